@@ -3,7 +3,7 @@
 # ============================================
 
 from django.contrib import admin
-from .models import Conversation, Message, QueryContext, Feedback
+from .models import Conversation, Message, QueryContext, Feedback, AnswerCacheEntry, EditorSnapshot, EditorOperation, EditorPageRender
 
 
 class MessageInline(admin.TabularInline):
@@ -49,4 +49,35 @@ class FeedbackAdmin(admin.ModelAdmin):
     list_display = ['message', 'user', 'rating', 'is_helpful', 'is_accurate', 'created_at']
     list_filter = ['rating', 'is_helpful', 'is_accurate', 'created_at']
     search_fields = ['comment']
-    readonly_fields = ['created_at']
\ No newline at end of file
+    readonly_fields = ['created_at']
+
+@admin.register(AnswerCacheEntry)
+class AnswerCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ['question', 'origin', 'hit_count', 'created_at', 'last_hit_at']
+    list_filter = ['origin', 'created_at']
+    search_fields = ['question', 'answer']
+    readonly_fields = ['document_set_key', 'normalized_question', 'question_embedding', 'created_at', 'last_hit_at']
+
+
+@admin.register(EditorSnapshot)
+class EditorSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['document', 'content_type', 'seq', 'created_at']
+    list_filter = ['content_type', 'created_at']
+    search_fields = ['document__title']
+    readonly_fields = ['created_at']
+
+
+@admin.register(EditorOperation)
+class EditorOperationAdmin(admin.ModelAdmin):
+    list_display = ['document', 'seq', 'content_type', 'kind', 'created_at']
+    list_filter = ['kind', 'created_at']
+    search_fields = ['document__title']
+    readonly_fields = ['created_at']
+
+
+@admin.register(EditorPageRender)
+class EditorPageRenderAdmin(admin.ModelAdmin):
+    list_display = ['document', 'page_number', 'converter_version', 'created_at']
+    list_filter = ['converter_version', 'created_at']
+    search_fields = ['document__title']
+    readonly_fields = ['content_hash', 'created_at']
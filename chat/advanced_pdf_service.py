@@ -1,9 +1,13 @@
 import fitz  # PyMuPDF
 from typing import List, Dict, Any, Optional
-import base64
-import io
 import logging
-from PIL import Image
+import numpy as np
+from django.urls import reverse
+
+from documents.pdf_pool import get_pdf_pool
+from documents.storage import ContentAddressedStorage
+from .line_grid import detect_grids, segments_from_drawings
+from .spatial_index import SpatialGrid
 
 # Configuration du logging
 logger = logging.getLogger(__name__)
@@ -14,6 +18,79 @@ class PDFExtractionError(Exception):
     pass
 
 
+class PageTextContext:
+    """
+    Texte d'une page extrait une seule fois (une TextPage PyMuPDF) et partagé par les étapes
+    de l'extraction: texte formaté, tableaux par alignement et contenu des cellules.
+    Les cellules sont remplies en répartissant les mots déjà extraits dans la grille
+    (np.searchsorted), au lieu d'une extraction get_textbox par cellule.
+    """
+
+    def __init__(self, page, flags: int):
+        self.page = page
+        self.flags = flags
+        self._textpage = None
+        self._text_dict = None
+        self._words = None
+
+    @property
+    def textpage(self):
+        if self._textpage is None:
+            self._textpage = self.page.get_textpage(flags=self.flags)
+        return self._textpage
+
+    @property
+    def text_dict(self) -> Dict[str, Any]:
+        if self._text_dict is None:
+            self._text_dict = self.page.get_text("dict", textpage=self.textpage)
+        return self._text_dict
+
+    @property
+    def words(self) -> Dict[str, Any]:
+        """Mots de la page dans l'ordre de lecture: centres (x, y), lignes (bloc, ligne) et textes"""
+        if self._words is None:
+            raw = self.page.get_text("words", textpage=self.textpage)
+            boxes = np.array([w[:4] for w in raw], dtype=float).reshape(-1, 4)
+            self._words = {
+                'cx': (boxes[:, 0] + boxes[:, 2]) / 2,
+                'cy': (boxes[:, 1] + boxes[:, 3]) / 2,
+                'line': [(w[5], w[6]) for w in raw],
+                'text': [w[4] for w in raw],
+            }
+        return self._words
+
+    def cell_texts(self, y_positions: List[float], x_positions: List[float]) -> List[List[str]]:
+        """
+        Texte de chaque cellule de la grille définie par les lignes triées y_positions et x_positions
+        (un mot appartient à la cellule qui contient son centre)
+        """
+        n_rows, n_cols = len(y_positions) - 1, len(x_positions) - 1
+        cells = [[[] for _ in range(n_cols)] for _ in range(n_rows)]
+        words = self.words
+        if n_rows > 0 and n_cols > 0 and words['text']:
+            rows = np.searchsorted(np.asarray(y_positions, dtype=float), words['cy'], side='right') - 1
+            cols = np.searchsorted(np.asarray(x_positions, dtype=float), words['cx'], side='right') - 1
+            inside = (rows >= 0) & (rows < n_rows) & (cols >= 0) & (cols < n_cols)
+            for index in np.flatnonzero(inside):
+                cells[rows[index]][cols[index]].append(index)
+
+        texts = []
+        for row in cells:
+            row_texts = []
+            for indexes in row:
+                # Mots d'une même ligne séparés par un espace, lignes par un saut de ligne (comme get_textbox)
+                parts = []
+                previous_line = None
+                for index in indexes:
+                    if previous_line is not None:
+                        parts.append(' ' if words['line'][index] == previous_line else '\n')
+                    parts.append(words['text'][index])
+                    previous_line = words['line'][index]
+                row_texts.append(''.join(parts).strip())
+            texts.append(row_texts)
+        return texts
+
+
 class AdvancedPDFExtractor:
     """
     Extracteur PDF avancé avec support du formatage fidèle.
@@ -21,6 +98,19 @@ class AdvancedPDFExtractor:
     VERSION AMÉLIORÉE avec logging et gestion d'erreurs robuste.
     """
 
+    # Texte seulement: les blocs image du dictionnaire (contenu décodé) ne sont pas utilisés,
+    # les images sont lues une fois par xref dans _store_image
+    TEXT_DICT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+    # Marge (points) pour considérer qu'un bloc de texte est à l'intérieur d'un tableau
+    TABLE_TEXT_TOLERANCE = 5
+
+    # Tableaux à grille: traits regroupés à LINE_TOLERANCE points près, reliés s'ils se touchent
+    # à LINE_JOIN_TOLERANCE près, au moins MIN_GRID_CELLS cellules (un simple cadre n'est pas un tableau)
+    LINE_TOLERANCE = 5
+    LINE_JOIN_TOLERANCE = 2
+    MIN_GRID_CELLS = 2
+
     def __init__(self, pdf_path: str):
         """
         Initialise l'extracteur PDF avec gestion d'erreurs.
@@ -43,13 +133,17 @@ class AdvancedPDFExtractor:
             'warnings': []
         }
 
+        # Images déjà écrites, par xref (logo répété sur chaque page: extrait une seule fois)
+        self._images_by_xref: Dict[int, Optional[Dict[str, Any]]] = {}
+
         # Vérification et ouverture du document
         try:
             import os
             if not os.path.exists(pdf_path):
                 raise PDFExtractionError(f"Fichier PDF introuvable: {pdf_path}")
 
-            self.doc = fitz.open(pdf_path)
+            # Document emprunté au pool du processus (déjà ouvert si le fichier a servi récemment)
+            self.doc = get_pdf_pool().acquire(pdf_path)
             logger.info(f"PDF ouvert avec succès: {pdf_path} ({len(self.doc)} pages)")
 
         except fitz.fitz.FileNotFoundError as e:
@@ -69,13 +163,23 @@ class AdvancedPDFExtractor:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Fermeture automatique du document"""
+        self.close(discard=exc_type is not None)
+        return False
+
+    def close(self, discard: bool = False):
+        """Rend le document au pool (discard: le fermer, après une erreur)"""
+        doc, self.doc = getattr(self, 'doc', None), None
+        if doc is None:
+            return
         try:
-            if self.doc:
-                self.doc.close()
-                logger.debug("Document PDF fermé")
+            get_pdf_pool().release(doc, discard=discard)
+            logger.debug("Document PDF rendu au pool")
         except Exception as e:
             logger.warning(f"Erreur lors de la fermeture du PDF: {e}")
-        return False
+
+    def __del__(self):
+        # Extracteur abandonné sans close(): le document revient quand même au pool
+        self.close()
 
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -112,12 +216,13 @@ class AdvancedPDFExtractor:
                 page_start = time.time()
                 try:
                     page = self.doc[page_num]
+                    context = PageTextContext(page, self.TEXT_DICT_FLAGS)
                     logger.debug(f"Traitement de la page {page_num + 1}/{len(self.doc)}")
 
                     # Extraire le texte avec formatage
                     text_blocks = []
                     try:
-                        text_blocks = self._extract_formatted_text(page)
+                        text_blocks = self._extract_formatted_text(page, context)
                         self.stats['text_blocks'] += len(text_blocks)
                         logger.debug(f"Page {page_num + 1}: {len(text_blocks)} blocs de texte extraits")
                     except Exception as e:
@@ -128,7 +233,6 @@ class AdvancedPDFExtractor:
                     images = []
                     try:
                         images = self._extract_images(page, page_num)
-                        self.stats['images_extracted'] += len(images)
                         logger.debug(f"Page {page_num + 1}: {len(images)} images extraites")
                     except Exception as e:
                         logger.warning(f"Erreur lors de l'extraction des images de la page {page_num + 1}: {e}")
@@ -137,7 +241,7 @@ class AdvancedPDFExtractor:
                     # Extraire les tableaux
                     tables = []
                     try:
-                        tables = self._extract_tables(page)
+                        tables = self._extract_tables(page, context)
                         self.stats['tables_detected'] += len(tables)
                         logger.debug(f"Page {page_num + 1}: {len(tables)} tableaux détectés")
                     except Exception as e:
@@ -194,27 +298,20 @@ class AdvancedPDFExtractor:
                         logger.warning(f"Erreur lors du tri des éléments: {e}")
 
                     # Filtrer les blocs de texte qui se trouvent à l'intérieur des tableaux
-                    filtered_elements = []
-                    for element in all_elements:
-                        try:
-                            if element['type'] == 'text':
-                                # Vérifier si ce bloc de texte est dans un tableau
-                                is_in_table = False
-                                for other in all_elements:
-                                    try:
-                                        if other['type'] == 'table':
-                                            if self._is_inside(element['bbox'], other['bbox']):
-                                                is_in_table = True
-                                                break
-                                    except Exception:
-                                        continue
+                    # (index spatial des blocs: chaque tableau ne teste que les blocs de sa zone)
+                    in_table = set()
+                    try:
+                        text_elements = [el for el in all_elements if el['type'] == 'text']
+                        table_boxes = [el['bbox'] for el in all_elements if el['type'] == 'table']
+                        if text_elements and table_boxes:
+                            grid = SpatialGrid.from_boxes([el['bbox'][:4] for el in text_elements])
+                            for table_bbox in table_boxes:
+                                for index in grid.contained_in(table_bbox, tolerance=self.TABLE_TEXT_TOLERANCE):
+                                    in_table.add(id(text_elements[index]))
+                    except Exception as e:
+                        logger.warning(f"Erreur lors du filtrage des blocs dans les tableaux: {e}")
 
-                                if not is_in_table:
-                                    filtered_elements.append(element)
-                            else:
-                                filtered_elements.append(element)
-                        except Exception:
-                            continue
+                    filtered_elements = [el for el in all_elements if id(el) not in in_table]
 
                     # Obtenir les dimensions de la page
                     page_width = 595  # A4 par défaut
@@ -301,13 +398,14 @@ class AdvancedPDFExtractor:
                 inner_bbox[2] <= outer_bbox[2] + 5 and
                 inner_bbox[3] <= outer_bbox[3] + 5)
 
-    def _extract_formatted_text(self, page) -> List[Dict[str, Any]]:
+    def _extract_formatted_text(self, page, context: Optional[PageTextContext] = None) -> List[Dict[str, Any]]:
         """
         Extrait le texte avec toutes les informations de formatage.
         Préserve le style, la taille, la couleur, etc.
         """
+        context = context or PageTextContext(page, self.TEXT_DICT_FLAGS)
         text_blocks = []
-        text_dict = page.get_text("dict")
+        text_dict = context.text_dict
 
         for block in text_dict.get("blocks", []):
             if block.get("type") != 0:  # Type 0 = texte
@@ -359,12 +457,41 @@ class AdvancedPDFExtractor:
 
         return text_blocks
 
+    def _store_image(self, xref: int) -> Optional[Dict[str, Any]]:
+        """
+        Écrit l'image une seule fois dans le stockage par empreinte (cas/img/) et retourne
+        sa référence: URL, SHA-256, extension et dimensions (lues dans les métadonnées de extract_image)
+        """
+        if xref in self._images_by_xref:
+            return self._images_by_xref[xref]
+
+        stored = None
+        base_image = self.doc.extract_image(xref)
+        image_bytes = base_image.get("image") if base_image else None
+        if image_bytes:
+            image_ext = (base_image.get("ext") or "png").lower()
+            stored_file = ContentAddressedStorage.store_bytes(
+                image_bytes, f".{image_ext}", namespace=ContentAddressedStorage.IMAGE_NAMESPACE
+            )
+            stored = {
+                'url': reverse('chat:editor_image', args=[f"{stored_file.sha256}.{image_ext}"]),
+                'sha256': stored_file.sha256,
+                'ext': image_ext,
+                'width': base_image.get("width") or 100,
+                'height': base_image.get("height") or 100,
+                'size': stored_file.size,
+            }
+            self.stats['images_extracted'] += 1
+
+        self._images_by_xref[xref] = stored
+        return stored
+
     def _extract_images(self, page, page_num: int) -> List[Dict[str, Any]]:
         """
         Extrait toutes les images de la page avec leurs métadonnées.
 
         Returns:
-            Liste des images avec leurs données en base64
+            Liste des images, référencées par URL et empreinte (contenu dans le stockage par empreinte)
         """
         images = []
 
@@ -377,35 +504,12 @@ class AdvancedPDFExtractor:
                         continue
 
                     xref = img_info[0]
-                    base_image = self.doc.extract_image(xref)
-
-                    if not base_image:
+                    stored = self._store_image(xref)
+                    if not stored:
                         continue
 
-                    image_bytes = base_image.get("image")
-                    image_ext = base_image.get("ext", "png")
-
-                    if not image_bytes:
-                        continue
-
-                    # Convertir en base64 pour l'éditeur
-                    try:
-                        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
-                        image_data_uri = f"data:image/{image_ext};base64,{image_base64}"
-                    except Exception as e:
-                        logger.warning(f"Erreur lors de l'encodage base64 de l'image {img_index}: {e}")
-                        continue
-
-                    # Obtenir les dimensions de l'image
-                    width, height = 100, 100  # Valeurs par défaut
-                    try:
-                        pil_image = Image.open(io.BytesIO(image_bytes))
-                        width, height = pil_image.size
-                    except Exception as e:
-                        logger.debug(f"Impossible d'obtenir les dimensions de l'image {img_index}: {e}")
-
                     # Obtenir la position de l'image sur la page
-                    bbox = [0, 0, width, height]  # Défaut
+                    bbox = [0, 0, stored['width'], stored['height']]  # Défaut
                     try:
                         img_rects = page.get_image_rects(xref)
                         if img_rects and len(img_rects) > 0:
@@ -414,11 +518,8 @@ class AdvancedPDFExtractor:
                         logger.debug(f"Impossible d'obtenir la position de l'image {img_index}: {e}")
 
                     images.append({
-                        'data': image_data_uri,
-                        'width': width,
-                        'height': height,
+                        **stored,
                         'bbox': bbox,
-                        'ext': image_ext,
                         'xref': xref,
                         'page': page_num + 1
                     })
@@ -431,66 +532,35 @@ class AdvancedPDFExtractor:
 
         return images
 
-    def _extract_tables(self, page) -> List[Dict[str, Any]]:
+    def _extract_tables(self, page, context: Optional[PageTextContext] = None) -> List[Dict[str, Any]]:
         """
         Extraction avancée des tableaux en détectant les lignes et la structure.
         Utilise à la fois les lignes graphiques et l'alignement du texte.
         """
+        context = context or PageTextContext(page, self.TEXT_DICT_FLAGS)
         tables = []
 
         try:
-            # Méthode 1: Détecter les tableaux via les lignes graphiques (rectangles, lignes)
-            horizontal_lines = []
-            vertical_lines = []
-
+            # Méthode 1: Détecter les tableaux via les lignes graphiques (traits, rectangles)
             try:
-                drawings = page.get_drawings()
-
-                for drawing in drawings:
-                    try:
-                        # Analyser les chemins pour trouver les lignes
-                        items = drawing.get("items", [])
-                        for item in items:
-                            try:
-                                if len(item) < 2:
-                                    continue
-
-                                item_type = item[0]
-
-                                if item_type == "l" and len(item) >= 5:  # ligne
-                                    x0, y0, x1, y1 = item[1], item[2], item[3], item[4]
-                                    if abs(y0 - y1) < 2:  # Ligne horizontale
-                                        horizontal_lines.append((min(x0, x1), y0, max(x0, x1), y1))
-                                    elif abs(x0 - x1) < 2:  # Ligne verticale
-                                        vertical_lines.append((x0, min(y0, y1), x1, max(y0, y1)))
-                                elif item_type == "re" and len(item) >= 5:  # rectangle
-                                    x, y, w, h = item[1], item[2], item[3], item[4]
-                                    # Ajouter les bords du rectangle comme lignes
-                                    horizontal_lines.append((x, y, x + w, y))
-                                    horizontal_lines.append((x, y + h, x + w, y + h))
-                                    vertical_lines.append((x, y, x, y + h))
-                                    vertical_lines.append((x + w, y, x + w, y + h))
-                            except (IndexError, TypeError, ValueError) as e:
-                                # Ignorer les items malformés
-                                continue
-                    except Exception as e:
-                        # Ignorer les drawings problématiques
-                        continue
+                drawings = page.get_cdrawings() if hasattr(page, 'get_cdrawings') else page.get_drawings()
+                horizontal_lines, vertical_lines = segments_from_drawings(drawings)
 
                 # Grouper les lignes proches pour former des grilles de tableaux
-                if horizontal_lines and vertical_lines:
-                    tables_from_lines = self._detect_tables_from_lines(
-                        page, horizontal_lines, vertical_lines
-                    )
-                    if tables_from_lines:
-                        tables.extend(tables_from_lines)
+                if len(horizontal_lines) and len(vertical_lines):
+                    tables.extend(self._detect_tables_from_lines(
+                        page, horizontal_lines, vertical_lines, context
+                    ))
             except Exception as e:
                 # Si la détection par lignes échoue, continuer avec la détection par texte
                 logger.debug(f"Détection de tableaux par lignes échouée: {e}")
 
             # Méthode 2: Détecter les tableaux via l'alignement du texte en colonnes
             try:
-                tables_from_text = self._detect_tables_from_text_alignment(page)
+                tables_from_text = self._detect_tables_from_text_alignment(page, context)
+                known_tables = SpatialGrid()
+                for table in tables:
+                    known_tables.insert(table.get('bbox', [0, 0, 0, 0]))
 
                 # Fusionner les tableaux détectés en évitant les doublons
                 for text_table in tables_from_text:
@@ -499,14 +569,16 @@ class AdvancedPDFExtractor:
                         is_duplicate = False
                         text_bbox = text_table.get('bbox', [0, 0, 0, 0])
 
-                        for existing_table in tables:
-                            existing_bbox = existing_table.get('bbox', [0, 0, 0, 0])
+                        # Seuls les tableaux qui recouvrent sa zone sont comparés
+                        for index in known_tables.overlapping(text_bbox):
+                            existing_bbox = tables[index].get('bbox', [0, 0, 0, 0])
                             # Calculer le chevauchement
                             if self._boxes_overlap(text_bbox, existing_bbox, threshold=0.5):
                                 is_duplicate = True
                                 break
 
                         if not is_duplicate:
+                            known_tables.insert(text_bbox)
                             tables.append(text_table)
                     except Exception as e:
                         # Ignorer ce tableau s'il y a une erreur
@@ -521,89 +593,36 @@ class AdvancedPDFExtractor:
 
         return tables
 
-    def _detect_tables_from_lines(self, page, h_lines, v_lines) -> List[Dict[str, Any]]:
+    def _detect_tables_from_lines(self, page, h_lines, v_lines,
+                                  context: Optional[PageTextContext] = None) -> List[Dict[str, Any]]:
         """
         Détecte les tableaux à partir des lignes graphiques.
+        h_lines: segments horizontaux [y, x0, x1], v_lines: segments verticaux [x, y0, y1]
+        (segments_from_drawings); un tableau par grille de traits croisés.
         """
+        context = context or PageTextContext(page, self.TEXT_DICT_FLAGS)
         tables = []
 
         try:
-            if not h_lines or not v_lines:
-                return tables
-
-            # Trier les lignes avec gestion d'erreurs
-            try:
-                h_lines = sorted(set(h_lines), key=lambda l: (l[1], l[0]))
-                v_lines = sorted(set(v_lines), key=lambda l: (l[0], l[1]))
-            except (TypeError, IndexError) as e:
-                logger.warning(f"Erreur lors du tri des lignes: {e}")
-                return tables
-
-            if not h_lines or not v_lines:
-                return tables
-
-            # Grouper les lignes horizontales proches (même Y)
-            h_groups = []
-            current_group = [h_lines[0]]
-
-            for line in h_lines[1:]:
-                try:
-                    if abs(line[1] - current_group[-1][1]) < 5:  # Même hauteur (tolérance 5 points)
-                        current_group.append(line)
-                    else:
-                        if current_group:
-                            h_groups.append(current_group)
-                        current_group = [line]
-                except (IndexError, TypeError):
-                    continue
-
-            if current_group:
-                h_groups.append(current_group)
-
-            # Grouper les lignes verticales proches (même X)
-            v_groups = []
-            current_group = [v_lines[0]]
-
-            for line in v_lines[1:]:
-                try:
-                    if abs(line[0] - current_group[-1][0]) < 5:  # Même position X (tolérance 5 points)
-                        current_group.append(line)
-                    else:
-                        if current_group:
-                            v_groups.append(current_group)
-                        current_group = [line]
-                except (IndexError, TypeError):
-                    continue
-
-            if current_group:
-                v_groups.append(current_group)
+            grids = detect_grids(
+                np.asarray(h_lines, dtype=float).reshape(-1, 3),
+                np.asarray(v_lines, dtype=float).reshape(-1, 3),
+                tolerance=self.LINE_TOLERANCE,
+                join_tolerance=self.LINE_JOIN_TOLERANCE,
+                min_cells=self.MIN_GRID_CELLS
+            )
 
-            # Si on a au moins 2 lignes horizontales et 2 verticales, c'est probablement un tableau
-            if len(h_groups) >= 2 and len(v_groups) >= 2:
+            for grid in grids:
                 try:
-                    # Calculer le bbox du tableau
-                    all_h = [l for group in h_groups for l in group]
-                    all_v = [l for group in v_groups for l in group]
-
-                    if not all_h or not all_v:
-                        return tables
-
-                    min_x = min(l[0] for l in all_h + all_v)
-                    max_x = max(l[2] for l in all_h + all_v)
-                    min_y = min(l[1] for l in all_h + all_v)
-                    max_y = max(l[3] for l in all_h + all_v)
-
-                    bbox = [min_x, min_y, max_x, max_y]
-
                     # Extraire le texte dans chaque cellule
-                    rows = self._extract_table_cells(page, h_groups, v_groups)
+                    rows = self._extract_table_cells(context, grid['rows'], grid['cols'])
 
                     if rows:
                         tables.append({
                             'rows': rows,
-                            'bbox': bbox,
-                            'num_rows': len(h_groups) - 1,
-                            'num_cols': len(v_groups) - 1,
+                            'bbox': grid['bbox'],
+                            'num_rows': len(grid['rows']) - 1,
+                            'num_cols': len(grid['cols']) - 1,
                             'type': 'grid'
                         })
                 except Exception as e:
@@ -614,71 +633,38 @@ class AdvancedPDFExtractor:
 
         return tables
 
-    def _extract_table_cells(self, page, h_groups, v_groups) -> List[List[str]]:
+    def _extract_table_cells(self, context: PageTextContext, h_positions, v_positions) -> List[List[str]]:
         """
-        Extrait le texte de chaque cellule d'un tableau.
+        Extrait le texte de chaque cellule d'un tableau délimité par les positions triées
+        des lignes horizontales (y) et verticales (x)
+        (mots de la page répartis dans la grille, sans nouvelle extraction par cellule)
         """
         rows = []
 
         try:
-            if not h_groups or not v_groups:
-                return rows
-
-            # Obtenir les positions Y des lignes horizontales
-            try:
-                h_positions = sorted(set(g[0][1] for g in h_groups if g and len(g) > 0))
-            except (IndexError, TypeError, KeyError) as e:
-                logger.warning(f"Erreur lors de l'extraction des positions horizontales: {e}")
-                return rows
-
-            # Obtenir les positions X des lignes verticales
-            try:
-                v_positions = sorted(set(g[0][0] for g in v_groups if g and len(g) > 0))
-            except (IndexError, TypeError, KeyError) as e:
-                logger.warning(f"Erreur lors de l'extraction des positions verticales: {e}")
-                return rows
-
             if len(h_positions) < 2 or len(v_positions) < 2:
                 return rows
 
-            # Pour chaque cellule définie par les intersections
-            for i in range(len(h_positions) - 1):
-                row = []
-                try:
-                    y_top = h_positions[i]
-                    y_bottom = h_positions[i + 1]
-
-                    for j in range(len(v_positions) - 1):
-                        try:
-                            x_left = v_positions[j]
-                            x_right = v_positions[j + 1]
-
-                            # Extraire le texte dans cette région
-                            cell_rect = fitz.Rect(x_left, y_top, x_right, y_bottom)
-                            cell_text = page.get_textbox(cell_rect).strip()
-                            row.append(cell_text)
-                        except Exception as e:
-                            # En cas d'erreur, ajouter une cellule vide
-                            row.append('')
-
-                    if any(cell for cell in row):  # Ajouter seulement si la ligne contient du texte
-                        rows.append(row)
-                except (IndexError, TypeError) as e:
-                    continue
+            # Texte de chaque cellule définie par les intersections
+            for row in context.cell_texts(h_positions, v_positions):
+                if any(cell for cell in row):  # Ajouter seulement si la ligne contient du texte
+                    rows.append(row)
 
         except Exception as e:
             logger.error(f"Erreur dans _extract_table_cells: {e}")
 
         return rows
 
-    def _detect_tables_from_text_alignment(self, page) -> List[Dict[str, Any]]:
+    def _detect_tables_from_text_alignment(self, page,
+                                           context: Optional[PageTextContext] = None) -> List[Dict[str, Any]]:
         """
         Détecte les tableaux en analysant l'alignement du texte en colonnes.
         """
+        context = context or PageTextContext(page, self.TEXT_DICT_FLAGS)
         tables = []
 
         try:
-            text_dict = page.get_text("dict")
+            text_dict = context.text_dict
 
             # Regrouper les blocs par zones verticales proches
             all_words = []
@@ -758,6 +744,7 @@ class AdvancedPDFExtractor:
                     # Si on a plusieurs colonnes alignées
                     if len(x_positions) >= 2:
                         x_sorted = sorted(x_positions)
+                        column_of = {x: index for index, x in enumerate(x_sorted)}
 
                         # Essayer de créer un tableau
                         rows = []
@@ -768,9 +755,8 @@ class AdvancedPDFExtractor:
                                 for word in line:
                                     try:
                                         x_rounded = round(word['x'] / 10) * 10
-                                        col_idx = x_sorted.index(x_rounded)
-                                        row[col_idx] = word['text']
-                                    except (ValueError, KeyError, TypeError):
+                                        row[column_of[x_rounded]] = word['text']
+                                    except (KeyError, TypeError):
                                         pass
 
                                 rows.append(row)
@@ -873,7 +859,7 @@ class AdvancedPDFExtractor:
 
             # Ajouter les images
             for img in page.get('images', []):
-                html_parts.append(f'<img src="{img["data"]}" width="{img["width"]}" height="{img["height"]}" />')
+                html_parts.append(f'<img src="{img["url"]}" width="{img["width"]}" height="{img["height"]}" />')
 
             html_parts.append('</div>')
 
@@ -998,7 +984,7 @@ class PDFToEditableConverter:
                         height = int(height * ratio)
 
                     ops.append({
-                        'insert': {'image': img['data']},
+                        'insert': {'image': img['url']},
                         'attributes': {
                             'width': str(width),
                             'height': str(height)
@@ -1282,7 +1268,7 @@ class PDFToEditableConverter:
 
                 fabric_objects.append({
                     'type': 'image',
-                    'src': img['data'],
+                    'src': img['url'],
                     'left': left,
                     'top': page_y_offset + top,
                     'width': width,
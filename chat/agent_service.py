@@ -10,7 +10,9 @@ import time
 
 from .models import Conversation, Message, GeneratedFile, ConversationDocument
 from .document_tools_service import DocumentToolsService
+from .memory_service import ConversationMemoryService
 from documents.models import Document
+from documents.digest_service import DocumentDigestService
 
 
 class AgentService:
@@ -122,6 +124,27 @@ class AgentService:
                 }
             }
         },
+        {
+            "type": "function",
+            "function": {
+                "name": "get_document_section",
+                "description": "Retourne le texte complet d'une section d'un document, à partir de l'index indiqué dans le plan du document (voir les condensés des documents disponibles)",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "document_id": {
+                            "type": "integer",
+                            "description": "ID du document"
+                        },
+                        "section_index": {
+                            "type": "integer",
+                            "description": "Index de la section dans le plan du document (nombre entre crochets)"
+                        }
+                    },
+                    "required": ["document_id", "section_index"]
+                }
+            }
+        },
         {
             "type": "function",
             "function": {
@@ -240,6 +263,9 @@ class AgentService:
                 gen_file.message = assistant_msg
                 gen_file.save()
 
+            # Replier les anciens échanges dans le résumé si nécessaire (arrière-plan)
+            ConversationMemoryService.schedule_refresh_if_needed(conversation)
+
             print(f"[AGENT] Réponse générée en {time.time() - start_time:.2f}s")
             print(f"[AGENT] Outils utilisés: {tools_used}")
             print(f"[AGENT] Fichiers générés: {len(generated_files)}")
@@ -285,9 +311,8 @@ class AgentService:
             conversation=conversation
         ).select_related('document')
 
-        # Historique des messages (limité aux 10 derniers)
-        messages = conversation.messages.order_by('-created_at')[:10]
-        messages = list(reversed(messages))  # Plus ancien en premier
+        # Mémoire bornée: résumé des anciens échanges + derniers messages
+        memory = ConversationMemoryService.get_memory(conversation)
 
         # Fichiers générés dans cette conversation
         generated_files = GeneratedFile.objects.filter(
@@ -297,7 +322,7 @@ class AgentService:
         return {
             'documents': list(attached_docs),
             'conversation_documents': list(conversation_docs),
-            'messages': messages,
+            'memory': memory,
             'generated_files': list(generated_files)
         }
 
@@ -419,6 +444,7 @@ class AgentService:
 
 Tu as accès à plusieurs outils :
 - answer_question : Pour répondre aux questions sur le contenu des documents (utilise cet outil pour TOUTE question nécessitant l'analyse des documents)
+- get_document_section : Pour lire le texte complet d'une section listée dans le plan d'un document
 - edit_document : Pour modifier le CONTENU d'un document (remplacer du texte, changer une valeur, corriger une erreur)
 - format_text : Pour modifier le FORMATAGE/STYLE d'un texte (ajouter/enlever gras, italique, changer couleur, taille, etc.)
 - compare_documents : Pour comparer des documents et identifier les différences
@@ -448,6 +474,12 @@ AUTRES RÈGLES :
             for doc in context['documents']:
                 system_content += f"- ID {doc.id}: {doc.title} ({doc.file_type})\n"
 
+            # Condensés des documents pertinents (plan, tableaux, entités) au lieu du texte complet
+            digests_text = AgentService._format_relevant_digests(user_message, context['documents'])
+            if digests_text:
+                system_content += "\n\nCondensés des documents (utilise get_document_section pour lire une section) :\n"
+                system_content += digests_text
+
         # Ajouter les fichiers générés récents (dernières modifications)
         recent_files = GeneratedFile.objects.filter(
             conversation=conversation
@@ -465,12 +497,8 @@ AUTRES RÈGLES :
             "content": system_content
         })
 
-        # Ajouter l'historique récent (max 5 messages pour ne pas surcharger)
-        for msg in context['messages'][-5:]:
-            messages.append({
-                "role": msg.role,
-                "content": msg.content
-            })
+        # Ajouter la mémoire: résumé glissant puis derniers échanges mot pour mot
+        messages.extend(ConversationMemoryService.as_prompt_messages(context['memory']))
 
         # Ajouter le message utilisateur actuel
         messages.append({
@@ -480,6 +508,36 @@ AUTRES RÈGLES :
 
         return messages
 
+    @staticmethod
+    def _format_relevant_digests(user_message: str, documents: List[Document]) -> str:
+        """
+        Condensés des documents les plus pertinents pour le message, dans un budget de caractères.
+        Sans document pertinent, les condensés sont pris dans l'ordre de la conversation.
+        """
+        budget = getattr(settings, 'AGENT_DIGEST_MAX_CHARS', 6000)
+
+        candidates = []
+        for position, doc in enumerate(documents):
+            digest = DocumentDigestService.get_fresh_digest(doc)
+            if digest:
+                score = DocumentDigestService.score_relevance(digest, doc, user_message)
+                candidates.append((-score, position, doc, digest))
+        candidates.sort(key=lambda c: (c[0], c[1]))
+
+        if any(c[0] < 0 for c in candidates):
+            candidates = [c for c in candidates if c[0] < 0]
+
+        parts, used = [], 0
+        for _, _, doc, digest in candidates:
+            remaining = budget - used
+            if remaining < 300:
+                break
+            text = DocumentDigestService.format_for_prompt(digest, doc, max_chars=remaining)
+            parts.append(text)
+            used += len(text) + 2
+
+        return "\n\n".join(parts)
+
     @staticmethod
     def _execute_tool(
         tool_name: str,
@@ -522,6 +580,13 @@ AUTRES RÈGLES :
                     conversation=conversation
                 )
 
+            elif tool_name == "get_document_section":
+                return DocumentToolsService.get_document_section(
+                    document_id=tool_params.get('document_id'),
+                    section_index=tool_params.get('section_index'),
+                    conversation=conversation
+                )
+
             elif tool_name == "edit_document":
                 return DocumentToolsService.edit_document(
                     document_id=tool_params.get('document_id'),
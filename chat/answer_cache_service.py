@@ -0,0 +1,239 @@
+"""
+Service de cache des réponses
+Sert une réponse déjà générée quand une question très proche est posée
+sur le même ensemble de documents (dans la même version)
+"""
+from typing import Dict, List, Optional
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+import hashlib
+import math
+import re
+import unicodedata
+
+from .models import AnswerCacheEntry
+from documents.models import DocumentContent
+
+
+class AnswerCacheService:
+    """
+    Cache sémantique des réponses:
+    - clé exacte: documents utilisés + empreinte de leur contenu
+    - recherche approchée: similarité cosinus entre vecteurs de questions normalisées
+    L'invalidation est automatique: un document modifié change la clé,
+    et ses anciennes entrées sont supprimées (voir chat/signals.py)
+    """
+
+    EMBEDDING_DIM = 256
+
+    STOPWORDS = {
+        'le', 'la', 'les', 'l', 'un', 'une', 'des', 'du', 'de', 'd', 'au', 'aux',
+        'et', 'ou', 'est', 'sont', 'ce', 'cet', 'cette', 'ces', 'quel', 'quelle',
+        'quels', 'quelles', 'qu', 'que', 'qui', 'quoi', 'dans', 'pour', 'sur',
+        'en', 'a', 'il', 'elle', 'y', 'se', 'sa', 'son', 'ses', 'me', 'moi',
+        'peux', 'tu', 'vous', 'donne', 'dis', 'indique',
+        'the', 'of', 'is', 'what', 'a', 'an', 'to', 'in', 'for',
+    }
+
+    @staticmethod
+    def _setting(name: str, default):
+        return getattr(settings, name, default)
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return cls._setting('ANSWER_CACHE_ENABLED', True)
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """Minuscules, sans accents ni ponctuation, espaces normalisés"""
+        text = unicodedata.normalize('NFKD', (question or '').lower())
+        text = ''.join(c for c in text if not unicodedata.combining(c))
+        text = re.sub(r"[^\w\s]", ' ', text)
+        return ' '.join(text.split())
+
+    @classmethod
+    def embed(cls, normalized_question: str) -> List[float]:
+        """
+        Vecteur de la question par hachage de caractéristiques
+        (mots pleins + trigrammes de caractères), normalisé L2
+        """
+        vector = [0.0] * cls.EMBEDDING_DIM
+        words = normalized_question.split()
+        content_words = [w for w in words if w not in cls.STOPWORDS] or words
+
+        features = [(w, 1.0) for w in content_words]
+        for word in content_words:
+            padded = f" {word} "
+            features.extend((padded[i:i + 3], 0.5) for i in range(len(padded) - 2))
+
+        for feature, weight in features:
+            h = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+            sign = 1.0 if (h >> 63) & 1 else -1.0
+            vector[h % cls.EMBEDDING_DIM] += sign * weight
+
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm:
+            vector = [round(v / norm, 6) for v in vector]
+        return vector
+
+    @staticmethod
+    def similarity(vec1: List[float], vec2: List[float]) -> float:
+        """Similarité cosinus (les vecteurs sont déjà normalisés)"""
+        if not vec1 or not vec2 or len(vec1) != len(vec2):
+            return 0.0
+        return sum(a * b for a, b in zip(vec1, vec2))
+
+    @staticmethod
+    def _clean_ids(document_ids) -> List[int]:
+        ids = set()
+        for doc_id in document_ids or []:
+            try:
+                ids.add(int(doc_id))
+            except (TypeError, ValueError):
+                continue
+        return sorted(ids)
+
+    @classmethod
+    def document_set_key(cls, document_ids) -> Optional[str]:
+        """
+        Clé de l'ensemble de documents dans leur version actuelle.
+        Retourne None si un document n'a pas encore de contenu extrait.
+        """
+        ids = cls._clean_ids(document_ids)
+        if not ids:
+            return None
+
+        contents = {c.document_id: c for c in DocumentContent.objects.filter(document_id__in=ids).only(
+            'id', 'document_id', 'content_hash'
+        )}
+        if len(contents) != len(ids):
+            return None
+
+        parts = []
+        for doc_id in ids:
+            content = contents[doc_id]
+            if not content.content_hash:
+                # Contenu antérieur à l'empreinte: calculée une fois puis stockée
+                content = DocumentContent.objects.get(id=content.id)
+                content.content_hash = content.compute_content_hash()
+                content.save(update_fields=['content_hash'])
+            parts.append(f"{doc_id}:{content.content_hash}")
+
+        return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def is_cacheable_question(cls, question: str) -> bool:
+        """Les questions trop courtes dépendent souvent du fil de la conversation"""
+        min_words = cls._setting('ANSWER_CACHE_MIN_QUESTION_WORDS', 3)
+        return len(cls.normalize_question(question).split()) >= min_words
+
+    @classmethod
+    def lookup(cls, question: str, document_ids, origin: str = 'chat') -> Optional[AnswerCacheEntry]:
+        """
+        Cherche une réponse pour une question similaire sur les mêmes documents
+
+        Returns:
+            L'entrée trouvée (compteur d'utilisations mis à jour) ou None
+        """
+        if not cls.is_enabled() or not cls.is_cacheable_question(question):
+            return None
+
+        key = cls.document_set_key(document_ids)
+        if not key:
+            return None
+
+        threshold = cls._setting('ANSWER_CACHE_SIMILARITY_THRESHOLD', 0.9)
+        max_candidates = cls._setting('ANSWER_CACHE_MAX_CANDIDATES', 200)
+
+        normalized = cls.normalize_question(question)
+        embedding = None
+
+        best_id, best_score = None, 0.0
+        candidates = AnswerCacheEntry.objects.filter(
+            document_set_key=key,
+            origin=origin
+        ).order_by(F('last_hit_at').desc(nulls_last=True), '-created_at').values_list(
+            'id', 'normalized_question', 'question_embedding'
+        )[:max_candidates]
+
+        for entry_id, entry_question, entry_embedding in candidates:
+            if entry_question == normalized:
+                best_id, best_score = entry_id, 1.0
+                break
+            if embedding is None:
+                embedding = cls.embed(normalized)
+            score = cls.similarity(embedding, entry_embedding)
+            if score > best_score:
+                best_id, best_score = entry_id, score
+
+        if best_id is None or best_score < threshold:
+            return None
+
+        AnswerCacheEntry.objects.filter(id=best_id).update(
+            hit_count=F('hit_count') + 1,
+            last_hit_at=timezone.now()
+        )
+        entry = AnswerCacheEntry.objects.get(id=best_id)
+        print(f"[CACHE] Réponse servie depuis le cache (entrée {entry.id}, similarité {best_score:.2f})")
+        return entry
+
+    @classmethod
+    def store(cls, question: str, document_ids, answer: str, sources: List[Dict] = None,
+              origin: str = 'chat') -> Optional[AnswerCacheEntry]:
+        """Enregistre une réponse générée pour les documents dans leur version actuelle"""
+        if not cls.is_enabled() or not answer or not cls.is_cacheable_question(question):
+            return None
+
+        ids = cls._clean_ids(document_ids)
+        key = cls.document_set_key(ids)
+        if not key:
+            return None
+
+        normalized = cls.normalize_question(question)
+        entry = AnswerCacheEntry.objects.create(
+            document_set_key=key,
+            origin=origin,
+            question=question,
+            normalized_question=normalized,
+            question_embedding=cls.embed(normalized),
+            answer=answer,
+            sources=sources or []
+        )
+        entry.documents.set(ids)
+
+        # Borne le nombre d'entrées par ensemble de documents
+        max_entries = cls._setting('ANSWER_CACHE_MAX_ENTRIES_PER_SET', 200)
+        stale_ids = list(AnswerCacheEntry.objects.filter(
+            document_set_key=key,
+            origin=origin
+        ).order_by(F('last_hit_at').desc(nulls_last=True), '-created_at').values_list('id', flat=True)[max_entries:])
+        if stale_ids:
+            AnswerCacheEntry.objects.filter(id__in=stale_ids).delete()
+
+        print(f"[CACHE] Réponse enregistrée (entrée {entry.id})")
+        return entry
+
+    @staticmethod
+    def sources_from_contexts(contexts: List[Dict]) -> List[Dict]:
+        """Provenance sérialisable à partir des contextes de ContextRetrievalService"""
+        sources = []
+        for ctx in contexts:
+            doc = ctx.get('document')
+            sources.append({
+                'document_id': doc.id if doc else None,
+                'document_title': doc.title if doc else '',
+                'content': ctx.get('content', ''),
+                'relevance_score': ctx.get('relevance_score', 0.0),
+                'page_number': ctx.get('page_number'),
+                'chunk_index': ctx.get('chunk_index'),
+            })
+        return sources
+
+    @staticmethod
+    def invalidate_document(document_id: int) -> int:
+        """Supprime les réponses qui s'appuient sur ce document"""
+        deleted, _ = AnswerCacheEntry.objects.filter(documents__id=document_id).delete()
+        if deleted:
+            print(f"[CACHE] Document {document_id} modifié: entrées du cache supprimées")
+        return deleted
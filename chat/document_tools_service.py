@@ -11,6 +11,8 @@ from .models import GeneratedFile, ConversationDocument
 from documents.models import Document
 from .services import DocumentComparisonService, DocumentUpdateService
 from .pdf_generator import PDFDocumentGenerator
+from .answer_cache_service import AnswerCacheService
+from documents.digest_service import DocumentDigestService
 
 
 class DocumentToolsService:
@@ -18,6 +20,9 @@ class DocumentToolsService:
     Service fournissant les outils disponibles pour l'agent
     """
 
+    # Au-delà, answer_question n'envoie que les sections pertinentes du document
+    FULL_TEXT_MAX_CHARS = 20000
+
     @staticmethod
     def compare_documents(
         document_ids: List[int],
@@ -372,8 +377,20 @@ Statistiques:
                 'error': 'Aucun document disponible pour répondre à la question'
             }
         
+        # Réponse déjà générée pour une question similaire sur ces documents ?
+        cached = AnswerCacheService.lookup(question, document_ids, origin='tool')
+        if cached:
+            return {
+                'success': True,
+                'answer': cached.answer,
+                'documents_used': [source['document_id'] for source in cached.sources],
+                'sources': cached.sources,
+                'cached': True
+            }
+        
         # Construire le contexte à partir des documents
         context_parts = []
+        sources = []
         
         for doc_id in document_ids:
             try:
@@ -383,10 +400,27 @@ Statistiques:
                 # CETTE PARTIE EST CRITIQUE - Lire depuis DocumentContent
                 try:
                     doc_content = DocumentContent.objects.get(document=doc)
-                    content_text = doc_content.raw_text or doc_content.processed_text
+                    content_text = doc_content.get_text()
+                    
+                    if content_text and len(content_text) > DocumentToolsService.FULL_TEXT_MAX_CHARS:
+                        # Document volumineux: seulement les sections pertinentes (via le condensé)
+                        digest = DocumentDigestService.get_fresh_digest(doc)
+                        if digest and digest.outline and not digest.matches_content(doc_content.content_hash):
+                            # Condensé en cours de recalcul: ses positions ne valent plus pour ce texte
+                            content_text = content_text[:DocumentToolsService.FULL_TEXT_MAX_CHARS]
+                            print(f"[INFO] Document {doc_id}: condensé périmé, texte tronqué ({len(content_text)} caractères)")
+                        elif digest and digest.outline:
+                            content_text = DocumentDigestService.relevant_sections_text(
+                                digest,
+                                content_text,
+                                question,
+                                DocumentToolsService.FULL_TEXT_MAX_CHARS
+                            )
+                            print(f"[INFO] Document {doc_id}: sections pertinentes retenues ({len(content_text)} caractères)")
                     
                     if content_text:
                         context_parts.append(f"Document: {doc.title}\n\n{content_text}")
+                        sources.append({'document_id': doc.id, 'document_title': doc.title})
                         print(f"[INFO] Document {doc_id} ({doc.title}) loaded: {len(content_text)} characters")
                     else:
                         print(f"[WARNING] Document {doc_id} ({doc.title}) has empty content")
@@ -456,10 +490,15 @@ Statistiques:
             answer = response.choices[0].message.content
             print(f"[TOOL] Réponse générée: {len(answer)} caractères")
             
+            # Mise en cache seulement si tous les documents avaient un contenu
+            if len(sources) == len(document_ids):
+                AnswerCacheService.store(question, document_ids, answer, sources=sources, origin='tool')
+            
             return {
                 'success': True,
                 'answer': answer,
-                'documents_used': document_ids
+                'documents_used': document_ids,
+                'sources': sources
             }
             
         except Exception as e:
@@ -472,6 +511,64 @@ Statistiques:
                 'error': f"Erreur lors de la génération de la réponse: {str(e)}"
             }
     
+    @staticmethod
+    def get_document_section(document_id: int, section_index: int, conversation) -> Dict:
+        """
+        Outil: Retourne le texte complet d'une section du plan d'un document
+
+        Args:
+            document_id: ID du document
+            section_index: Index de la section dans le condensé du document
+            conversation: Instance de Conversation
+        """
+        print(f"[TOOL] get_document_section: doc={document_id}, section={section_index}")
+
+        try:
+            document = conversation.documents.get(id=document_id)
+        except Document.DoesNotExist:
+            return {
+                'success': False,
+                'error': f"Document {document_id} non trouvé dans cette conversation"
+            }
+
+        digest = DocumentDigestService.get_fresh_digest(document)
+        if not digest:
+            return {
+                'success': False,
+                'error': "Le plan de ce document est en cours de calcul, utilise answer_question"
+            }
+
+        try:
+            section = DocumentDigestService.get_section_text(document, int(section_index), digest=digest)
+        except (TypeError, ValueError):
+            section = None
+
+        if not section:
+            return {
+                'success': False,
+                'error': f"Section {section_index} inexistante (le document compte {len(digest.outline)} sections)"
+            }
+        if section['rebuilding']:
+            return {
+                'success': False,
+                'error': "Section indisponible: le document a changé et son plan est en cours de recalcul, utilise answer_question"
+            }
+
+        text = section['text']
+        truncated = len(text) > DocumentToolsService.FULL_TEXT_MAX_CHARS
+        if truncated:
+            text = text[:DocumentToolsService.FULL_TEXT_MAX_CHARS]
+
+        return {
+            'success': True,
+            'document_id': document.id,
+            'section_index': int(section_index),
+            'title': section['title'],
+            'page': section['page'],
+            'text': text,
+            'truncated': truncated
+        }
+
     @staticmethod
     def edit_document(
         document_id: int,
@@ -521,16 +618,16 @@ Statistiques:
             print(f"[TOOL] Texte trouvé et remplacé")
 
             # Récupérer la structure PDF si disponible
-            pdf_structure = None
-            if hasattr(document, 'content') and document.content.pdf_structure:
-                pdf_structure = document.content.pdf_structure
+            pdf_structure = document.content.get_pdf_structure() if hasattr(document, 'content') else None
+            if pdf_structure:
                 print(f"[INFO] Structure PDF récupérée: {pdf_structure.get('total_tables', 0)} tableau(x)")
 
             # Modifier aussi le brouillon de l'éditeur si disponible
-            if pdf_structure and 'editor_draft' in pdf_structure:
-                editor_draft = pdf_structure['editor_draft']
-                content_data = editor_draft.get('content', {})
-                content_type = editor_draft.get('content_type', 'quill')
+            from chat.editor_log_service import EditorLogService
+            editor_draft = EditorLogService.current_state(document.id)
+            if editor_draft:
+                content_data = editor_draft['content'] or {}
+                content_type = editor_draft['content_type']
 
                 modifications_count = 0
 
@@ -543,7 +640,6 @@ Statistiques:
                                 modifications_count += 1
 
                     if modifications_count > 0:
-                        editor_draft['saved_at'] = timezone.now().isoformat()
                         print(f"[INFO] {modifications_count} remplacement(s) effectué(s) dans l'éditeur Quill")
 
                 elif content_type == 'fabric' and 'objects' in content_data:
@@ -573,14 +669,11 @@ Statistiques:
                                 modifications_count += 1
 
                     if modifications_count > 0:
-                        editor_draft['saved_at'] = timezone.now().isoformat()
                         print(f"[INFO] {modifications_count} remplacement(s) effectué(s) dans l'éditeur Fabric")
 
                 # Sauvegarder les modifications dans la base de données
                 if modifications_count > 0:
-                    # IMPORTANT: Forcer la détection de changement pour JSONField
-                    document.content.pdf_structure = dict(document.content.pdf_structure)
-                    document.content.save(update_fields=['pdf_structure'])
+                    EditorLogService.replace(document, content_type, content_data)
                     print(f"[INFO] Modifications sauvegardées dans la base de données")
 
             # Appliquer directement le remplacement à la structure PDF
@@ -697,22 +790,21 @@ Statistiques:
                 }
 
             # Récupérer le draft de l'éditeur
-            print(f"[DEBUG] pdf_structure exists: {doc_content.pdf_structure is not None}")
-            print(f"[DEBUG] pdf_structure type: {type(doc_content.pdf_structure)}")
+            from chat.editor_log_service import EditorLogService
+            editor_draft = EditorLogService.current_state(document.id)
+            print(f"[DEBUG] editor_draft exists: {editor_draft is not None}")
 
-            if not doc_content.pdf_structure or 'editor_draft' not in doc_content.pdf_structure:
-                print(f"[DEBUG] pdf_structure keys: {list(doc_content.pdf_structure.keys()) if doc_content.pdf_structure else 'None'}")
+            if not editor_draft:
                 return {
                     'success': False,
                     'error': 'Aucun brouillon d\'éditeur trouvé. Veuillez d\'abord ouvrir le document dans l\'éditeur et attendre la sauvegarde automatique.'
                 }
 
-            editor_draft = doc_content.pdf_structure['editor_draft']
-            content_data = editor_draft.get('content', {})
-            content_type = editor_draft.get('content_type', 'quill')
+            content_data = editor_draft['content'] or {}
+            content_type = editor_draft['content_type']
 
             # Debug: Afficher la structure des données
-            print(f"[DEBUG] editor_draft keys: {editor_draft.keys()}")
+            print(f"[DEBUG] editor_draft seq: {editor_draft['seq']}")
             print(f"[DEBUG] content_data type: {type(content_data)}")
             print(f"[DEBUG] content_type: {content_type}")
             print(f"[DEBUG] content_data: {str(content_data)[:500]}")
@@ -864,13 +956,7 @@ Statistiques:
                 }
 
             # Sauvegarder le contenu modifié
-            doc_content.pdf_structure['editor_draft']['content'] = content_data
-            doc_content.pdf_structure['editor_draft']['saved_at'] = timezone.now().isoformat()
-
-            # IMPORTANT: Marquer le champ comme modifié pour forcer la sauvegarde (JSONField)
-            from django.db.models import F
-            doc_content.pdf_structure = dict(doc_content.pdf_structure)  # Force la détection de changement
-            doc_content.save(update_fields=['pdf_structure'])
+            EditorLogService.replace(document, content_type, content_data)
 
             print(f"[TOOL] Formatage modifié: {modifications_count} occurrence(s)")
             print(f"[INFO] Contenu sauvegardé dans la base de données")
@@ -0,0 +1,360 @@
+"""
+Service du brouillon de l'éditeur
+Les sauvegardes automatiques sont des modifications (delta Quill, patch Fabric.js)
+ajoutées à un journal, repliées périodiquement en arrière-plan dans un instantané:
+le volume écrit est proportionnel à ce que l'utilisateur a modifié
+"""
+from typing import Dict, List, Optional
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+
+from .models import EditorOperation, EditorSnapshot
+from core.tasks import run_in_background
+from documents.models import Document
+
+
+INFINITY = float('inf')
+
+
+class EditorConflict(Exception):
+    """La modification ne s'applique pas au dernier état enregistré (seq: numéro du dernier état)"""
+
+    def __init__(self, message: str, seq: int):
+        super().__init__(message)
+        self.seq = seq
+
+
+# ----------------------------------------------------------------------
+# Deltas Quill (mêmes règles que Delta.compose de quill-delta)
+# Les longueurs sont en unités UTF-16, comme les positions de Quill
+# ----------------------------------------------------------------------
+
+def _utf16_length(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode('utf-16-le', 'surrogatepass')) // 2
+
+
+def _utf16_slice(text: str, start: int, end: int) -> str:
+    if text.isascii():
+        return text[start:end]
+    data = text.encode('utf-16-le', 'surrogatepass')
+    return data[2 * start:2 * end].decode('utf-16-le', 'surrogatepass')
+
+
+def _op_length(op: Dict) -> int:
+    if 'delete' in op:
+        return op['delete']
+    if 'retain' in op:
+        return op['retain']
+    return _utf16_length(op['insert']) if isinstance(op['insert'], str) else 1
+
+
+class _DeltaIterator:
+    def __init__(self, ops: List[Dict]):
+        self.ops = ops
+        self.index = 0
+        self.offset = 0
+
+    def peek(self) -> Optional[Dict]:
+        return self.ops[self.index] if self.index < len(self.ops) else None
+
+    def has_next(self) -> bool:
+        return self.peek_length() < INFINITY
+
+    def peek_length(self):
+        op = self.peek()
+        return _op_length(op) - self.offset if op else INFINITY
+
+    def peek_type(self) -> str:
+        op = self.peek()
+        if op is None or 'retain' in op:
+            return 'retain'
+        return 'delete' if 'delete' in op else 'insert'
+
+    def next(self, length=INFINITY) -> Dict:
+        op = self.peek()
+        if op is None:
+            return {'retain': INFINITY}
+
+        offset = self.offset
+        op_length = _op_length(op)
+        if length >= op_length - offset:
+            length = op_length - offset
+            self.index += 1
+            self.offset = 0
+        else:
+            self.offset += length
+
+        if 'delete' in op:
+            return {'delete': length}
+        result = {}
+        if 'retain' in op:
+            result['retain'] = length
+        elif isinstance(op['insert'], str):
+            result['insert'] = _utf16_slice(op['insert'], offset, offset + length)
+        else:
+            result['insert'] = op['insert']
+        if op.get('attributes'):
+            result['attributes'] = op['attributes']
+        return result
+
+
+def _push(ops: List[Dict], op: Dict):
+    """Ajoute une opération en fusionnant avec la précédente si possible (insertions avant suppressions)"""
+    op = dict(op)
+    index = len(ops)
+    last = ops[-1] if ops else None
+    if last is not None:
+        if 'delete' in op and 'delete' in last:
+            last['delete'] += op['delete']
+            return
+        if 'delete' in last and 'insert' in op:
+            index -= 1
+            last = ops[index - 1] if index > 0 else None
+            if last is None:
+                ops.insert(0, op)
+                return
+        if op.get('attributes') == last.get('attributes'):
+            if isinstance(op.get('insert'), str) and isinstance(last.get('insert'), str):
+                last['insert'] += op['insert']
+                return
+            if 'retain' in op and 'retain' in last:
+                last['retain'] += op['retain']
+                return
+    ops.insert(index, op)
+
+
+def _compose_attributes(a: Optional[Dict], b: Optional[Dict], keep_null: bool) -> Optional[Dict]:
+    a, b = a or {}, b or {}
+    attributes = {key: value for key, value in b.items() if keep_null or value is not None}
+    for key, value in a.items():
+        if key not in b:
+            attributes[key] = value
+    return attributes or None
+
+
+def compose_delta(ops: List[Dict], change: List[Dict]) -> List[Dict]:
+    """Applique le delta change au delta ops (document Quill: insertions seulement)"""
+    this_iter, other_iter = _DeltaIterator(ops), _DeltaIterator(change)
+    result = []
+    while this_iter.has_next() or other_iter.has_next():
+        if other_iter.peek_type() == 'insert':
+            _push(result, other_iter.next())
+        elif this_iter.peek_type() == 'delete':
+            _push(result, this_iter.next())
+        else:
+            length = min(this_iter.peek_length(), other_iter.peek_length())
+            this_op = this_iter.next(length)
+            other_op = other_iter.next(length)
+            if 'retain' in other_op:
+                new_op = {'retain': length} if 'retain' in this_op else {'insert': this_op['insert']}
+                attributes = _compose_attributes(
+                    this_op.get('attributes'), other_op.get('attributes'), keep_null='retain' in this_op
+                )
+                if attributes:
+                    new_op['attributes'] = attributes
+                _push(result, new_op)
+            elif 'delete' in other_op and 'retain' in this_op:
+                _push(result, other_op)
+            # Insertion puis suppression: les deux s'annulent
+
+    if result and 'retain' in result[-1] and not result[-1].get('attributes'):
+        result.pop()
+    return result
+
+
+def _is_valid_delta(ops) -> bool:
+    if not isinstance(ops, list):
+        return False
+    for op in ops:
+        if not isinstance(op, dict) or len({'insert', 'retain', 'delete'} & set(op)) != 1:
+            return False
+        if 'insert' in op and not isinstance(op['insert'], (str, dict)):
+            return False
+        for key in ('retain', 'delete'):
+            if key in op and (not isinstance(op[key], int) or op[key] <= 0):
+                return False
+        if not isinstance(op.get('attributes', {}), dict):
+            return False
+    return True
+
+
+# ----------------------------------------------------------------------
+# Patchs Fabric.js: objets identifiés par leur propriété 'uid'
+# {'objects': {uid: objet}, 'removed': [uid], 'order': [uid], 'canvas': {propriété: valeur}}
+# ----------------------------------------------------------------------
+
+def ensure_fabric_uids(canvas: Optional[Dict]) -> Optional[Dict]:
+    """
+    Donne aux objets sans 'uid' (brouillons de l'ancien éditeur) un uid dérivé de leur position:
+    le même à chaque chargement, donc connu des patchs que le client calcule ensuite
+    """
+    objects = (canvas or {}).get('objects')
+    if not isinstance(objects, list) or all(obj.get('uid') for obj in objects):
+        return canvas
+
+    taken = {obj.get('uid') for obj in objects}
+    with_uids = []
+    for index, obj in enumerate(objects):
+        if not obj.get('uid'):
+            uid, suffix = f"legacy-{index}", 0
+            while uid in taken:
+                suffix += 1
+                uid = f"legacy-{index}-{suffix}"
+            taken.add(uid)
+            obj = dict(obj, uid=uid)
+        with_uids.append(obj)
+    return dict(canvas, objects=with_uids)
+
+
+def apply_fabric_patch(canvas: Dict, patch: Dict) -> Dict:
+    """Applique un patch au JSON d'un canevas Fabric.js (toJSON)"""
+    canvas = dict(ensure_fabric_uids(canvas) or {})
+    previous = canvas.get('objects') or []
+    objects = {obj['uid']: obj for obj in previous}
+    for uid in patch.get('removed') or []:
+        objects.pop(uid, None)
+    objects.update({uid: dict(obj, uid=uid) for uid, obj in (patch.get('objects') or {}).items()})
+
+    order = patch.get('order')
+    if order is None:
+        known = [obj['uid'] for obj in previous]
+        order = [uid for uid in known if uid in objects]
+        order += [uid for uid in (patch.get('objects') or {}) if uid not in set(known)]
+    canvas['objects'] = [objects[uid] for uid in order if uid in objects]
+    canvas.update({key: value for key, value in (patch.get('canvas') or {}).items() if key != 'objects'})
+    return canvas
+
+
+def _is_valid_patch(patch) -> bool:
+    if not isinstance(patch, dict) or set(patch) - {'objects', 'removed', 'order', 'canvas'}:
+        return False
+    return (isinstance(patch.get('objects', {}), dict)
+            and all(isinstance(obj, dict) for obj in patch.get('objects', {}).values())
+            and isinstance(patch.get('removed', []), list)
+            and isinstance(patch.get('order', []), list)
+            and isinstance(patch.get('canvas', {}), dict))
+
+
+class EditorLogService:
+    """
+    Journal des sauvegardes automatiques d'un document:
+    état courant = dernier instantané (EditorSnapshot) + opérations suivantes (EditorOperation)
+    """
+
+    KIND_BY_CONTENT_TYPE = {'quill': 'delta', 'fabric': 'patch'}
+
+    @staticmethod
+    def _setting(name: str, default):
+        return getattr(settings, name, default)
+
+    @staticmethod
+    def _lock(document_id: int):
+        """Sérialise les écritures du journal d'un document"""
+        Document.objects.select_for_update().filter(id=document_id).values_list('id', flat=True).first()
+
+    @staticmethod
+    def head(document_id: int):
+        """(numéro du dernier état, type de contenu), (0, None) sans brouillon"""
+        last = EditorOperation.objects.filter(document_id=document_id).order_by('-seq').values_list(
+            'seq', 'content_type'
+        ).first()
+        if last is None:
+            last = EditorSnapshot.objects.filter(document_id=document_id).order_by('-seq').values_list(
+                'seq', 'content_type'
+            ).first()
+        return last or (0, None)
+
+    @classmethod
+    def replace(cls, document: Document, content_type: str, content) -> int:
+        """Enregistre le contenu complet: nouvel instantané, journal précédent supprimé. Retourne son numéro."""
+        with transaction.atomic():
+            cls._lock(document.id)
+            seq = cls.head(document.id)[0] + 1
+            if content_type == 'fabric':
+                content = ensure_fabric_uids(content)
+            EditorSnapshot.objects.create(document=document, content_type=content_type, content=content, seq=seq)
+            EditorOperation.objects.filter(document=document, seq__lt=seq).delete()
+            EditorSnapshot.objects.filter(document=document, seq__lt=seq).delete()
+        return seq
+
+    @classmethod
+    def append(cls, document: Document, content_type: str, payload, base_seq: int) -> int:
+        """
+        Ajoute une modification (delta Quill ou patch Fabric.js) calculée par rapport à l'état base_seq
+
+        Raises:
+            ValueError: modification mal formée
+            EditorConflict: base_seq n'est pas le dernier état (le client renvoie le contenu complet)
+        """
+        kind = cls.KIND_BY_CONTENT_TYPE.get(content_type)
+        if kind is None:
+            raise ValueError(f"Type de contenu inconnu: {content_type}")
+        if not (_is_valid_delta(payload) if kind == 'delta' else _is_valid_patch(payload)):
+            raise ValueError("Modification mal formée")
+
+        with transaction.atomic():
+            cls._lock(document.id)
+            head_seq, head_type = cls.head(document.id)
+            if head_type != content_type or base_seq != head_seq:
+                raise EditorConflict("Le brouillon a changé depuis le dernier chargement", head_seq)
+            seq = head_seq + 1
+            EditorOperation.objects.create(
+                document=document, seq=seq, content_type=content_type, kind=kind, payload=payload
+            )
+
+        snapshot_seq = EditorSnapshot.objects.filter(document=document).aggregate(seq=Max('seq'))['seq'] or 0
+        if seq - snapshot_seq >= cls._setting('EDITOR_LOG_COMPACT_OPS', 50):
+            run_in_background(cls.compact, document.id)
+        return seq
+
+    @staticmethod
+    def apply(content_type: str, content, kind: str, payload):
+        if kind == 'delta':
+            return {'ops': compose_delta((content or {}).get('ops') or [], payload)}
+        return apply_fabric_patch(content, payload)
+
+    @classmethod
+    def current_state(cls, document_id: int) -> Optional[Dict]:
+        """Brouillon courant: {'content_type', 'content', 'seq'}, None sans brouillon"""
+        snapshot = EditorSnapshot.objects.filter(document_id=document_id).order_by('-seq').first()
+        if snapshot is None:
+            return None
+
+        content = snapshot.content
+        if snapshot.content_type == 'fabric':
+            content = ensure_fabric_uids(content)
+        seq = snapshot.seq
+        operations = EditorOperation.objects.filter(document_id=document_id, seq__gt=seq).order_by('seq')
+        for operation in operations.iterator():
+            if operation.content_type != snapshot.content_type:
+                break
+            content = cls.apply(operation.content_type, content, operation.kind, operation.payload)
+            seq = operation.seq
+        return {'content_type': snapshot.content_type, 'content': content, 'seq': seq}
+
+    @classmethod
+    def compact(cls, document_id: int):
+        """Replie le journal dans un nouvel instantané"""
+        with transaction.atomic():
+            cls._lock(document_id)
+            state = cls.current_state(document_id)
+            if state is None:
+                return
+            removed, _ = EditorOperation.objects.filter(document_id=document_id, seq__lte=state['seq']).delete()
+            if not removed:
+                return
+            EditorSnapshot.objects.filter(document_id=document_id).delete()
+            EditorSnapshot.objects.create(
+                document_id=document_id,
+                content_type=state['content_type'],
+                content=state['content'],
+                seq=state['seq']
+            )
+        print(f"[EDITOR] Document {document_id}: {removed} opération(s) repliée(s) dans l'instantané {state['seq']}")
+
+    @staticmethod
+    def discard(document: Document):
+        """Supprime le brouillon (après une sauvegarde explicite)"""
+        EditorOperation.objects.filter(document=document).delete()
+        EditorSnapshot.objects.filter(document=document).delete()
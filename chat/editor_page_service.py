@@ -0,0 +1,278 @@
+"""
+Service des pages de l'éditeur
+Sert le document par fenêtres de pages [start, end) au format Quill ou Fabric.js:
+seules les pages demandées sont lues, le temps d'affichage de la première page
+ne dépend pas de la longueur du document.
+Les deux représentations de chaque page sont calculées une fois en arrière-plan
+(EditorPageRender), par version du contenu et du convertisseur.
+"""
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+
+from .models import EditorPageRender
+from core.tasks import run_in_background
+from documents.models import Document, DocumentContent, DocumentPage
+from documents.render_service import PageRenderService, RenderUnavailable
+
+
+class EditorPageService:
+    """Découpage du contenu de l'éditeur en pages, avec un jeton de version par page"""
+
+    FORMATS = ('quill', 'fabric')
+
+    # À incrémenter quand la conversion change: les rendus enregistrés sont recalculés
+    CONVERTER_VERSION = 1
+
+    # Mise en page Fabric.js (identique à renderFabricPages dans l'éditeur)
+    PAGE_LEFT = 50
+    LINE_HEIGHT = 20
+    CELL_WIDTH = 120
+    CELL_HEIGHT = 25
+    PAGE_MARGIN = 100
+
+    @staticmethod
+    def _setting(name: str, default):
+        return getattr(settings, name, default)
+
+    @classmethod
+    def window_bounds(cls, start: int, end: Optional[int]) -> Tuple[int, int]:
+        """Bornes [start, end) demandées, ramenées à EDITOR_PAGE_WINDOW_MAX pages au plus"""
+        maximum = cls._setting('EDITOR_PAGE_WINDOW_MAX', 20)
+        start = max(start, 1)
+        if end is None or end <= start:
+            end = start + cls._setting('EDITOR_PAGE_WINDOW', 5)
+        return start, min(end, start + maximum)
+
+    @staticmethod
+    def is_paged(doc_content: DocumentContent) -> bool:
+        """
+        Le document se lit page par page: ses pages sont dans DocumentPage et son contenu
+        n'a pas été remplacé par une sauvegarde de l'éditeur (canevas Fabric.js ou delta Quill complet)
+        """
+        structure = doc_content.get_pdf_structure(with_pages=False)
+        if isinstance(structure, dict) and ('editor_type' in structure or 'objects' in structure):
+            return False
+        return DocumentPage.objects.filter(document_id=doc_content.document_id).exists()
+
+    @staticmethod
+    def page_count(document_id: int) -> int:
+        return DocumentPage.objects.filter(document_id=document_id).count()
+
+    # ------------------------------------------------------------------
+    # Conversion
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def text_to_quill(text: str) -> Dict:
+        """Texte -> delta Quill (une insertion par ligne non vide)"""
+        ops = []
+        for line in (text or '').split('\n'):
+            if line.strip():
+                ops.append({'insert': line})
+                ops.append({'insert': '\n'})
+        return {'ops': ops}
+
+    @classmethod
+    def page_to_fabric(cls, page: Dict) -> Dict:
+        """
+        Page -> objets Fabric.js (toJSON), positions relatives au haut de la page:
+        en-tête, une ligne de texte par objet, tableaux en cellules, séparateur
+        """
+        left = cls.PAGE_LEFT
+        objects = [{
+            'type': 'text', 'text': f"Page {page['page_number']}", 'left': left, 'top': 0,
+            'fontSize': 10, 'fill': '#9ca3af', 'fontFamily': 'Arial', 'selectable': False
+        }]
+        y = 30
+
+        for line in (page.get('text') or '').split('\n'):
+            if line.strip():
+                objects.append({
+                    'type': 'i-text', 'text': line, 'left': left, 'top': y, 'fontSize': 12,
+                    'fontFamily': 'Arial', 'fill': '#111827', 'selectable': True, 'editable': True, 'width': 500
+                })
+                y += cls.LINE_HEIGHT
+
+        for index, table in enumerate(page.get('tables') or []):
+            y += 20
+            objects.append({
+                'type': 'text', 'text': f"Table {index + 1}", 'left': left, 'top': y, 'fontSize': 11,
+                'fill': '#3b82f6', 'fontFamily': 'Arial', 'fontWeight': 'bold', 'selectable': False
+            })
+            y += 25
+            data = table.get('data') if isinstance(table, dict) else None
+            if not isinstance(data, list):
+                continue
+            for row_index, row in enumerate(data):
+                row_y = y + row_index * cls.CELL_HEIGHT
+                for col_index, cell in enumerate(row or []):
+                    cell_x = left + col_index * cls.CELL_WIDTH
+                    objects.append({
+                        'type': 'rect', 'left': cell_x, 'top': row_y,
+                        'width': cls.CELL_WIDTH, 'height': cls.CELL_HEIGHT,
+                        'fill': '#f3f4f6' if row_index == 0 else '#ffffff',
+                        'stroke': '#e5e7eb', 'strokeWidth': 1, 'selectable': False
+                    })
+                    text = cell.get('text', '') if isinstance(cell, dict) else ('' if cell is None else str(cell))
+                    if str(text).strip():
+                        objects.append({
+                            'type': 'text', 'text': str(text), 'left': cell_x + 5, 'top': row_y + 5,
+                            'fontSize': 10, 'fontFamily': 'Arial', 'fill': '#111827', 'width': cls.CELL_WIDTH - 10,
+                            'fontWeight': 'bold' if row_index == 0 else 'normal', 'selectable': False
+                        })
+            y += len(data) * cls.CELL_HEIGHT + 20
+
+        y += cls.PAGE_MARGIN
+        objects.append({
+            'type': 'line', 'x1': left, 'y1': y - 30, 'x2': 545, 'y2': y - 30,
+            'stroke': '#e5e7eb', 'strokeWidth': 2, 'strokeDashArray': [5, 5], 'selectable': False
+        })
+        return {'page_number': page['page_number'], 'width': page.get('width'), 'height': y, 'objects': objects}
+
+    @classmethod
+    def convert_page(cls, page: Dict, format_type: str) -> Dict:
+        """Page ({'page_number', 'text', 'tables', 'width', 'height'}) -> contenu de l'éditeur"""
+        if format_type == 'quill':
+            return cls.text_to_quill(page.get('text', ''))
+        return cls.page_to_fabric(page)
+
+    @staticmethod
+    def version(content: Dict) -> str:
+        """Jeton de version d'une page: change dès que son contenu change"""
+        data = json.dumps(content, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def _page_rows(document_id: int):
+        return DocumentPage.objects.filter(document_id=document_id).order_by('page_number').values_list(
+            'page_number', 'text', 'tables', 'width', 'height'
+        )
+
+    @staticmethod
+    def _page_dict(number, text, tables, width, height) -> Dict:
+        return {'page_number': number, 'text': text, 'tables': tables, 'width': width, 'height': height}
+
+    # ------------------------------------------------------------------
+    # Rendus précalculés
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def schedule_precompute(cls, document: Document, refresh: bool = False):
+        """Planifie la conversion des pages en arrière-plan (refresh: pages retraitées, rendus recalculés)"""
+        return run_in_background(cls.precompute, document.id, refresh)
+
+    @classmethod
+    def precompute(cls, document_id: int, refresh: bool = False) -> int:
+        """Convertit une fois chaque page aux formats Quill et Fabric.js. Retourne le nombre de pages converties."""
+        content_hash = DocumentContent.objects.filter(document_id=document_id).values_list(
+            'content_hash', flat=True
+        ).first()
+        if content_hash is None:
+            return 0
+
+        key = {'document_id': document_id, 'content_hash': content_hash, 'converter_version': cls.CONVERTER_VERSION}
+        # Rendus d'une version précédente du contenu ou du convertisseur
+        EditorPageRender.objects.filter(document_id=document_id).exclude(
+            content_hash=content_hash, converter_version=cls.CONVERTER_VERSION
+        ).delete()
+        if refresh:
+            EditorPageRender.objects.filter(**key).delete()
+        done = set(EditorPageRender.objects.filter(**key).values_list('page_number', flat=True))
+
+        batch_size = cls._setting('PDF_PAGE_BATCH_SIZE', 50)
+        batch = []
+        converted = 0
+        for row in cls._page_rows(document_id).iterator(chunk_size=batch_size):
+            if row[0] in done:
+                continue
+            page = cls._page_dict(*row)
+            quill = cls.convert_page(page, 'quill')
+            fabric = cls.convert_page(page, 'fabric')
+            batch.append(EditorPageRender(
+                page_number=page['page_number'],
+                quill=quill,
+                quill_version=cls.version(quill),
+                fabric=fabric,
+                fabric_version=cls.version(fabric),
+                **key
+            ))
+            if len(batch) >= batch_size:
+                EditorPageRender.objects.bulk_create(batch, ignore_conflicts=True)
+                converted += len(batch)
+                batch = []
+        if batch:
+            EditorPageRender.objects.bulk_create(batch, ignore_conflicts=True)
+            converted += len(batch)
+
+        if converted:
+            print(f"[EDITOR] Document {document_id}: {converted} page(s) convertie(s) pour l'éditeur")
+        return converted
+
+    @classmethod
+    def get_window(cls, doc_content: DocumentContent, format_type: str, start: int, end: int,
+                   known_versions: Optional[Dict[int, str]] = None) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Pages [start, end) au format demandé, et numéro de la page suivante (None à la fin)
+
+        Les rendus précalculés sont servis tels quels; les pages pas encore converties le sont
+        à la volée et la conversion du document est planifiée.
+        Les pages dont le jeton figure dans known_versions sont renvoyées sans contenu
+        ('unchanged': True): le client les a déjà.
+        """
+        document_id = doc_content.document_id
+        known_versions = known_versions or {}
+        window = {'page_number__gte': start, 'page_number__lt': end}
+        renders = EditorPageRender.objects.filter(
+            document_id=document_id,
+            content_hash=doc_content.content_hash,
+            converter_version=cls.CONVERTER_VERSION,
+            **window
+        )
+
+        versions = dict(renders.values_list('page_number', f'{format_type}_version'))
+        needed = [number for number, version in versions.items() if known_versions.get(number) != version]
+        contents = dict(renders.filter(page_number__in=needed).values_list('page_number', format_type)) if needed else {}
+
+        missing = cls._page_rows(document_id).filter(**window).exclude(page_number__in=list(versions))
+        for row in missing:
+            page = cls._page_dict(*row)
+            content = cls.convert_page(page, format_type)
+            versions[page['page_number']] = cls.version(content)
+            if known_versions.get(page['page_number']) != versions[page['page_number']]:
+                contents[page['page_number']] = content
+        if missing:
+            run_in_background(cls.precompute, document_id)
+
+        pages = []
+        for number in sorted(versions):
+            if number in contents:
+                pages.append({'page_number': number, 'version': versions[number], 'content': contents[number]})
+            else:
+                pages.append({'page_number': number, 'version': versions[number], 'unchanged': True})
+
+        next_page = DocumentPage.objects.filter(
+            document_id=document_id, page_number__gte=end
+        ).order_by('page_number').values_list('page_number', flat=True).first()
+        return pages, next_page
+
+    @staticmethod
+    def page_rasters(document: Document, start: int, end: int) -> Dict[int, Dict]:
+        """
+        Rendus des pages [start, end) affichés par l'éditeur Fabric.js avant l'édition de chaque page:
+        {numéro de page: {'url', 'width', 'height'}} (taille de la page en points), {} hors PDF
+        """
+        if not PageRenderService.is_renderable(document):
+            return {}
+        dpi = PageRenderService.editor_dpi()
+        rows = DocumentPage.objects.filter(
+            document_id=document.id, physical=True, page_number__gte=start, page_number__lt=end
+        ).values_list('page_number', 'width', 'height')
+        try:
+            return {
+                number: {'url': PageRenderService.url(document, number, dpi), 'width': width, 'height': height}
+                for number, width, height in rows if width and height
+            }
+        except RenderUnavailable:
+            return {}
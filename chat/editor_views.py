@@ -4,16 +4,23 @@
 # Gestion de l'éditeur de documents style Word/Canva
 
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, FileResponse, Http404, HttpResponseNotModified
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods
 from django.core.files.base import ContentFile
 from django.utils import timezone
 from documents.models import Document, DocumentContent
+from documents.storage import ContentAddressedStorage
 from .models import Conversation, Message, GeneratedFile
 from .advanced_pdf_service import AdvancedPDFExtractor, PDFToEditableConverter
+from .editor_log_service import EditorConflict, EditorLogService
+from .editor_page_service import EditorPageService
+from typing import Optional
 import json
+import mimetypes
 import os
+import re
 from io import BytesIO
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.pdfgen import canvas as pdf_canvas
@@ -21,8 +28,6 @@ from reportlab.lib.utils import ImageReader
 from PIL import Image
 import base64
 from django.views.decorators.http import require_POST
-from django.http import JsonResponse
-from documents.models import Document, DocumentContent
 
 
 @login_required
@@ -100,6 +105,51 @@ def conversation_editor(request, conversation_id, document_id=None):
     return render(request, 'chat/conversation_editor.html', context)
 
 
+# Nom d'une image extraite: <sha256>.<extension>, extensions produites par extract_image (PyMuPDF).
+# Les documents (.pdf, .docx, .txt) et les rendus de page (.jpg) du même stockage sont exclus.
+EDITOR_IMAGE_EXTENSIONS = ('png', 'jpeg', 'jpx', 'jxr', 'jb2', 'gif', 'bmp', 'tiff',
+                           'pnm', 'pbm', 'pgm', 'ppm', 'pam', 'psd', 'tga')
+EDITOR_IMAGE_NAME = re.compile(r'^([0-9a-f]{64})\.(' + '|'.join(EDITOR_IMAGE_EXTENSIONS) + r')$')
+
+
+def _editor_image_path(name: str) -> Optional[str]:
+    """Chemin d'une image extraite (cas/img/, ou cas/ pour les images extraites avant ce rangement)"""
+    match = EDITOR_IMAGE_NAME.match(name)
+    if not match:
+        return None
+    sha256, extension = match.groups()
+    for namespace in (ContentAddressedStorage.IMAGE_NAMESPACE, ''):
+        path = ContentAddressedStorage.path_for(sha256, f".{extension}", namespace)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+@login_required
+@require_http_methods(["GET", "HEAD"])
+def editor_image(request, name):
+    """
+    Image extraite d'un PDF, servie depuis le stockage par empreinte.
+    Le nom contient l'empreinte du contenu: la réponse ne change jamais
+    et reste en cache dans le navigateur (une image partagée n'est téléchargée qu'une fois).
+
+    Args:
+        name: <sha256>.<extension>
+    """
+    path = _editor_image_path(name)
+    if path is None:
+        raise Http404("Image introuvable")
+
+    etag = f'"{name.split(".", 1)[0]}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(open(path, 'rb'), content_type=mimetypes.guess_type(name)[0] or 'application/octet-stream')
+    response['ETag'] = etag
+    response['Cache-Control'] = f"private, max-age={getattr(settings, 'EDITOR_IMAGE_CACHE_SECONDS', 31536000)}, immutable"
+    return response
+
+
 @require_POST
 def extract_document_content(request, document_id):
     """Extract document content in specified format"""
@@ -110,23 +160,25 @@ def extract_document_content(request, document_id):
         # Get DocumentContent
         try:
             doc_content = DocumentContent.objects.get(document=document)
-            pdf_structure = doc_content.pdf_structure
+            pdf_structure = doc_content.get_pdf_structure()
         except DocumentContent.DoesNotExist:
             return JsonResponse({
                 'success': False,
                 'error': 'Document content not found. Please re-upload the document.'
             })
+
+        # Brouillon de l'éditeur (instantané + sauvegardes automatiques suivantes)
+        draft = EditorLogService.current_state(document.id)
+        if draft and draft['content_type'] == format_type:
+            return JsonResponse({
+                'success': True,
+                'content': draft['content'],
+                'draft_seq': draft['seq']
+            })
         
         if format_type == 'fabric':
-            # Check if we have an editor draft (saved content)
             if pdf_structure and isinstance(pdf_structure, dict):
-                if 'editor_draft' in pdf_structure and pdf_structure['editor_draft'].get('content_type') == 'fabric':
-                    # Return saved Fabric content
-                    return JsonResponse({
-                        'success': True,
-                        'content': pdf_structure['editor_draft']['content']
-                    })
-                elif 'pages' in pdf_structure:
+                if 'pages' in pdf_structure:
                     # Return original PDF structure with pages
                     return JsonResponse({
                         'success': True,
@@ -204,7 +256,7 @@ def extract_document_content(request, document_id):
                         pass
 
                     # Final fallback: use raw/processed text to build a simple single page
-                    fallback_text = (doc_content.raw_text or doc_content.processed_text or '').strip()
+                    fallback_text = doc_content.get_text().strip()
                     return JsonResponse({
                         'success': True,
                         'content': {
@@ -217,7 +269,7 @@ def extract_document_content(request, document_id):
                     })
             else:
                 # No PDF structure at all — build from text as a simple single page
-                fallback_text = (doc_content.raw_text or doc_content.processed_text or '').strip()
+                fallback_text = doc_content.get_text().strip()
                 return JsonResponse({
                     'success': True,
                     'content': {
@@ -232,12 +284,7 @@ def extract_document_content(request, document_id):
         else:  # quill format
             # Check for saved Quill content first (modifications from chatbot)
             if pdf_structure and isinstance(pdf_structure, dict):
-                if 'editor_draft' in pdf_structure and pdf_structure['editor_draft'].get('content_type') == 'quill':
-                    return JsonResponse({
-                        'success': True,
-                        'content': pdf_structure['editor_draft']['content']
-                    })
-                elif 'editor_type' in pdf_structure and pdf_structure['editor_type'] == 'quill':
+                if 'editor_type' in pdf_structure and pdf_structure['editor_type'] == 'quill':
                     return JsonResponse({
                         'success': True,
                         'content': pdf_structure.get('content', {'ops': []})
@@ -247,7 +294,7 @@ def extract_document_content(request, document_id):
             # Never return saved/modified content for text mode
             
             # Get the original text content
-            text_content = doc_content.raw_text or doc_content.processed_text or ''
+            text_content = doc_content.get_text()
             
             # If no text content, try to extract from pdf_structure
             if not text_content and pdf_structure and isinstance(pdf_structure, dict):
@@ -280,17 +327,9 @@ def extract_document_content(request, document_id):
                     text_content = pdf_structure['text']
             
             # Convert text to Quill Delta format
-            delta_ops = []
-            if text_content:
-                lines = text_content.split('\n')
-                for line in lines:
-                    if line.strip():
-                        delta_ops.append({'insert': line})
-                        delta_ops.append({'insert': '\n'})
-            
             return JsonResponse({
                 'success': True,
-                'content': {'ops': delta_ops}
+                'content': EditorPageService.text_to_quill(text_content)
             })
 
         
@@ -303,6 +342,78 @@ def extract_document_content(request, document_id):
             'error': str(e)
         })
 
+@login_required
+@require_http_methods(["GET"])
+def extract_document_pages(request, document_id):
+    """
+    API paginée du contenu de l'éditeur: pages [start, end) au format Quill ou Fabric.js.
+    L'éditeur affiche les premières pages dès leur arrivée puis charge les suivantes.
+
+    Paramètres GET:
+        format: 'quill' ou 'fabric'
+        start, end: numéros de page (end exclu, fenêtre limitée à EDITOR_PAGE_WINDOW_MAX pages)
+        versions: JSON {numéro de page: jeton} des pages déjà chargées, renvoyées sans contenu si inchangées
+
+    Returns:
+        JSON avec 'pages' [{'page_number', 'version', 'content'}], 'page_count' et 'next'
+        (première page suivante, None à la fin); en Fabric.js, 'rasters' {numéro de page:
+        {'url', 'width', 'height'}} donne le rendu des pages PDF affiché avant leur édition. 'paged': False si le contenu ne se découpe
+        pas en pages (brouillon, contenu enregistré par l'éditeur): le client utilise alors
+        extract_document_content.
+    """
+    document = get_object_or_404(Document, id=document_id, user=request.user)
+    format_type = request.GET.get('format', 'quill')
+    if format_type not in EditorPageService.FORMATS:
+        return JsonResponse({
+            'success': False,
+            'error': f'Format non supporté: {format_type}'
+        }, status=400)
+
+    try:
+        start = int(request.GET.get('start', 1))
+        end = int(request.GET['end']) if request.GET.get('end') else None
+        known_versions = {
+            int(number): str(version)
+            for number, version in json.loads(request.GET.get('versions') or '{}').items()
+        }
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({
+            'success': False,
+            'error': 'Paramètres de pagination invalides.'
+        }, status=400)
+
+    try:
+        doc_content = DocumentContent.objects.get(document=document)
+    except DocumentContent.DoesNotExist:
+        return JsonResponse({
+            'success': False,
+            'error': 'Document content not found. Please re-upload the document.'
+        })
+
+    draft_seq, draft_type = EditorLogService.head(document.id)
+    if draft_type == format_type or not EditorPageService.is_paged(doc_content):
+        return JsonResponse({
+            'success': True,
+            'paged': False
+        })
+
+    start, end = EditorPageService.window_bounds(start, end)
+    pages, next_page = EditorPageService.get_window(doc_content, format_type, start, end, known_versions)
+    rasters = EditorPageService.page_rasters(document, start, end) if format_type == 'fabric' else {}
+
+    return JsonResponse({
+        'success': True,
+        'paged': True,
+        'format': format_type,
+        'page_count': EditorPageService.page_count(document.id),
+        'start': start,
+        'end': end,
+        'next': next_page,
+        'pages': pages,
+        'rasters': rasters
+    })
+
+
 @require_POST
 def save_document_changes(request, document_id):
     """Save document changes from editor"""
@@ -322,18 +433,12 @@ def save_document_changes(request, document_id):
             })
         
         # Get or create DocumentContent
-        doc_content, created = DocumentContent.objects.get_or_create(
-            document=document,
-            defaults={
-                'raw_text': '',
-                'processed_text': ''
-            }
-        )
+        doc_content, created = DocumentContent.objects.get_or_create(document=document)
         
         # Save based on content type
         if content_type == 'fabric':
             # Save Fabric.js canvas data
-            doc_content.pdf_structure = content
+            doc_content.set_payload(pdf_structure=content)
             
             # Extract text from Fabric objects for search
             text_parts = []
@@ -342,15 +447,15 @@ def save_document_changes(request, document_id):
                     if obj.get('type') in ['text', 'textbox', 'i-text']:
                         text_parts.append(obj.get('text', ''))
             
-            doc_content.processed_text = '\n'.join(text_parts)
+            doc_content.set_payload(processed_text='\n'.join(text_parts))
             
         else:  # quill
             # Save Quill Delta format
             # Store as JSON in pdf_structure
-            doc_content.pdf_structure = {
+            doc_content.set_payload(pdf_structure={
                 'editor_type': 'quill',
                 'content': content
-            }
+            })
             
             # Extract plain text for search
             text_parts = []
@@ -359,9 +464,12 @@ def save_document_changes(request, document_id):
                     if isinstance(op.get('insert'), str):
                         text_parts.append(op['insert'])
             
-            doc_content.processed_text = ''.join(text_parts)
+            doc_content.set_payload(processed_text=''.join(text_parts))
         
         doc_content.save()
+
+        # Le brouillon est remplacé par le contenu enregistré
+        EditorLogService.discard(document)
         
         # Mark document as modified
         document.status = 'completed'
@@ -370,7 +478,6 @@ def save_document_changes(request, document_id):
         # If this is part of a conversation, create a generated file record
         if conversation_id:
             try:
-                from chat.models import Conversation, GeneratedFile
                 conversation = Conversation.objects.get(id=conversation_id)
                 
                 # Create or update generated file record
@@ -478,48 +585,59 @@ def auto_save_document(request, document_id):
     API pour la sauvegarde automatique (draft).
     Sauvegarde l'état actuel sans créer de nouvelle version.
 
+    Le client envoie de préférence la modification depuis le dernier état enregistré
+    (base_seq): 'changes' = delta Quill ou patch Fabric.js (voir EditorLogService).
+    Le contenu complet ('content_data') reste accepté: premier enregistrement,
+    changement de mode ou réponse 409 (brouillon modifié ailleurs).
+
     Args:
         document_id: ID du document
 
     Returns:
-        JSON de confirmation
+        JSON de confirmation avec 'seq', numéro de l'état enregistré
     """
     document = get_object_or_404(Document, id=document_id, user=request.user)
 
     try:
         content_data = request.POST.get('content_data')
+        changes = request.POST.get('changes')
         content_type = request.POST.get('content_type', 'quill')
 
-        if not content_data:
+        if content_type not in EditorLogService.KIND_BY_CONTENT_TYPE:
             return JsonResponse({
                 'success': False,
-                'error': 'Aucune donnée fournie.'
+                'error': f'Type de contenu non supporté: {content_type}'
             }, status=400)
 
-        # Sauvegarder dans le DocumentContent comme draft
-        doc_content, created = DocumentContent.objects.get_or_create(
-            document=document,
-            defaults={'raw_text': '', 'processed_text': ''}
-        )
-
-        # Stocker le draft dans pdf_structure (champ JSON existant)
-        if not doc_content.pdf_structure:
-            doc_content.pdf_structure = {}
-
-        # Conserver la structure PDF originale et ajouter le draft
-        if not isinstance(doc_content.pdf_structure, dict):
-            doc_content.pdf_structure = {}
-
-        doc_content.pdf_structure['editor_draft'] = {
-            'content': json.loads(content_data),
-            'content_type': content_type,
-            'saved_at': timezone.now().isoformat()
-        }
-        doc_content.save()
+        if changes:
+            try:
+                seq = EditorLogService.append(
+                    document, content_type, json.loads(changes), int(request.POST.get('base_seq', -1))
+                )
+            except EditorConflict as e:
+                return JsonResponse({
+                    'success': False,
+                    'conflict': True,
+                    'error': str(e),
+                    'seq': e.seq
+                }, status=409)
+            except ValueError as e:
+                return JsonResponse({
+                    'success': False,
+                    'error': str(e)
+                }, status=400)
+        elif content_data:
+            seq = EditorLogService.replace(document, content_type, json.loads(content_data))
+        else:
+            return JsonResponse({
+                'success': False,
+                'error': 'Aucune donnée fournie.'
+            }, status=400)
 
         return JsonResponse({
             'success': True,
             'message': 'Sauvegarde automatique effectuée',
+            'seq': seq,
             'saved_at': timezone.now().isoformat()
         })
 
@@ -532,6 +650,19 @@ def auto_save_document(request, document_id):
 
 # Fonctions utilitaires privées
 
+def _read_image_source(src: str):
+    """Octets d'une image de l'éditeur: URI data: en base64 ou image extraite (URL de editor_image)"""
+    if not isinstance(src, str):
+        return None
+    if src.startswith('data:image'):
+        return base64.b64decode(src.split(',')[1])
+    path = _editor_image_path(src.rsplit('/', 1)[-1])
+    if path:
+        with open(path, 'rb') as f:
+            return f.read()
+    return None
+
+
 def _generate_pdf_from_content(content: dict, content_type: str) -> BytesIO:
     """
     Génère un PDF à partir du contenu de l'éditeur.
@@ -601,11 +732,8 @@ def _generate_pdf_from_content(content: dict, content_type: str) -> BytesIO:
             elif isinstance(insert, dict) and 'image' in insert:
                 # Image
                 try:
-                    img_data = insert['image']
-                    if img_data.startswith('data:image'):
-                        # Extraire les données base64
-                        img_data = img_data.split(',')[1]
-                        img_bytes = base64.b64decode(img_data)
+                    img_bytes = _read_image_source(insert['image'])
+                    if img_bytes:
                         img = Image.open(BytesIO(img_bytes))
 
                         # Redimensionner si nécessaire
@@ -768,10 +896,8 @@ def _generate_pdf_from_content(content: dict, content_type: str) -> BytesIO:
                     # Convertir position
                     pdf_y = height - top - img_height
 
-                    if img_src.startswith('data:image'):
-                        # Extraire les données base64
-                        img_data = img_src.split(',')[1]
-                        img_bytes = base64.b64decode(img_data)
+                    img_bytes = _read_image_source(img_src)
+                    if img_bytes:
                         img = Image.open(BytesIO(img_bytes))
 
                         # Dessiner l'image
@@ -0,0 +1,288 @@
+"""
+Détection des tableaux à partir des traits d'une page PDF (tableaux à grille)
+Les segments horizontaux et verticaux sont tenus dans des tableaux NumPy:
+fusion des segments alignés, composantes connexes du graphe des croisements
+(un tableau par composante), puis regroupement des coordonnées par tri + écarts.
+Plusieurs tableaux par page, en temps quasi linéaire sur des plans de milliers de tracés.
+"""
+from typing import Any, Dict, List, Sequence, Tuple
+import numpy as np
+
+
+# Segment horizontal: [y, x0, x1]; vertical: [x, y0, y1]
+SegmentArray = np.ndarray
+
+
+def segments_from_drawings(drawings: Sequence[Dict[str, Any]],
+                           max_thickness: float = 2.0) -> Tuple[SegmentArray, SegmentArray]:
+    """
+    Segments horizontaux et verticaux des tracés (page.get_cdrawings() ou page.get_drawings()):
+    traits ('l') et bords des rectangles ('re'); un rectangle plus fin que max_thickness
+    est un trait (filets dessinés en rectangles pleins)
+    """
+    lines = []
+    rects = []
+    for drawing in drawings:
+        for item in drawing.get('items') or ():
+            kind = item[0]
+            if kind == 'l':
+                start, end = item[1], item[2]
+                lines.append((start[0], start[1], end[0], end[1]))
+            elif kind == 're':
+                rect = item[1]
+                rects.append((rect[0], rect[1], rect[2], rect[3]))
+
+    h_parts = []
+    v_parts = []
+    if lines:
+        l = np.asarray(lines, dtype=float)
+        dx = np.abs(l[:, 2] - l[:, 0])
+        dy = np.abs(l[:, 3] - l[:, 1])
+        h = (dy < max_thickness) & (dx >= dy)
+        v = (dx < max_thickness) & ~h
+        h_parts.append(np.column_stack([
+            (l[h, 1] + l[h, 3]) / 2, np.minimum(l[h, 0], l[h, 2]), np.maximum(l[h, 0], l[h, 2])
+        ]))
+        v_parts.append(np.column_stack([
+            (l[v, 0] + l[v, 2]) / 2, np.minimum(l[v, 1], l[v, 3]), np.maximum(l[v, 1], l[v, 3])
+        ]))
+    if rects:
+        r = np.asarray(rects, dtype=float)
+        x0, x1 = np.minimum(r[:, 0], r[:, 2]), np.maximum(r[:, 0], r[:, 2])
+        y0, y1 = np.minimum(r[:, 1], r[:, 3]), np.maximum(r[:, 1], r[:, 3])
+        thin_h = (y1 - y0) < max_thickness
+        thin_v = ((x1 - x0) < max_thickness) & ~thin_h
+        box = ~thin_h & ~thin_v
+        h_parts += [
+            np.column_stack([(y0 + y1)[thin_h] / 2, x0[thin_h], x1[thin_h]]),
+            np.column_stack([y0[box], x0[box], x1[box]]),
+            np.column_stack([y1[box], x0[box], x1[box]]),
+        ]
+        v_parts += [
+            np.column_stack([(x0 + x1)[thin_v] / 2, y0[thin_v], y1[thin_v]]),
+            np.column_stack([x0[box], y0[box], y1[box]]),
+            np.column_stack([x1[box], y0[box], y1[box]]),
+        ]
+
+    def stack(parts):
+        return np.concatenate(parts) if parts else np.empty((0, 3), dtype=float)
+
+    return stack(h_parts), stack(v_parts)
+
+
+def cluster_positions(values: np.ndarray, tolerance: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Regroupe des coordonnées proches (chaînage: écart < tolerance entre voisines triées)
+
+    Returns:
+        (numéro de groupe de chaque valeur, position de chaque groupe = plus petite valeur)
+    """
+    if not len(values):
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=float)
+    order = np.argsort(values, kind='stable')
+    sorted_values = values[order]
+    starts = np.concatenate([[True], np.diff(sorted_values) >= tolerance])
+    groups = np.empty(len(values), dtype=np.intp)
+    groups[order] = np.cumsum(starts) - 1
+    return groups, sorted_values[starts]
+
+
+def merge_segments(groups: np.ndarray, segments: SegmentArray, tolerance: float) -> Tuple[np.ndarray, SegmentArray]:
+    """
+    Fusionne les segments d'un même groupe de coordonnée qui se touchent ou se recouvrent
+    (écart < tolerance): un filet découpé en morceaux devient un seul segment
+
+    Returns:
+        (groupe de chaque segment fusionné, segments fusionnés [position, début, fin])
+    """
+    if not len(segments):
+        return groups, segments
+    order = np.lexsort((segments[:, 1], groups))
+    groups, segments = groups[order], segments[order]
+    # Fin la plus lointaine atteinte par les segments précédents du groupe: un seul maximum cumulé
+    # sur tout le tableau, chaque groupe décalé au-delà de l'étendue des coordonnées
+    low = segments[:, 1:].min()
+    offset = groups * (np.ptp(segments[:, 1:]) + 1)
+    reach = np.maximum.accumulate(segments[:, 2] - low + offset) + low - offset
+    starts = np.concatenate([[True], (groups[1:] != groups[:-1]) | (segments[1:, 1] > reach[:-1] + tolerance)])
+    first = np.flatnonzero(starts)
+    merged = np.column_stack([
+        np.minimum.reduceat(segments[:, 0], first),
+        segments[first, 1],
+        np.maximum.reduceat(segments[:, 2], first),
+    ])
+    return groups[first], merged
+
+
+def _expand(first: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Énumère les intervalles [first[i], first[i] + counts[i]): (indice i, valeur) pour chaque élément"""
+    owners = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owners, np.repeat(first, counts) + offsets
+
+
+def _crossings(h: SegmentArray, v: SegmentArray, tolerance: float,
+               bucket: float = 32.0, chunk_pairs: int = 1 << 21) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Couples (segment horizontal, segment vertical) qui se croisent ou se touchent (à tolerance près)
+
+    Jointure par cases de bucket points: un vertical est inscrit dans les cases de sa colonne
+    qu'il traverse, un horizontal dans celles de sa ligne; un croisement se retrouve dans
+    exactement une case commune, seuls les couples d'une même case sont vérifiés.
+    """
+    empty = (np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp))
+    if not len(h) or not len(v):
+        return empty
+
+    y_first = np.floor((v[:, 1] - tolerance) / bucket).astype(np.int64)
+    y_count = np.floor((v[:, 2] + tolerance) / bucket).astype(np.int64) - y_first + 1
+    v_owner, v_row = _expand(y_first, y_count)
+    v_col = np.floor(v[v_owner, 0] / bucket).astype(np.int64)
+
+    x_first = np.floor((h[:, 1] - tolerance) / bucket).astype(np.int64)
+    x_count = np.floor((h[:, 2] + tolerance) / bucket).astype(np.int64) - x_first + 1
+    h_owner, h_col = _expand(x_first, x_count)
+    h_row = np.floor(h[h_owner, 0] / bucket).astype(np.int64)
+
+    # Clé de case unique (colonne, ligne)
+    row_min = min(v_row.min(), h_row.min())
+    height = max(v_row.max(), h_row.max()) - row_min + 1
+    v_keys = v_col * height + (v_row - row_min)
+    h_keys = h_col * height + (h_row - row_min)
+
+    order = np.argsort(v_keys, kind='stable')
+    v_keys = v_keys[order]
+    lo = np.searchsorted(v_keys, h_keys, side='left')
+    counts = np.searchsorted(v_keys, h_keys, side='right') - lo
+    has_pairs = counts > 0
+    h_owner, lo, counts = h_owner[has_pairs], lo[has_pairs], counts[has_pairs]
+
+    pairs_h, pairs_v = [], []
+    cumulative = np.cumsum(counts)
+    start = 0
+    while start < len(counts):
+        # Paquets pour borner la mémoire des couples candidats
+        base = cumulative[start - 1] if start else 0
+        end = max(int(np.searchsorted(cumulative, base + chunk_pairs, side='right')), start + 1)
+        owners, positions = _expand(lo[start:end], counts[start:end])
+        h_index = h_owner[start:end][owners]
+        v_index = v_owner[order[positions]]
+        hit = ((h[h_index, 0] >= v[v_index, 1] - tolerance) & (h[h_index, 0] <= v[v_index, 2] + tolerance)
+               & (v[v_index, 0] >= h[h_index, 1] - tolerance) & (v[v_index, 0] <= h[h_index, 2] + tolerance))
+        pairs_h.append(h_index[hit])
+        pairs_v.append(v_index[hit])
+        start = end
+
+    if not pairs_h:
+        return empty
+    return np.concatenate(pairs_h), np.concatenate(pairs_v)
+
+
+def _components(n: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Composantes connexes des n nœuds reliés par les arêtes (a, b): étiquette = plus petit nœud"""
+    labels = np.arange(n)
+    while True:
+        roots_a, roots_b = labels[a], labels[b]
+        low = np.minimum(roots_a, roots_b)
+        previous = labels.copy()
+        # Accroche chaque racine à la plus petite racine voisine, puis aplatit les chaînes
+        np.minimum.at(labels, roots_a, low)
+        np.minimum.at(labels, roots_b, low)
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def _edge_coverage(segments: SegmentArray, lines: np.ndarray, n_lines: int,
+                   bounds: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Couverture des bords: [ligne, intervalle] vrai si un segment de la ligne passe par le milieu
+    de l'intervalle [bounds[k], bounds[k + 1]] (tableau de différences + somme cumulée)
+    """
+    middles = (bounds[:-1] + bounds[1:]) / 2
+    first = np.searchsorted(middles, segments[:, 1] - tolerance, side='left')
+    last = np.searchsorted(middles, segments[:, 2] + tolerance, side='right')
+    counts = np.zeros((n_lines, len(middles) + 1), dtype=np.int32)
+    np.add.at(counts, (lines, first), 1)
+    np.add.at(counts, (lines, last), -1)
+    return np.cumsum(counts, axis=1)[:, :-1] > 0
+
+
+def _exact_groups(values: np.ndarray, resolution: float = 0.5) -> np.ndarray:
+    """Groupes de coordonnées identiques (à resolution près): segments colinéaires à fusionner"""
+    return np.unique(np.round(values / resolution), return_inverse=True)[1].reshape(-1)
+
+
+def detect_grids(h: SegmentArray, v: SegmentArray, tolerance: float = 5.0,
+                 join_tolerance: float = 2.0, min_cells: int = 2) -> List[Dict[str, Any]]:
+    """
+    Grilles de la page: une par composante connexe de traits croisés ayant au moins
+    min_cells cellules fermées (un simple cadre n'est pas un tableau).
+    Deux traits se croisent s'ils se touchent à join_tolerance près. Un trait qui croise moins
+    de 2 traits encore retenus n'est pas un bord de cellule (cotes, petits tracés d'un plan):
+    il est écarté, jusqu'à stabilité, avant le calcul des composantes.
+    Les positions des lignes et colonnes sont regroupées par grille, à tolerance près.
+
+    Returns:
+        [{'bbox': [x0, y0, x1, y1], 'rows': positions y triées, 'cols': positions x triées}]
+        triées de haut en bas
+    """
+    if not len(h) or not len(v):
+        return []
+
+    _, h = merge_segments(_exact_groups(h[:, 0]), h, tolerance)
+    _, v = merge_segments(_exact_groups(v[:, 0]), v, tolerance)
+
+    pairs_h, pairs_v = _crossings(h, v, join_tolerance)
+    while len(pairs_h):
+        keep = ((np.bincount(pairs_h, minlength=len(h))[pairs_h] >= 2)
+                & (np.bincount(pairs_v, minlength=len(v))[pairs_v] >= 2))
+        if keep.all():
+            break
+        pairs_h, pairs_v = pairs_h[keep], pairs_v[keep]
+    if not len(pairs_h):
+        return []
+
+    labels = _components(len(h) + len(v), pairs_h, pairs_v + len(h))
+    # Seuls les traits qui se croisent appartiennent à une grille
+    h_members_all = np.flatnonzero(np.bincount(pairs_h, minlength=len(h)))
+    v_members_all = np.flatnonzero(np.bincount(pairs_v, minlength=len(v)))
+    h_labels, v_labels = labels[h_members_all], labels[v_members_all + len(h)]
+
+    # Composantes d'au moins 2 traits dans chaque sens, membres regroupés par étiquette
+    h_count = np.bincount(h_labels, minlength=len(labels))
+    v_count = np.bincount(v_labels, minlength=len(labels))
+    h_order = np.argsort(h_labels, kind='stable')
+    v_order = np.argsort(v_labels, kind='stable')
+    h_sorted, v_sorted = h_labels[h_order], v_labels[v_order]
+
+    grids = []
+    for component in np.flatnonzero((h_count >= 2) & (v_count >= 2)):
+        h_members = h_members_all[h_order[np.searchsorted(h_sorted, component):np.searchsorted(h_sorted, component, side='right')]]
+        v_members = v_members_all[v_order[np.searchsorted(v_sorted, component):np.searchsorted(v_sorted, component, side='right')]]
+        h_rows, rows = cluster_positions(h[h_members, 0], tolerance)
+        v_cols, cols = cluster_positions(v[v_members, 0], tolerance)
+        if len(rows) < 2 or len(cols) < 2:
+            continue
+
+        # Cellules fermées (4 bords tracés): la grille est ramenée à leur étendue,
+        # les bandes d'un cadre de page relié au tableau ne sont pas des cellules
+        h_edges = _edge_coverage(h[h_members], h_rows, len(rows), cols, tolerance)
+        v_edges = _edge_coverage(v[v_members], v_cols, len(cols), rows, tolerance)
+        closed = h_edges[:-1] & h_edges[1:] & v_edges[:-1].T & v_edges[1:].T
+        if closed.sum() < min_cells:
+            continue
+        closed_rows, closed_cols = np.nonzero(closed)
+        rows = rows[closed_rows.min():closed_rows.max() + 2]
+        cols = cols[closed_cols.min():closed_cols.max() + 2]
+        grids.append({
+            'bbox': [float(cols[0]), float(rows[0]), float(cols[-1]), float(rows[-1])],
+            'rows': rows.tolist(),
+            'cols': cols.tolist(),
+        })
+    grids.sort(key=lambda grid: (grid['bbox'][1], grid['bbox'][0]))
+    return grids
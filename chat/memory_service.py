@@ -0,0 +1,284 @@
+"""
+Service de mémoire des conversations
+Conserve les derniers échanges mot pour mot et replie les plus anciens
+dans un résumé glissant stocké sur la Conversation
+"""
+from typing import Dict, List
+from django.conf import settings
+from django.db.models import Sum
+from django.db.models.functions import Length
+from django.utils import timezone
+import threading
+
+from .models import Conversation, Message
+from core.tasks import run_in_background
+
+# Import Groq
+try:
+    from groq import Groq
+    GROQ_AVAILABLE = True
+except ImportError:
+    GROQ_AVAILABLE = False
+
+
+class ConversationMemoryService:
+    """
+    Mémoire bornée d'une conversation:
+    - les derniers messages sont transmis tels quels (dans un budget de tokens)
+    - les messages plus anciens sont repliés dans Conversation.memory_summary
+    - le résumé n'est jamais recalculé depuis le début: seuls les messages
+      postérieurs à memory_summarized_until y sont intégrés
+    """
+
+    CHARS_PER_TOKEN = 4
+
+    # Conversations dont le résumé est en cours de rafraîchissement (par processus)
+    _refreshing = set()
+    _refreshing_lock = threading.Lock()
+
+    @staticmethod
+    def _setting(name: str, default: int) -> int:
+        return getattr(settings, name, default)
+
+    @classmethod
+    def estimate_tokens(cls, text: str) -> int:
+        """Estimation rapide du nombre de tokens (≈ 4 caractères par token)"""
+        return (len(text or '') + cls.CHARS_PER_TOKEN - 1) // cls.CHARS_PER_TOKEN
+
+    @classmethod
+    def _unsummarized_messages(cls, conversation: Conversation):
+        """Messages utilisateur/assistant postérieurs au dernier message résumé"""
+        queryset = conversation.messages.filter(role__in=['user', 'assistant'])
+        if conversation.memory_summarized_until_id:
+            queryset = queryset.filter(id__gt=conversation.memory_summarized_until_id)
+        return queryset
+
+    @classmethod
+    def _recent_ids(cls, conversation: Conversation) -> List[int]:
+        recent_count = cls._setting('CONVERSATION_MEMORY_RECENT_MESSAGES', 6)
+        return list(
+            cls._unsummarized_messages(conversation)
+            .order_by('-created_at', '-id')
+            .values_list('id', flat=True)[:recent_count]
+        )
+
+    @classmethod
+    def get_memory(cls, conversation: Conversation) -> Dict:
+        """
+        Récupère la mémoire à injecter dans le prompt
+
+        Returns:
+            Dict avec 'summary' (str), 'messages' (liste de {'role', 'content'})
+            et 'pending_tokens' (volume non résumé hors fenêtre récente)
+        """
+        recent_count = cls._setting('CONVERSATION_MEMORY_RECENT_MESSAGES', 6)
+        recent_budget = cls._setting('CONVERSATION_MEMORY_RECENT_TOKENS', 3000)
+        summary_budget = cls._setting('CONVERSATION_MEMORY_SUMMARY_TOKENS', 800)
+
+        # Parcours du plus récent au plus ancien, borné en nombre et en tokens
+        recent = []
+        used_tokens = 0
+        latest = cls._unsummarized_messages(conversation).order_by('-created_at', '-id')[:recent_count]
+        for msg in latest:
+            tokens = cls.estimate_tokens(msg.content)
+            if recent and used_tokens + tokens > recent_budget:
+                break
+
+            content = msg.content
+            if tokens > recent_budget:
+                # Un seul message trop long: on garde sa fin
+                content = "[...] " + content[-recent_budget * cls.CHARS_PER_TOKEN:]
+                tokens = recent_budget
+
+            recent.append({'role': msg.role, 'content': content})
+            used_tokens += tokens
+
+        recent.reverse()
+
+        summary = conversation.memory_summary or ''
+        max_summary_chars = summary_budget * cls.CHARS_PER_TOKEN
+        if len(summary) > max_summary_chars:
+            summary = summary[-max_summary_chars:]
+
+        return {
+            'summary': summary,
+            'messages': recent,
+            'pending_tokens': cls.get_pending_tokens(conversation)
+        }
+
+    @classmethod
+    def get_pending_tokens(cls, conversation: Conversation) -> int:
+        """Volume (tokens) des messages non résumés situés avant la fenêtre récente"""
+        older = cls._unsummarized_messages(conversation).exclude(id__in=cls._recent_ids(conversation))
+        chars = older.aggregate(chars=Sum(Length('content')))['chars'] or 0
+        return (chars + cls.CHARS_PER_TOKEN - 1) // cls.CHARS_PER_TOKEN
+
+    @classmethod
+    def as_prompt_messages(cls, memory: Dict) -> List[Dict]:
+        """Convertit la mémoire en messages prêts pour l'API chat"""
+        messages = []
+        if memory.get('summary'):
+            messages.append({
+                "role": "system",
+                "content": f"Résumé des échanges précédents de cette conversation :\n{memory['summary']}"
+            })
+        messages.extend(memory.get('messages', []))
+        return messages
+
+    @classmethod
+    def schedule_refresh_if_needed(cls, conversation: Conversation) -> bool:
+        """
+        Lance le rafraîchissement du résumé en arrière-plan si le reste
+        non résumé dépasse le seuil configuré
+        """
+        threshold = cls._setting('CONVERSATION_MEMORY_REFRESH_TOKENS', 1500)
+        pending = cls.get_pending_tokens(conversation)
+
+        if pending < threshold:
+            return False
+
+        with cls._refreshing_lock:
+            if conversation.id in cls._refreshing:
+                return False
+            cls._refreshing.add(conversation.id)
+
+        print(f"[MEMORY] Conversation {conversation.id}: {pending} tokens à résumer, rafraîchissement planifié")
+        run_in_background(cls._refresh_and_release, conversation.id)
+        return True
+
+    @classmethod
+    def _refresh_and_release(cls, conversation_id: int):
+        try:
+            cls.refresh_summary(conversation_id)
+        finally:
+            with cls._refreshing_lock:
+                cls._refreshing.discard(conversation_id)
+
+    @classmethod
+    def refresh_summary(cls, conversation_id: int) -> int:
+        """
+        Replie les messages non résumés (hors fenêtre récente) dans le résumé existant
+
+        Returns:
+            Nombre de messages intégrés au résumé
+        """
+        batch_budget = cls._setting('CONVERSATION_MEMORY_FOLD_BATCH_TOKENS', 4000)
+        folded = 0
+
+        conversation = Conversation.objects.get(id=conversation_id)
+        recent_ids = cls._recent_ids(conversation)
+        to_fold = cls._unsummarized_messages(conversation).exclude(
+            id__in=recent_ids
+        ).order_by('created_at', 'id')
+
+        batch = []
+        batch_tokens = 0
+        for msg in to_fold.iterator():
+            batch.append(msg)
+            batch_tokens += cls.estimate_tokens(msg.content)
+
+            if batch_tokens >= batch_budget:
+                if not cls._fold_batch(conversation, batch):
+                    return folded
+                folded += len(batch)
+                batch, batch_tokens = [], 0
+
+        if batch and cls._fold_batch(conversation, batch):
+            folded += len(batch)
+
+        print(f"[MEMORY] Conversation {conversation_id}: {folded} message(s) intégrés au résumé")
+        return folded
+
+    @classmethod
+    def _fold_batch(cls, conversation: Conversation, batch: List[Message]) -> bool:
+        """
+        Intègre un lot de messages au résumé et avance le pointeur.
+        La mise à jour est conditionnelle au pointeur lu: si un autre worker
+        a déjà avancé la mémoire, le lot est abandonné.
+        """
+        previous_until = conversation.memory_summarized_until_id
+        new_summary = cls._summarize(conversation.memory_summary, batch)
+
+        updated = Conversation.objects.filter(
+            id=conversation.id,
+            memory_summarized_until_id=previous_until
+        ).update(
+            memory_summary=new_summary,
+            memory_summarized_until_id=batch[-1].id,
+            memory_updated_at=timezone.now()
+        )
+
+        if not updated:
+            print(f"[MEMORY] Conversation {conversation.id}: mémoire déjà mise à jour ailleurs, lot ignoré")
+            return False
+
+        conversation.memory_summary = new_summary
+        conversation.memory_summarized_until_id = batch[-1].id
+        return True
+
+    @classmethod
+    def _summarize(cls, previous_summary: str, batch: List[Message]) -> str:
+        """Met à jour le résumé avec le LLM, ou par extraction en cas d'indisponibilité"""
+        summary_budget = cls._setting('CONVERSATION_MEMORY_SUMMARY_TOKENS', 800)
+        max_chars = summary_budget * cls.CHARS_PER_TOKEN
+
+        transcript = "\n".join(
+            f"{'Utilisateur' if msg.role == 'user' else 'Assistant'}: {msg.content}"
+            for msg in batch
+        )
+
+        if GROQ_AVAILABLE and getattr(settings, 'GROQ_API_KEY', ''):
+            try:
+                client = Groq(api_key=settings.GROQ_API_KEY)
+
+                prompt = f"""Résumé actuel de la conversation :
+{previous_summary or '(aucun)'}
+
+Nouveaux échanges à intégrer :
+{transcript}
+
+Mets à jour le résumé en intégrant les nouveaux échanges. Conserve les faits importants
+(documents cités, valeurs, décisions, demandes en cours de l'utilisateur) et supprime les détails
+superflus. Le résumé doit rester sous {int(summary_budget * 0.75)} mots. Réponds uniquement avec le résumé."""
+
+                response = client.chat.completions.create(
+                    model=settings.GROQ_MODEL,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "Tu maintiens le résumé concis et factuel d'une conversation, en français."
+                        },
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.2,
+                    max_tokens=summary_budget
+                )
+
+                summary = (response.choices[0].message.content or '').strip()
+                if summary:
+                    return summary[-max_chars:]
+
+            except Exception as e:
+                print(f"[MEMORY ERROR] Résumé LLM impossible: {type(e).__name__}: {e}")
+
+        return cls._extractive_summary(previous_summary, batch, max_chars)
+
+    @staticmethod
+    def _extractive_summary(previous_summary: str, batch: List[Message], max_chars: int) -> str:
+        """Repli sans LLM: une ligne courte par message, les plus anciennes lignes sont évincées"""
+        lines = [line for line in (previous_summary or '').split('\n') if line.strip()]
+
+        for msg in batch:
+            speaker = 'Utilisateur' if msg.role == 'user' else 'Assistant'
+            text = ' '.join(msg.content.split())
+            if len(text) > 200:
+                text = text[:200] + '...'
+            lines.append(f"- {speaker}: {text}")
+
+        total = sum(len(line) + 1 for line in lines)
+        start = 0
+        while total > max_chars and start < len(lines) - 1:
+            total -= len(lines[start]) + 1
+            start += 1
+
+        return '\n'.join(lines[start:])[-max_chars:]
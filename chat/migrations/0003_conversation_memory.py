@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0002_generatedfile_conversationdocument"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conversation",
+            name="memory_summarized_until",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="chat.message",
+                verbose_name="Dernier message résumé",
+            ),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="memory_summary",
+            field=models.TextField(blank=True, verbose_name="Résumé de la mémoire"),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="memory_updated_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
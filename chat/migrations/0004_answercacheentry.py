@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0003_conversation_memory"),
+        ("documents", "0004_documentcontent_content_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnswerCacheEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "document_set_key",
+                    models.CharField(
+                        db_index=True,
+                        max_length=64,
+                        verbose_name="Clé de l'ensemble de documents",
+                    ),
+                ),
+                (
+                    "origin",
+                    models.CharField(
+                        choices=[("chat", "Chat"), ("tool", "Outil answer_question")],
+                        default="chat",
+                        max_length=10,
+                    ),
+                ),
+                ("question", models.TextField(verbose_name="Question")),
+                (
+                    "normalized_question",
+                    models.TextField(verbose_name="Question normalisée"),
+                ),
+                (
+                    "question_embedding",
+                    models.JSONField(
+                        blank=True, default=list, verbose_name="Vecteur de la question"
+                    ),
+                ),
+                ("answer", models.TextField(verbose_name="Réponse")),
+                (
+                    "sources",
+                    models.JSONField(blank=True, default=list, verbose_name="Sources"),
+                ),
+                (
+                    "hit_count",
+                    models.IntegerField(
+                        default=0, verbose_name="Nombre d'utilisations"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("last_hit_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "documents",
+                    models.ManyToManyField(
+                        blank=True,
+                        related_name="cached_answers",
+                        to="documents.document",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Réponse en cache",
+                "verbose_name_plural": "Réponses en cache",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["document_set_key", "origin"],
+                        name="chat_answer_documen_e8119b_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,204 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:07
+
+import core.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+BATCH_SIZE = 100
+
+
+def _with_uids(content):
+    """Objets Fabric.js sans uid (ancien éditeur): uid dérivé de la position (cf. ensure_fabric_uids)"""
+    objects = (content or {}).get('objects')
+    if not isinstance(objects, list) or all(obj.get('uid') for obj in objects):
+        return content
+    taken = {obj.get('uid') for obj in objects}
+    with_uids = []
+    for index, obj in enumerate(objects):
+        if not obj.get('uid'):
+            uid, suffix = f"legacy-{index}", 0
+            while uid in taken:
+                suffix += 1
+                uid = f"legacy-{index}-{suffix}"
+            taken.add(uid)
+            obj = dict(obj, uid=uid)
+        with_uids.append(obj)
+    return dict(content, objects=with_uids)
+
+
+def move_drafts_out(apps, schema_editor):
+    """Brouillons de l'éditeur (pdf_structure['editor_draft']) -> instantanés EditorSnapshot"""
+    DocumentContentPayload = apps.get_model('documents', 'DocumentContentPayload')
+    DocumentContent = apps.get_model('documents', 'DocumentContent')
+    EditorSnapshot = apps.get_model('chat', 'EditorSnapshot')
+
+    ids = list(DocumentContentPayload.objects.exclude(pdf_structure=None).values_list('content_id', flat=True))
+    for i in range(0, len(ids), BATCH_SIZE):
+        for payload in DocumentContentPayload.objects.filter(content_id__in=ids[i:i + BATCH_SIZE]):
+            structure = payload.pdf_structure
+            if not isinstance(structure, dict) or 'editor_draft' not in structure:
+                continue
+            draft = structure.pop('editor_draft') or {}
+            document_id = DocumentContent.objects.filter(id=payload.content_id).values_list('document_id', flat=True).first()
+            if draft.get('content_type') in ('quill', 'fabric'):
+                content = draft.get('content')
+                if draft['content_type'] == 'fabric':
+                    content = _with_uids(content)
+                EditorSnapshot.objects.create(
+                    document_id=document_id, content_type=draft['content_type'], content=content, seq=1
+                )
+            payload.pdf_structure = structure or None
+            payload.save(update_fields=['pdf_structure'])
+            if not structure:
+                DocumentContent.objects.filter(id=payload.content_id).update(has_pdf_structure=False)
+
+
+def move_drafts_back(apps, schema_editor):
+    DocumentContentPayload = apps.get_model('documents', 'DocumentContentPayload')
+    DocumentContent = apps.get_model('documents', 'DocumentContent')
+    EditorSnapshot = apps.get_model('chat', 'EditorSnapshot')
+
+    # Dernier instantané de chaque document (les sauvegardes automatiques non repliées sont perdues)
+    seen = set()
+    for snapshot in EditorSnapshot.objects.order_by('document_id', '-seq').iterator(chunk_size=BATCH_SIZE):
+        if snapshot.document_id in seen:
+            continue
+        seen.add(snapshot.document_id)
+        content = DocumentContent.objects.filter(document_id=snapshot.document_id).first()
+        if content is None:
+            continue
+        payload, _ = DocumentContentPayload.objects.get_or_create(content_id=content.id)
+        structure = payload.pdf_structure if isinstance(payload.pdf_structure, dict) else {}
+        if 'editor_draft' in structure:
+            continue
+        structure['editor_draft'] = {
+            'content': snapshot.content,
+            'content_type': snapshot.content_type,
+            'saved_at': snapshot.created_at.isoformat()
+        }
+        payload.pdf_structure = structure
+        payload.save(update_fields=['pdf_structure'])
+        DocumentContent.objects.filter(id=content.id).update(has_pdf_structure=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0004_answercacheentry"),
+        ("documents", "0013_compressed_pdf_structure"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EditorOperation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("seq", models.PositiveIntegerField(verbose_name="Numéro d'ordre")),
+                (
+                    "content_type",
+                    models.CharField(
+                        choices=[
+                            ("quill", "Texte (Quill)"),
+                            ("fabric", "Visuel (Fabric.js)"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("delta", "Delta Quill"),
+                            ("patch", "Patch Fabric.js"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "payload",
+                    core.fields.CompressedJSONField(verbose_name="Modification"),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "document",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="editor_operations",
+                        to="documents.document",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Opération de l'éditeur",
+                "verbose_name_plural": "Opérations de l'éditeur",
+                "ordering": ["document", "seq"],
+                "unique_together": {("document", "seq")},
+            },
+        ),
+        migrations.CreateModel(
+            name="EditorSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "content_type",
+                    models.CharField(
+                        choices=[
+                            ("quill", "Texte (Quill)"),
+                            ("fabric", "Visuel (Fabric.js)"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "content",
+                    core.fields.CompressedJSONField(
+                        verbose_name="Contenu de l'éditeur"
+                    ),
+                ),
+                (
+                    "seq",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Dernière opération incluse"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "document",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="editor_snapshots",
+                        to="documents.document",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Instantané de l'éditeur",
+                "verbose_name_plural": "Instantanés de l'éditeur",
+                "ordering": ["document", "-seq"],
+                "indexes": [
+                    models.Index(
+                        fields=["document", "-seq"],
+                        name="chat_editor_documen_4a763b_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(move_drafts_out, move_drafts_back),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:18
+
+import core.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0005_editor_log"),
+        ("documents", "0013_compressed_pdf_structure"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EditorPageRender",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "content_hash",
+                    models.CharField(
+                        max_length=64, verbose_name="Empreinte du contenu"
+                    ),
+                ),
+                (
+                    "converter_version",
+                    models.PositiveSmallIntegerField(
+                        verbose_name="Version du convertisseur"
+                    ),
+                ),
+                (
+                    "page_number",
+                    models.PositiveIntegerField(verbose_name="Numéro de page"),
+                ),
+                ("quill", core.fields.CompressedJSONField(verbose_name="Delta Quill")),
+                (
+                    "quill_version",
+                    models.CharField(
+                        max_length=16, verbose_name="Jeton de version Quill"
+                    ),
+                ),
+                (
+                    "fabric",
+                    core.fields.CompressedJSONField(verbose_name="Page Fabric.js"),
+                ),
+                (
+                    "fabric_version",
+                    models.CharField(
+                        max_length=16, verbose_name="Jeton de version Fabric.js"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "document",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="editor_page_renders",
+                        to="documents.document",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Rendu de page pour l'éditeur",
+                "verbose_name_plural": "Rendus de pages pour l'éditeur",
+                "ordering": ["document", "page_number"],
+                "unique_together": {
+                    ("document", "content_hash", "converter_version", "page_number")
+                },
+            },
+        ),
+    ]
@@ -6,6 +6,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from documents.models import Document
 import json
+from core.fields import CompressedJSONField
 from database_manager.models import ExternalDatabase
 
 
@@ -30,6 +31,18 @@ class Conversation(models.Model):
     use_documents = models.BooleanField(default=True, verbose_name="Utiliser les documents")
     use_external_db = models.BooleanField(default=False, verbose_name="Utiliser la base externe")
 
+    # Mémoire: résumé glissant des anciens échanges (mis à jour incrémentalement)
+    memory_summary = models.TextField(blank=True, verbose_name="Résumé de la mémoire")
+    memory_summarized_until = models.ForeignKey(
+        'Message',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Dernier message résumé"
+    )
+    memory_updated_at = models.DateTimeField(null=True, blank=True)
+
     # Métadonnées
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -284,3 +297,129 @@ class GeneratedFile(models.Model):
         """Incrémente le compteur de téléchargements"""
         self.downloaded_count += 1
         self.save(update_fields=['downloaded_count'])
+
+
+class AnswerCacheEntry(models.Model):
+    """
+    Réponse mise en cache pour une question posée sur un ensemble de documents.
+    La clé combine les documents et leur version (empreinte du contenu):
+    toute modification d'un document rend ses entrées inaccessibles.
+    """
+    ORIGIN_CHOICES = [
+        ('chat', 'Chat'),
+        ('tool', 'Outil answer_question'),
+    ]
+
+    # SHA-256 des paires "id_document:empreinte_contenu" triées
+    document_set_key = models.CharField(max_length=64, db_index=True, verbose_name="Clé de l'ensemble de documents")
+    documents = models.ManyToManyField(Document, blank=True, related_name='cached_answers')
+    origin = models.CharField(max_length=10, choices=ORIGIN_CHOICES, default='chat')
+
+    # Question
+    question = models.TextField(verbose_name="Question")
+    normalized_question = models.TextField(verbose_name="Question normalisée")
+    question_embedding = models.JSONField(default=list, blank=True, verbose_name="Vecteur de la question")
+
+    # Réponse et provenance (pour citer les sources quand la réponse est servie)
+    answer = models.TextField(verbose_name="Réponse")
+    sources = models.JSONField(default=list, blank=True, verbose_name="Sources")
+
+    # Statistiques
+    hit_count = models.IntegerField(default=0, verbose_name="Nombre d'utilisations")
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_hit_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['document_set_key', 'origin']),
+        ]
+        verbose_name = "Réponse en cache"
+        verbose_name_plural = "Réponses en cache"
+
+    def __str__(self):
+        return f"{self.question[:60]} ({self.hit_count} utilisations)"
+
+
+class EditorSnapshot(models.Model):
+    """
+    État complet du brouillon de l'éditeur (Quill ou Fabric.js) jusqu'à l'opération seq incluse.
+    L'état courant est le dernier instantané suivi des opérations postérieures (EditorOperation).
+    """
+    CONTENT_TYPE_CHOICES = [
+        ('quill', 'Texte (Quill)'),
+        ('fabric', 'Visuel (Fabric.js)'),
+    ]
+
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='editor_snapshots')
+    content_type = models.CharField(max_length=10, choices=CONTENT_TYPE_CHOICES)
+    content = CompressedJSONField(verbose_name="Contenu de l'éditeur")
+    seq = models.PositiveIntegerField(default=0, verbose_name="Dernière opération incluse")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['document', '-seq']
+        indexes = [
+            models.Index(fields=['document', '-seq']),
+        ]
+        verbose_name = "Instantané de l'éditeur"
+        verbose_name_plural = "Instantanés de l'éditeur"
+
+    def __str__(self):
+        return f"{self.document.title} - instantané {self.seq}"
+
+
+class EditorOperation(models.Model):
+    """
+    Sauvegarde automatique de l'éditeur: modification depuis l'opération précédente
+    - delta: delta Quill à composer avec le texte
+    - patch: objets Fabric.js ajoutés ou modifiés, supprimés, ordre et propriétés du canevas
+    Un contenu complet (premier enregistrement, changement de mode, conflit) devient un instantané.
+    """
+    KIND_CHOICES = [
+        ('delta', 'Delta Quill'),
+        ('patch', 'Patch Fabric.js'),
+    ]
+
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='editor_operations')
+    seq = models.PositiveIntegerField(verbose_name="Numéro d'ordre")
+    content_type = models.CharField(max_length=10, choices=EditorSnapshot.CONTENT_TYPE_CHOICES)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    payload = CompressedJSONField(verbose_name="Modification")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['document', 'seq']
+        unique_together = ['document', 'seq']
+        verbose_name = "Opération de l'éditeur"
+        verbose_name_plural = "Opérations de l'éditeur"
+
+    def __str__(self):
+        return f"{self.document.title} - {self.kind} {self.seq}"
+
+
+class EditorPageRender(models.Model):
+    """
+    Représentations d'une page pour l'éditeur (delta Quill, objets Fabric.js), calculées une fois
+    en arrière-plan par version du contenu (content_hash) et du convertisseur (converter_version)
+    """
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='editor_page_renders')
+    content_hash = models.CharField(max_length=64, verbose_name="Empreinte du contenu")
+    converter_version = models.PositiveSmallIntegerField(verbose_name="Version du convertisseur")
+    page_number = models.PositiveIntegerField(verbose_name="Numéro de page")
+
+    quill = CompressedJSONField(verbose_name="Delta Quill")
+    quill_version = models.CharField(max_length=16, verbose_name="Jeton de version Quill")
+    fabric = CompressedJSONField(verbose_name="Page Fabric.js")
+    fabric_version = models.CharField(max_length=16, verbose_name="Jeton de version Fabric.js")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['document', 'page_number']
+        unique_together = ['document', 'content_hash', 'converter_version', 'page_number']
+        verbose_name = "Rendu de page pour l'éditeur"
+        verbose_name_plural = "Rendus de pages pour l'éditeur"
+
+    def __str__(self):
+        return f"{self.document.title} - rendu page {self.page_number}"
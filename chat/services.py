@@ -6,7 +6,10 @@ from typing import List, Dict, Tuple
 from django.db.models import Q
 from django.conf import settings
 from .models import Conversation, Message, QueryContext
+from .memory_service import ConversationMemoryService
+from .answer_cache_service import AnswerCacheService
 from documents.models import Document, DocumentChunk
+from documents.storage import ContentAddressedStorage
 from database_manager.models import ExternalDatabase
 import time
 
@@ -46,7 +49,7 @@ class ContextRetrievalService:
                 try:
                     content = document.content
                     # Découper le texte en morceaux de ~1000 caractères
-                    text = content.raw_text
+                    text = content.get_raw_text()
                     chunk_size = 1000
                     for i in range(0, len(text), chunk_size):
                         chunk_text = text[i:i+chunk_size]
@@ -63,12 +66,15 @@ class ContextRetrievalService:
                     continue
             return contexts[:top_k]
 
+        # Texte des chunks: une lecture des pages par document
+        chunks = DocumentChunk.load_texts(chunks)
+
         # Recherche simple par mots-clés
         query_words = set(query.lower().split())
 
         for chunk in chunks:
             # Calculer un score de pertinence simple
-            chunk_words = set(chunk.content.lower().split())
+            chunk_words = set(chunk.get_text().lower().split())
             common_words = query_words.intersection(chunk_words)
             relevance_score = len(common_words) / len(query_words) if query_words else 0
 
@@ -76,20 +82,20 @@ class ContextRetrievalService:
                 contexts.append({
                     'document': chunk.document,
                     'chunk': chunk,
-                    'content': chunk.content,
+                    'content': chunk.get_text(),
                     'relevance_score': relevance_score,
                     'page_number': chunk.page_number,
                     'chunk_index': chunk.chunk_index
                 })
 
         # Si aucun contexte pertinent trouvé, retourner TOUS les chunks (pas juste top_k)
-        if not contexts and chunks.exists():
+        if not contexts and chunks:
             print("[DEBUG] Aucun contexte pertinent, retour de TOUS les chunks")
             for chunk in chunks:  # Tous les chunks, pas seulement top_k
                 contexts.append({
                     'document': chunk.document,
                     'chunk': chunk,
-                    'content': chunk.content,
+                    'content': chunk.get_text(),
                     'relevance_score': 0.3,  # Score bas
                     'page_number': chunk.page_number,
                     'chunk_index': chunk.chunk_index
@@ -143,9 +149,21 @@ class ResponseGeneratorService:
         """
         Génère une réponse avec un modèle LLM (Groq)
         """
+        return ResponseGeneratorService.generate_llm_answer(query, contexts, conversation_history)[0]
+
+    @staticmethod
+    def generate_llm_answer(query: str, contexts: List[Dict],
+                            conversation_history: List[Dict] = None) -> Tuple[str, bool]:
+        """
+        Génère une réponse avec un modèle LLM (Groq)
+
+        Returns:
+            (réponse, is_fallback): is_fallback est vrai si la réponse est le repli
+            sans LLM (Groq absent, non configuré ou en erreur)
+        """
         # Vérifier si Groq est disponible et configuré
         if not GROQ_AVAILABLE or not hasattr(settings, 'GROQ_API_KEY') or not settings.GROQ_API_KEY:
-            return ResponseGeneratorService.generate_simple_response(query, contexts)
+            return ResponseGeneratorService.generate_simple_response(query, contexts), True
 
         try:
             # Initialiser le client Groq
@@ -162,7 +180,8 @@ class ResponseGeneratorService:
 
                 # Ajouter le chunk si on ne dépasse pas la limite
                 if total_chars + len(content) < max_context_chars:
-                    context_parts.append(f"[Chunk {ctx.get('chunk_index', '?')} du document {doc_title}]\n{content}")
+                    page = f", page {ctx['page_number']}" if ctx.get('page_number') else ''
+                    context_parts.append(f"[Chunk {ctx.get('chunk_index', '?')} du document {doc_title}{page}]\n{content}")
                     total_chars += len(content)
                 else:
                     break
@@ -175,7 +194,14 @@ class ResponseGeneratorService:
                 {
                     "role": "system",
                     "content": "Tu es un assistant intelligent spécialisé dans l'analyse de documents. Réponds de manière précise et concise en français, en te basant uniquement sur le contexte fourni."
-                },
+                }
+            ]
+
+            # Historique borné (résumé glissant + derniers échanges)
+            if conversation_history:
+                messages.extend(conversation_history)
+
+            messages.append(
                 {
                     "role": "user",
                     "content": f"""Contexte provenant des documents:
@@ -185,7 +211,7 @@ Question de l'utilisateur: {query}
 
 Réponds à la question en te basant sur le contexte fourni. Si l'information n'est pas dans le contexte, indique-le clairement."""
                 }
-            ]
+            )
 
             print(f"[DEBUG Groq] Appel à Groq avec modèle: {settings.GROQ_MODEL}")
             print(f"[DEBUG Groq] Longueur du contexte: {len(context_text)} caractères")
@@ -199,7 +225,7 @@ Réponds à la question en te basant sur le contexte fourni. Si l'information n'
             )
 
             print(f"[DEBUG Groq] Réponse reçue avec succès")
-            return response.choices[0].message.content
+            return response.choices[0].message.content, False
 
         except Exception as e:
             # En cas d'erreur, fallback sur la réponse simple
@@ -208,7 +234,7 @@ Réponds à la question en te basant sur le contexte fourni. Si l'information n'
             import traceback
             print(f"[ERREUR Groq] Traceback complet:")
             traceback.print_exc()
-            return ResponseGeneratorService.generate_simple_response(query, contexts)
+            return ResponseGeneratorService.generate_simple_response(query, contexts), True
 
 
 class DocumentUpdateService:
@@ -273,9 +299,8 @@ class DocumentUpdateService:
                 print(f"[INFO] Fichier original trouvé: {doc1.file.path}")
 
                 # Récupérer la structure PDF stockée si disponible
-                pdf_structure = None
-                if hasattr(doc1, 'content') and doc1.content.pdf_structure:
-                    pdf_structure = doc1.content.pdf_structure
+                pdf_structure = doc1.content.get_pdf_structure() if hasattr(doc1, 'content') else None
+                if pdf_structure:
                     print(f"[INFO] Structure PDF récupérée de la DB: {pdf_structure.get('total_tables', 0)} tableau(x)")
                 else:
                     print(f"[WARNING] Pas de structure PDF stockée pour ce document")
@@ -299,9 +324,10 @@ class DocumentUpdateService:
                     file_ext = os.path.splitext(old_filename)[1]
                     new_filename = f"{doc1.title}_updated{file_ext}"
 
-                    # Supprimer l'ancien fichier
+                    # Supprimer l'ancien fichier (sauf s'il est partagé avec un autre document)
                     old_file_path = doc1.file.path
-                    doc1.file.delete(save=False)
+                    ContentAddressedStorage.release(doc1.file.name, exclude_document_id=doc1.id)
+                    doc1.file_hash = ''
 
                     # Sauvegarder le nouveau fichier
                     doc1.file.save(new_filename, ContentFile(modified_file_buffer.read()), save=False)
@@ -313,17 +339,11 @@ class DocumentUpdateService:
                     extraction_result = DocumentExtractorService.extract_text(doc1.file.path, file_ext)
                     extracted_content = extraction_result.get('text', '')
 
-                    if hasattr(doc1, 'content'):
-                        doc1.content.raw_text = extracted_content
-                        doc1.content.word_count = len(extracted_content.split())
-                        doc1.content.save()
-                    else:
-                        from documents.models import DocumentContent
-                        DocumentContent.objects.create(
-                            document=doc1,
-                            raw_text=extracted_content,
-                            word_count=len(extracted_content.split())
-                        )
+                    from documents.models import DocumentContent
+                    content = DocumentContent.objects.filter(document=doc1).first() or DocumentContent(document=doc1)
+                    content.set_payload(raw_text=extracted_content)
+                    content.word_count = len(extracted_content.split())
+                    content.save()
 
                     doc1.save()
 
@@ -366,18 +386,12 @@ class DocumentUpdateService:
             )
 
             # Mettre à jour le contenu du Document 1
-            if hasattr(doc1, 'content'):
-                doc1.content.raw_text = updated_content
-                doc1.content.word_count = len(updated_content.split())
-                doc1.content.save()
-            else:
-                # Créer le contenu s'il n'existe pas
-                from documents.models import DocumentContent
-                DocumentContent.objects.create(
-                    document=doc1,
-                    raw_text=updated_content,
-                    word_count=len(updated_content.split())
-                )
+            # Créer le contenu s'il n'existe pas
+            from documents.models import DocumentContent
+            content = DocumentContent.objects.filter(document=doc1).first() or DocumentContent(document=doc1)
+            content.set_payload(raw_text=updated_content)
+            content.word_count = len(updated_content.split())
+            content.save()
 
             processing_time = time.time() - start_time
 
@@ -636,12 +650,12 @@ class DocumentComparisonService:
         try:
             # Essayer d'abord avec DocumentContent
             if hasattr(document, 'content'):
-                return document.content.raw_text
+                return document.content.get_raw_text()
 
             # Sinon, essayer avec les chunks
-            chunks = document.chunks.all().order_by('chunk_index')
-            if chunks.exists():
-                return '\n\n'.join([chunk.content for chunk in chunks])
+            chunks = DocumentChunk.load_texts(document.chunks.all().order_by('chunk_index'))
+            if chunks:
+                return '\n\n'.join([chunk.get_text() for chunk in chunks])
 
             return ""
         except Exception as e:
@@ -795,6 +809,11 @@ class ChatService:
         """
         start_time = time.time()
 
+        # Mémoire bornée de la conversation (avant d'ajouter la nouvelle question)
+        history = ConversationMemoryService.as_prompt_messages(
+            ConversationMemoryService.get_memory(conversation)
+        )
+
         # 1. Créer le message utilisateur
         user_message = Message.objects.create(
             conversation=conversation,
@@ -802,7 +821,17 @@ class ChatService:
             content=query
         )
 
-        # 2. Récupérer le contexte pertinent
+        # 2. Réponse déjà générée pour une question similaire sur les mêmes documents ?
+        cache_document_ids = None
+        if conversation.use_documents and not (conversation.use_external_db and conversation.external_db):
+            cache_document_ids = list(conversation.documents.values_list('id', flat=True))
+
+        if cache_document_ids:
+            cached = AnswerCacheService.lookup(query, cache_document_ids, origin='chat')
+            if cached:
+                return cls._answer_from_cache(conversation, user_message, cached, start_time)
+
+        # 3. Récupérer le contexte pertinent
         contexts = []
 
         print(f"[DEBUG ChatService] use_documents={conversation.use_documents}, nombre docs={conversation.documents.count()}")
@@ -827,7 +856,7 @@ class ChatService:
             )
             contexts.extend(db_contexts)
 
-        # 3. Sauvegarder les contextes
+        # 4. Sauvegarder les contextes
         for ctx in contexts:
             QueryContext.objects.create(
                 message=user_message,
@@ -838,17 +867,18 @@ class ChatService:
                 chunk_index=ctx.get('chunk_index')
             )
 
-        # 4. Générer la réponse
+        # 5. Générer la réponse
         print(f"[DEBUG ChatService] Nombre total de contextes avant génération: {len(contexts)}")
         if contexts:
             print(f"[DEBUG ChatService] Premier contexte (extrait): {contexts[0]['content'][:200]}...")
 
-        response_text = ResponseGeneratorService.generate_llm_response(
+        response_text, is_fallback = ResponseGeneratorService.generate_llm_answer(
             query,
-            contexts
+            contexts,
+            conversation_history=history
         )
 
-        # 5. Créer le message de réponse
+        # 6. Créer le message de réponse
         response_time = time.time() - start_time
 
         # Extraire les IDs des documents sources
@@ -866,8 +896,54 @@ class ChatService:
             sources_used=source_ids
         )
 
-        # 6. Mettre à jour la conversation
-        conversation.save()  # Met à jour updated_at
+        # Mise en cache (uniquement les réponses réellement générées par le LLM)
+        if cache_document_ids and contexts and not is_fallback:
+            AnswerCacheService.store(
+                query,
+                cache_document_ids,
+                response_text,
+                sources=AnswerCacheService.sources_from_contexts(contexts),
+                origin='chat'
+            )
+
+        # 7. Mettre à jour la conversation
+        # update_fields: ne pas écraser la mémoire mise à jour en arrière-plan
+        conversation.save(update_fields=['updated_at'])  # Met à jour updated_at
+
+        # 8. Replier les anciens échanges dans le résumé si nécessaire (arrière-plan)
+        ConversationMemoryService.schedule_refresh_if_needed(conversation)
+
+        return assistant_message
+
+    @staticmethod
+    def _answer_from_cache(conversation: Conversation, user_message: Message, entry, start_time: float) -> Message:
+        """Crée la réponse à partir d'une entrée du cache, avec ses sources d'origine"""
+        documents = {doc.id: doc for doc in conversation.documents.all()}
+
+        source_ids = []
+        for source in entry.sources:
+            document = documents.get(source.get('document_id'))
+            QueryContext.objects.create(
+                message=user_message,
+                document=document,
+                content=source.get('content', ''),
+                relevance_score=source.get('relevance_score', 0.0),
+                page_number=source.get('page_number'),
+                chunk_index=source.get('chunk_index')
+            )
+            if document:
+                source_ids.append(document.id)
+
+        assistant_message = Message.objects.create(
+            conversation=conversation,
+            role='assistant',
+            content=entry.answer,
+            response_time=time.time() - start_time,
+            sources_used=source_ids
+        )
+
+        conversation.save(update_fields=['updated_at'])
+        ConversationMemoryService.schedule_refresh_if_needed(conversation)
 
         return assistant_message
 
@@ -900,7 +976,8 @@ class ChatService:
     @staticmethod
     def get_conversation_history(conversation: Conversation) -> List[Dict]:
         """
-        Récupère l'historique d'une conversation
+        Récupère l'historique complet d'une conversation (affichage).
+        Pour construire un prompt, utiliser ConversationMemoryService.get_memory
         """
         messages = conversation.messages.all().order_by('created_at')
 
@@ -0,0 +1,21 @@
+# FICHIER: chat/signals.py
+# SIGNAUX DE L'APP CHAT
+# ============================================
+
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from documents.models import Document, DocumentContent
+from .answer_cache_service import AnswerCacheService
+
+
+@receiver(post_save, sender=DocumentContent)
+def invalidate_answer_cache_on_content_change(sender, instance, **kwargs):
+    """Le texte d'un document a changé: ses réponses en cache ne sont plus valides"""
+    if getattr(instance, '_content_hash_changed', False):
+        AnswerCacheService.invalidate_document(instance.document_id)
+
+
+@receiver(pre_delete, sender=Document)
+def invalidate_answer_cache_on_document_delete(sender, instance, **kwargs):
+    AnswerCacheService.invalidate_document(instance.id)
@@ -0,0 +1,113 @@
+"""
+Index spatial des boîtes d'une page PDF
+Grille uniforme (cellules de taille fixe, en points) sur des tableaux NumPy: une requête
+ne teste que les boîtes des cellules qu'elle recouvre, au lieu de toutes les boîtes de la page.
+Les boîtes sont au format [x0, y0, x1, y1] (coordonnées PyMuPDF).
+"""
+import math
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+
+class SpatialGrid:
+    """
+    Grille de boîtes avec requêtes de chevauchement et d'inclusion
+
+    Les boîtes peuvent être ajoutées au fur et à mesure (insert): la grille n'a pas de bornes,
+    les cellules sont indexées par leurs coordonnées entières.
+    """
+
+    DEFAULT_CELL_SIZE = 64.0
+    # Au-delà, la boîte n'est pas répartie dans les cellules: elle est candidate à toutes les requêtes
+    MAX_CELLS_PER_BOX = 1024
+
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE):
+        if cell_size <= 0:
+            raise ValueError(f"Taille de cellule invalide: {cell_size}")
+        self.cell_size = float(cell_size)
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._large: List[int] = []
+        self._boxes: List[Sequence[float]] = []
+        self._array = np.empty((0, 4), dtype=float)
+
+    @classmethod
+    def from_boxes(cls, boxes: Sequence[Sequence[float]], cell_size: float = None) -> 'SpatialGrid':
+        """
+        Grille construite en une fois; sans cell_size, la taille des cellules suit
+        la taille médiane des boîtes (quelques boîtes par cellule)
+        """
+        array = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        if cell_size is None:
+            cell_size = cls.DEFAULT_CELL_SIZE
+            if len(array):
+                sizes = np.maximum(array[:, 2] - array[:, 0], array[:, 3] - array[:, 1])
+                cell_size = max(float(np.median(sizes)) * 2, 8.0)
+        grid = cls(cell_size)
+        for box in array:
+            grid.insert(box)
+        return grid
+
+    def __len__(self) -> int:
+        return len(self._boxes)
+
+    def _cell_range(self, x0: float, y0: float, x1: float, y1: float):
+        size = self.cell_size
+        return (math.floor(x0 / size), math.floor(y0 / size),
+                math.floor(x1 / size), math.floor(y1 / size))
+
+    def insert(self, box: Sequence[float]) -> int:
+        """Ajoute une boîte et retourne son indice"""
+        x0, y0, x1, y1 = (float(value) for value in box[:4])
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        index = len(self._boxes)
+        self._boxes.append((x0, y0, x1, y1))
+        cx0, cy0, cx1, cy1 = self._cell_range(x0, y0, x1, y1)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > self.MAX_CELLS_PER_BOX:
+            self._large.append(index)
+            return index
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self._cells.setdefault((cx, cy), []).append(index)
+        return index
+
+    def _candidates(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """Indices des boîtes enregistrées dans les cellules recouvertes par la zone"""
+        if len(self._array) != len(self._boxes):
+            self._array = np.asarray(self._boxes, dtype=float).reshape(-1, 4)
+        cx0, cy0, cx1, cy1 = self._cell_range(x0, y0, x1, y1)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._cells):
+            # Zone plus grande que la partie occupée de la grille: parcours des cellules existantes
+            lists = [indexes for (cx, cy), indexes in self._cells.items()
+                     if cx0 <= cx <= cx1 and cy0 <= cy <= cy1]
+        else:
+            lists = [self._cells.get((cx, cy), ()) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)]
+        lists = [indexes for indexes in lists if indexes]
+        if self._large:
+            lists.append(self._large)
+        if not lists:
+            return np.empty(0, dtype=np.intp)
+        return np.unique(np.concatenate([np.asarray(indexes, dtype=np.intp) for indexes in lists]))
+
+    def overlapping(self, box: Sequence[float]) -> np.ndarray:
+        """Indices (croissants) des boîtes dont l'intersection avec box est d'aire non nulle"""
+        x0, y0, x1, y1 = (float(value) for value in box[:4])
+        candidates = self._candidates(x0, y0, x1, y1)
+        if not len(candidates):
+            return candidates
+        boxes = self._array[candidates]
+        hit = ((np.minimum(boxes[:, 2], x1) - np.maximum(boxes[:, 0], x0) > 0)
+               & (np.minimum(boxes[:, 3], y1) - np.maximum(boxes[:, 1], y0) > 0))
+        return candidates[hit]
+
+    def contained_in(self, box: Sequence[float], tolerance: float = 0.0) -> np.ndarray:
+        """Indices (croissants) des boîtes entièrement à l'intérieur de box élargie de tolerance"""
+        x0, y0, x1, y1 = (float(value) for value in box[:4])
+        x0, y0, x1, y1 = x0 - tolerance, y0 - tolerance, x1 + tolerance, y1 + tolerance
+        candidates = self._candidates(x0, y0, x1, y1)
+        if not len(candidates):
+            return candidates
+        boxes = self._array[candidates]
+        hit = ((boxes[:, 0] >= x0) & (boxes[:, 1] >= y0)
+               & (boxes[:, 2] <= x1) & (boxes[:, 3] <= y1))
+        return candidates[hit]
@@ -1,3 +1,127 @@
-from django.test import TestCase
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from documents.models import Document
+from documents.storage import ContentAddressedStorage
+from .editor_log_service import EditorLogService, apply_fabric_patch, compose_delta, ensure_fabric_uids
+
+
+class ComposeDeltaTests(SimpleTestCase):
+    """Deltas Quill du journal de l'éditeur (mêmes résultats que quill-delta)"""
+
+    DOCUMENT = [{'insert': 'Bonjour le monde\n'}]
+    # Insertion (emoji: 2 unités UTF-16) et mise en gras
+    FIRST = [{'retain': 8}, {'insert': '😀 '}, {'retain': 2, 'attributes': {'bold': True}}]
+    # Suppression et changement de format à cheval sur l'insertion précédente
+    SECOND = [{'retain': 3}, {'delete': 5}, {'retain': 3, 'attributes': {'bold': None, 'italic': True}}]
+
+    EXPECTED = [
+        {'insert': 'Bon'},
+        {'insert': '😀 ', 'attributes': {'italic': True}},
+        {'insert': 'le', 'attributes': {'bold': True}},
+        {'insert': ' monde\n'},
+    ]
+
+    def test_sequential_changes(self):
+        document = compose_delta(compose_delta(self.DOCUMENT, self.FIRST), self.SECOND)
+        self.assertEqual(document, self.EXPECTED)
+
+    def test_composed_changes(self):
+        self.assertEqual(compose_delta(self.DOCUMENT, compose_delta(self.FIRST, self.SECOND)), self.EXPECTED)
+
+    def test_insert_then_delete_cancel_out(self):
+        change = compose_delta([{'retain': 3}, {'insert': 'abc'}], [{'retain': 3}, {'delete': 3}])
+        self.assertEqual(compose_delta(self.DOCUMENT, change), self.DOCUMENT)
+
+
+class FabricPatchTests(SimpleTestCase):
+    """Patchs Fabric.js, y compris sur les brouillons de l'ancien éditeur (objets sans uid)"""
+
+    LEGACY = {'version': '5.3.0', 'objects': [
+        {'type': 'textbox', 'text': 'A'},
+        {'type': 'textbox', 'text': 'B'},
+        {'type': 'rect', 'width': 10},
+    ]}
+
+    def test_uids_are_stable(self):
+        canvas = ensure_fabric_uids(self.LEGACY)
+        self.assertEqual([obj['uid'] for obj in canvas['objects']], ['legacy-0', 'legacy-1', 'legacy-2'])
+        self.assertEqual(ensure_fabric_uids(self.LEGACY), canvas)
+        self.assertNotIn('uid', self.LEGACY['objects'][0])
+
+    def test_uids_do_not_collide(self):
+        canvas = ensure_fabric_uids({'objects': [{'type': 'rect'}, {'type': 'rect', 'uid': 'legacy-0'}]})
+        self.assertEqual([obj['uid'] for obj in canvas['objects']], ['legacy-0-1', 'legacy-0'])
+
+    def test_patch_on_objects_without_uid(self):
+        edited = dict(ensure_fabric_uids(self.LEGACY)['objects'][0], text='A modifié')
+        canvas = apply_fabric_patch(self.LEGACY, {'objects': {'legacy-0': edited}})
+        self.assertEqual([obj.get('text', obj['type']) for obj in canvas['objects']], ['A modifié', 'B', 'rect'])
+        self.assertEqual(canvas['version'], '5.3.0')
+
+    def test_removed_and_added_objects(self):
+        canvas = apply_fabric_patch(self.LEGACY, {
+            'objects': {'o1': {'type': 'circle'}},
+            'removed': ['legacy-1'],
+        })
+        self.assertEqual([obj['uid'] for obj in canvas['objects']], ['legacy-0', 'legacy-2', 'o1'])
+        canvas = apply_fabric_patch(canvas, {'order': ['o1', 'legacy-0', 'legacy-2']})
+        self.assertEqual([obj['uid'] for obj in canvas['objects']], ['o1', 'legacy-0', 'legacy-2'])
+
+
+class EditorLogServiceTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user('editor')
+        self.document = Document.objects.create(user=user, title='Brouillon', file_type='.pdf')
+
+    def test_legacy_fabric_draft(self):
+        EditorLogService.replace(self.document, 'fabric', FabricPatchTests.LEGACY)
+        state = EditorLogService.current_state(self.document.id)
+        first = state['content']['objects'][0]
+
+        EditorLogService.append(self.document, 'fabric', {'objects': {first['uid']: dict(first, text='A2')}},
+                                state['seq'])
+        EditorLogService.compact(self.document.id)
+
+        objects = EditorLogService.current_state(self.document.id)['content']['objects']
+        self.assertEqual([obj.get('text') for obj in objects], ['A2', 'B', None])
+        self.assertEqual(len({obj['uid'] for obj in objects}), 3)
+
+
+class EditorImageTests(TestCase):
+    """editor_image ne sert que les images extraites, jamais les documents du même stockage"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.force_login(User.objects.create_user('reader'))
+
+    def get(self, name):
+        return self.client.get(reverse('chat:editor_image', args=[name]))
+
+    def test_extracted_image(self):
+        stored = ContentAddressedStorage.store_bytes(b'image', '.png', namespace=ContentAddressedStorage.IMAGE_NAMESPACE)
+        response = self.get(f"{stored.sha256}.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'image')
+
+    def test_uploaded_document_is_not_served(self):
+        for extension in ('pdf', 'txt'):
+            stored = ContentAddressedStorage.store_bytes(b'document', f".{extension}")
+            self.assertEqual(self.get(f"{stored.sha256}.{extension}").status_code, 404)
+
+    def test_images_extracted_before_image_store(self):
+        stored = ContentAddressedStorage.store_bytes(b'legacy', '.png')
+        self.assertEqual(self.get(f"{stored.sha256}.png").status_code, 200)
+
+    def test_page_render_is_not_served(self):
+        stored = ContentAddressedStorage.store_derived('0' * 64, b'render', '.jpg')
+        self.assertEqual(self.get(f"{stored.sha256}.jpg").status_code, 404)
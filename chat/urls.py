@@ -40,6 +40,8 @@ urlpatterns = [
     path('conversation/<int:conversation_id>/editor/', editor.conversation_editor, name='conversation_editor'),
     path('conversation/<int:conversation_id>/editor/<int:document_id>/', editor.conversation_editor, name='conversation_editor_document'),
     path('editor/<int:document_id>/extract/', editor.extract_document_content, name='extract_document_content'),
+    path('editor/<int:document_id>/pages/', editor.extract_document_pages, name='extract_document_pages'),
+    path('editor/images/<str:name>', editor.editor_image, name='editor_image'),
     path('editor/<int:document_id>/save/', editor.save_document_changes, name='save_document_changes'),
     path('editor/<int:document_id>/export/', editor.export_document, name='export_document'),
     path('editor/<int:document_id>/autosave/', editor.auto_save_document, name='auto_save_document'),
@@ -0,0 +1,146 @@
+# FICHIER: core/fields.py
+# CHAMPS DE MODÈLE PARTAGÉS
+# ============================================
+
+from django import forms
+from django.db import models
+import json
+import lzma
+import struct
+import zlib
+
+
+class CompressedJSONField(models.BinaryField):
+    """
+    Valeur JSON stockée compressée (structures PDF, brouillons de l'éditeur, données extraites:
+    objets Fabric.js, opérations Quill et cellules de tableaux très répétitifs).
+
+    Format: 1 octet de codec + longueur du JSON non compressé (4 octets, big-endian) + données.
+    Codecs: 'z' zlib (défaut, décompression rapide), 'x' lzma (plus compact, plus lent),
+    'j' JSON brut (petites valeurs que la compression n'allège pas).
+    Lecture et écriture transparentes (objets Python, comme JSONField), sans lookups JSON.
+    """
+
+    CODECS = {
+        'zlib': b'z',
+        'lzma': b'x',
+    }
+    HEADER = struct.Struct('>cI')
+    MIN_COMPRESS_BYTES = 256
+    ZLIB_LEVEL = 6
+
+    description = "JSON compressé"
+
+    def __init__(self, *args, codec: str = 'zlib', encoder=None, decoder=None, **kwargs):
+        if codec not in self.CODECS:
+            raise ValueError(f"Codec inconnu: {codec} ({', '.join(self.CODECS)})")
+        self.codec = codec
+        self.encoder = encoder
+        self.decoder = decoder
+        kwargs.setdefault('editable', True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs.pop('editable', None)
+        if not self.editable:
+            kwargs['editable'] = False
+        if self.codec != 'zlib':
+            kwargs['codec'] = self.codec
+        if self.encoder is not None:
+            kwargs['encoder'] = self.encoder
+        if self.decoder is not None:
+            kwargs['decoder'] = self.decoder
+        return name, path, args, kwargs
+
+    # ------------------------------------------------------------------
+    # Codec
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def compress(cls, raw: bytes, codec: str = 'zlib') -> bytes:
+        """JSON encodé -> octets stockés"""
+        if len(raw) >= cls.MIN_COMPRESS_BYTES:
+            if codec == 'lzma':
+                data = lzma.compress(raw, preset=6)
+            else:
+                data = zlib.compress(raw, cls.ZLIB_LEVEL)
+            if len(data) < len(raw):
+                return cls.HEADER.pack(cls.CODECS[codec], len(raw)) + data
+        return cls.HEADER.pack(b'j', len(raw)) + raw
+
+    @classmethod
+    def decompress(cls, data: bytes) -> bytes:
+        """Octets stockés -> JSON encodé"""
+        marker, length = cls.HEADER.unpack_from(data)
+        body = memoryview(data)[cls.HEADER.size:]
+        if marker == b'z':
+            raw = zlib.decompress(body, bufsize=max(length, 1))
+        elif marker == b'x':
+            raw = lzma.decompress(body)
+        elif marker == b'j':
+            raw = bytes(body)
+        else:
+            raise ValueError(f"Codec inconnu dans les données compressées: {marker!r}")
+        if len(raw) != length:
+            raise ValueError(f"Données compressées corrompues ({len(raw)} octets au lieu de {length})")
+        return raw
+
+    @classmethod
+    def stored_length(cls, data) -> int:
+        """Taille du JSON non compressé, lue dans l'en-tête (sans décompresser)"""
+        return cls.HEADER.unpack_from(bytes(data[:cls.HEADER.size]))[1] if data else 0
+
+    def encode(self, value) -> bytes:
+        raw = json.dumps(value, cls=self.encoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return self.compress(raw, self.codec)
+
+    def decode(self, data):
+        if not data:
+            return None
+        return json.loads(self.decompress(bytes(data)), cls=self.decoder)
+
+    # ------------------------------------------------------------------
+    # Intégration Django
+    # ------------------------------------------------------------------
+
+    def get_default(self):
+        if self.has_default():
+            return self._get_default()
+        return None
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return self.decode(value)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return self.decode(value)
+        if isinstance(value, str):
+            # Sérialisation (loaddata): JSON en clair
+            return json.loads(value, cls=self.decoder)
+        return value
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        if isinstance(value, (bytes, memoryview)):
+            return value
+        return self.encode(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        return connection.Database.Binary(value) if value is not None else None
+
+    def value_to_string(self, obj):
+        return json.dumps(self.value_from_object(obj), cls=self.encoder, ensure_ascii=False)
+
+    def formfield(self, **kwargs):
+        return super(models.BinaryField, self).formfield(**{
+            'form_class': forms.JSONField,
+            'encoder': self.encoder,
+            'decoder': self.decoder,
+            **kwargs,
+        })
@@ -0,0 +1,72 @@
+# FICHIER: core/tasks.py
+# EXÉCUTION DE TÂCHES EN ARRIÈRE-PLAN
+# ============================================
+# Pool de threads partagé pour les traitements qui ne doivent pas bloquer
+# la requête HTTP (résumés, précalculs, etc.). Dans une vraie app, utiliser Celery.
+
+from concurrent.futures import ThreadPoolExecutor, Future
+from django.conf import settings
+from django.db import connections
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_executors = {}
+_executor_lock = threading.Lock()
+
+
+def _get_executor(pool: str = 'default') -> ThreadPoolExecutor:
+    """
+    Crée le pool à la première utilisation.
+    Taille: BACKGROUND_TASK_WORKERS pour le pool par défaut,
+    BACKGROUND_TASK_POOLS[pool] pour les pools dédiés (ex: 'ingestion')
+    """
+    with _executor_lock:
+        if pool not in _executors:
+            if pool == 'default':
+                workers = getattr(settings, 'BACKGROUND_TASK_WORKERS', 2)
+            else:
+                workers = getattr(settings, 'BACKGROUND_TASK_POOLS', {}).get(pool, 2)
+            _executors[pool] = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix=f'docmind-{pool}' if pool != 'default' else 'docmind-bg'
+            )
+        return _executors[pool]
+
+
+def _run_task(func, args, kwargs):
+    """Exécute la tâche et libère les connexions DB propres au thread"""
+    try:
+        return func(*args, **kwargs)
+    except Exception as e:
+        logger.exception(f"Erreur dans la tâche d'arrière-plan {getattr(func, '__name__', func)}: {e}")
+        return None
+    finally:
+        connections.close_all()
+
+
+def run_in_background(func, *args, **kwargs) -> Future:
+    """
+    Planifie func(*args, **kwargs) dans le pool d'arrière-plan.
+    Si BACKGROUND_TASKS_SYNC est activé (tests, commandes), exécute immédiatement.
+    """
+    return run_in_pool('default', func, *args, **kwargs)
+
+
+def run_in_pool(pool: str, func, *args, **kwargs) -> Future:
+    """
+    Planifie func(*args, **kwargs) dans un pool nommé, de taille bornée:
+    les tâches en excès attendent leur tour sans bloquer les autres pools.
+    Si BACKGROUND_TASKS_SYNC est activé (tests, commandes), exécute immédiatement.
+    """
+    if getattr(settings, 'BACKGROUND_TASKS_SYNC', False):
+        future = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            logger.exception(f"Erreur dans la tâche {getattr(func, '__name__', func)}: {e}")
+            future.set_exception(e)
+        return future
+
+    return _get_executor(pool).submit(_run_task, func, args, kwargs)
@@ -8,17 +8,10 @@ from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.views import LoginView
 from django.contrib import messages
 from django.db.models import Count, Sum
-from documents.models import Document
+from documents.models import Document, DocumentContent
 from chat.models import Conversation
 from database_manager.models import ExternalDatabase, DatabaseSchema
 from .forms import UserRegistrationForm, UserProfileForm, UserUpdateForm
-from django.shortcuts import render, redirect
-from django.contrib import messages
-from documents.models import Document
-from chat.models import Conversation
-import zipfile
-import os
-from django.conf import settings
 
 def home(request):
     """Page d'accueil"""
@@ -143,13 +136,6 @@ def document_actions(request):
     """Document actions page with upload interface"""
     return render(request, 'core/document_actions.html')
 
-from django.shortcuts import render, redirect
-from django.contrib import messages
-from documents.models import Document, DocumentContent
-from chat.models import Conversation
-import os
-import zipfile
-
 def upload_source(request):
     """Handle PDF/ZIP file upload with PROPER processing"""
     if request.method == 'POST':
@@ -161,6 +147,7 @@ def upload_source(request):
             return redirect('core:document_actions')
         
         uploaded_documents = []
+        batches = []
         
         for file in files:
             if file.name.endswith('.pdf'):
@@ -185,13 +172,13 @@ def upload_source(request):
                         full_text = PDFStructureExtractor.extract_text_with_structure(pdf_path)
                         
                         # Create DocumentContent (THIS IS THE FIX!)
-                        DocumentContent.objects.create(
-                            document=document,
+                        content = DocumentContent(document=document, page_count=structure['total_pages'])
+                        content.set_payload(
                             raw_text=full_text,  # ← Save to raw_text
                             processed_text=full_text,
-                            page_count=structure['total_pages'],
                             pdf_structure=structure  # Save full structure too
                         )
+                        content.save()
                         
                         document.status = 'completed'
                         document.save()
@@ -215,65 +202,15 @@ def upload_source(request):
                 uploaded_documents.append(document)
                 
             elif file.name.endswith('.zip'):
-                # Extract PDFs from ZIP
-                zip_path = os.path.join(settings.MEDIA_ROOT, 'temp_' + file.name)
-                
-                with open(zip_path, 'wb+') as destination:
-                    for chunk in file.chunks():
-                        destination.write(chunk)
-                
-                try:
-                    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                        for zip_info in zip_ref.filelist:
-                            if zip_info.filename.endswith('.pdf'):
-                                pdf_content = zip_ref.read(zip_info.filename)
-                                pdf_name = os.path.basename(zip_info.filename)
-                                
-                                pdf_path = os.path.join(settings.MEDIA_ROOT, 'documents', pdf_name)
-                                os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
-                                
-                                with open(pdf_path, 'wb') as pdf_file:
-                                    pdf_file.write(pdf_content)
-                                
-                                document = Document.objects.create(
-                                    title=pdf_name,
-                                    file='documents/' + pdf_name,
-                                    user=request.user if request.user.is_authenticated else None,
-                                    status='processing'
-                                )
-                                
-                                from chat.pdf_extractor import PDFStructureExtractor
-                                try:
-                                    structure = PDFStructureExtractor.extract_structure(pdf_path)
-                                    
-                                    if structure['success']:
-                                        full_text = PDFStructureExtractor.extract_text_with_structure(pdf_path)
-                                        
-                                        DocumentContent.objects.create(
-                                            document=document,
-                                            raw_text=full_text,
-                                            processed_text=full_text,
-                                            page_count=structure['total_pages'],
-                                            pdf_structure=structure
-                                        )
-                                        
-                                        document.status = 'completed'
-                                        document.save()
-                                        print(f"✅ ZIP Document {document.id} processed")
-                                    else:
-                                        document.status = 'error'
-                                        document.save()
-                                        
-                                except Exception as e:
-                                    print(f"❌ Error processing ZIP document: {e}")
-                                    document.status = 'error'
-                                    document.save()
-                                
-                                uploaded_documents.append(document)
-                finally:
-                    if os.path.exists(zip_path):
-                        os.remove(zip_path)
-        
+                # Archive lue en flux: fichiers stockés par empreinte, extraction par le pool d'ingestion
+                from documents.ingestion import ZipIngestionService
+                batch = ZipIngestionService.ingest_zip(
+                    file,
+                    user=request.user if request.user.is_authenticated else None
+                )
+                batches.append(batch)
+                uploaded_documents.extend(batch.documents.all())
+
         if not uploaded_documents:
             messages.error(request, 'Aucun fichier PDF trouvé')
             return redirect('core:document_actions')
@@ -288,6 +225,8 @@ def upload_source(request):
             conversation.documents.set(uploaded_documents)
             
             messages.success(request, f'{len(uploaded_documents)} document(s) traité(s) avec succès!')
+            for batch in batches:
+                messages.info(request, f"Archive {batch.source_name}: {batch.total_count} document(s) en cours d'extraction (lot {batch.id})")
             return redirect('chat:conversation_detail', pk=conversation.pk)
         
         elif agent_type == 'validation':
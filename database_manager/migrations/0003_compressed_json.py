@@ -0,0 +1,99 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:20
+
+import core.fields
+from django.db import migrations, models
+
+
+BATCH_SIZE = 100
+COLUMNS = [
+    ('DatabaseSchema', 'schema_definition'),
+    ('DataExtraction', 'extracted_data'),
+]
+
+
+def _copy_column(model, source, target):
+    """Copie source -> target par lots (la conversion est faite par les champs)"""
+    pks = list(model.objects.exclude(**{f"{source}__isnull": True}).order_by('pk').values_list('pk', flat=True))
+    for i in range(0, len(pks), BATCH_SIZE):
+        rows = model.objects.filter(pk__in=pks[i:i + BATCH_SIZE]).values_list('pk', source)
+        model.objects.bulk_update([model(pk=pk, **{target: value}) for pk, value in rows], [target])
+
+
+def compress_columns(apps, schema_editor):
+    for model_name, field_name in COLUMNS:
+        _copy_column(apps.get_model('database_manager', model_name), field_name, f"{field_name}_compressed")
+
+
+def decompress_columns(apps, schema_editor):
+    for model_name, field_name in COLUMNS:
+        _copy_column(apps.get_model('database_manager', model_name), f"{field_name}_compressed", field_name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("database_manager", "0002_dataextraction"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="databaseschema",
+            name="schema_definition_compressed",
+            field=core.fields.CompressedJSONField(codec="lzma", null=True),
+        ),
+        migrations.AddField(
+            model_name="dataextraction",
+            name="extracted_data_compressed",
+            field=core.fields.CompressedJSONField(codec="lzma", null=True),
+        ),
+        # Colonnes d'origine facultatives le temps de la copie (retour arrière possible)
+        migrations.AlterField(
+            model_name="databaseschema",
+            name="schema_definition",
+            field=models.JSONField(null=True, verbose_name="Définition du schéma"),
+        ),
+        migrations.AlterField(
+            model_name="dataextraction",
+            name="extracted_data",
+            field=models.JSONField(
+                null=True,
+                help_text="JSON contenant les données du document formatées selon le schéma",
+                verbose_name="Données extraites",
+            ),
+        ),
+        migrations.RunPython(compress_columns, decompress_columns),
+        migrations.RemoveField(
+            model_name="databaseschema",
+            name="schema_definition",
+        ),
+        migrations.RemoveField(
+            model_name="dataextraction",
+            name="extracted_data",
+        ),
+        migrations.RenameField(
+            model_name="databaseschema",
+            old_name="schema_definition_compressed",
+            new_name="schema_definition",
+        ),
+        migrations.RenameField(
+            model_name="dataextraction",
+            old_name="extracted_data_compressed",
+            new_name="extracted_data",
+        ),
+        migrations.AlterField(
+            model_name="databaseschema",
+            name="schema_definition",
+            field=core.fields.CompressedJSONField(
+                codec="lzma", verbose_name="Définition du schéma"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="dataextraction",
+            name="extracted_data",
+            field=core.fields.CompressedJSONField(
+                codec="lzma",
+                help_text="JSON contenant les données du document formatées selon le schéma",
+                verbose_name="Données extraites",
+            ),
+        ),
+    ]
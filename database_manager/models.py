@@ -4,6 +4,7 @@
 
 from django.db import models
 from django.contrib.auth.models import User
+from core.fields import CompressedJSONField
 from documents.models import Document
 
 
@@ -28,8 +29,8 @@ class DatabaseSchema(models.Model):
     name = models.CharField(max_length=255, verbose_name="Nom du schéma")
     description = models.TextField(blank=True, verbose_name="Description")
 
-    # Schéma JSON contenant les tables, champs, relations
-    schema_definition = models.JSONField(verbose_name="Définition du schéma")
+    # Schéma JSON contenant les tables, champs, relations (compressé lzma: écrit une fois, lu rarement)
+    schema_definition = CompressedJSONField(codec='lzma', verbose_name="Définition du schéma")
 
     # Statut du schéma
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='proposed')
@@ -297,8 +298,9 @@ class DataExtraction(models.Model):
         verbose_name="Document source"
     )
 
-    # JSON contenant les données extraites structurées selon le schéma
-    extracted_data = models.JSONField(
+    # JSON contenant les données extraites structurées selon le schéma (compressé lzma)
+    extracted_data = CompressedJSONField(
+        codec='lzma',
         verbose_name="Données extraites",
         help_text="JSON contenant les données du document formatées selon le schéma"
     )
@@ -6,6 +6,7 @@ from django.conf import settings
 import json
 from .models import DatabaseSchema, DatabaseTable, DatabaseField, DataExtraction
 from documents.models import Document, DocumentAnalysis, DocumentChunk
+from documents.entity_extractor import EntityExtractor
 
 # Import Groq pour la génération de schémas
 try:
@@ -41,10 +42,10 @@ Résumé du document: {analysis.summary[:1000]}
 
 Mots-clés: {', '.join(analysis.keywords[:20])}
 
-Entités identifiées: {json.dumps(analysis.entities, ensure_ascii=False)[:500]}
+Entités identifiées: {json.dumps(EntityExtractor.summary(analysis.entities), ensure_ascii=False)[:1500]}
 
 Extrait du contenu:
-{content.raw_text[:3000]}
+{content.get_text_preview(3000)}
 
 Fournis un schéma de base de données complet en JSON avec cette structure:
 {{
@@ -378,11 +379,11 @@ class DataExtractionService:
             chunks = DocumentChunk.objects.filter(document=document).order_by('chunk_index')
 
             # Construire le texte complet (limité pour ne pas dépasser les limites de l'API)
-            full_text = content.raw_text[:20000]  # Limiter à 20000 caractères
+            full_text = content.get_text_preview(20000)  # Limiter à 20000 caractères
 
             # Si on a des chunks, les utiliser aussi
             if chunks.exists():
-                chunk_texts = [chunk.content for chunk in chunks[:30]]  # Max 30 chunks
+                chunk_texts = [chunk.get_text() for chunk in DocumentChunk.load_texts(chunks[:30])]  # Max 30 chunks
                 chunks_text = "\n\n---\n\n".join(chunk_texts)
                 full_text = chunks_text[:20000]  # Prioriser les chunks si disponibles
 
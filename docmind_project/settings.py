@@ -184,9 +184,104 @@ MESSAGE_TAGS = {
 FILE_UPLOAD_MAX_MEMORY_SIZE = 52428800  # 50 MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 52428800  # 50 MB
 
+# Upload fractionné et reprenable (parties lues en flux, hors DATA_UPLOAD_MAX_MEMORY_SIZE)
+UPLOAD_PART_SIZE = 8 * 1024 * 1024            # Taille fixe des parties (la dernière peut être plus courte)
+UPLOAD_MAX_FILE_BYTES = 500 * 1024 * 1024     # Taille maximale d'un fichier
+UPLOAD_SESSION_TTL_HOURS = 24                 # Uploads inachevés supprimés après ce délai d'inactivité
+
 # ---------------------------------------------------------
 # API KEYS
 # ---------------------------------------------------------
 GROQ_API_KEY = os.getenv('GROQ_API_KEY', '')
 GROQ_MODEL = os.getenv('GROQ_MODEL', 'llama-3.3-70b-versatile')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')  # Optionnel
+
+# ---------------------------------------------------------
+# TÂCHES EN ARRIÈRE-PLAN
+# ---------------------------------------------------------
+BACKGROUND_TASK_WORKERS = int(os.getenv('BACKGROUND_TASK_WORKERS', '2'))
+BACKGROUND_TASK_POOLS = {
+    'ingestion': int(os.getenv('INGESTION_WORKERS', '2')),  # Extraction des documents importés par lot
+}
+BACKGROUND_TASKS_SYNC = os.getenv('BACKGROUND_TASKS_SYNC', 'false').lower() == 'true'
+
+# ---------------------------------------------------------
+# MÉMOIRE DES CONVERSATIONS
+# ---------------------------------------------------------
+CONVERSATION_MEMORY_RECENT_MESSAGES = 6      # Derniers messages conservés mot pour mot
+CONVERSATION_MEMORY_RECENT_TOKENS = 3000     # Budget (tokens) de l'historique verbatim
+CONVERSATION_MEMORY_SUMMARY_TOKENS = 800     # Taille maximale du résumé glissant
+CONVERSATION_MEMORY_REFRESH_TOKENS = 1500    # Reste non résumé déclenchant un rafraîchissement
+CONVERSATION_MEMORY_FOLD_BATCH_TOKENS = 4000 # Volume maximal replié par appel au LLM
+
+# ---------------------------------------------------------
+# CACHE DES RÉPONSES
+# ---------------------------------------------------------
+ANSWER_CACHE_ENABLED = os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() == 'true'
+ANSWER_CACHE_SIMILARITY_THRESHOLD = 0.9   # Similarité cosinus minimale entre questions
+ANSWER_CACHE_MIN_QUESTION_WORDS = 3       # Questions plus courtes: jamais mises en cache
+ANSWER_CACHE_MAX_CANDIDATES = 200         # Entrées comparées par recherche
+ANSWER_CACHE_MAX_ENTRIES_PER_SET = 200    # Entrées conservées par ensemble de documents
+
+# ---------------------------------------------------------
+# AGENT
+# ---------------------------------------------------------
+AGENT_DIGEST_MAX_CHARS = 6000  # Budget des condensés de documents injectés dans le prompt
+
+# ---------------------------------------------------------
+# DÉCOUPAGE DES DOCUMENTS
+# ---------------------------------------------------------
+CHUNK_MAX_TOKENS = 250      # Taille maximale d'un segment (≈ 1000 caractères)
+CHUNK_OVERLAP_TOKENS = 40   # Recouvrement entre segments consécutifs d'une même page
+
+# Traitement en flux: résumé, mots-clés et entités calculés sur le début du texte
+# (les termes indexés pour le TF-IDF couvrent tout le document)
+DOCUMENT_ANALYSIS_MAX_CHARS = 2000000
+
+# ---------------------------------------------------------
+# EXTRACTION DES PDF VOLUMINEUX
+# ---------------------------------------------------------
+# Mode mémoire bornée: caches de pdfplumber libérés après chaque page,
+# fichier rouvert par fenêtres de pages
+PDF_BOUNDED_MEMORY = os.getenv('PDF_BOUNDED_MEMORY', 'auto').lower()  # 'auto', 'true' ou 'false'
+PDF_BOUNDED_MEMORY_MIN_PAGES = 100   # En mode 'auto': seuil de pages déclenchant le mode borné
+PDF_BOUNDED_WINDOW_PAGES = 50        # Pages traitées avant de rouvrir le fichier
+PDF_PAGE_BATCH_SIZE = 50             # Pages (DocumentPage) enregistrées par requête
+
+# Extraction dans un processus fils surveillé (un PDF pathologique ne bloque pas la file)
+PDF_EXTRACTION_SANDBOX = os.getenv('PDF_EXTRACTION_SANDBOX', 'true').lower() == 'true'
+PDF_EXTRACTION_TIMEOUT = 300       # Durée maximale de l'extraction d'un document (secondes)
+PDF_PAGE_TIMEOUT = 30              # Durée maximale d'une page avant repli en texte seul
+PDF_TEXT_ONLY_GRACE_TIMEOUT = 60   # Délai accordé au texte seul des pages restantes après le timeout
+PDF_EXTRACTION_MEMORY_MB = 2048    # Espace d'adressage maximal du processus d'extraction (0: illimité)
+
+# Documents PyMuPDF gardés ouverts par processus (extraction de l'éditeur, rendus de pages, export)
+PDF_POOL_MAX_OPEN = 16        # Documents ouverts au plus (les moins récemment utilisés sont fermés)
+PDF_POOL_WAIT_SECONDS = 5     # Attente d'un document rendu quand tous sont prêtés, puis ouverture hors budget
+
+# ---------------------------------------------------------
+# RENDUS DES PAGES PDF (VIGNETTES, FONDS DE L'ÉDITEUR)
+# ---------------------------------------------------------
+# Pages rastérisées en JPEG à quelques résolutions fixes, en cache dans le stockage par empreinte
+PAGE_RENDER_DPIS = (36, 96, 192)    # Résolutions proposées (les autres sont refusées)
+PAGE_RENDER_THUMBNAIL_DPI = 36      # Vignettes de la liste des documents
+PAGE_RENDER_EDITOR_DPI = 96         # Fond des pages de l'éditeur Fabric.js
+PAGE_RENDER_TILE_SIZE = 512         # Côté des tuiles (pixels) pour les grandes résolutions
+PAGE_RENDER_JPEG_QUALITY = 80
+PAGE_RENDER_CACHE_SECONDS = 31536000  # Cache navigateur des URL versionnées (le rendu ne change pas)
+
+# ---------------------------------------------------------
+# IMPORT D'ARCHIVES ZIP
+# ---------------------------------------------------------
+ZIP_MAX_MEMBERS = 500                        # Fichiers par archive
+ZIP_MAX_MEMBER_BYTES = 200 * 1024 * 1024     # Taille décompressée d'un fichier
+ZIP_MAX_TOTAL_BYTES = 1024 * 1024 * 1024     # Taille décompressée de l'archive
+ZIP_MAX_COMPRESSION_RATIO = 100              # Rapport décompressé / compressé (bombes ZIP)
+
+# ---------------------------------------------------------
+# ÉDITEUR
+# ---------------------------------------------------------
+EDITOR_LOG_COMPACT_OPS = 50   # Sauvegardes automatiques (deltas, patchs) repliées ensuite dans un instantané
+EDITOR_PAGE_WINDOW = 5        # Pages chargées par requête de l'éditeur (première fenêtre, puis préchargement)
+EDITOR_PAGE_WINDOW_MAX = 20   # Taille maximale d'une fenêtre de pages
+EDITOR_IMAGE_CACHE_SECONDS = 31536000  # Images extraites (noms par empreinte, jamais modifiées): cache navigateur d'un an
@@ -3,7 +3,7 @@
 # ============================================
 
 from django.contrib import admin
-from .models import Document, DocumentContent, DocumentAnalysis, DocumentChunk
+from .models import Document, DocumentContent, DocumentAnalysis, DocumentChunk, DocumentDigest, DocumentPage, IngestionBatch, IngestionCheckpoint, UploadSession
 
 
 @admin.register(Document)
@@ -29,7 +29,7 @@ class DocumentAdmin(admin.ModelAdmin):
 
 @admin.register(DocumentContent)
 class DocumentContentAdmin(admin.ModelAdmin):
-    list_display = ['document', 'word_count', 'page_count', 'language', 'created_at']
+    list_display = ['document', 'word_count', 'page_count', 'text_length', 'has_pdf_structure', 'text_in_pages', 'language', 'created_at']
     list_filter = ['language', 'created_at']
     search_fields = ['document__title']
     readonly_fields = ['created_at', 'updated_at']
@@ -47,4 +47,40 @@ class DocumentChunkAdmin(admin.ModelAdmin):
     list_display = ['document', 'chunk_index', 'page_number', 'created_at']
     list_filter = ['document', 'created_at']
     search_fields = ['document__title', 'content']
-    readonly_fields = ['created_at']
\ No newline at end of file
+    readonly_fields = ['created_at']
+
+@admin.register(DocumentPage)
+class DocumentPageAdmin(admin.ModelAdmin):
+    list_display = ['document', 'page_number', 'start_char', 'physical', 'created_at']
+    search_fields = ['document__title', 'text']
+    readonly_fields = ['created_at']
+
+@admin.register(DocumentDigest)
+class DocumentDigestAdmin(admin.ModelAdmin):
+    list_display = ['document', 'version', 'updated_at']
+    search_fields = ['document__title']
+    readonly_fields = ['content_hash', 'created_at', 'updated_at']
+
+
+@admin.register(IngestionBatch)
+class IngestionBatchAdmin(admin.ModelAdmin):
+    list_display = ['source_name', 'user', 'status', 'total_count', 'processed_count', 'failed_count', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['source_name', 'user__username']
+    readonly_fields = ['created_at', 'finished_at']
+
+
+@admin.register(IngestionCheckpoint)
+class IngestionCheckpointAdmin(admin.ModelAdmin):
+    list_display = ['path', 'source_root', 'status', 'page_count', 'updated_at']
+    list_filter = ['status', 'source_root']
+    search_fields = ['path', 'error']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'user', 'status', 'total_size', 'received_bytes', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['filename', 'title', 'user__username']
+    readonly_fields = ['parts', 'created_at', 'updated_at']
@@ -0,0 +1,266 @@
+# FICHIER: documents/cue_matcher.py
+# DÉTECTION DU TYPE, DE LA LANGUE ET DE LA STRUCTURE EN UNE PASSE
+# ============================================
+# Tous les mots indicateurs (types de documents, langues, sections) sont compilés
+# dans un automate d'Aho–Corasick sur les mots: le texte est parcouru une seule fois
+# et toutes les occurrences sont comptées en même temps.
+
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import copy
+import re
+import threading
+
+
+# Listes par défaut. L'ordre des types sert à départager les égalités.
+# Extensibles via le paramètre système DocumentCueClassifier.SETTINGS_KEY (JSON), par exemple:
+# {"document_types": {"Certificat d'analyse": ["certificat d'analyse", "coa"]},
+#  "languages": {"Français": ["notamment"]}}
+DEFAULT_CUES = {
+    'document_types': {
+        'Contrat': ['contrat', 'contract', 'agreement', 'accord'],
+        'Rapport': ['rapport', 'report', 'étude', 'study'],
+        'Document financier': ['facture', 'invoice', 'devis', 'quote'],
+        'Directive/Règlement': ['guideline', 'directive', 'règlement', 'regulation'],
+        'Manuel/Guide': ['manuel', 'manual', 'guide', 'documentation'],
+        'Article/Publication': ['article', 'publication', 'journal', 'research'],
+        'Lettre/Correspondance': ['lettre', 'letter', 'correspondance'],
+    },
+    'languages': {
+        'Français': ['le', 'la', 'les', 'un', 'une', 'des', 'de', 'du', 'et', 'est', 'dans', 'pour', 'avec', 'que'],
+        'Anglais': ['the', 'a', 'an', 'of', 'and', 'is', 'in', 'for', 'with', 'that', 'this'],
+    },
+    'sections': {
+        'table_of_contents': ['sommaire', 'table des matières', 'table of contents', 'contents'],
+        'bibliography': ['bibliographie', 'références bibliographiques', 'bibliography', 'references'],
+    },
+}
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+class CueAutomaton:
+    """
+    Automate d'Aho–Corasick dont l'alphabet est constitué de mots:
+    une expression indicatrice de plusieurs mots ("table des matières") est un chemin
+    """
+
+    def __init__(self, cues: Dict[str, Dict[str, List[str]]]):
+        self.cues = cues
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # Sorties de chaque état: (groupe, label, nombre de mots de l'expression)
+        self.output: List[List[Tuple[str, str, int]]] = [[]]
+
+        for group, labels in cues.items():
+            for label, phrases in labels.items():
+                for phrase in phrases:
+                    words = WORD_PATTERN.findall(phrase.lower())
+                    if words:
+                        self._add(words, (group, label, len(words)))
+
+        self._build_failure_links()
+
+    def _add(self, words: List[str], payload: Tuple[str, str, int]):
+        state = 0
+        for word in words:
+            next_state = self.goto[state].get(word)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][word] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        if payload not in self.output[state]:
+            self.output[state].append(payload)
+
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(word, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def step(self, state: int, word: str) -> int:
+        """Transition sur un mot (en suivant les liens d'échec si nécessaire)"""
+        goto = self.goto
+        while state and word not in goto[state]:
+            state = self.fail[state]
+        return goto[state].get(word, 0)
+
+
+class DocumentCueClassifier:
+    """
+    Classification d'un document en une passe: type, langue, structure.
+    Les décisions de type et de langue sont figées dès qu'elles sont sûres;
+    si la structure n'est pas demandée, le parcours s'arrête alors.
+    """
+
+    SETTINGS_KEY = 'document_cues'
+
+    # Le titre compte davantage que le corps du texte
+    TITLE_WEIGHT = 3
+
+    # Un type est retenu dès qu'il a TYPE_MIN_HITS occurrences et TYPE_MARGIN d'avance
+    TYPE_MIN_HITS = 5
+    TYPE_MARGIN = 3
+
+    # La langue est retenue dès LANGUAGE_MIN_HITS occurrences avec un rapport LANGUAGE_RATIO
+    LANGUAGE_MIN_HITS = 30
+    LANGUAGE_RATIO = 3
+
+    # Fréquence de vérification des décisions (en mots)
+    CHECK_EVERY = 256
+
+    # Titres numérotés en début de ligne (1., 2., I., II., A., ...)
+    TOKEN_PATTERN = re.compile(r'^[ \t]*(?P<num>(?:\d{1,3}|[IVX]{1,5}|[A-Z])\.)(?=\s)|(?P<word>\w+)', re.MULTILINE)
+    MAX_HEADING_LENGTH = 100
+
+    _automaton: Optional[CueAutomaton] = None
+    _automaton_version = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_cues(cls) -> Dict:
+        """Listes par défaut complétées par le paramètre système (si présent)"""
+        from core.models import SystemSettings
+
+        cues = copy.deepcopy(DEFAULT_CUES)
+        setting = SystemSettings.objects.filter(key=cls.SETTINGS_KEY).first()
+        if setting is None:
+            return cues
+
+        try:
+            extra = setting.get_value()
+        except ValueError as e:
+            print(f"[WARNING] Paramètre {cls.SETTINGS_KEY} invalide, listes par défaut utilisées: {e}")
+            return cues
+
+        for group, labels in extra.items():
+            if group not in cues:
+                continue
+            for label, phrases in labels.items():
+                existing = cues[group].setdefault(label, [])
+                existing.extend(p for p in phrases if p not in existing)
+        return cues
+
+    @classmethod
+    def get_automaton(cls) -> CueAutomaton:
+        """Automate compilé, reconstruit seulement quand le paramètre système change"""
+        from core.models import SystemSettings
+        version = SystemSettings.objects.filter(key=cls.SETTINGS_KEY).values_list('updated_at', flat=True).first()
+
+        with cls._lock:
+            if cls._automaton is None or cls._automaton_version != version:
+                cls._automaton = CueAutomaton(cls.get_cues())
+                cls._automaton_version = version
+            return cls._automaton
+
+    @classmethod
+    def _type_decided(cls, counts: Dict[str, int]) -> bool:
+        ranked = sorted(counts.values(), reverse=True) + [0, 0]
+        return ranked[0] >= cls.TYPE_MIN_HITS and ranked[0] - ranked[1] >= cls.TYPE_MARGIN
+
+    @classmethod
+    def _language_decided(cls, counts: Dict[str, int]) -> bool:
+        ranked = sorted(counts.values(), reverse=True) + [0, 0]
+        return sum(ranked) >= cls.LANGUAGE_MIN_HITS and ranked[0] >= cls.LANGUAGE_RATIO * max(ranked[1], 1)
+
+    @staticmethod
+    def _best_label(counts: Dict[str, int], order: List[str], default: str) -> str:
+        """Label le plus fréquent; à égalité, le premier dans l'ordre des listes"""
+        if not counts or max(counts.values()) == 0:
+            return default
+        return max(order, key=lambda label: (counts.get(label, 0), -order.index(label)))
+
+    @classmethod
+    def classify(cls, text: str, title: str = '', with_structure: bool = True) -> Dict:
+        """
+        Parcourt le texte une fois et retourne:
+        - document_type, type_counts
+        - language, language_counts
+        - structure (si demandée): sections numérotées, sommaire, bibliographie
+        - words_scanned
+        """
+        automaton = cls.get_automaton()
+        cues = automaton.cues
+        type_order = list(cues['document_types'])
+        language_order = list(cues['languages'])
+
+        type_counts = {label: 0 for label in type_order}
+        language_counts = {label: 0 for label in language_order}
+        section_counts = {label: 0 for label in cues.get('sections', {})}
+        sections = []
+
+        # Le titre d'abord, avec un poids plus fort pour le type
+        state = 0
+        for word in WORD_PATTERN.findall((title or '').lower()):
+            state = automaton.step(state, word)
+            for group, label, _ in automaton.output[state]:
+                if group == 'document_types':
+                    type_counts[label] += cls.TITLE_WEIGHT
+
+        type_done = language_done = False
+        state = 0
+        words_scanned = 0
+        line_number, line_pos = 0, 0
+        text = text or ''
+
+        for match in cls.TOKEN_PATTERN.finditer(text):
+            if match.lastgroup == 'num':
+                if with_structure:
+                    start = match.start('num')
+                    line_end = text.find('\n', start)
+                    line = text[start:line_end if line_end != -1 else len(text)].strip()
+                    if len(line) < cls.MAX_HEADING_LENGTH:
+                        line_number += text.count('\n', line_pos, start)
+                        line_pos = start
+                        sections.append({'title': line, 'line_number': line_number})
+                continue
+
+            state = automaton.step(state, match.group('word').lower())
+            for group, label, _ in automaton.output[state]:
+                if group == 'document_types':
+                    if not type_done:
+                        type_counts[label] += 1
+                elif group == 'languages':
+                    if not language_done:
+                        language_counts[label] += 1
+                elif group == 'sections':
+                    section_counts[label] += 1
+
+            words_scanned += 1
+            if words_scanned % cls.CHECK_EVERY == 0:
+                type_done = type_done or cls._type_decided(type_counts)
+                language_done = language_done or cls._language_decided(language_counts)
+                if type_done and language_done and not with_structure:
+                    break
+
+        result = {
+            'document_type': cls._best_label(type_counts, type_order, 'Document général'),
+            'type_counts': type_counts,
+            'language': cls._best_label(language_counts, language_order, 'Non détectée'),
+            'language_counts': language_counts,
+            'words_scanned': words_scanned,
+        }
+
+        # Égalité parfaite entre langues: indécidable
+        ranked_languages = sorted(language_counts.values(), reverse=True) + [0, 0]
+        if ranked_languages[0] == ranked_languages[1]:
+            result['language'] = 'Non détectée'
+
+        if with_structure:
+            result['structure'] = {
+                'sections': sections,
+                'has_table_of_contents': section_counts.get('table_of_contents', 0) > 0,
+                'has_bibliography': section_counts.get('bibliography', 0) > 0,
+                'cue_counts': section_counts,
+            }
+
+        return result
@@ -0,0 +1,364 @@
+# FICHIER: documents/digest_service.py
+# CONDENSÉS DE DOCUMENTS POUR L'AGENT
+# ============================================
+# Calculés une fois en arrière-plan après le traitement du document,
+# puis injectés dans le prompt de l'agent à la place du texte complet.
+
+from bisect import bisect_right
+from collections import Counter
+from typing import Dict, List, Optional
+import re
+import threading
+
+from .models import Document, DocumentContent, DocumentDigest
+from .entity_extractor import EntityExtractor
+from core.tasks import run_in_background
+
+
+class DocumentDigestService:
+    """
+    Construit et exploite les condensés (DocumentDigest):
+    plan avec positions, résumés extractifs par section, tableaux, entités
+    """
+
+    # À incrémenter quand l'algorithme change: les anciens condensés sont recalculés
+    DIGEST_VERSION = 2
+
+    MAX_SECTIONS = 80
+    MAX_TABLES = 20
+    MAX_ENTITIES_PER_TYPE = 15
+    SECTION_SUMMARY_CHARS = 300
+    FALLBACK_BLOCK_CHARS = 4000
+
+    NUMBERED_HEADING = re.compile(r'^((?:\d{1,2}\.)+\d{0,2}|\d{1,2}\)|[IVX]{1,5}\.|[A-H]\.)\s+[A-ZÀ-Ý]')
+
+    STOPWORDS = {
+        'le', 'la', 'les', 'un', 'une', 'des', 'de', 'du', 'et', 'ou', 'dans', 'sur',
+        'pour', 'par', 'avec', 'sans', 'sous', 'ce', 'ces', 'est', 'sont', 'que', 'qui',
+        'quel', 'quelle', 'quels', 'quelles', 'au', 'aux', 'en', 'the', 'of', 'and', 'to'
+    }
+
+    # Documents dont le condensé est en cours de calcul (un seul recalcul planifié à la fois)
+    _pending = set()
+    _pending_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def schedule_build(cls, document: Document):
+        """Planifie le calcul du condensé en arrière-plan (None si un calcul est déjà planifié)"""
+        document_id = document.id
+        with cls._pending_lock:
+            if document_id in cls._pending:
+                return None
+            cls._pending.add(document_id)
+
+        def release(_future):
+            with cls._pending_lock:
+                cls._pending.discard(document_id)
+
+        try:
+            future = run_in_background(cls.build_digest, document_id)
+        except BaseException:
+            release(None)
+            raise
+        future.add_done_callback(release)
+        return future
+
+    @classmethod
+    def build_digest(cls, document_id: int) -> Optional[DocumentDigest]:
+        """Calcule (ou recalcule) le condensé d'un document"""
+        try:
+            content = DocumentContent.objects.select_related('document').get(document_id=document_id)
+        except DocumentContent.DoesNotExist:
+            print(f"[DIGEST] Document {document_id}: aucun contenu, condensé ignoré")
+            return None
+
+        text = content.get_raw_text()
+        pdf_structure = content.get_pdf_structure()
+        page_starts = content.get_page_starts()
+
+        outline = cls._build_outline(text, page_starts)
+        tables = cls._collect_tables(pdf_structure)
+        entities = cls._extract_entities(text, page_starts)
+
+        digest, _ = DocumentDigest.objects.update_or_create(
+            document_id=document_id,
+            defaults={
+                'content_hash': content.content_hash,
+                'version': cls.DIGEST_VERSION,
+                'outline': outline,
+                'tables': tables,
+                'entities': entities,
+            }
+        )
+
+        print(f"[DIGEST] Document {document_id}: {len(outline)} section(s), {len(tables)} tableau(x)")
+        return digest
+
+    @staticmethod
+    def _page_at(page_starts: List[int], offset: int) -> Optional[int]:
+        if not page_starts:
+            return None
+        return bisect_right(page_starts, offset)
+
+    @classmethod
+    def _heading_level(cls, line: str) -> int:
+        """Niveau du titre (1, 2, ...) ou 0 si la ligne n'est pas un titre"""
+        if not 3 <= len(line) <= 100 or line.endswith((',', ';')):
+            return 0
+
+        match = cls.NUMBERED_HEADING.match(line)
+        if match:
+            numbering = match.group(1).rstrip('.)')
+            return min(numbering.count('.') + 1, 3) if numbering[0].isdigit() else 1
+
+        letters = [c for c in line if c.isalpha()]
+        if len(letters) >= 4 and len(line) <= 80 and all(c.isupper() for c in letters):
+            return 1
+
+        return 0
+
+    @classmethod
+    def _build_outline(cls, text: str, page_starts: List[int]) -> List[Dict]:
+        """Découpe le texte en sections à partir des titres détectés"""
+        headings = []
+        offset = 0
+        for raw_line in text.split('\n'):
+            line = raw_line.strip()
+            level = cls._heading_level(line)
+            if level:
+                headings.append((offset + raw_line.find(line), level, line))
+            offset += len(raw_line) + 1
+
+        if len(headings) > cls.MAX_SECTIONS:
+            headings = [h for h in headings if h[1] <= 2] or headings
+            headings = headings[:cls.MAX_SECTIONS]
+
+        boundaries = []
+        if headings:
+            if text[:headings[0][0]].strip():
+                boundaries.append((0, 1, "Début du document"))
+            boundaries.extend(headings)
+        elif page_starts and len(page_starts) > 1:
+            boundaries = [(start, 1, f"Page {i}") for i, start in enumerate(page_starts, 1)]
+        else:
+            boundaries = [
+                (start, 1, f"Partie {i}")
+                for i, start in enumerate(cls._block_starts(text), 1)
+            ]
+
+        word_freq = cls._word_frequencies(text)
+
+        outline = []
+        for i, (start, level, title) in enumerate(boundaries):
+            end = boundaries[i + 1][0] if i + 1 < len(boundaries) else len(text)
+            if start >= end:
+                continue
+            body = text[start:end]
+            if body.startswith(title):
+                body = body[len(title):]
+            outline.append({
+                'title': title[:120],
+                'level': level,
+                'start': start,
+                'end': end,
+                'page': cls._page_at(page_starts, start),
+                'summary': cls._summarize_section(body, word_freq)
+            })
+
+        return outline
+
+    @classmethod
+    def _block_starts(cls, text: str) -> List[int]:
+        """Découpage de repli en blocs de taille fixe, sur une fin de paragraphe si possible"""
+        starts = [0]
+        while starts[-1] + cls.FALLBACK_BLOCK_CHARS < len(text):
+            target = starts[-1] + cls.FALLBACK_BLOCK_CHARS
+            cut = text.rfind('\n\n', starts[-1] + cls.FALLBACK_BLOCK_CHARS // 2, target)
+            starts.append(cut + 2 if cut != -1 else target)
+        return starts
+
+    @classmethod
+    def _tokenize(cls, text: str) -> List[str]:
+        return [w for w in re.findall(r'\w+', text.lower()) if len(w) > 2 and w not in cls.STOPWORDS]
+
+    @classmethod
+    def _word_frequencies(cls, text: str) -> Counter:
+        return Counter(cls._tokenize(text))
+
+    @classmethod
+    def _summarize_section(cls, section_text: str, word_freq: Counter) -> str:
+        """Résumé extractif: les deux phrases les plus représentatives, dans l'ordre du texte"""
+        sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+|\n{2,}', section_text) if len(s.strip()) > 20]
+        if not sentences:
+            return ' '.join(section_text.split())[:cls.SECTION_SUMMARY_CHARS]
+
+        scored = []
+        for i, sentence in enumerate(sentences):
+            words = cls._tokenize(sentence)
+            if words:
+                scored.append((sum(word_freq[w] for w in words) / len(words), i))
+
+        best = sorted(i for _, i in sorted(scored, reverse=True)[:2])
+        summary = ' '.join(' '.join(sentences[i].split()) for i in best)
+        if len(summary) > cls.SECTION_SUMMARY_CHARS:
+            summary = summary[:cls.SECTION_SUMMARY_CHARS].rsplit(' ', 1)[0] + '...'
+        return summary
+
+    @classmethod
+    def _collect_tables(cls, pdf_structure: Optional[Dict]) -> List[Dict]:
+        """Tableaux extraits par pdfplumber: position, taille, en-tête et aperçu"""
+        tables = []
+        for page in (pdf_structure or {}).get('pages') or []:
+            for index, table in enumerate(page.get('tables') or []):
+                data = table.get('data') or []
+                if not data:
+                    continue
+                tables.append({
+                    'page': page.get('page_number'),
+                    'index': index,
+                    'rows': table.get('rows', len(data)),
+                    'cols': table.get('cols', len(data[0])),
+                    'header': [cell[:40] for cell in data[0]],
+                    'preview': [[cell[:40] for cell in row] for row in data[1:3]]
+                })
+                if len(tables) >= cls.MAX_TABLES:
+                    return tables
+        return tables
+
+    @classmethod
+    def _extract_entities(cls, text: str, page_starts: List[int]) -> Dict[str, List[str]]:
+        """Valeurs distinctes par type (les plus fréquentes en premier), sans les positions"""
+        mentions = EntityExtractor.extract(text, page_starts)['mentions']
+        counts = {}
+        for mention in mentions:
+            values = counts.setdefault(mention['type'], Counter())
+            values[mention['value']] += 1
+        return {
+            entity_type: [value for value, _ in values.most_common(cls.MAX_ENTITIES_PER_TYPE)]
+            for entity_type, values in counts.items()
+        }
+
+    # ------------------------------------------------------------------
+    # Utilisation
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def get_fresh_digest(cls, document: Document) -> Optional[DocumentDigest]:
+        """
+        Condensé du document, ou None s'il n'a pas de contenu.
+        Un condensé périmé (contenu modifié, algorithme changé) reste servi pendant son
+        recalcul en arrière-plan; sans condensé du tout, il est calculé immédiatement.
+        """
+        digest = DocumentDigest.objects.filter(document=document).first()
+        current_hash = DocumentContent.objects.filter(document=document).values_list(
+            'content_hash', flat=True
+        ).first()
+
+        if current_hash is None:
+            return None
+
+        if digest is None:
+            return cls.build_digest(document.id)
+
+        if digest.content_hash != current_hash or digest.version != cls.DIGEST_VERSION:
+            cls.schedule_build(document)
+        return digest
+
+    @classmethod
+    def score_relevance(cls, digest: DocumentDigest, document: Document, query: str) -> int:
+        """Nombre de mots de la requête présents dans le titre, le plan ou les entités"""
+        query_words = set(cls._tokenize(query))
+        if not query_words:
+            return 0
+
+        haystack = [document.title]
+        haystack.extend(f"{s['title']} {s['summary']}" for s in digest.outline)
+        haystack.extend(' '.join(values) for values in digest.entities.values())
+        digest_words = set(cls._tokenize(' '.join(haystack)))
+
+        return len(query_words & digest_words)
+
+    @classmethod
+    def format_for_prompt(cls, digest: DocumentDigest, document: Document, max_chars: int = 3000) -> str:
+        """Représentation textuelle compacte du condensé pour le prompt"""
+        lines = [f"Document ID {document.id}: {document.title} ({document.file_type})"]
+
+        if digest.outline:
+            lines.append("Sections (index, titre, page, résumé) :")
+            for index, section in enumerate(digest.outline):
+                indent = '  ' * (section['level'] - 1)
+                page = f" p.{section['page']}" if section.get('page') else ''
+                lines.append(f"{indent}[{index}] {section['title']}{page} — {section['summary']}")
+
+        if digest.tables:
+            lines.append("Tableaux :")
+            for table in digest.tables:
+                header = ' | '.join(table['header'])
+                lines.append(f"- p.{table['page']} tableau {table['index'] + 1} ({table['rows']}x{table['cols']}) : {header}")
+
+        if digest.entities:
+            lines.append("Entités : " + "; ".join(
+                f"{entity_type}: {', '.join(values)}" for entity_type, values in digest.entities.items()
+            ))
+
+        result = '\n'.join(lines)
+        if len(result) > max_chars:
+            result = result[:max_chars].rsplit('\n', 1)[0] + "\n[...] (condensé tronqué)"
+        return result
+
+    @staticmethod
+    def get_section_text(document: Document, section_index: int, digest: DocumentDigest = None) -> Optional[Dict]:
+        """
+        Texte complet d'une section du plan
+        Si le contenu a changé depuis le calcul du condensé, text vaut None et rebuilding True
+        (les positions de la section ne correspondent plus au texte)
+        """
+        digest = digest or DocumentDigest.objects.filter(document=document).first()
+        if not digest or not 0 <= section_index < len(digest.outline):
+            return None
+
+        section = digest.outline[section_index]
+        content = DocumentContent.objects.filter(document=document).first()
+        result = {'title': section['title'], 'page': section.get('page'), 'text': '', 'rebuilding': False}
+
+        if content and not digest.matches_content(content.content_hash):
+            result.update(text=None, rebuilding=True)
+        elif content:
+            result['text'] = content.get_text_range(section['start'], section['end'])
+        return result
+
+    @classmethod
+    def relevant_sections_text(cls, digest: DocumentDigest, text: str, query: str, max_chars: int) -> str:
+        """
+        Sélectionne les sections les plus pertinentes pour la requête
+        dans la limite de max_chars, restituées dans l'ordre du document
+        text: texte dont le condensé est issu (digest.matches_content)
+        """
+        query_words = set(cls._tokenize(query))
+
+        scored = []
+        for index, section in enumerate(digest.outline):
+            section_words = set(cls._tokenize(section['title'] + ' ' + text[section['start']:section['end']]))
+            scored.append((len(query_words & section_words), -index, index))
+        scored.sort(reverse=True)
+
+        selected, used = [], 0
+        for score, _, index in scored:
+            section = digest.outline[index]
+            length = section['end'] - section['start']
+            if used + length > max_chars:
+                if selected:
+                    continue
+                length = max_chars
+            selected.append((index, length))
+            used += length
+
+        parts = []
+        for index, length in sorted(selected):
+            section = digest.outline[index]
+            parts.append(f"[Section {index}: {section['title']}]\n{text[section['start']:section['start'] + length]}")
+        return "\n\n".join(parts)
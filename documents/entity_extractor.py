@@ -0,0 +1,238 @@
+# FICHIER: documents/entity_extractor.py
+# EXTRACTION D'ENTITÉS HORS LIGNE (EXPRESSIONS RÉGULIÈRES + GAZETIERS)
+# ============================================
+# Une seule expression régulière compilée (groupes nommés) parcourt le texte:
+# chaque correspondance est soit une entité (date, lot, dosage, montant, référence),
+# soit un mot transmis à l'automate des gazetiers (organisations, lieux).
+
+from bisect import bisect_right
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Optional
+import copy
+import re
+import threading
+
+from .cue_matcher import CueAutomaton
+
+
+MONTHS = (
+    r"janvier|février|fevrier|mars|avril|mai|juin|juillet|août|aout|septembre|octobre|novembre|décembre|decembre"
+    r"|january|february|march|april|may|june|july|august|september|october|november|december"
+    r"|janv|févr|fevr|avr|juil|sept|oct|nov|déc|dec|jan|feb|mar|apr|jun|jul|aug|sep"
+)
+
+# Ordre important: à une position donnée, la première alternative qui correspond l'emporte
+ENTITY_PATTERNS = [
+    ('date', r"""
+        \b\d{4}-\d{2}-\d{2}\b
+        | \b\d{1,2}[/.-]\d{1,2}[/.-](?:\d{4}|\d{2})\b
+        | \b(?:\d{1,2}(?:er)?\s+)?(?i:""" + MONTHS + r""")\.?\s+\d{4}\b
+        | \b(?i:""" + MONTHS + r""")\.?\s+\d{1,2},\s+\d{4}\b
+        | \b(?:0?[1-9]|1[0-2])[/.-]\d{4}\b
+    """),
+    ('lot', r"""
+        \b(?i:n°\s*de\s*lot|lot|batch)\s*(?i:n°|no\.?|number|\#)?\s*[:.]?\s*
+        (?P<lot_value>[A-Z0-9][A-Z0-9/-]{2,}\b)
+    """),
+    ('amount', r"""
+        (?:[€$£]\s?\d{1,3}(?:[\s .,']?\d{3})*(?:[.,]\d{1,2})?)
+        | (?:\b\d{1,3}(?:[\s .,']?\d{3})*(?:[.,]\d{1,2})?\s?(?:€|(?i:eur|euros?|usd|dollars?|fcfa|xof|mga|ariary|ar)\b))
+    """),
+    ('dosage', r"""
+        \b\d+(?:[.,]\d+)?\s?(?:mg|µg|mcg|ng|g|kg|ml|mL|µl|UI|IU|mmol|%)
+        (?:\s?/\s?(?:ml|mL|kg|j|jour|24\s?h|h|dose|comprimé|cp|m²))?(?!\w)
+    """),
+    ('reference', r"""
+        \b(?i:réf(?:érence)?|ref(?:erence)?)\.?\s*(?i:n°|no\.?)?\s*:?\s*(?P<ref_value>[A-Z0-9][A-Za-z0-9./-]{2,}\b)
+        | \b[A-Z]{2,6}[-/]\d{2,}(?:[-/][A-Z0-9]+)*\b
+        | \b[A-Z]{2,6}\d{3,}[A-Z0-9]*\b
+    """),
+]
+
+# Mot quelconque, transmis aux gazetiers
+WORD_GROUP = 'word'
+
+DEFAULT_GAZETTEERS = {
+    'organizations': [
+        'ANSM', 'EMA', 'FDA', 'OMS', 'WHO', 'HAS', 'AFSSAPS', 'ICH', 'Agence européenne des médicaments',
+        'Sanofi', 'Pfizer', 'Novartis', 'Roche', 'Bayer', 'GSK', 'GlaxoSmithKline', 'AstraZeneca',
+        'Servier', 'Biogaran', 'Mylan', 'Viatris', 'Teva', 'Merck', 'MSD', 'Johnson & Johnson',
+        'Janssen', 'Boehringer Ingelheim', 'Ipsen', 'Pierre Fabre', 'Zentiva', 'Sandoz', 'Abbott',
+        'Takeda', 'Bristol-Myers Squibb', 'Novo Nordisk', 'Lilly', 'Moderna', 'BioNTech',
+    ],
+    'locations': [
+        'France', 'Belgique', 'Suisse', 'Luxembourg', 'Canada', 'Allemagne', 'Espagne', 'Italie',
+        'Royaume-Uni', 'États-Unis', 'Etats-Unis', 'Chine', 'Inde', 'Japon', 'Maroc', 'Tunisie',
+        'Algérie', 'Sénégal', "Côte d'Ivoire", 'Cameroun', 'Madagascar', 'Maurice', 'La Réunion',
+        'Paris', 'Lyon', 'Marseille', 'Toulouse', 'Lille', 'Bordeaux', 'Nantes', 'Strasbourg',
+        'Montpellier', 'Bruxelles', 'Genève', 'Montréal', 'Dakar', 'Abidjan', 'Antananarivo',
+        'Europe', 'Afrique', 'Union européenne',
+    ],
+}
+
+
+NAME_TOKEN = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=None)
+def _exact_case_tokens(name: str) -> Optional[List[str]]:
+    """
+    Mots d'un nom à reconnaître avec sa casse exacte: sigles (HAS, ICH) et noms à majuscules
+    internes (BioNTech), sinon confondus avec des mots courants ("Has", "Ich"). None pour un nom ordinaire.
+    """
+    tokens = NAME_TOKEN.findall(name)
+    if any(char.isupper() for token in tokens for char in token[1:]):
+        return tokens
+    return None
+
+
+class EntityExtractor:
+    """
+    Extracteur d'entités en une passe, avec positions (caractères) et numéros de page
+    """
+
+    SETTINGS_KEY = 'entity_gazetteers'
+
+    MAX_VALUES_PER_TYPE = 50
+    MAX_MENTIONS = 500
+
+    ENTITY_TYPES = {
+        'date': 'dates',
+        'lot': 'lots',
+        'dosage': 'dosages',
+        'amount': 'amounts',
+        'reference': 'references',
+        'organizations': 'organizations',
+        'locations': 'locations',
+    }
+
+    PATTERN = re.compile(
+        '|'.join(f"(?P<{name}>{pattern})" for name, pattern in ENTITY_PATTERNS) + rf"|(?P<{WORD_GROUP}>\w+)",
+        re.VERBOSE
+    )
+
+    # Groupes dont la valeur est un sous-groupe (le mot-clé "lot"/"réf" n'en fait pas partie)
+    VALUE_GROUPS = {'lot': 'lot_value', 'reference': 'ref_value'}
+
+    _automaton: Optional[CueAutomaton] = None
+    _automaton_version = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_gazetteers(cls) -> Dict[str, List[str]]:
+        """Gazetiers par défaut complétés par le paramètre système (si présent)"""
+        from core.models import SystemSettings
+
+        gazetteers = copy.deepcopy(DEFAULT_GAZETTEERS)
+        setting = SystemSettings.objects.filter(key=cls.SETTINGS_KEY).first()
+        if setting is None:
+            return gazetteers
+
+        try:
+            extra = setting.get_value()
+        except ValueError as e:
+            print(f"[WARNING] Paramètre {cls.SETTINGS_KEY} invalide, gazetiers par défaut utilisés: {e}")
+            return gazetteers
+
+        for entity_type, names in extra.items():
+            if entity_type in gazetteers:
+                gazetteers[entity_type].extend(n for n in names if n not in gazetteers[entity_type])
+        return gazetteers
+
+    @classmethod
+    def get_automaton(cls) -> CueAutomaton:
+        """Automate des gazetiers (un label par nom canonique), recompilé si le paramètre change"""
+        from core.models import SystemSettings
+        version = SystemSettings.objects.filter(key=cls.SETTINGS_KEY).values_list('updated_at', flat=True).first()
+
+        with cls._lock:
+            if cls._automaton is None or cls._automaton_version != version:
+                cues = {
+                    entity_type: {name: [name] for name in names}
+                    for entity_type, names in cls.get_gazetteers().items()
+                }
+                cls._automaton = CueAutomaton(cues)
+                cls._automaton_version = version
+            return cls._automaton
+
+    @classmethod
+    def extract(cls, text: str, page_starts: Optional[List[int]] = None) -> Dict:
+        """
+        Extrait les entités du texte
+
+        Args:
+            page_starts: positions de début de chaque page (voir DocumentExtractorService.compute_page_starts)
+
+        Returns:
+            Dict {type: [valeurs distinctes]} pour chaque type, plus 'mentions':
+            [{'type', 'value', 'start', 'end', 'page'}] (bornées à MAX_MENTIONS)
+        """
+        automaton = cls.get_automaton()
+        goto, fail, output = automaton.goto, automaton.fail, automaton.output
+
+        values = {key: [] for key in cls.ENTITY_TYPES.values()}
+        seen = {key: set() for key in cls.ENTITY_TYPES.values()}
+        mentions = []
+        page_starts = page_starts or []
+
+        def add(entity_type, value, start, end):
+            key = cls.ENTITY_TYPES[entity_type]
+            if value not in seen[key] and len(values[key]) < cls.MAX_VALUES_PER_TYPE:
+                seen[key].add(value)
+                values[key].append(value)
+            if len(mentions) < cls.MAX_MENTIONS:
+                mentions.append({
+                    'type': key,
+                    'value': value,
+                    'start': start,
+                    'end': end,
+                    'page': bisect_right(page_starts, start) if page_starts else None
+                })
+
+        text = text or ''
+        state = 0
+        # Débuts des derniers mots consécutifs (pour retrouver le début d'un nom de plusieurs mots)
+        word_starts = deque(maxlen=8)
+
+        for match in cls.PATTERN.finditer(text):
+            group = match.lastgroup
+
+            if group == WORD_GROUP:
+                word = match.group(WORD_GROUP)
+                word_starts.append(match.start())
+
+                lowered = word.lower()
+                while state and lowered not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(lowered, 0)
+
+                for entity_type, name, n_words in output[state]:
+                    if n_words > len(word_starts):
+                        continue
+                    start = word_starts[-n_words]
+                    # Noms propres: la correspondance doit commencer par une majuscule
+                    if not text[start].isupper():
+                        continue
+                    exact = _exact_case_tokens(name)
+                    if exact is None or NAME_TOKEN.findall(text, start, match.end()) == exact:
+                        add(entity_type, name, start, match.end())
+                continue
+
+            # Une entité interrompt une suite de mots pour les gazetiers
+            state = 0
+            word_starts.clear()
+
+            value_group = cls.VALUE_GROUPS.get(group)
+            if value_group and match.group(value_group):
+                add(group, match.group(value_group), match.start(value_group), match.end(value_group))
+            else:
+                add(group, ' '.join(match.group(group).split()), match.start(), match.end())
+
+        values['mentions'] = mentions
+        return values
+
+    @staticmethod
+    def summary(entities: Dict) -> Dict[str, List[str]]:
+        """Valeurs distinctes par type, sans les positions"""
+        return {key: value for key, value in (entities or {}).items() if key != 'mentions'}
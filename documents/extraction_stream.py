@@ -0,0 +1,152 @@
+# FICHIER: documents/extraction_stream.py
+# EXTRACTION DU TEXTE EN FLUX
+# ============================================
+# Chaque format est lu par morceaux (page PDF, paragraphe ou tableau DOCX, bloc de lignes TXT):
+# le fichier n'est jamais chargé en entier et le texte n'est jamais construit par concaténations successives.
+
+from typing import Iterator, List
+import zipfile
+import xml.etree.ElementTree as ET
+
+import PyPDF2
+
+
+W_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+W_BODY = W_NAMESPACE + 'body'
+W_PARAGRAPH = W_NAMESPACE + 'p'
+W_TEXT = W_NAMESPACE + 't'
+W_TAB = W_NAMESPACE + 'tab'
+W_BREAKS = (W_NAMESPACE + 'br', W_NAMESPACE + 'cr')
+W_TABLE = W_NAMESPACE + 'tbl'
+W_ROW = W_NAMESPACE + 'tr'
+W_CELL = W_NAMESPACE + 'tc'
+
+# Taille des blocs lus dans un fichier texte (caractères)
+TXT_BLOCK_CHARS = 1 << 16
+
+
+class TextRecord:
+    """
+    Morceau de texte produit par l'extraction:
+    - kind: 'page' (PDF), 'paragraph' ou 'table' (DOCX), 'block' (TXT)
+    - number: numéro de la page, du paragraphe/tableau ou du bloc (à partir de 1)
+    - rows: cellules du tableau (DOCX uniquement)
+    """
+    __slots__ = ('kind', 'number', 'text', 'rows')
+
+    def __init__(self, kind: str, number: int, text: str, rows: List[List[str]] = None):
+        self.kind = kind
+        self.number = number
+        self.text = text
+        self.rows = rows
+
+    def __repr__(self):
+        return f"TextRecord({self.kind!r}, {self.number}, {len(self.text)} car.)"
+
+
+def iter_pdf_pages(file_path: str) -> Iterator[TextRecord]:
+    """Pages d'un PDF avec PyPDF2, une à la fois"""
+    with open(file_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        for page_number, page in enumerate(reader.pages, 1):
+            yield TextRecord('page', page_number, page.extract_text() or '')
+
+
+def iter_docx_records(file_path: str) -> Iterator[TextRecord]:
+    """
+    Paragraphes et tableaux d'un DOCX, dans l'ordre du document.
+    word/document.xml est lu directement dans l'archive par un analyseur incrémental;
+    chaque élément du corps est libéré dès qu'il a été traité.
+    """
+    with zipfile.ZipFile(file_path) as archive, archive.open('word/document.xml') as xml_file:
+        body = None
+        paragraphs: List[List[str]] = []  # textes des paragraphes ouverts (zones de texte imbriquées)
+        tables: List[List[List[str]]] = []  # lignes des tableaux ouverts
+        rows: List[List[str]] = []  # cellules des lignes ouvertes
+        cells: List[List[str]] = []  # paragraphes des cellules ouvertes
+        paragraph_number = table_number = 0
+
+        for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+            tag = elem.tag
+
+            if event == 'start':
+                if tag == W_PARAGRAPH:
+                    paragraphs.append([])
+                elif tag == W_TABLE:
+                    tables.append([])
+                elif tag == W_ROW:
+                    rows.append([])
+                elif tag == W_CELL:
+                    cells.append([])
+                elif tag == W_BODY:
+                    body = elem
+                continue
+
+            if tag == W_TEXT:
+                if paragraphs:
+                    paragraphs[-1].append(elem.text or '')
+            elif tag == W_TAB:
+                if paragraphs:
+                    paragraphs[-1].append('\t')
+            elif tag in W_BREAKS:
+                if paragraphs:
+                    paragraphs[-1].append('\n')
+            elif tag == W_PARAGRAPH:
+                text = ''.join(paragraphs.pop())
+                if paragraphs:
+                    paragraphs[-1].append(text)
+                elif cells:
+                    cells[-1].append(text)
+                else:
+                    paragraph_number += 1
+                    yield TextRecord('paragraph', paragraph_number, text)
+            elif tag == W_CELL:
+                rows[-1].append('\n'.join(cells.pop()))
+            elif tag == W_ROW:
+                tables[-1].append(rows.pop())
+            elif tag == W_TABLE:
+                table_rows = tables.pop()
+                text = '\n'.join(' | '.join(row) for row in table_rows)
+                if cells:
+                    # Tableau imbriqué: son texte fait partie de la cellule qui le contient
+                    cells[-1].append(text)
+                else:
+                    table_number += 1
+                    yield TextRecord('table', table_number, text, rows=table_rows)
+
+            # Un élément direct du corps est entièrement traité: on le libère
+            if body is not None and not paragraphs and not tables and tag in (W_PARAGRAPH, W_TABLE):
+                body.clear()
+
+
+def iter_txt_blocks(file_path: str, block_chars: int = TXT_BLOCK_CHARS) -> Iterator[TextRecord]:
+    """
+    Blocs d'environ block_chars caractères d'un fichier texte, coupés en fin de ligne
+    (une ligne plus longue qu'un bloc est coupée)
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        carry = ''
+        block_number = 0
+        while True:
+            data = file.read(block_chars)
+            if not data:
+                break
+            block = carry + data if carry else data
+            cut = block.rfind('\n') + 1 or len(block)
+            carry = block[cut:]
+            block_number += 1
+            yield TextRecord('block', block_number, block[:cut])
+
+        if carry:
+            yield TextRecord('block', block_number + 1, carry)
+
+
+def iter_records(file_path: str, file_extension: str) -> Iterator[TextRecord]:
+    """Morceaux de texte du fichier selon son type"""
+    if file_extension == '.pdf':
+        return iter_pdf_pages(file_path)
+    if file_extension in ['.docx', '.doc']:
+        return iter_docx_records(file_path)
+    if file_extension == '.txt':
+        return iter_txt_blocks(file_path)
+    raise ValueError(f"Type de fichier non supporté: {file_extension}")
@@ -0,0 +1,190 @@
+# FICHIER: documents/ingestion.py
+# IMPORT D'ARCHIVES ZIP EN FLUX
+# ============================================
+# Les fichiers de l'archive sont lus directement dans le flux de l'upload (sans copie
+# temporaire de l'archive), contrôlés (nombre, taille, taux de compression), stockés
+# par empreinte, puis confiés à un pool borné de workers d'extraction.
+
+from typing import Iterator, List, Optional
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+import os
+import zipfile
+import zlib
+
+from core.tasks import run_in_pool
+from .models import Document, IngestionBatch
+from .services import DocumentProcessorService
+from .storage import ContentAddressedStorage, StorageLimitExceeded
+
+
+class ZipIngestionService:
+    """
+    Import d'une archive ZIP: un lot (IngestionBatch) par archive, un document par fichier pris en charge
+    """
+
+    SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+    IGNORED_PREFIXES = ('__MACOSX/',)
+    READ_CHUNK_SIZE = 1024 * 1024
+    POOL = 'ingestion'
+
+    @staticmethod
+    def _setting(name: str, default):
+        return getattr(settings, name, default)
+
+    @classmethod
+    def _select_members(cls, zip_ref: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+        """Fichiers de l'archive dont le type est pris en charge"""
+        members = []
+        for info in zip_ref.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith(cls.IGNORED_PREFIXES) or os.path.basename(name).startswith('.'):
+                continue
+            if os.path.splitext(name)[1].lower() in cls.SUPPORTED_EXTENSIONS:
+                members.append(info)
+        return members
+
+    @classmethod
+    def _check_declared_sizes(cls, info: zipfile.ZipInfo) -> Optional[str]:
+        """Contrôle des tailles annoncées par l'archive (revérifiées pendant la lecture)"""
+        max_bytes = cls._setting('ZIP_MAX_MEMBER_BYTES', 200 * 1024 * 1024)
+        max_ratio = cls._setting('ZIP_MAX_COMPRESSION_RATIO', 100)
+
+        if info.file_size > max_bytes:
+            return f"fichier trop volumineux ({info.file_size} octets, maximum {max_bytes})"
+        if info.compress_size and info.file_size / info.compress_size > max_ratio:
+            return f"taux de compression suspect ({info.file_size // info.compress_size}:1)"
+        return None
+
+    @classmethod
+    def _read_member(cls, zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo) -> Iterator[bytes]:
+        """Contenu décompressé du fichier, par blocs, avec contrôle du taux de compression réel"""
+        max_ratio = cls._setting('ZIP_MAX_COMPRESSION_RATIO', 100)
+        # Marge pour les très petits fichiers (en-têtes de compression)
+        max_bytes = max(info.compress_size, 1) * max_ratio + 64 * 1024
+
+        read = 0
+        with zip_ref.open(info) as member:
+            while True:
+                chunk = member.read(cls.READ_CHUNK_SIZE)
+                if not chunk:
+                    return
+                read += len(chunk)
+                if read > max_bytes:
+                    raise StorageLimitExceeded("taux de compression réel dépassé")
+                yield chunk
+
+    @classmethod
+    def ingest_zip(cls, uploaded_file, user=None) -> IngestionBatch:
+        """
+        Lit l'archive depuis le fichier uploadé et planifie l'extraction de chaque document
+
+        Returns:
+            Le lot créé (son avancement: IngestionBatch.progress)
+        """
+        batch = IngestionBatch.objects.create(user=user, source_name=os.path.basename(uploaded_file.name)[:255])
+
+        try:
+            zip_ref = zipfile.ZipFile(uploaded_file)
+        except (zipfile.BadZipFile, OSError) as e:
+            batch.status = 'error'
+            batch.errors = [{'member': '', 'error': f"archive illisible: {e}"}]
+            batch.finished_at = timezone.now()
+            batch.save()
+            return batch
+
+        errors, documents_to_process = [], []
+        duplicates = 0
+
+        with zip_ref:
+            members = cls._select_members(zip_ref)
+            max_members = cls._setting('ZIP_MAX_MEMBERS', 500)
+            if len(members) > max_members:
+                errors.append({'member': '', 'error': f"{len(members)} fichiers, seuls les {max_members} premiers sont importés"})
+                members = members[:max_members]
+
+            remaining_bytes = cls._setting('ZIP_MAX_TOTAL_BYTES', 1024 * 1024 * 1024)
+            max_member_bytes = cls._setting('ZIP_MAX_MEMBER_BYTES', 200 * 1024 * 1024)
+
+            for info in members:
+                error = cls._check_declared_sizes(info)
+                if error is None and info.file_size > remaining_bytes:
+                    error = "taille totale maximale de l'archive atteinte"
+                if error:
+                    errors.append({'member': info.filename, 'error': error})
+                    continue
+
+                extension = os.path.splitext(info.filename)[1].lower()
+                try:
+                    stored = ContentAddressedStorage.store_chunks(
+                        cls._read_member(zip_ref, info),
+                        extension,
+                        max_bytes=min(max_member_bytes, remaining_bytes)
+                    )
+                except (StorageLimitExceeded, zipfile.BadZipFile, zlib.error, EOFError, RuntimeError, NotImplementedError) as e:
+                    errors.append({'member': info.filename, 'error': str(e)})
+                    continue
+                remaining_bytes -= stored.size
+
+                # Même contenu déjà importé par cet utilisateur: le document existant est réutilisé
+                existing = Document.objects.filter(user=user, file_hash=stored.sha256).first() if user else None
+                if existing:
+                    batch.documents.add(existing)
+                    duplicates += 1
+                    continue
+
+                document = Document.objects.create(
+                    user=user,
+                    title=os.path.basename(info.filename)[:255],
+                    file=stored.name,
+                    file_hash=stored.sha256,
+                    status='pending'
+                )
+                batch.documents.add(document)
+                documents_to_process.append(document.id)
+
+        batch.total_count = len(documents_to_process)
+        batch.duplicate_count = duplicates
+        batch.errors = errors
+        if not documents_to_process:
+            batch.status = 'completed' if batch.documents.exists() else 'error'
+            batch.finished_at = timezone.now()
+        batch.save()
+
+        print(f"[INGEST] Lot {batch.id} ({batch.source_name}): {len(documents_to_process)} document(s) à traiter, "
+              f"{duplicates} doublon(s), {len(errors)} refusé(s)")
+
+        for document_id in documents_to_process:
+            run_in_pool(cls.POOL, cls.process_member, batch.id, document_id)
+
+        return batch
+
+    @classmethod
+    def process_member(cls, batch_id: int, document_id: int):
+        """Extraction et analyse d'un document du lot (exécuté par le pool d'ingestion)"""
+        error = None
+        try:
+            document = Document.objects.get(id=document_id)
+            if not DocumentProcessorService.process_document(document):
+                error = "traitement échoué"
+        except Exception as e:
+            error = str(e)
+
+        with transaction.atomic():
+            batch = IngestionBatch.objects.select_for_update().get(id=batch_id)
+            if error:
+                batch.failed_count = F('failed_count') + 1
+                title = Document.objects.filter(id=document_id).values_list('title', flat=True).first() or ''
+                batch.errors = batch.errors + [{'member': title, 'error': error}]
+            else:
+                batch.processed_count = F('processed_count') + 1
+            batch.save(update_fields=['failed_count', 'processed_count', 'errors'])
+
+            batch.refresh_from_db(fields=['processed_count', 'failed_count', 'total_count'])
+            if batch.processed_count + batch.failed_count >= batch.total_count:
+                batch.status = 'completed'
+                batch.finished_at = timezone.now()
+                batch.save(update_fields=['status', 'finished_at'])
+                print(f"[INGEST] Lot {batch.id} terminé: {batch.processed_count} traité(s), {batch.failed_count} en erreur")
@@ -0,0 +1,258 @@
+# FICHIER: documents/management/commands/ingest_directory.py
+# IMPORT EN MASSE D'UN RÉPERTOIRE DE DOCUMENTS
+# ============================================
+# Usage: python manage.py ingest_directory /chemin/vers/archives --user alice --workers 8
+#
+# Les fichiers sont dédoublonnés par empreinte, traités par un pool de processus
+# (une connexion DB par processus) et écrits par lots transactionnels.
+# Chaque fichier traité est consigné dans IngestionCheckpoint: relancer la même
+# commande après une interruption reprend là où elle s'était arrêtée.
+#
+# Les modèles sont importés dans les fonctions: les processus du pool chargent ce module
+# avant d'avoir initialisé Django (voir _init_worker).
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from django.core.management.base import BaseCommand, CommandError
+import hashlib
+import multiprocessing
+import os
+import time
+
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+HASH_CHUNK_SIZE = 1024 * 1024
+CHECKPOINT_UPDATE_FIELDS = ['file_hash', 'status', 'document', 'page_count', 'error', 'updated_at']
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _init_worker(use_sandbox: bool):
+    """Initialisation d'un processus du pool: Django et sa propre connexion à la base"""
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.db import connections
+    connections.close_all()
+    settings.PDF_EXTRACTION_SANDBOX = use_sandbox
+
+
+def _save_checkpoints(checkpoints):
+    from documents.models import IngestionCheckpoint
+    IngestionCheckpoint.objects.bulk_create(
+        checkpoints,
+        update_conflicts=True,
+        unique_fields=['source_root', 'path'],
+        update_fields=CHECKPOINT_UPDATE_FIELDS
+    )
+
+
+def _ingest_batch(user_id: int, source_root: str, items):
+    """
+    Traite un lot de fichiers [(chemin relatif, empreinte)] dans un processus du pool:
+    extraction hors transaction, puis documents, contenus, analyses, chunks et points
+    de reprise écrits dans une seule transaction
+    """
+    from django.db import transaction
+    from django.utils import timezone
+    from documents.models import Document, IngestionCheckpoint
+    from documents.services import DocumentExtractorService, DocumentProcessorService
+    from documents.storage import ContentAddressedStorage
+    from documents.text_analysis import TermStatisticsService
+
+    started = time.monotonic()
+    extracted, checkpoints, errors = [], [], []
+    size = 0
+
+    for relative_path, file_hash in items:
+        path = os.path.join(source_root, relative_path)
+        extension = os.path.splitext(relative_path)[1].lower()
+        try:
+            with open(path, 'rb') as file:
+                stored = ContentAddressedStorage.store_file(file, extension)
+            extracted.append((relative_path, extension, stored, DocumentExtractorService.extract_text(path, extension)))
+            size += stored.size
+        except Exception as e:
+            errors.append((relative_path, str(e)))
+            checkpoints.append(IngestionCheckpoint(
+                source_root=source_root, path=relative_path, file_hash=file_hash, status='error', error=str(e)
+            ))
+
+    pages = 0
+    indexed_terms = []
+    with transaction.atomic():
+        for relative_path, extension, stored, extraction_result in extracted:
+            try:
+                with transaction.atomic():
+                    document = Document.objects.create(
+                        user_id=user_id,
+                        title=os.path.basename(relative_path)[:255],
+                        file=stored.name,
+                        file_hash=stored.sha256,
+                        status='processing'
+                    )
+                    # Fréquences du corpus mises à jour après la transaction (verrous courts)
+                    analysis_result = DocumentProcessorService.save_results(
+                        document, extraction_result, update_statistics=False
+                    )
+                    document.status = 'completed'
+                    document.analyzed_at = timezone.now()
+                    document.save(update_fields=['status', 'analyzed_at', 'file_type', 'file_size'])
+            except Exception as e:
+                errors.append((relative_path, str(e)))
+                checkpoints.append(IngestionCheckpoint(
+                    source_root=source_root, path=relative_path, file_hash=stored.sha256, status='error', error=str(e)
+                ))
+                continue
+
+            page_count = extraction_result['page_count'] if extension == '.pdf' else 1
+            pages += page_count
+            indexed_terms.append(analysis_result['indexed_terms'])
+            checkpoints.append(IngestionCheckpoint(
+                source_root=source_root, path=relative_path, file_hash=stored.sha256,
+                status='done', document=document, page_count=page_count
+            ))
+
+        _save_checkpoints(checkpoints)
+
+    for terms in indexed_terms:
+        TermStatisticsService.update_document_terms(terms, [])
+
+    return {
+        'documents': len(indexed_terms),
+        'pages': pages,
+        'bytes': size,
+        'errors': errors,
+        'seconds': time.monotonic() - started,
+    }
+
+
+class Command(BaseCommand):
+    help = "Importe en masse les documents (PDF, DOCX, TXT) d'un répertoire, avec reprise après interruption"
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help="Répertoire à importer (parcouru récursivement)")
+        parser.add_argument('--user', required=True, help="Nom de l'utilisateur propriétaire des documents")
+        parser.add_argument('--workers', type=int, default=max((os.cpu_count() or 2) - 1, 1),
+                            help="Nombre de processus d'extraction")
+        parser.add_argument('--batch-size', type=int, default=20, help="Documents écrits par transaction")
+        parser.add_argument('--retry-errors', action='store_true', help="Retraiter les fichiers en erreur lors d'un import précédent")
+        parser.add_argument('--no-sandbox', action='store_true',
+                            help="Extraire les PDF dans le processus du pool, sans processus surveillé (corpus de confiance)")
+
+    def _walk(self, root: str):
+        """Chemins relatifs des fichiers pris en charge"""
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSIONS:
+                        yield os.path.relpath(entry.path, root)
+
+    def _log_progress(self, done: int, total: int, documents: int, pages: int, size: int, errors: int, started: float):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        docs_per_second = documents / elapsed
+        eta = (total - done) / (done / elapsed) if done else 0
+        self.stdout.write(
+            f"[{done}/{total}] {docs_per_second:.1f} docs/s, {pages / elapsed:.1f} pages/s, "
+            f"{size / elapsed / (1024 * 1024):.1f} Mo/s, {errors} erreur(s), reste ~{eta:.0f} s"
+        )
+
+    def handle(self, *args, **options):
+        from django.contrib.auth.models import User
+        from django.db import connections
+        from documents.models import Document, IngestionCheckpoint
+
+        root = os.path.realpath(options['directory'])
+        if not os.path.isdir(root):
+            raise CommandError(f"Répertoire introuvable: {root}")
+        if len(root) > 255:
+            raise CommandError("Chemin du répertoire trop long (255 caractères maximum)")
+
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"Utilisateur inconnu: {options['user']}")
+
+        # 1. Fichiers restant à traiter (reprise)
+        finished_statuses = ['done', 'duplicate'] if options['retry_errors'] else ['done', 'duplicate', 'error']
+        finished = set(IngestionCheckpoint.objects.filter(
+            source_root=root, status__in=finished_statuses
+        ).values_list('path', flat=True))
+        files = sorted(self._walk(root))
+        pending = [path for path in files if path not in finished]
+        self.stdout.write(f"{len(files)} fichier(s) trouvé(s), {len(files) - len(pending)} déjà traité(s)")
+
+        # 2. Empreintes (lecture parallèle) et dédoublonnage
+        with ThreadPoolExecutor(max_workers=8) as hashers:
+            hashes = list(hashers.map(lambda path: _hash_file(os.path.join(root, path)), pending))
+
+        known = dict(Document.objects.filter(user=user).exclude(file_hash='').values_list('file_hash', 'id'))
+        to_process, duplicates = [], []
+        for path, file_hash in zip(pending, hashes):
+            if file_hash in known:
+                duplicates.append(IngestionCheckpoint(
+                    source_root=root, path=path, file_hash=file_hash, status='duplicate', document_id=known[file_hash]
+                ))
+            else:
+                known[file_hash] = None
+                to_process.append((path, file_hash))
+
+        if duplicates:
+            _save_checkpoints(duplicates)
+        self.stdout.write(f"{len(to_process)} fichier(s) à importer, {len(duplicates)} doublon(s) ignoré(s)")
+        if not to_process:
+            return
+
+        # 3. Traitement par lots dans le pool de processus
+        batch_size = max(options['batch_size'], 1)
+        batches = [to_process[i:i + batch_size] for i in range(0, len(to_process), batch_size)]
+        connections.close_all()
+
+        started = time.monotonic()
+        done = documents = pages = size = 0
+        errors = []
+        pool = ProcessPoolExecutor(
+            max_workers=max(options['workers'], 1),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(not options['no_sandbox'],)
+        )
+        try:
+            futures = {pool.submit(_ingest_batch, user.id, root, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # Lot annulé (transaction annulée): ses fichiers seront repris au prochain lancement
+                    result = {'documents': 0, 'pages': 0, 'bytes': 0, 'errors': [(path, str(e)) for path, _ in batch]}
+
+                done += len(batch)
+                documents += result['documents']
+                pages += result['pages']
+                size += result['bytes']
+                errors.extend(result['errors'])
+                for path, error in result['errors']:
+                    self.stderr.write(f"  {path}: {error}")
+                self._log_progress(done, len(to_process), documents, pages, size, len(errors), started)
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise CommandError("Import interrompu: relancer la même commande pour reprendre")
+        pool.shutdown()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Import terminé: {documents} document(s), {pages} page(s) en {elapsed:.1f} s "
+            f"({documents / max(elapsed, 1e-6):.1f} docs/s, {pages / max(elapsed, 1e-6):.1f} pages/s), "
+            f"{len(errors)} erreur(s)"
+        ))
@@ -0,0 +1,27 @@
+# FICHIER: documents/management/commands/rebuild_term_statistics.py
+# RECALCUL DES FRÉQUENCES DU CORPUS (TF-IDF)
+# ============================================
+# Usage: python manage.py rebuild_term_statistics
+#
+# À lancer une fois après la migration 0006 (documents analysés avant l'indexation
+# des termes), puis pour réconcilier les fréquences après une interruption.
+# Les fréquences sont remplacées: à lancer hors des périodes d'import.
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Recalcule les fréquences documentaires du corpus à partir des analyses (indexe les analyses anciennes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-backfill', action='store_true',
+                            help="Ne pas indexer les analyses sans termes (documents analysés avant l'indexation)")
+
+    def handle(self, *args, **options):
+        from documents.text_analysis import TermStatisticsService
+
+        result = TermStatisticsService.rebuild(backfill=not options['no_backfill'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['documents']} document(s) indexé(s) ({result['backfilled']} ajouté(s)), "
+            f"{result['terms']} terme(s)"
+        ))
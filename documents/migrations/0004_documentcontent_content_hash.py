@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0003_documentcontent_pdf_structure"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documentcontent",
+            name="content_hash",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                max_length=64,
+                verbose_name="Empreinte du contenu",
+            ),
+        ),
+    ]
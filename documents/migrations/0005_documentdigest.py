@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0004_documentcontent_content_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentDigest",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "content_hash",
+                    models.CharField(
+                        blank=True, max_length=64, verbose_name="Empreinte du contenu"
+                    ),
+                ),
+                (
+                    "version",
+                    models.PositiveSmallIntegerField(
+                        default=1, verbose_name="Version du condensé"
+                    ),
+                ),
+                (
+                    "outline",
+                    models.JSONField(
+                        blank=True, default=list, verbose_name="Plan du document"
+                    ),
+                ),
+                (
+                    "tables",
+                    models.JSONField(blank=True, default=list, verbose_name="Tableaux"),
+                ),
+                (
+                    "entities",
+                    models.JSONField(blank=True, default=dict, verbose_name="Entités"),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "document",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="digest",
+                        to="documents.document",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Condensé du document",
+                "verbose_name_plural": "Condensés des documents",
+            },
+        ),
+    ]
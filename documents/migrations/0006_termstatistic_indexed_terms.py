@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0005_documentdigest"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TermStatistic",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=100, unique=True)),
+                (
+                    "document_frequency",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Nombre de documents"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Statistique de terme",
+                "verbose_name_plural": "Statistiques des termes",
+            },
+        ),
+        migrations.AddField(
+            model_name="documentanalysis",
+            name="indexed_terms",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0006_termstatistic_indexed_terms"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentPage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "page_number",
+                    models.PositiveIntegerField(verbose_name="Numéro de page"),
+                ),
+                ("text", models.TextField(blank=True, verbose_name="Texte de la page")),
+                (
+                    "tables",
+                    models.JSONField(blank=True, default=list, verbose_name="Tableaux"),
+                ),
+                ("width", models.FloatField(blank=True, null=True)),
+                ("height", models.FloatField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "document",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pages",
+                        to="documents.document",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Page de document",
+                "verbose_name_plural": "Pages de documents",
+                "ordering": ["document", "page_number"],
+                "unique_together": {("document", "page_number")},
+            },
+        ),
+    ]
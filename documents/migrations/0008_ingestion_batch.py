@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0007_documentpage"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="file_hash",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                max_length=64,
+                verbose_name="Empreinte du fichier (SHA-256)",
+            ),
+        ),
+        migrations.CreateModel(
+            name="IngestionBatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "source_name",
+                    models.CharField(max_length=255, verbose_name="Archive d'origine"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("processing", "En cours"),
+                            ("completed", "Terminé"),
+                            ("error", "Erreur"),
+                        ],
+                        default="processing",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "total_count",
+                    models.IntegerField(default=0, verbose_name="Documents à traiter"),
+                ),
+                (
+                    "processed_count",
+                    models.IntegerField(default=0, verbose_name="Documents traités"),
+                ),
+                (
+                    "failed_count",
+                    models.IntegerField(default=0, verbose_name="Documents en erreur"),
+                ),
+                (
+                    "duplicate_count",
+                    models.IntegerField(default=0, verbose_name="Doublons"),
+                ),
+                ("errors", models.JSONField(blank=True, default=list)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "documents",
+                    models.ManyToManyField(
+                        blank=True,
+                        related_name="ingestion_batches",
+                        to="documents.document",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ingestion_batches",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Lot d'import",
+                "verbose_name_plural": "Lots d'import",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
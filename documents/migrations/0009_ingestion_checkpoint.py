@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0008_ingestion_batch"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IngestionCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "source_root",
+                    models.CharField(
+                        db_index=True, max_length=255, verbose_name="Répertoire importé"
+                    ),
+                ),
+                (
+                    "path",
+                    models.CharField(max_length=500, verbose_name="Chemin relatif"),
+                ),
+                ("file_hash", models.CharField(blank=True, max_length=64)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("done", "Importé"),
+                            ("duplicate", "Doublon"),
+                            ("error", "Erreur"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("page_count", models.IntegerField(default=0)),
+                ("error", models.TextField(blank=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "document",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="documents.document",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Point de reprise d'import",
+                "verbose_name_plural": "Points de reprise d'import",
+                "unique_together": {("source_root", "path")},
+            },
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0009_ingestion_checkpoint"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "title",
+                    models.CharField(max_length=255, verbose_name="Titre du document"),
+                ),
+                ("description", models.TextField(blank=True)),
+                (
+                    "filename",
+                    models.CharField(max_length=255, verbose_name="Nom du fichier"),
+                ),
+                (
+                    "total_size",
+                    models.BigIntegerField(verbose_name="Taille annoncée (octets)"),
+                ),
+                (
+                    "part_size",
+                    models.IntegerField(verbose_name="Taille des parties (octets)"),
+                ),
+                (
+                    "declared_hash",
+                    models.CharField(
+                        blank=True,
+                        max_length=64,
+                        verbose_name="Empreinte annoncée par le client",
+                    ),
+                ),
+                (
+                    "mime_type",
+                    models.CharField(
+                        blank=True, max_length=100, verbose_name="Type détecté"
+                    ),
+                ),
+                ("parts", models.JSONField(blank=True, default=dict)),
+                ("received_bytes", models.BigIntegerField(default=0)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "En cours"),
+                            ("completed", "Terminé"),
+                            ("rejected", "Refusé"),
+                            ("aborted", "Annulé"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "document",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="documents.document",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upload_sessions",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Upload fractionné",
+                "verbose_name_plural": "Uploads fractionnés",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
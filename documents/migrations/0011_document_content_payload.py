@@ -0,0 +1,135 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+PAYLOAD_FIELDS = ('raw_text', 'processed_text', 'embeddings', 'pdf_structure')
+BATCH_SIZE = 100
+
+
+def move_payload_out(apps, schema_editor):
+    """Copie les champs volumineux de DocumentContent vers DocumentContentPayload, par lots"""
+    DocumentContent = apps.get_model('documents', 'DocumentContent')
+    DocumentContentPayload = apps.get_model('documents', 'DocumentContentPayload')
+
+    payloads, contents = [], []
+    rows = DocumentContent.objects.values('id', *PAYLOAD_FIELDS).iterator(chunk_size=BATCH_SIZE)
+    for row in rows:
+        payloads.append(DocumentContentPayload(content_id=row['id'], **{name: row[name] for name in PAYLOAD_FIELDS}))
+        contents.append(DocumentContent(
+            id=row['id'],
+            text_length=len(row['raw_text'] or ''),
+            has_pdf_structure=bool(row['pdf_structure']),
+            has_embeddings=bool(row['embeddings'])
+        ))
+        if len(payloads) >= BATCH_SIZE:
+            DocumentContentPayload.objects.bulk_create(payloads)
+            DocumentContent.objects.bulk_update(contents, ['text_length', 'has_pdf_structure', 'has_embeddings'])
+            payloads, contents = [], []
+
+    if payloads:
+        DocumentContentPayload.objects.bulk_create(payloads)
+        DocumentContent.objects.bulk_update(contents, ['text_length', 'has_pdf_structure', 'has_embeddings'])
+
+
+def move_payload_back(apps, schema_editor):
+    DocumentContent = apps.get_model('documents', 'DocumentContent')
+    DocumentContentPayload = apps.get_model('documents', 'DocumentContentPayload')
+
+    contents = []
+    for row in DocumentContentPayload.objects.values('content_id', *PAYLOAD_FIELDS).iterator(chunk_size=BATCH_SIZE):
+        contents.append(DocumentContent(id=row['content_id'], **{name: row[name] for name in PAYLOAD_FIELDS}))
+        if len(contents) >= BATCH_SIZE:
+            DocumentContent.objects.bulk_update(contents, PAYLOAD_FIELDS)
+            contents = []
+    if contents:
+        DocumentContent.objects.bulk_update(contents, PAYLOAD_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0010_upload_session"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentContentPayload",
+            fields=[
+                (
+                    "content",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="payload",
+                        serialize=False,
+                        to="documents.documentcontent",
+                    ),
+                ),
+                (
+                    "raw_text",
+                    models.TextField(blank=True, verbose_name="Texte brut extrait"),
+                ),
+                (
+                    "processed_text",
+                    models.TextField(blank=True, verbose_name="Texte traité"),
+                ),
+                ("embeddings", models.JSONField(blank=True, null=True)),
+                (
+                    "pdf_structure",
+                    models.JSONField(
+                        blank=True, null=True, verbose_name="Structure PDF extraite"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Contenu volumineux du document",
+                "verbose_name_plural": "Contenus volumineux des documents",
+            },
+        ),
+        migrations.AddField(
+            model_name="documentcontent",
+            name="has_embeddings",
+            field=models.BooleanField(
+                default=False, verbose_name="Embeddings disponibles"
+            ),
+        ),
+        migrations.AddField(
+            model_name="documentcontent",
+            name="has_pdf_structure",
+            field=models.BooleanField(
+                default=False, verbose_name="Structure PDF disponible"
+            ),
+        ),
+        migrations.AddField(
+            model_name="documentcontent",
+            name="text_length",
+            field=models.IntegerField(
+                default=0, verbose_name="Longueur du texte brut (caractères)"
+            ),
+        ),
+        migrations.RunPython(move_payload_out, move_payload_back),
+        # Valeur par défaut: permet de recréer la colonne lors d'un retour arrière
+        migrations.AlterField(
+            model_name="documentcontent",
+            name="raw_text",
+            field=models.TextField(default="", verbose_name="Texte brut extrait"),
+        ),
+        migrations.RemoveField(
+            model_name="documentcontent",
+            name="embeddings",
+        ),
+        migrations.RemoveField(
+            model_name="documentcontent",
+            name="pdf_structure",
+        ),
+        migrations.RemoveField(
+            model_name="documentcontent",
+            name="processed_text",
+        ),
+        migrations.RemoveField(
+            model_name="documentcontent",
+            name="raw_text",
+        ),
+    ]
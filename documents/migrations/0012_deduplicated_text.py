@@ -0,0 +1,166 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:56
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 100
+SEPARATOR = "\n\n"
+
+
+def _page_rows(DocumentPage, document_id):
+    return DocumentPage.objects.filter(document_id=document_id).order_by('page_number').values(
+        'page_number', 'text', 'physical', 'tables', 'width', 'height'
+    )
+
+
+def deduplicate_text(apps, schema_editor):
+    """
+    Texte brut stocké une seule fois dans DocumentPage (raw_text vidé, chunks sans leur texte):
+    pages de la structure pdfplumber (retirées de la structure), sinon une seule page non physique.
+    Texte traité vidé lorsqu'il est identique au texte brut.
+    """
+    DocumentContent = apps.get_model('documents', 'DocumentContent')
+    DocumentContentPayload = apps.get_model('documents', 'DocumentContentPayload')
+    DocumentPage = apps.get_model('documents', 'DocumentPage')
+    DocumentChunk = apps.get_model('documents', 'DocumentChunk')
+
+    document_ids = dict(DocumentContent.objects.values_list('id', 'document_id'))
+    content_ids = list(DocumentContentPayload.objects.order_by('content_id').values_list('content_id', flat=True))
+
+    for i in range(0, len(content_ids), BATCH_SIZE):
+        batch = content_ids[i:i + BATCH_SIZE]
+        payloads = DocumentContentPayload.objects.filter(content_id__in=batch)
+        contents = []
+        for payload in payloads:
+            content = DocumentContent(id=payload.content_id)
+            document_id = document_ids[payload.content_id]
+            raw_text = payload.raw_text or ''
+
+            content.processed_same_as_raw = payload.processed_text == raw_text
+            if content.processed_same_as_raw:
+                payload.processed_text = ''
+
+            structure = payload.pdf_structure or {}
+            pages = structure.get('pages') or []
+            physical = bool(structure.get('success') and pages)
+            if physical:
+                parts, starts, offset = [], [], 0
+                for page in pages:
+                    starts.append(offset)
+                    text = page.get('text') or ''
+                    if text:
+                        parts.append(text + SEPARATOR)
+                        offset += len(text) + len(SEPARATOR)
+                physical = ''.join(parts) == raw_text
+
+            content.text_in_pages = physical or bool(raw_text)
+            if content.text_in_pages:
+                DocumentPage.objects.filter(document_id=document_id).delete()
+                if physical:
+                    DocumentPage.objects.bulk_create([
+                        DocumentPage(
+                            document_id=document_id,
+                            page_number=page['page_number'],
+                            text=page.get('text') or '',
+                            start_char=start,
+                            tables=page.get('tables') or [],
+                            width=page.get('width'),
+                            height=page.get('height')
+                        )
+                        for page, start in zip(pages, starts)
+                    ])
+                    payload.pdf_structure = {
+                        key: value for key, value in structure.items() if key not in ('pages', 'full_text')
+                    }
+                    payload.pdf_structure['pages_in_db'] = True
+                else:
+                    DocumentPage.objects.create(document_id=document_id, page_number=1, text=raw_text, physical=False)
+                payload.raw_text = ''
+
+                chunks = []
+                for chunk in DocumentChunk.objects.filter(document_id=document_id).exclude(content=''):
+                    if chunk.start_char is not None and chunk.content == raw_text[chunk.start_char:chunk.end_char]:
+                        chunk.content = ''
+                        chunks.append(chunk)
+                DocumentChunk.objects.bulk_update(chunks, ['content'], batch_size=500)
+
+            payload.save()
+            contents.append(content)
+
+        DocumentContent.objects.bulk_update(contents, ['processed_same_as_raw', 'text_in_pages'])
+
+
+def restore_text(apps, schema_editor):
+    DocumentContent = apps.get_model('documents', 'DocumentContent')
+    DocumentContentPayload = apps.get_model('documents', 'DocumentContentPayload')
+    DocumentPage = apps.get_model('documents', 'DocumentPage')
+    DocumentChunk = apps.get_model('documents', 'DocumentChunk')
+
+    rows = DocumentContent.objects.filter(
+        models.Q(text_in_pages=True) | models.Q(processed_same_as_raw=True)
+    ).values_list('id', 'document_id', 'text_in_pages', 'processed_same_as_raw')
+    for content_id, document_id, text_in_pages, processed_same_as_raw in rows.iterator(chunk_size=BATCH_SIZE):
+        payload = DocumentContentPayload.objects.get(content_id=content_id)
+        if text_in_pages:
+            pages = list(_page_rows(DocumentPage, document_id))
+            payload.raw_text = ''.join(
+                page['text'] + SEPARATOR if page['physical'] and page['text'] else page['text'] for page in pages
+            )
+            structure = dict(payload.pdf_structure or {})
+            if structure.pop('pages_in_db', False):
+                structure['pages'] = [
+                    {key: page[key] for key in ('page_number', 'text', 'tables', 'width', 'height')}
+                    for page in pages if page['physical']
+                ]
+                payload.pdf_structure = structure
+
+            chunks = list(DocumentChunk.objects.filter(document_id=document_id, content='').exclude(start_char=None))
+            for chunk in chunks:
+                chunk.content = payload.raw_text[chunk.start_char:chunk.end_char]
+            DocumentChunk.objects.bulk_update(chunks, ['content'], batch_size=500)
+            DocumentPage.objects.filter(document_id=document_id, physical=False).delete()
+        if processed_same_as_raw:
+            payload.processed_text = payload.raw_text
+        payload.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0011_document_content_payload"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documentcontent",
+            name="processed_same_as_raw",
+            field=models.BooleanField(
+                default=False, verbose_name="Texte traité identique au texte brut"
+            ),
+        ),
+        migrations.AddField(
+            model_name="documentcontent",
+            name="text_in_pages",
+            field=models.BooleanField(
+                default=False, verbose_name="Texte brut lu dans les pages"
+            ),
+        ),
+        migrations.AddField(
+            model_name="documentpage",
+            name="physical",
+            field=models.BooleanField(default=True, verbose_name="Page physique (PDF)"),
+        ),
+        migrations.AddField(
+            model_name="documentpage",
+            name="start_char",
+            field=models.IntegerField(
+                default=0, verbose_name="Position dans le texte complet"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="documentchunk",
+            name="content",
+            field=models.TextField(blank=True, verbose_name="Contenu du segment"),
+        ),
+        migrations.RunPython(deduplicate_text, restore_text),
+    ]
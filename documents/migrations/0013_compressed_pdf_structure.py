@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:20
+
+import core.fields
+from django.db import migrations
+
+
+BATCH_SIZE = 100
+
+
+def _copy_column(model, source, target):
+    """Copie source -> target par lots (la conversion est faite par les champs)"""
+    pks = list(model.objects.exclude(**{f"{source}__isnull": True}).order_by('pk').values_list('pk', flat=True))
+    for i in range(0, len(pks), BATCH_SIZE):
+        rows = model.objects.filter(pk__in=pks[i:i + BATCH_SIZE]).values_list('pk', source)
+        model.objects.bulk_update([model(pk=pk, **{target: value}) for pk, value in rows], [target])
+
+
+def compress_structures(apps, schema_editor):
+    _copy_column(apps.get_model('documents', 'DocumentContentPayload'), 'pdf_structure', 'pdf_structure_compressed')
+
+
+def decompress_structures(apps, schema_editor):
+    _copy_column(apps.get_model('documents', 'DocumentContentPayload'), 'pdf_structure_compressed', 'pdf_structure')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0012_deduplicated_text"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documentcontentpayload",
+            name="pdf_structure_compressed",
+            field=core.fields.CompressedJSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(compress_structures, decompress_structures),
+        migrations.RemoveField(
+            model_name="documentcontentpayload",
+            name="pdf_structure",
+        ),
+        migrations.RenameField(
+            model_name="documentcontentpayload",
+            old_name="pdf_structure_compressed",
+            new_name="pdf_structure",
+        ),
+        migrations.AlterField(
+            model_name="documentcontentpayload",
+            name="pdf_structure",
+            field=core.fields.CompressedJSONField(
+                blank=True, null=True, verbose_name="Structure PDF extraite"
+            ),
+        ),
+    ]
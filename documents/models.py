@@ -2,9 +2,13 @@
 # PARTIE 1: MODÈLES POUR LA GESTION DES DOCUMENTS
 # ============================================
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Substr
 from django.contrib.auth.models import User
 from django.utils import timezone
+from typing import Iterator, List, Optional
+from core.fields import CompressedJSONField
+import hashlib
 import os
 
 
@@ -24,6 +28,7 @@ class Document(models.Model):
     file = models.FileField(upload_to='documents/%Y/%m/%d/', verbose_name="Fichier")
     file_type = models.CharField(max_length=50, blank=True)
     file_size = models.IntegerField(default=0, verbose_name="Taille (bytes)")
+    file_hash = models.CharField(max_length=64, blank=True, db_index=True, verbose_name="Empreinte du fichier (SHA-256)")
 
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
 
@@ -54,22 +59,35 @@ class Document(models.Model):
 
 class DocumentContent(models.Model):
     """
-    Contenu extrait du document après analyse
+    Contenu extrait du document après analyse: ligne légère (compteurs, indicateurs, empreinte).
+    Les textes et structures volumineux sont dans DocumentContentPayload et ne sont lus
+    qu'à la demande, champ par champ, via les accesseurs get_*() et modifiés via set_payload().
+
+    Chaque donnée n'est stockée qu'une fois:
+    - texte issu de l'extraction: dans les pages (DocumentPage), raw_text reste vide (text_in_pages)
+    - texte traité: seulement s'il diffère du texte brut (processed_same_as_raw)
+    - structure PDF: sans ses pages, relues dans DocumentPage (clé 'pages_in_db')
     """
+    PAYLOAD_FIELDS = ('raw_text', 'processed_text', 'embeddings', 'pdf_structure')
+
     document = models.OneToOneField(Document, on_delete=models.CASCADE, related_name='content')
-    raw_text = models.TextField(verbose_name="Texte brut extrait")
-    processed_text = models.TextField(blank=True, verbose_name="Texte traité")
 
     # Métadonnées extraites
     word_count = models.IntegerField(default=0)
     page_count = models.IntegerField(default=0)
     language = models.CharField(max_length=10, blank=True)
+    text_length = models.IntegerField(default=0, verbose_name="Longueur du texte brut (caractères)")
 
-    # Stockage des embeddings pour la recherche sémantique
-    embeddings = models.JSONField(null=True, blank=True)
+    # Présence des données volumineuses (évite de les lire pour le savoir)
+    has_pdf_structure = models.BooleanField(default=False, verbose_name="Structure PDF disponible")
+    has_embeddings = models.BooleanField(default=False, verbose_name="Embeddings disponibles")
 
-    # Stockage de la structure du document (tableaux, mise en page) pour PDF
-    pdf_structure = models.JSONField(null=True, blank=True, verbose_name="Structure PDF extraite")
+    # Emplacement du texte (évite les copies)
+    text_in_pages = models.BooleanField(default=False, verbose_name="Texte brut lu dans les pages")
+    processed_same_as_raw = models.BooleanField(default=False, verbose_name="Texte traité identique au texte brut")
+
+    # Empreinte du texte (version du contenu), recalculée à chaque sauvegarde du texte
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, verbose_name="Empreinte du contenu")
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -81,6 +99,233 @@ class DocumentContent(models.Model):
     def __str__(self):
         return f"Contenu de {self.document.title}"
 
+    # ------------------------------------------------------------------
+    # Accès au contenu volumineux
+    # ------------------------------------------------------------------
+
+    def _payload_value(self, name: str):
+        """Valeur d'un champ de DocumentContentPayload (une requête par champ, mise en cache sur l'instance)"""
+        cache = self.__dict__.setdefault('_payload_cache', {})
+        if name not in cache:
+            cache[name] = None if self.pk is None else DocumentContentPayload.objects.filter(
+                content_id=self.pk
+            ).values_list(name, flat=True).first()
+        return cache[name]
+
+    def _is_cached(self, name: str) -> bool:
+        return name in self.__dict__.get('_payload_cache', {})
+
+    def get_raw_text(self) -> str:
+        if self.text_in_pages and not self._is_cached('raw_text'):
+            self.__dict__.setdefault('_payload_cache', {})['raw_text'] = DocumentPage.assemble(self.document_id)
+        return self._payload_value('raw_text') or ''
+
+    def get_processed_text(self) -> str:
+        if self.processed_same_as_raw and not self._is_cached('processed_text'):
+            return self.get_raw_text()
+        return self._payload_value('processed_text') or ''
+
+    def get_text(self) -> str:
+        """Texte brut, ou texte traité à défaut"""
+        return self.get_raw_text() or self.get_processed_text()
+
+    def get_text_range(self, start: int, end: int) -> str:
+        """raw_text[start:end], découpé par la base (le texte complet n'est pas transféré)"""
+        if self._is_cached('raw_text') or self.pk is None:
+            return self.get_raw_text()[start:end]
+        if end <= start:
+            return ''
+        if self.text_in_pages:
+            return DocumentPage.assemble(self.document_id, start, end)
+        return DocumentContentPayload.objects.filter(content_id=self.pk).annotate(
+            part=Substr('raw_text', start + 1, end - start)
+        ).values_list('part', flat=True).first() or ''
+
+    def get_text_preview(self, length: int = 5000) -> str:
+        """Début du texte brut"""
+        return self.get_text_range(0, length)
+
+    def get_pdf_structure(self, with_pages: bool = True):
+        """
+        Structure PDF, avec ses pages relues dans DocumentPage si elles n'y sont pas stockées
+        (with_pages=False: structure telle que stockée, sans lire les pages)
+        """
+        if not self.has_pdf_structure and not self._is_cached('pdf_structure'):
+            return None
+        structure = self._payload_value('pdf_structure')
+        if with_pages and structure and structure.get('pages_in_db'):
+            structure = dict(structure)
+            del structure['pages_in_db']
+            structure['pages'] = [
+                {'page_number': number, 'text': text, 'tables': tables, 'width': width, 'height': height}
+                for number, text, tables, width, height in DocumentPage.objects.filter(
+                    document_id=self.document_id, physical=True
+                ).order_by('page_number').values_list('page_number', 'text', 'tables', 'width', 'height')
+            ]
+            self._payload_cache['pdf_structure'] = structure
+        return structure
+
+    def get_embeddings(self):
+        if not self.has_embeddings and not self._is_cached('embeddings'):
+            return None
+        return self._payload_value('embeddings')
+
+    def get_page_starts(self) -> List[int]:
+        """
+        Position de début de chaque page PDF dans le texte brut, pages numérotées à partir de 1
+        ([] si le texte ne correspond plus aux pages)
+        """
+        if self.text_in_pages:
+            pages = list(DocumentPage.objects.filter(document_id=self.document_id, physical=True).order_by(
+                'page_number'
+            ).values_list('page_number', 'start_char'))
+            if [number for number, _ in pages] != list(range(1, len(pages) + 1)):
+                return []
+            return [start for _, start in pages]
+
+        from .services import DocumentExtractorService
+        return DocumentExtractorService.compute_page_starts(self.get_pdf_structure(), self.get_raw_text())
+
+    def set_payload(self, **fields):
+        """Modifie des champs volumineux (raw_text, processed_text, embeddings, pdf_structure), écrits au prochain save()"""
+        unknown = set(fields) - set(self.PAYLOAD_FIELDS)
+        if unknown:
+            raise ValueError(f"Champs inconnus: {', '.join(sorted(unknown))}")
+
+        if 'raw_text' in fields and 'processed_text' not in fields:
+            self._keep_processed_text()
+
+        if 'processed_text' in fields:
+            self.__dict__.pop('_processed_follows_raw', None)
+        self.__dict__.setdefault('_payload_cache', {}).update(fields)
+        self.__dict__.setdefault('_payload_pending', {}).update(fields)
+
+        if 'raw_text' in fields:
+            self.text_in_pages = False
+            self.text_length = len(fields['raw_text'] or '')
+        if 'pdf_structure' in fields:
+            self.has_pdf_structure = bool(fields['pdf_structure'])
+        if 'embeddings' in fields:
+            self.has_embeddings = bool(fields['embeddings'])
+
+    def _keep_processed_text(self):
+        """Avant de changer le texte brut: le texte traité qui le suivait garde sa valeur actuelle"""
+        if self.processed_same_as_raw and 'processed_text' not in self.__dict__.get('_payload_pending', {}):
+            self.set_payload(processed_text=self.get_processed_text())
+
+    def set_page_text(self, text: str):
+        """
+        Texte brut identique à la concaténation des pages du document (DocumentPage, déjà enregistrées):
+        il n'est pas copié dans raw_text
+        """
+        self._keep_processed_text()
+        self.__dict__.setdefault('_payload_cache', {})['raw_text'] = text
+        self.__dict__.setdefault('_payload_pending', {})['raw_text'] = ''
+        self.text_in_pages = True
+        self.text_length = len(text)
+
+    def set_streamed_page_text(self, length: int):
+        """
+        Texte brut et texte traité identiques à la concaténation des pages déjà enregistrées
+        (extraction en flux): le texte n'est ni copié ni chargé en mémoire
+        """
+        cache = self.__dict__.setdefault('_payload_cache', {})
+        cache.pop('raw_text', None)
+        cache.pop('processed_text', None)
+        self.__dict__.setdefault('_payload_pending', {}).update(raw_text='', processed_text='')
+        self._processed_follows_raw = True
+        self.text_in_pages = True
+        self.processed_same_as_raw = True
+        self.text_length = length
+
+    def refresh_from_db(self, *args, **kwargs):
+        self.__dict__.pop('_payload_cache', None)
+        self.__dict__.pop('_payload_pending', None)
+        super().refresh_from_db(*args, **kwargs)
+
+    def _iter_raw_text(self):
+        """Texte brut par morceaux: pages lues une à une s'il n'est pas déjà en mémoire"""
+        if self.text_in_pages and not self._is_cached('raw_text'):
+            yield from DocumentPage.iter_text(self.document_id)
+        else:
+            yield self.get_raw_text()
+
+    def compute_content_hash(self):
+        """SHA-256 du texte brut et du texte traité (calculé page par page quand le texte est dans les pages)"""
+        digest = hashlib.sha256()
+        for part in self._iter_raw_text():
+            digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+        if self.processed_same_as_raw and not self._is_cached('processed_text'):
+            processed = self._iter_raw_text()
+        else:
+            processed = [self.get_processed_text()]
+        for part in processed:
+            digest.update(part.encode('utf-8'))
+        return digest.hexdigest()
+
+    def save(self, *args, **kwargs):
+        """
+        Override save pour écrire le contenu volumineux modifié (set_payload)
+        et tenir l'empreinte à jour quand le texte change
+        """
+        pending = self.__dict__.get('_payload_pending', {})
+        update_fields = kwargs.get('update_fields')
+        self._content_hash_changed = False
+
+        text_changed = bool({'raw_text', 'processed_text'} & set(pending))
+        if text_changed or not self.content_hash or (update_fields is not None and 'content_hash' in update_fields):
+            new_hash = self.compute_content_hash()
+            self._content_hash_changed = new_hash != self.content_hash
+            self.content_hash = new_hash
+
+        stored = dict(pending)
+        if 'processed_text' in stored and not self.__dict__.pop('_processed_follows_raw', False):
+            self.processed_same_as_raw = stored['processed_text'] == self.get_raw_text()
+            if self.processed_same_as_raw:
+                stored['processed_text'] = ''
+
+        if update_fields is not None:
+            derived = {'content_hash'}
+            if 'raw_text' in pending:
+                derived.update(('text_length', 'text_in_pages'))
+            if 'processed_text' in pending:
+                derived.add('processed_same_as_raw')
+            if 'pdf_structure' in pending:
+                derived.add('has_pdf_structure')
+            if 'embeddings' in pending:
+                derived.add('has_embeddings')
+            kwargs['update_fields'] = (set(update_fields) - set(self.PAYLOAD_FIELDS)) | derived
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if stored:
+                DocumentContentPayload.objects.update_or_create(content=self, defaults=stored)
+        self._payload_pending = {}
+
+
+class DocumentContentPayload(models.Model):
+    """
+    Contenu volumineux d'un DocumentContent (texte complet, embeddings, structure PDF).
+    Ne pas lire directement: passer par les accesseurs de DocumentContent.
+    """
+    content = models.OneToOneField(DocumentContent, on_delete=models.CASCADE, primary_key=True, related_name='payload')
+    raw_text = models.TextField(blank=True, verbose_name="Texte brut extrait")
+    processed_text = models.TextField(blank=True, verbose_name="Texte traité")
+
+    # Stockage des embeddings pour la recherche sémantique
+    embeddings = models.JSONField(null=True, blank=True)
+
+    # Stockage de la structure du document (tableaux, mise en page, brouillons de l'éditeur) pour PDF
+    pdf_structure = CompressedJSONField(null=True, blank=True, verbose_name="Structure PDF extraite")
+
+    class Meta:
+        verbose_name = "Contenu volumineux du document"
+        verbose_name_plural = "Contenus volumineux des documents"
+
+    def __str__(self):
+        return f"Contenu volumineux {self.content_id}"
+
 
 class DocumentAnalysis(models.Model):
     """
@@ -112,6 +357,9 @@ class DocumentAnalysis(models.Model):
     # Métadonnées supplémentaires
     metadata = models.JSONField(default=dict, blank=True)
 
+    # Termes comptés dans TermStatistic pour ce document (pour la mise à jour incrémentale)
+    indexed_terms = models.JSONField(default=list, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -122,6 +370,21 @@ class DocumentAnalysis(models.Model):
         return f"Analyse de {self.document.title}"
 
 
+class TermStatistic(models.Model):
+    """
+    Fréquence documentaire d'un terme sur l'ensemble du corpus (pour le TF-IDF)
+    """
+    term = models.CharField(max_length=100, unique=True)
+    document_frequency = models.PositiveIntegerField(default=0, verbose_name="Nombre de documents")
+
+    class Meta:
+        verbose_name = "Statistique de terme"
+        verbose_name_plural = "Statistiques des termes"
+
+    def __str__(self):
+        return f"{self.term or '(corpus)'}: {self.document_frequency}"
+
+
 class DocumentChunk(models.Model):
     """
     Segments du document pour améliorer la recherche et les réponses
@@ -129,7 +392,8 @@ class DocumentChunk(models.Model):
     document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='chunks')
 
     chunk_index = models.IntegerField(verbose_name="Index du segment")
-    content = models.TextField(verbose_name="Contenu du segment")
+    # Vide pour les segments récents: le texte est la plage [start_char:end_char] des pages (get_text)
+    content = models.TextField(blank=True, verbose_name="Contenu du segment")
 
     # Position dans le document
     page_number = models.IntegerField(null=True, blank=True)
@@ -147,4 +411,287 @@ class DocumentChunk(models.Model):
         verbose_name_plural = "Segments de documents"
 
     def __str__(self):
-        return f"{self.document.title} - Segment {self.chunk_index}"
\ No newline at end of file
+        return f"{self.document.title} - Segment {self.chunk_index}"
+
+    def get_text(self) -> str:
+        """Texte du segment (stocké pour les anciens segments, sinon lu dans les pages du document)"""
+        if self.content:
+            return self.content
+        if '_text' not in self.__dict__:
+            if self.start_char is None or self.end_char is None:
+                return ''
+            self._text = DocumentPage.assemble(self.document_id, self.start_char, self.end_char)
+        return self._text
+
+    @classmethod
+    def load_texts(cls, chunks):
+        """
+        Charge le texte d'une liste de segments en lisant une seule fois les pages de leurs documents
+        (au lieu d'une requête par segment). Retourne la liste.
+        """
+        chunks = list(chunks)
+        document_ids = {chunk.document_id for chunk in chunks if not chunk.content}
+        texts = {}
+        for document_id in document_ids:
+            texts[document_id] = DocumentPage.assemble(document_id)
+        for chunk in chunks:
+            if not chunk.content and chunk.start_char is not None and chunk.end_char is not None:
+                chunk._text = texts[chunk.document_id][chunk.start_char:chunk.end_char]
+        return chunks
+
+class DocumentPage(models.Model):
+    """
+    Texte canonique d'un document, page par page (avec tableaux et dimensions pour les PDF).
+    Le texte complet est la concaténation des pages (voir span_text) et les chunks
+    sont des plages de positions dans ce texte: il n'est stocké qu'une fois.
+    Documents sans pages physiques (DOCX, TXT): fenêtres de texte numérotées (physical=False).
+    """
+    SEPARATOR = "\n\n"  # Suit chaque page physique non vide dans le texte complet
+
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='pages')
+
+    page_number = models.PositiveIntegerField(verbose_name="Numéro de page")
+    text = models.TextField(blank=True, verbose_name="Texte de la page")
+
+    # Position de la page dans le texte complet du document
+    start_char = models.IntegerField(default=0, verbose_name="Position dans le texte complet")
+    physical = models.BooleanField(default=True, verbose_name="Page physique (PDF)")
+
+    # Tableaux de la page: [{'data', 'rows', 'cols'}]
+    tables = models.JSONField(default=list, blank=True, verbose_name="Tableaux")
+
+    width = models.FloatField(null=True, blank=True)
+    height = models.FloatField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['document', 'page_number']
+        unique_together = ['document', 'page_number']
+        verbose_name = "Page de document"
+        verbose_name_plural = "Pages de documents"
+
+    def __str__(self):
+        return f"{self.document.title} - Page {self.page_number}"
+
+    @classmethod
+    def span_text(cls, text: str, physical: bool) -> str:
+        """Texte de la page tel qu'il figure dans le texte complet"""
+        return text + cls.SEPARATOR if physical and text else text
+
+    @classmethod
+    def assemble(cls, document_id: int, start: int = 0, end: Optional[int] = None) -> str:
+        """
+        Texte complet du document, ou sa plage [start:end]:
+        seules les pages qui recouvrent la plage sont lues
+        """
+        pages = cls.objects.filter(document_id=document_id)
+        if start > 0:
+            first = pages.filter(start_char__lte=start).order_by('-start_char', '-page_number').values_list(
+                'start_char', flat=True
+            ).first()
+            pages = pages.filter(start_char__gte=first or 0)
+        else:
+            first = 0
+        if end is not None:
+            pages = pages.filter(start_char__lt=end)
+
+        text = ''.join(
+            cls.span_text(page_text, physical)
+            for page_text, physical in pages.order_by('page_number').values_list('text', 'physical')
+        )
+        offset = first or 0
+        return text[start - offset:None if end is None else end - offset]
+
+    @classmethod
+    def iter_text(cls, document_id: int, batch_size: int = 50) -> Iterator[str]:
+        """Texte complet du document page par page, sans l'assembler"""
+        pages = cls.objects.filter(document_id=document_id).order_by('page_number').values_list('text', 'physical')
+        for page_text, physical in pages.iterator(chunk_size=batch_size):
+            yield cls.span_text(page_text, physical)
+
+
+class DocumentDigest(models.Model):
+    """
+    Condensé du document calculé après l'analyse (plan, résumés, tableaux, entités)
+    Sert de contexte léger à l'agent, qui récupère le texte complet d'une section à la demande
+    """
+    document = models.OneToOneField(Document, on_delete=models.CASCADE, related_name='digest')
+
+    # Version du contenu (DocumentContent.content_hash) et de l'algorithme ayant produit le condensé
+    content_hash = models.CharField(max_length=64, blank=True, verbose_name="Empreinte du contenu")
+    version = models.PositiveSmallIntegerField(default=1, verbose_name="Version du condensé")
+
+    # Plan: [{'title', 'level', 'start', 'end', 'page', 'summary'}] (positions dans raw_text)
+    outline = models.JSONField(default=list, blank=True, verbose_name="Plan du document")
+
+    # Tableaux principaux: [{'page', 'index', 'rows', 'cols', 'header', 'preview'}]
+    tables = models.JSONField(default=list, blank=True, verbose_name="Tableaux")
+
+    # Entités détectées, par type
+    entities = models.JSONField(default=dict, blank=True, verbose_name="Entités")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Condensé du document"
+        verbose_name_plural = "Condensés des documents"
+
+    def __str__(self):
+        return f"Condensé de {self.document.title}"
+
+    def matches_content(self, content_hash: Optional[str]) -> bool:
+        """Les positions du plan (start, end) ne valent que pour le contenu dont le condensé est issu"""
+        return bool(content_hash) and self.content_hash == content_hash
+
+
+class IngestionBatch(models.Model):
+    """
+    Lot de documents importés ensemble (archive ZIP), extraits par un pool de taille bornée
+    Son avancement est consultable pendant le traitement
+    """
+    STATUS_CHOICES = [
+        ('processing', 'En cours'),
+        ('completed', 'Terminé'),
+        ('error', 'Erreur'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='ingestion_batches')
+    source_name = models.CharField(max_length=255, verbose_name="Archive d'origine")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='processing')
+
+    documents = models.ManyToManyField(Document, related_name='ingestion_batches', blank=True)
+
+    # Compteurs mis à jour par les workers
+    total_count = models.IntegerField(default=0, verbose_name="Documents à traiter")
+    processed_count = models.IntegerField(default=0, verbose_name="Documents traités")
+    failed_count = models.IntegerField(default=0, verbose_name="Documents en erreur")
+    duplicate_count = models.IntegerField(default=0, verbose_name="Doublons")
+
+    # Fichiers refusés ou en erreur: [{'member', 'error'}]
+    errors = models.JSONField(default=list, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Lot d'import"
+        verbose_name_plural = "Lots d'import"
+
+    def __str__(self):
+        return f"Lot {self.id} - {self.source_name}"
+
+    def progress(self):
+        """État du lot, sérialisable en JSON"""
+        done = self.processed_count + self.failed_count
+        return {
+            'batch_id': self.id,
+            'source_name': self.source_name,
+            'status': self.status,
+            'total': self.total_count,
+            'processed': self.processed_count,
+            'failed': self.failed_count,
+            'duplicates': self.duplicate_count,
+            'percent': round(100 * done / self.total_count, 1) if self.total_count else 100.0,
+            'errors': self.errors,
+            'documents': list(self.documents.values('id', 'title', 'status')),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class IngestionCheckpoint(models.Model):
+    """
+    Avancement d'un import de répertoire (commande ingest_directory):
+    une ligne par fichier traité, pour reprendre un import interrompu
+    """
+    STATUS_CHOICES = [
+        ('done', 'Importé'),
+        ('duplicate', 'Doublon'),
+        ('error', 'Erreur'),
+    ]
+
+    source_root = models.CharField(max_length=255, db_index=True, verbose_name="Répertoire importé")
+    path = models.CharField(max_length=500, verbose_name="Chemin relatif")
+    file_hash = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    document = models.ForeignKey(Document, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    page_count = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['source_root', 'path']
+        verbose_name = "Point de reprise d'import"
+        verbose_name_plural = "Points de reprise d'import"
+
+    def __str__(self):
+        return f"{self.path} ({self.status})"
+
+
+class UploadSession(models.Model):
+    """
+    Upload fractionné et reprenable: le fichier arrive en parties de taille fixe
+    (une empreinte par partie), puis est assemblé lors de la validation finale
+    """
+    STATUS_CHOICES = [
+        ('pending', 'En cours'),
+        ('completed', 'Terminé'),
+        ('rejected', 'Refusé'),
+        ('aborted', 'Annulé'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    title = models.CharField(max_length=255, verbose_name="Titre du document")
+    description = models.TextField(blank=True)
+    filename = models.CharField(max_length=255, verbose_name="Nom du fichier")
+    total_size = models.BigIntegerField(verbose_name="Taille annoncée (octets)")
+    part_size = models.IntegerField(verbose_name="Taille des parties (octets)")
+    declared_hash = models.CharField(max_length=64, blank=True, verbose_name="Empreinte annoncée par le client")
+    mime_type = models.CharField(max_length=100, blank=True, verbose_name="Type détecté")
+
+    # Parties reçues: {"<numéro>": {"offset", "size", "etag"}}
+    parts = models.JSONField(default=dict, blank=True)
+    received_bytes = models.BigIntegerField(default=0)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    error = models.TextField(blank=True)
+    document = models.ForeignKey(Document, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Upload fractionné"
+        verbose_name_plural = "Uploads fractionnés"
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+
+    @property
+    def part_count(self) -> int:
+        return max((self.total_size + self.part_size - 1) // self.part_size, 1)
+
+    def expected_part_size(self, number: int) -> int:
+        """Taille attendue de la partie `number` (la dernière peut être plus courte)"""
+        offset = (number - 1) * self.part_size
+        return min(self.part_size, self.total_size - offset)
+
+    def progress(self):
+        """État de l'upload, sérialisable en JSON (reprise côté client)"""
+        return {
+            'upload_id': self.id,
+            'status': self.status,
+            'filename': self.filename,
+            'total_size': self.total_size,
+            'part_size': self.part_size,
+            'part_count': self.part_count,
+            'received_bytes': self.received_bytes,
+            'parts': [dict(self.parts[key], number=int(key)) for key in sorted(self.parts, key=int)],
+            'error': self.error,
+            'document_id': self.document_id,
+        }
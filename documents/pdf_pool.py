@@ -0,0 +1,190 @@
+# FICHIER: documents/pdf_pool.py
+# DOCUMENTS PyMuPDF GARDÉS OUVERTS
+# ============================================
+# fitz.open relit la table xref et l'arbre des pages à chaque ouverture. Pendant une
+# session d'édition le même fichier est ouvert pour l'extraction, les rendus de pages
+# et l'export: le pool garde les documents ouverts (par processus) et les prête.
+# Un document n'est prêté qu'à un utilisateur à la fois (PyMuPDF n'est pas sûr entre
+# threads sur un même document): deux requêtes simultanées sur le même fichier
+# obtiennent chacune leur exemplaire. Clé: (chemin réel, date de modification, taille),
+# un fichier remplacé n'est donc jamais servi depuis un ancien exemplaire.
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+import logging
+import os
+import threading
+import time
+
+try:
+    import fitz  # PyMuPDF
+    FITZ_AVAILABLE = True
+except ImportError:
+    FITZ_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[str, int, int]
+
+
+class PDFDocumentPool:
+    """
+    Pool LRU de documents PyMuPDF ouverts
+
+    max_open: nombre de documents ouverts (prêtés + disponibles) par processus;
+    au-delà, les documents disponibles les moins récemment utilisés sont fermés.
+    Si tous sont prêtés, acquire attend qu'un document soit rendu (wait_seconds au plus),
+    puis ouvre quand même le fichier (hors budget) plutôt que de bloquer la requête.
+    """
+
+    def __init__(self, max_open: int = 16, wait_seconds: float = 5.0):
+        self.max_open = max(1, max_open)
+        self.wait_seconds = wait_seconds
+        self._condition = threading.Condition()
+        self._idle: 'OrderedDict[int, Tuple[PoolKey, object]]' = OrderedDict()  # LRU: plus ancien en tête
+        self._leased: Dict[int, PoolKey] = {}
+        self._opening = 0
+        self._pid = os.getpid()
+        self.stats = {'hits': 0, 'opens': 0, 'evictions': 0, 'over_budget': 0}
+
+    @staticmethod
+    def key_for(path: str) -> PoolKey:
+        """(chemin réel, date de modification en ns, taille); FileNotFoundError si le fichier n'existe pas"""
+        real_path = os.path.realpath(path)
+        stat = os.stat(real_path)
+        return real_path, stat.st_mtime_ns, stat.st_size
+
+    def _open_count(self) -> int:
+        return len(self._idle) + len(self._leased) + self._opening
+
+    def _check_fork(self):
+        """Processus fils (fork): les documents hérités ne sont pas utilisés"""
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._idle.clear()
+            self._leased.clear()
+            self._opening = 0
+
+    def _close_lru(self, keep: int) -> List[object]:
+        """Retire les documents disponibles les plus anciens au-delà de keep ouverts (fermés par l'appelant)"""
+        closed = []
+        while self._idle and self._open_count() > keep:
+            _, (_, doc) = self._idle.popitem(last=False)
+            closed.append(doc)
+            self.stats['evictions'] += 1
+        return closed
+
+    @staticmethod
+    def _close(docs: List[object]):
+        for doc in docs:
+            try:
+                doc.close()
+            except Exception as e:
+                logger.debug(f"Fermeture d'un document du pool échouée: {e}")
+
+    def acquire(self, path: str):
+        """
+        Emprunte un document ouvert (usage exclusif jusqu'à release)
+
+        Raises:
+            FileNotFoundError: fichier absent
+            Les erreurs de fitz.open (fichier corrompu)
+        """
+        if not FITZ_AVAILABLE:
+            raise RuntimeError("PyMuPDF (fitz) n'est pas installé")
+        key = self.key_for(path)
+        to_close = []
+        with self._condition:
+            self._check_fork()
+            # Exemplaire disponible pour cette version du fichier
+            for token, (idle_key, doc) in reversed(self._idle.items()):
+                if idle_key == key:
+                    del self._idle[token]
+                    self._leased[token] = key
+                    self.stats['hits'] += 1
+                    return doc
+            # Anciennes versions du fichier: ne serviront plus
+            for token in [t for t, (k, _) in self._idle.items() if k[0] == key[0]]:
+                to_close.append(self._idle.pop(token)[1])
+
+            deadline = time.monotonic() + self.wait_seconds
+            while True:
+                to_close += self._close_lru(self.max_open - 1)
+                if self._open_count() < self.max_open:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats['over_budget'] += 1
+                    logger.warning(f"Pool PDF plein ({self.max_open} documents prêtés): ouverture hors budget de {key[0]}")
+                    break
+                self._condition.wait(remaining)
+            self._opening += 1
+
+        self._close(to_close)
+        try:
+            doc = fitz.open(key[0])
+        except Exception:
+            with self._condition:
+                self._opening -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._opening -= 1
+            self._leased[id(doc)] = key
+            self.stats['opens'] += 1
+        return doc
+
+    def release(self, doc, discard: bool = False):
+        """Rend un document emprunté; discard: le fermer (erreur pendant l'utilisation)"""
+        to_close = []
+        with self._condition:
+            key = self._leased.pop(id(doc), None)
+            if key is None or discard or doc.is_closed or doc.is_dirty:
+                to_close.append(doc)
+            else:
+                self._idle[id(doc)] = (key, doc)
+                to_close += self._close_lru(self.max_open)
+            self._condition.notify()
+        self._close([d for d in to_close if not d.is_closed])
+
+    @contextmanager
+    def open(self, path: str):
+        """with pool.open(path) as doc: ... (le document est rendu à la sortie)"""
+        doc = self.acquire(path)
+        try:
+            yield doc
+        except BaseException:
+            self.release(doc, discard=True)
+            raise
+        else:
+            self.release(doc)
+
+    def clear(self):
+        """Ferme les documents disponibles (les documents prêtés seront fermés à leur retour)"""
+        with self._condition:
+            docs = [doc for _, doc in self._idle.values()]
+            self._idle.clear()
+            self._condition.notify_all()
+        self._close(docs)
+
+    def info(self) -> Dict[str, int]:
+        with self._condition:
+            return {'idle': len(self._idle), 'leased': len(self._leased), 'max_open': self.max_open, **self.stats}
+
+
+_pool: Optional[PDFDocumentPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pdf_pool() -> PDFDocumentPool:
+    """Pool du processus, créé à la première utilisation (PDF_POOL_MAX_OPEN, PDF_POOL_WAIT_SECONDS)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PDFDocumentPool(
+                max_open=getattr(settings, 'PDF_POOL_MAX_OPEN', 16),
+                wait_seconds=getattr(settings, 'PDF_POOL_WAIT_SECONDS', 5)
+            )
+        return _pool
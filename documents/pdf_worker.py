@@ -0,0 +1,319 @@
+# FICHIER: documents/pdf_worker.py
+# EXTRACTION PDF DANS UN PROCESSUS SURVEILLÉ
+# ============================================
+# Un PDF pathologique (milliers de tracés vectoriels, xref corrompue) peut bloquer
+# pdfplumber pendant des minutes. L'extraction tourne donc dans un processus fils
+# avec une limite de mémoire; le processus parent surveille la durée totale et la durée
+# de chaque page, tue le fils s'il dépasse, et reprend en mode dégradé (texte seul).
+# Ce module n'importe pas Django: il est chargé tel quel par le processus fils (spawn).
+
+from typing import Dict, Iterator, List, Optional, Set
+import multiprocessing
+import os
+import time
+
+try:
+    import pdfplumber
+    PDFPLUMBER_AVAILABLE = True
+except ImportError:
+    PDFPLUMBER_AVAILABLE = False
+
+
+TABLE_SETTINGS_TEXT = {
+    "vertical_strategy": "text",
+    "horizontal_strategy": "text",
+    "snap_tolerance": 5,
+    "join_tolerance": 5,
+    "edge_min_length": 10,
+    "min_words_vertical": 2,
+    "min_words_horizontal": 2,
+}
+
+
+def current_rss_mb() -> float:
+    """Mémoire résidente actuelle du processus (Mo); pic du processus si /proc est indisponible"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def empty_page(page_number: int, width: float = None, height: float = None) -> Dict:
+    return {'page_number': page_number, 'text': '', 'tables': [], 'width': width, 'height': height}
+
+
+def extract_page_structure(page, text_only: bool = False) -> Dict:
+    """Texte, tableaux (sauf en mode texte seul) et dimensions d'une page pdfplumber"""
+    page_info = empty_page(page.page_number, float(page.width), float(page.height))
+
+    if not text_only:
+        # Extraire les tableaux avec paramètres permissifs
+        tables = page.extract_tables()
+
+        if not tables or len(tables) == 0:
+            # Essayer avec paramètres personnalisés
+            tables = page.extract_tables(table_settings=TABLE_SETTINGS_TEXT)
+
+        if tables:
+            for table in tables:
+                if table and len(table) > 0:
+                    # Nettoyer les cellules
+                    cleaned_table = [
+                        [str(cell).strip() if cell is not None else '' for cell in row]
+                        for row in table
+                    ]
+                    # Filtrer les lignes vides
+                    cleaned_table = [row for row in cleaned_table if any(cell for cell in row)]
+
+                    if cleaned_table:
+                        page_info['tables'].append({
+                            'data': cleaned_table,
+                            'rows': len(cleaned_table),
+                            'cols': len(cleaned_table[0]) if cleaned_table else 0
+                        })
+
+    # Extraire le texte
+    page_text = page.extract_text()
+    if page_text:
+        page_info['text'] = page_text
+
+    return page_info
+
+
+def iter_page_structures(file_path: str, bounded: Optional[bool] = None, bounded_min_pages: int = 100,
+                         window: int = 50, page_numbers: Optional[List[int]] = None,
+                         text_only_pages: Optional[Set[int]] = None, text_only: bool = False) -> Iterator[tuple]:
+    """
+    Extrait les pages une à une et produit des événements:
+    - ('opened', total_pages, bounded)
+    - ('start', page_number)                       avant le traitement d'une page
+    - ('page', page_number, page_info, warning, rss_mb)
+
+    En mode borné, les caches de chaque page sont libérés et le fichier est rouvert
+    toutes les `window` pages (caches de pdfminer).
+    page_numbers: pages à traiter (toutes par défaut); text_only_pages: pages sans tableaux
+    """
+    with pdfplumber.open(file_path) as pdf:
+        total_pages = len(pdf.pages)
+
+    if bounded is None:
+        bounded = total_pages >= bounded_min_pages
+    yield ('opened', total_pages, bounded)
+
+    if page_numbers is None:
+        page_numbers = list(range(1, total_pages + 1))
+    text_only_pages = text_only_pages or set()
+    step = max(window, 1) if bounded else max(len(page_numbers), 1)
+
+    for i in range(0, len(page_numbers), step):
+        window_pages = page_numbers[i:i + step]
+        with pdfplumber.open(file_path, pages=window_pages) as pdf:
+            for page in pdf.pages:
+                number = page.page_number
+                yield ('start', number)
+
+                warning = None
+                try:
+                    page_info = extract_page_structure(page, text_only or number in text_only_pages)
+                except MemoryError:
+                    page.close()
+                    warning = f"page {number}: limite mémoire atteinte, texte seul"
+                    try:
+                        page_info = extract_page_structure(page, text_only=True)
+                    except MemoryError:
+                        page_info = empty_page(number)
+                        warning = f"page {number}: limite mémoire atteinte, page ignorée"
+                except Exception as e:
+                    page_info = empty_page(number)
+                    warning = f"page {number}: erreur d'extraction ({e})"
+
+                if bounded:
+                    page.close()
+                yield ('page', number, page_info, warning, current_rss_mb())
+
+
+def _set_memory_limit(memory_limit_mb: int):
+    if not memory_limit_mb:
+        return
+    try:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def _worker_main(conn, file_path: str, memory_limit_mb: int, options: Dict):
+    """Point d'entrée du processus fils: transmet chaque événement au parent"""
+    _set_memory_limit(memory_limit_mb)
+    try:
+        for event in iter_page_structures(file_path, **options):
+            conn.send(event)
+        conn.send(('done',))
+    except BaseException as e:
+        try:
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+        except Exception:
+            pass
+    finally:
+        conn.close()
+
+
+class ExtractionSupervisor:
+    """
+    Exécute iter_page_structures dans un processus fils et applique les budgets:
+    - timeout: durée totale de l'extraction complète (secondes)
+    - page_timeout: durée maximale d'une page
+    - memory_limit_mb: espace d'adressage du fils (RLIMIT_AS)
+    - grace_timeout: délai accordé après le timeout global pour extraire
+      le texte seul des pages restantes
+
+    Une page qui dépasse son budget (ou fait mourir le fils) est retentée en texte seul
+    dans un nouveau fils, puis ignorée si elle échoue encore. Les avertissements et
+    les pages dégradées sont consignés dans stats.
+    """
+
+    def __init__(self, file_path: str, timeout: float = 300, page_timeout: float = 30,
+                 memory_limit_mb: int = 2048, grace_timeout: float = 60, **options):
+        self.file_path = file_path
+        self.timeout = timeout
+        self.page_timeout = page_timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.grace_timeout = grace_timeout
+        self.options = options
+        self.stats = {
+            'sandboxed': True,
+            'warnings': [],
+            'degraded_pages': [],
+            'skipped_pages': [],
+            'worker_restarts': 0,
+            'worker_peak_rss_mb': 0.0,
+        }
+
+    def _warn(self, message: str):
+        print(f"[WARNING] Extraction PDF: {message}")
+        self.stats['warnings'].append(message)
+
+    def _spawn(self, options: Dict):
+        context = multiprocessing.get_context('spawn')
+        parent_conn, child_conn = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_worker_main,
+            args=(child_conn, self.file_path, self.memory_limit_mb, options),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    @staticmethod
+    def _stop(process, conn):
+        if process.is_alive():
+            process.kill()
+        process.join(5)
+        conn.close()
+
+    def events(self) -> Iterator[tuple]:
+        """
+        Événements 'opened' puis 'page' (dans l'ordre des pages), comme iter_page_structures.
+        Lève RuntimeError si le fichier ne peut pas être ouvert dans les budgets.
+        """
+        deadline = time.monotonic() + self.timeout
+        grace_deadline = None
+        remaining: Optional[List[int]] = None
+        text_only_pages: Set[int] = set()
+        opened = False
+
+        while remaining is None or remaining:
+            text_only = grace_deadline is not None
+            options = dict(self.options, text_only_pages=set(text_only_pages), text_only=text_only)
+            if remaining is not None:
+                options['page_numbers'] = list(remaining)
+
+            process, conn = self._spawn(options)
+            current, page_started = None, None
+            outcome = None
+            progressed = False
+
+            try:
+                while outcome is None:
+                    limit = grace_deadline or deadline
+                    if page_started is not None:
+                        limit = min(limit, page_started + self.page_timeout)
+
+                    if not conn.poll(max(limit - time.monotonic(), 0)):
+                        page_timed_out = page_started is not None and time.monotonic() >= page_started + self.page_timeout
+                        outcome = 'page_timeout' if page_timed_out else 'timeout'
+                        break
+
+                    try:
+                        event = conn.recv()
+                    except (EOFError, OSError):
+                        outcome = 'died'
+                        break
+
+                    kind = event[0]
+                    if kind == 'opened':
+                        if not opened:
+                            opened = True
+                            remaining = list(range(1, event[1] + 1))
+                            yield event
+                    elif kind == 'start':
+                        current, page_started = event[1], time.monotonic()
+                    elif kind == 'page':
+                        _, number, page_info, warning, rss = event
+                        if warning:
+                            self._warn(warning)
+                            self.stats['degraded_pages'].append(number)
+                        self.stats['worker_peak_rss_mb'] = max(self.stats['worker_peak_rss_mb'], round(rss, 1))
+                        remaining.remove(number)
+                        current, page_started = None, None
+                        progressed = True
+                        yield event
+                    elif kind == 'done':
+                        outcome = 'done'
+                    elif kind == 'error':
+                        self._warn(event[1])
+                        outcome = 'died'
+            finally:
+                self._stop(process, conn)
+
+            if outcome == 'done':
+                break
+
+            if not opened:
+                raise RuntimeError(f"le fichier n'a pas pu être ouvert ({outcome})")
+
+            self.stats['worker_restarts'] += 1
+            reason = {'page_timeout': 'délai par page dépassé', 'timeout': 'délai total dépassé',
+                      'died': 'processus d\'extraction interrompu'}[outcome]
+
+            if current is not None:
+                if current in text_only_pages or text_only:
+                    # Déjà en texte seul: la page est abandonnée
+                    self._warn(f"page {current}: {reason}, page ignorée")
+                    self.stats['skipped_pages'].append(current)
+                    remaining.remove(current)
+                    yield ('page', current, empty_page(current), None, 0.0)
+                elif outcome != 'timeout':
+                    self._warn(f"page {current}: {reason}, nouvel essai en texte seul")
+                    self.stats['degraded_pages'].append(current)
+                    text_only_pages.add(current)
+
+            if outcome == 'timeout' or time.monotonic() >= deadline:
+                if grace_deadline is None:
+                    self._warn(f"{reason}: texte seul pour les {len(remaining)} page(s) restante(s)")
+                    self.stats['degraded_pages'].extend(remaining)
+                    grace_deadline = time.monotonic() + self.grace_timeout
+                elif time.monotonic() >= grace_deadline:
+                    self._warn(f"délai de grâce dépassé: {len(remaining)} page(s) ignorée(s)")
+                    for number in list(remaining):
+                        self.stats['skipped_pages'].append(number)
+                        yield ('page', number, empty_page(number), None, 0.0)
+                    remaining = []
+            elif not progressed and current is None:
+                raise RuntimeError(f"le processus d'extraction échoue sans progresser ({reason})")
+
+        self.stats['degraded_pages'] = sorted(set(self.stats['degraded_pages']))
@@ -0,0 +1,197 @@
+# FICHIER: documents/render_service.py
+# RENDUS DES PAGES PDF (VIGNETTES, FONDS DE L'ÉDITEUR)
+# ============================================
+# Chaque page est rastérisée par PyMuPDF à quelques résolutions fixes (PAGE_RENDER_DPIS),
+# entière ou par tuiles, et rangée dans le stockage par empreinte sous le SHA-256 de ce
+# qui la produit (empreinte du fichier, page, résolution, tuile, version du rendu):
+# une page n'est rendue qu'une fois, à la demande ou en arrière-plan après l'analyse.
+
+from typing import List, NamedTuple, Optional, Tuple
+from django.conf import settings
+from django.urls import reverse
+import hashlib
+import math
+import os
+
+from .models import Document
+from .pdf_pool import FITZ_AVAILABLE, PDFDocumentPool, get_pdf_pool
+from .storage import ContentAddressedStorage
+from core.tasks import run_in_background
+
+if FITZ_AVAILABLE:
+    import fitz
+
+
+class RenderUnavailable(ValueError):
+    """Rendu impossible: document non PDF, fichier absent, page, résolution ou tuile hors limites"""
+
+
+class PageRender(NamedTuple):
+    key: str        # SHA-256 des entrées du rendu (ETag)
+    path: str       # Fichier JPEG dans le stockage par empreinte
+    created: bool   # False si le rendu était déjà en cache
+
+
+class PageRenderService:
+    """Rastérisation des pages PDF avec cache disque par empreinte"""
+
+    # À incrémenter quand le rendu change (format, qualité): les anciens rendus ne sont plus servis
+    RENDERER_VERSION = 1
+    EXTENSION = '.jpg'
+    CONTENT_TYPE = 'image/jpeg'
+
+    @staticmethod
+    def _setting(name: str, default):
+        return getattr(settings, name, default)
+
+    @classmethod
+    def dpi_levels(cls) -> Tuple[int, ...]:
+        return tuple(cls._setting('PAGE_RENDER_DPIS', (36, 96, 192)))
+
+    @classmethod
+    def thumbnail_dpi(cls) -> int:
+        return cls._setting('PAGE_RENDER_THUMBNAIL_DPI', 36)
+
+    @classmethod
+    def editor_dpi(cls) -> int:
+        return cls._setting('PAGE_RENDER_EDITOR_DPI', 96)
+
+    @classmethod
+    def tile_size(cls) -> int:
+        return cls._setting('PAGE_RENDER_TILE_SIZE', 512)
+
+    # ------------------------------------------------------------------
+    # Identification
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def is_renderable(document: Document) -> bool:
+        return FITZ_AVAILABLE and document.file_type == '.pdf' and bool(document.file)
+
+    @classmethod
+    def fingerprint(cls, document: Document) -> str:
+        """Empreinte du fichier: file_hash, sinon (documents anciens) chemin, date de modification et taille"""
+        if document.file_hash:
+            return document.file_hash
+        try:
+            key = PDFDocumentPool.key_for(document.file.path)
+        except (OSError, ValueError) as e:
+            raise RenderUnavailable(f"Fichier introuvable: {e}") from e
+        return hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def render_key(cls, fingerprint: str, page_number: int, dpi: int, tile: Optional[Tuple[int, int]] = None) -> str:
+        tile_part = f"{tile[0]},{tile[1]}" if tile else 'page'
+        data = f"{fingerprint}:{page_number}:{dpi}:{tile_part}:{cls.RENDERER_VERSION}"
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def url(cls, document: Document, page_number: int, dpi: int, tile: Optional[Tuple[int, int]] = None) -> str:
+        """
+        URL d'un rendu; le paramètre v (empreinte du fichier) change avec le fichier:
+        la réponse à cette URL ne change jamais et reste en cache dans le navigateur
+        """
+        url = reverse('documents:page_render', args=[document.pk, page_number])
+        url += f"?dpi={dpi}&v={cls.fingerprint(document)[:16]}"
+        if tile:
+            url += f"&tile={tile[0]},{tile[1]}"
+        return url
+
+    @classmethod
+    def thumbnail_url(cls, document: Document) -> Optional[str]:
+        """Vignette de la première page, None si le document n'est pas un PDF rendable"""
+        if not cls.is_renderable(document):
+            return None
+        try:
+            return cls.url(document, 1, cls.thumbnail_dpi())
+        except RenderUnavailable:
+            return None
+
+    # ------------------------------------------------------------------
+    # Rendu
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def tile_grid(cls, width_pt: float, height_pt: float, dpi: int) -> Tuple[int, int]:
+        """(colonnes, lignes) de tuiles de tile_size pixels pour une page de cette taille"""
+        size_pt = cls.tile_size() * 72 / dpi
+        return max(1, math.ceil(width_pt / size_pt)), max(1, math.ceil(height_pt / size_pt))
+
+    @classmethod
+    def _rasterize(cls, page, dpi: int, tile: Optional[Tuple[int, int]]) -> Optional[bytes]:
+        """JPEG de la page ou de la tuile, None si la tuile est hors de la page"""
+        clip = None
+        if tile:
+            rect = page.rect
+            columns, rows = cls.tile_grid(rect.width, rect.height, dpi)
+            col, row = tile
+            if not (0 <= col < columns and 0 <= row < rows):
+                return None
+            size_pt = cls.tile_size() * 72 / dpi
+            clip = fitz.Rect(
+                rect.x0 + col * size_pt, rect.y0 + row * size_pt,
+                min(rect.x0 + (col + 1) * size_pt, rect.x1), min(rect.y0 + (row + 1) * size_pt, rect.y1)
+            )
+        pixmap = page.get_pixmap(dpi=dpi, clip=clip, alpha=False)
+        return pixmap.tobytes('jpg', jpg_quality=cls._setting('PAGE_RENDER_JPEG_QUALITY', 80))
+
+    @classmethod
+    def render(cls, document: Document, page_number: int, dpi: int,
+               tile: Optional[Tuple[int, int]] = None) -> PageRender:
+        """
+        Rendu d'une page (ou d'une tuile [colonne, ligne]) à une résolution de PAGE_RENDER_DPIS
+
+        Raises:
+            RenderUnavailable: document non rendable, page, résolution ou tuile invalide
+        """
+        if not cls.is_renderable(document):
+            raise RenderUnavailable("Seuls les documents PDF ont un rendu de page")
+        if dpi not in cls.dpi_levels():
+            raise RenderUnavailable(f"Résolution non proposée: {dpi} (valeurs: {cls.dpi_levels()})")
+
+        key = cls.render_key(cls.fingerprint(document), page_number, dpi, tile)
+        path = ContentAddressedStorage.path_for(key, cls.EXTENSION)
+        if os.path.exists(path):
+            return PageRender(key, path, False)
+
+        try:
+            with get_pdf_pool().open(document.file.path) as doc:
+                page_count = len(doc)
+                data = cls._rasterize(doc[page_number - 1], dpi, tile) if 1 <= page_number <= page_count else None
+        except (OSError, RuntimeError, ValueError) as e:
+            raise RenderUnavailable(f"Rendu impossible: {e}") from e
+        if data is None:
+            raise RenderUnavailable(f"Page {page_number} ou tuile {tile} hors du document ({page_count} pages)")
+
+        stored = ContentAddressedStorage.store_derived(key, data, cls.EXTENSION)
+        return PageRender(key, path, stored.created)
+
+    # ------------------------------------------------------------------
+    # Rendus en arrière-plan
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def schedule_precompute(cls, document: Document):
+        """Planifie la vignette et les premières pages de l'éditeur (les autres sont rendues à la demande)"""
+        if cls.is_renderable(document):
+            return run_in_background(cls.precompute, document.id)
+        return None
+
+    @classmethod
+    def precompute(cls, document_id: int) -> int:
+        """Rend la vignette et les EDITOR_PAGE_WINDOW premières pages à la résolution de l'éditeur"""
+        document = Document.objects.filter(id=document_id).first()
+        if document is None or not cls.is_renderable(document):
+            return 0
+
+        jobs: List[Tuple[int, int]] = [(1, cls.thumbnail_dpi())]
+        jobs += [(number, cls.editor_dpi()) for number in range(1, cls._setting('EDITOR_PAGE_WINDOW', 5) + 1)]
+        created = 0
+        for page_number, dpi in jobs:
+            try:
+                created += cls.render(document, page_number, dpi).created
+            except RenderUnavailable:
+                break
+        if created:
+            print(f"[RENDER] Document {document_id}: {created} rendu(s) de page")
+        return created
@@ -2,20 +2,25 @@
 # SERVICES POUR L'ANALYSE ET LE TRAITEMENT DES DOCUMENTS
 # ============================================
 
-import PyPDF2
-import docx
 import os
+import re
 import json
-from typing import Dict, List, Tuple
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from django.conf import settings
 from django.core.files.uploadedfile import UploadedFile
-from .models import Document, DocumentContent, DocumentAnalysis, DocumentChunk
+from django.db import transaction
+from .models import Document, DocumentContent, DocumentAnalysis, DocumentChunk, DocumentPage
+from .text_analysis import TermStatisticsService, TextAnalysisEngine
+from .cue_matcher import DocumentCueClassifier
+from .entity_extractor import EntityExtractor
+from . import extraction_stream
+from .extraction_stream import TextRecord
 
-# Import conditionnel de pdfplumber
-try:
-    import pdfplumber
-    PDFPLUMBER_AVAILABLE = True
-except ImportError:
-    PDFPLUMBER_AVAILABLE = False
+from . import pdf_worker
+from .pdf_worker import PDFPLUMBER_AVAILABLE
+from .render_service import PageRenderService
 
 
 class DocumentExtractorService:
@@ -23,116 +28,182 @@ class DocumentExtractorService:
     Service pour extraire le contenu textuel des documents
     """
 
+    # Taille des fenêtres de texte produites pour les DOCX (caractères)
+    WINDOW_CHARS = 1 << 16
+
     @staticmethod
     def extract_text_from_pdf(file_path: str) -> Tuple[str, int]:
         """
-        Extrait le texte d'un fichier PDF
+        Extrait le texte d'un fichier PDF (PyPDF2, page par page)
         Returns: (text, page_count)
         """
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                page_count = len(pdf_reader.pages)
-                text = ""
-
-                for page_num in range(page_count):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text() + "\n"
-
-                return text, page_count
+            pages = list(extraction_stream.iter_pdf_pages(file_path))
+            return ''.join(page.text + "\n" for page in pages), len(pages)
         except Exception as e:
             raise Exception(f"Erreur lors de l'extraction du PDF: {str(e)}")
 
     @staticmethod
-    def extract_pdf_structure(file_path: str) -> Dict:
+    def use_sandbox() -> bool:
+        return getattr(settings, 'PDF_EXTRACTION_SANDBOX', True)
+
+    @staticmethod
+    def bounded_memory_setting() -> Optional[bool]:
+        """Mode mémoire bornée selon PDF_BOUNDED_MEMORY (None en mode 'auto': décidé selon le nombre de pages)"""
+        mode = getattr(settings, 'PDF_BOUNDED_MEMORY', 'auto')
+        if mode in ('true', True):
+            return True
+        if mode in ('false', False):
+            return False
+        return None
+
+    @classmethod
+    def extract_pdf_structure(cls, file_path: str, bounded: bool = None) -> Dict:
         """
-        Extrait la structure complète du PDF avec pdfplumber (tableaux, texte, mise en page)
-        Returns: Dict contenant la structure complète
+        Extrait la structure complète du PDF avec pdfplumber (tableaux, texte, mise en page),
+        pages comprises (voir iter_pdf_structure pour l'extraction en flux, sans garder les pages)
+
+        Returns: Dict contenant la structure complète, avec 'extraction' (mode, mémoire, durée)
         """
         if not PDFPLUMBER_AVAILABLE:
             print("[WARNING] pdfplumber non disponible, extraction simple utilisée")
             return None
 
         try:
-            pages_data = []
-            full_text = ""
-
-            with pdfplumber.open(file_path) as pdf:
-                for page_num, page in enumerate(pdf.pages, 1):
-                    page_info = {
-                        'page_number': page_num,
-                        'text': '',
-                        'tables': [],
-                        'width': float(page.width),
-                        'height': float(page.height)
-                    }
-
-                    # Extraire les tableaux avec paramètres permissifs
-                    tables = page.extract_tables()
-
-                    if not tables or len(tables) == 0:
-                        # Essayer avec paramètres personnalisés
-                        table_settings = {
-                            "vertical_strategy": "text",
-                            "horizontal_strategy": "text",
-                            "snap_tolerance": 5,
-                            "join_tolerance": 5,
-                            "edge_min_length": 10,
-                            "min_words_vertical": 2,
-                            "min_words_horizontal": 2,
-                        }
-                        tables = page.extract_tables(table_settings=table_settings)
-
-                    if tables:
-                        for table in tables:
-                            if table and len(table) > 0:
-                                # Nettoyer les cellules
-                                cleaned_table = [
-                                    [str(cell).strip() if cell is not None else '' for cell in row]
-                                    for row in table
-                                ]
-                                # Filtrer les lignes vides
-                                cleaned_table = [row for row in cleaned_table if any(cell for cell in row)]
-
-                                if cleaned_table:
-                                    page_info['tables'].append({
-                                        'data': cleaned_table,
-                                        'rows': len(cleaned_table),
-                                        'cols': len(cleaned_table[0]) if cleaned_table else 0
-                                    })
-
-                    # Extraire le texte
-                    page_text = page.extract_text()
-                    if page_text:
-                        page_info['text'] = page_text
-                        full_text += page_text + "\n\n"
-
-                    pages_data.append(page_info)
-
-            return {
-                'success': True,
-                'pages': pages_data,
-                'total_pages': len(pages_data),
-                'full_text': full_text,
-                'has_tables': any(len(p.get('tables', [])) > 0 for p in pages_data),
-                'total_tables': sum(len(p.get('tables', [])) for p in pages_data)
-            }
-
+            structure = {}
+            pages = list(cls.iter_pdf_structure(file_path, structure, bounded))
+            return dict(structure, pages=pages)
         except Exception as e:
             print(f"[ERROR] extract_pdf_structure: {e}")
             return None
 
+    @classmethod
+    def iter_pdf_structure(cls, file_path: str, structure: Dict, bounded: bool = None) -> Iterator[Dict]:
+        """
+        Pages de la structure pdfplumber (texte, tableaux, dimensions), produites une à une:
+        l'appelant les enregistre au fil de l'eau, aucune n'est conservée ici.
+        structure reçoit à la fin le reste de la structure ('success', 'total_pages', 'has_tables',
+        'total_tables', 'extraction'), sans ses pages.
+
+        Par défaut (PDF_EXTRACTION_SANDBOX), l'extraction tourne dans un processus fils surveillé
+        (voir pdf_worker.ExtractionSupervisor): durée totale, durée par page et mémoire sont bornées,
+        les pages qui dépassent sont extraites en texte seul et signalées dans 'extraction'.
+
+        En mode mémoire bornée (PDF volumineux, voir PDF_BOUNDED_MEMORY):
+        - les caches de chaque page sont libérés dès qu'elle est traitée
+        - le fichier est rouvert toutes les PDF_BOUNDED_WINDOW_PAGES pages (caches de pdfminer)
+        Le texte complet n'est pas assemblé ici: voir structure_full_text.
+
+        Raises:
+            RuntimeError si pdfplumber n'est pas installé, et les erreurs d'ouverture du fichier
+        """
+        if not PDFPLUMBER_AVAILABLE:
+            raise RuntimeError("pdfplumber n'est pas installé")
+
+        started = time.monotonic()
+        start_rss = peak_rss = pdf_worker.current_rss_mb()
+        options = {
+            'bounded': cls.bounded_memory_setting() if bounded is None else bounded,
+            'bounded_min_pages': getattr(settings, 'PDF_BOUNDED_MEMORY_MIN_PAGES', 100),
+            'window': getattr(settings, 'PDF_BOUNDED_WINDOW_PAGES', 50),
+        }
+
+        supervisor = None
+        if cls.use_sandbox():
+            supervisor = pdf_worker.ExtractionSupervisor(
+                file_path,
+                timeout=getattr(settings, 'PDF_EXTRACTION_TIMEOUT', 300),
+                page_timeout=getattr(settings, 'PDF_PAGE_TIMEOUT', 30),
+                memory_limit_mb=getattr(settings, 'PDF_EXTRACTION_MEMORY_MB', 2048),
+                grace_timeout=getattr(settings, 'PDF_TEXT_ONLY_GRACE_TIMEOUT', 60),
+                **options
+            )
+            events = supervisor.events()
+        else:
+            events = pdf_worker.iter_page_structures(file_path, **options)
+
+        total_pages, bounded = 0, False
+        page_count = table_count = 0
+        for event in events:
+            if event[0] == 'opened':
+                _, total_pages, bounded = event
+                continue
+            if event[0] != 'page':
+                continue
+
+            page_info = event[2]
+            page_count += 1
+            table_count += len(page_info.get('tables') or [])
+            peak_rss = max(peak_rss, pdf_worker.current_rss_mb())
+            yield page_info
+
+        extraction = {
+            'bounded': bounded,
+            'start_rss_mb': round(start_rss, 1),
+            'peak_rss_mb': round(peak_rss, 1),
+            'peak_rss_delta_mb': round(peak_rss - start_rss, 1),
+            'seconds': round(time.monotonic() - started, 2),
+        }
+        if supervisor is not None:
+            extraction.update(supervisor.stats)
+        else:
+            extraction['sandboxed'] = False
+
+        print(f"[INFO] Extraction pdfplumber ({'mémoire bornée' if bounded else 'standard'}"
+              f"{', processus surveillé' if supervisor else ''}): "
+              f"{total_pages} pages, pic mémoire {extraction['peak_rss_mb']} Mo "
+              f"(+{extraction['peak_rss_delta_mb']} Mo), {extraction['seconds']} s")
+
+        structure.update({
+            'success': True,
+            'total_pages': page_count,
+            'has_tables': table_count > 0,
+            'total_tables': table_count,
+            'extraction': extraction
+        })
+
+    @classmethod
+    def structure_full_text(cls, pdf_structure: Dict) -> str:
+        """Texte complet d'une structure PDF (pages non vides suivies d'une ligne vide), assemblé à la demande"""
+        if pdf_structure.get('full_text'):
+            # Structures enregistrées avant que le texte complet ne soit plus stocké
+            return pdf_structure['full_text']
+        return ''.join(text for _, text in cls.iter_pages(cls.records_from_structure(pdf_structure)))
+
+    @staticmethod
+    def compute_page_starts(pdf_structure: Dict, text: str) -> List[int]:
+        """
+        Positions de début de chaque page dans le texte extrait
+        (full_text = texte de chaque page non vide suivi d'une ligne vide)
+        Retourne [] si le texte ne correspond plus à la structure (texte modifié depuis)
+        """
+        pages = (pdf_structure or {}).get('pages') or []
+        if not pages:
+            return []
+
+        starts, offset = [], 0
+        for page in pages:
+            starts.append(offset)
+            page_text = page.get('text') or ''
+            if page_text:
+                offset += len(page_text) + 2
+
+        if offset != len(text or ''):
+            return []
+        return starts
+
     @staticmethod
     def extract_text_from_docx(file_path: str) -> Tuple[str, int]:
         """
-        Extrait le texte d'un fichier Word (.docx)
+        Extrait le texte d'un fichier Word (.docx), tableaux compris
         Returns: (text, paragraph_count)
         """
         try:
-            doc = docx.Document(file_path)
-            paragraphs = [para.text for para in doc.paragraphs]
-            text = "\n".join(paragraphs)
-            return text, len(paragraphs)
+            texts, paragraph_count = [], 0
+            for record in extraction_stream.iter_docx_records(file_path):
+                texts.append(record.text)
+                paragraph_count += record.kind == 'paragraph'
+            return "\n".join(texts), paragraph_count
         except Exception as e:
             raise Exception(f"Erreur lors de l'extraction du DOCX: {str(e)}")
 
@@ -143,22 +214,53 @@ class DocumentExtractorService:
         Returns: (text, line_count)
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                text = file.read()
-                lines = text.split('\n')
-                return text, len(lines)
+            blocks = [record.text for record in extraction_stream.iter_txt_blocks(file_path)]
+            return ''.join(blocks), sum(block.count('\n') for block in blocks) + 1
         except Exception as e:
             raise Exception(f"Erreur lors de la lecture du fichier texte: {str(e)}")
 
+    @staticmethod
+    def records_from_structure(pdf_structure: Dict) -> Iterator[TextRecord]:
+        """Pages déjà extraites par pdfplumber, sous forme de morceaux de texte"""
+        for page in pdf_structure.get('pages', []):
+            yield TextRecord('page', page.get('page_number'), page.get('text') or '')
+
+    @classmethod
+    def iter_pages(cls, records: Iterable[TextRecord]) -> Iterator[Tuple[Optional[int], str]]:
+        """
+        Regroupe les morceaux extraits en pages de texte: (numéro de page, texte).
+        Les pages PDF non vides sont suivies d'une ligne vide (même découpage que full_text);
+        les paragraphes DOCX sont regroupés en fenêtres d'environ WINDOW_CHARS (numéro None);
+        les blocs TXT sont déjà bornés et restitués tels quels.
+        Le texte du document est exactement la concaténation des pages.
+        """
+        window, size = [], 0
+        for record in records:
+            if record.kind == 'page':
+                if record.text:
+                    yield record.number, record.text + "\n\n"
+                continue
+            if record.kind == 'block':
+                yield None, record.text
+                continue
+
+            window.append(record.text + "\n")
+            size += len(record.text) + 1
+            if size >= cls.WINDOW_CHARS:
+                yield None, ''.join(window)
+                window, size = [], 0
+
+        if window:
+            yield None, ''.join(window)
+
     @classmethod
     def extract_text(cls, file_path: str, file_extension: str) -> Dict:
         """
-        Extrait le texte selon le type de fichier
+        Extrait le texte selon le type de fichier, en flux (page, paragraphe ou bloc de lignes)
         Pour les PDF, extrait aussi la structure complète (tableaux, mise en page)
-        Returns: Dict with 'text', 'page_count', 'word_count', 'pdf_structure'
+        Returns: Dict with 'text', 'page_count', 'word_count', 'page_spans', 'pdf_structure'
+            page_spans: [(numéro de page ou None, début, fin)] de chaque page dans 'text'
         """
-        text = ""
-        page_count = 0
         pdf_structure = None
 
         if file_extension == '.pdf':
@@ -167,29 +269,49 @@ class DocumentExtractorService:
 
             if pdf_structure and pdf_structure.get('success'):
                 # Utiliser le texte extrait par pdfplumber (meilleure qualité)
-                text = pdf_structure.get('full_text', '')
-                page_count = pdf_structure.get('total_pages', 0)
-
-                print(f"[INFO] PDF extrait avec pdfplumber: {page_count} pages, {pdf_structure.get('total_tables', 0)} tableau(x)")
+                records = cls.records_from_structure(pdf_structure)
+                print(f"[INFO] PDF extrait avec pdfplumber: {pdf_structure.get('total_pages', 0)} pages, {pdf_structure.get('total_tables', 0)} tableau(x)")
             else:
                 # Fallback sur PyPDF2 si pdfplumber échoue
-                text, page_count = cls.extract_text_from_pdf(file_path)
-                print(f"[INFO] PDF extrait avec PyPDF2 (fallback): {page_count} pages")
+                records = extraction_stream.iter_pdf_pages(file_path)
+        else:
+            records = extraction_stream.iter_records(file_path, file_extension)
+
+        # Compteurs tenus au passage des morceaux (pages, paragraphes, lignes)
+        counts = {'page': 0, 'paragraph': 0, 'table': 0, 'block': 0, 'lines': 1}
 
-        elif file_extension in ['.docx', '.doc']:
-            text, page_count = cls.extract_text_from_docx(file_path)
+        def counted(stream):
+            for record in stream:
+                counts[record.kind] += 1
+                if record.kind == 'block':
+                    counts['lines'] += record.text.count('\n')
+                yield record
+
+        parts, page_spans = [], []
+        offset = word_count = 0
+        try:
+            for page_number, page_text in cls.iter_pages(counted(records)):
+                parts.append(page_text)
+                page_spans.append((page_number, offset, offset + len(page_text)))
+                offset += len(page_text)
+                word_count += len(page_text.split())
+        except Exception as e:
+            raise Exception(f"Erreur lors de l'extraction du fichier {file_extension}: {str(e)}")
+
+        if file_extension == '.pdf':
+            page_count = counts['page']
+            if pdf_structure is None or not pdf_structure.get('success'):
+                print(f"[INFO] PDF extrait avec PyPDF2 (fallback): {page_count} pages")
         elif file_extension == '.txt':
-            text, page_count = cls.extract_text_from_txt(file_path)
+            page_count = counts['lines']
         else:
-            raise ValueError(f"Type de fichier non supporté: {file_extension}")
-
-        # Calculer le nombre de mots
-        word_count = len(text.split())
+            page_count = counts['paragraph']
 
         result = {
-            'text': text,
+            'text': ''.join(parts),
             'page_count': page_count,
-            'word_count': word_count
+            'word_count': word_count,
+            'page_spans': page_spans
         }
 
         # Ajouter la structure PDF si disponible
@@ -198,6 +320,69 @@ class DocumentExtractorService:
 
         return result
 
+    @classmethod
+    def extract_pages(cls, file_path: str, file_extension: str, summary: Dict) -> Iterator[Dict]:
+        """
+        Variante en flux de extract_text: pages produites au fil de l'extraction, le texte complet
+        n'est jamais assemblé. Pages: {'page_number', 'text', 'tables', 'width', 'height'}, avec
+        page_number None pour les fenêtres DOCX et les blocs TXT (voir DocumentPage.span_text).
+
+        summary est rempli à la fin de l'extraction: 'page_count' et, pour les PDF extraits
+        par pdfplumber, 'pdf_structure' (sans ses pages, qui sont dans DocumentPage)
+        """
+        counts = {'page': 0, 'paragraph': 0, 'table': 0, 'block': 0, 'lines': 1}
+
+        def counted(stream):
+            for record in stream:
+                counts[record.kind] += 1
+                if record.kind == 'block':
+                    counts['lines'] += record.text.count('\n')
+                yield record
+
+        try:
+            if file_extension == '.pdf':
+                yield from cls._extract_pdf_pages(file_path, summary, counts)
+            else:
+                for _, page_text in cls.iter_pages(counted(extraction_stream.iter_records(file_path, file_extension))):
+                    yield {'page_number': None, 'text': page_text}
+        except Exception as e:
+            raise Exception(f"Erreur lors de l'extraction du fichier {file_extension}: {str(e)}")
+
+        if file_extension == '.pdf':
+            summary['page_count'] = counts['page']
+        elif file_extension == '.txt':
+            summary['page_count'] = counts['lines']
+        else:
+            summary['page_count'] = counts['paragraph']
+
+    @classmethod
+    def _extract_pdf_pages(cls, file_path: str, summary: Dict, counts: Dict) -> Iterator[Dict]:
+        """
+        Pages pdfplumber (tableaux, dimensions) au fil de l'extraction, sinon pages PyPDF2.
+        Le repli PyPDF2 n'a lieu que si pdfplumber échoue avant la première page.
+        """
+        if PDFPLUMBER_AVAILABLE:
+            structure = {}
+            try:
+                for page in cls.iter_pdf_structure(file_path, structure):
+                    counts['page'] += 1
+                    yield page
+            except Exception as e:
+                if counts['page']:
+                    raise
+                print(f"[ERROR] extract_pdf_structure: {e}")
+            else:
+                summary['pdf_structure'] = structure
+                print(f"[INFO] PDF extrait avec pdfplumber: {structure['total_pages']} pages, {structure['total_tables']} tableau(x)")
+                return
+        else:
+            print("[WARNING] pdfplumber non disponible, extraction simple utilisée")
+
+        for record in extraction_stream.iter_pdf_pages(file_path):
+            counts['page'] += 1
+            yield {'page_number': record.number, 'text': record.text}
+        print(f"[INFO] PDF extrait avec PyPDF2 (fallback): {counts['page']} pages")
+
 
 class DocumentAnalyzerService:
     """
@@ -207,157 +392,72 @@ class DocumentAnalyzerService:
     @staticmethod
     def generate_summary(text: str, max_length: int = 500) -> str:
         """
-        Génère un résumé du texte
-        Note: Version simplifiée - à améliorer avec un vrai modèle NLP
+        Génère un résumé extractif du texte (TextRank)
         """
-        # Version simple: prendre les premiers paragraphes
-        sentences = text.split('.')
-        summary = ""
-
-        for sentence in sentences:
-            if len(summary) + len(sentence) < max_length:
-                summary += sentence + "."
-            else:
-                break
-
-        return summary.strip()
+        tokens = TextAnalysisEngine.tokenize(text)
+        return TextAnalysisEngine.summarize(text, tokens, max_length)
 
     @staticmethod
     def extract_keywords(text: str, top_n: int = 10) -> List[str]:
         """
-        Extrait les mots-clés principaux
-        Note: Version simplifiée - à améliorer avec TF-IDF ou autre
+        Extrait les mots-clés principaux (TF-IDF sur les fréquences du corpus)
         """
-        # Liste de mots vides en français
-        stop_words = {
-            'le', 'la', 'les', 'un', 'une', 'des', 'de', 'du', 'et', 'ou',
-            'dans', 'sur', 'pour', 'par', 'avec', 'sans', 'sous', 'ce', 'ces',
-            'est', 'sont', 'a', 'ai', 'ont', 'que', 'qui', 'quoi', 'dont'
-        }
-
-        # Nettoyer et séparer les mots
-        words = text.lower().split()
-        words = [w.strip('.,!?;:()[]{}""\'') for w in words]
-
-        # Filtrer les mots vides et courts
-        words = [w for w in words if w not in stop_words and len(w) > 3]
-
-        # Compter les occurrences
-        word_freq = {}
-        for word in words:
-            word_freq[word] = word_freq.get(word, 0) + 1
-
-        # Trier par fréquence
-        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-
-        return [word for word, freq in sorted_words[:top_n]]
+        tokens = TextAnalysisEngine.tokenize(text)
+        return TextAnalysisEngine.keywords(tokens, top_n)
 
     @staticmethod
-    def extract_entities(text: str) -> Dict:
+    def extract_entities(text: str, page_starts: List[int] = None) -> Dict:
         """
-        Extrait les entités nommées (personnes, lieux, organisations, dates)
-        Note: Version simplifiée - à améliorer avec spaCy ou autre
+        Extrait les entités (dates, lots, dosages, montants, références, organisations, lieux)
+        avec leurs positions et numéros de page
         """
-        # Version simplifiée - retourne une structure vide pour l'instant
-        entities = {
-            'persons': [],
-            'organizations': [],
-            'locations': [],
-            'dates': []
-        }
-
-        # TODO: Implémenter avec spaCy ou un autre outil NLP
-
-        return entities
+        return EntityExtractor.extract(text, page_starts)
 
     @staticmethod
     def detect_structure(text: str) -> Dict:
         """
-        Détecte la structure du document (chapitres, sections, etc.)
+        Détecte la structure du document (sections numérotées, sommaire, bibliographie)
         """
-        structure = {
-            'sections': [],
-            'has_table_of_contents': False,
-            'has_bibliography': False
-        }
-
-        lines = text.split('\n')
-
-        # Détecter les titres (lignes courtes en majuscules ou avec numérotation)
-        for i, line in enumerate(lines):
-            line = line.strip()
-
-            # Détection simple de sections
-            if len(line) < 100 and len(line) > 0:
-                # Vérifier si c'est un titre numéroté (1., I., A., etc.)
-                if any(line.startswith(prefix) for prefix in ['1.', '2.', '3.', 'I.', 'II.', 'III.', 'A.', 'B.']):
-                    structure['sections'].append({
-                        'title': line,
-                        'line_number': i
-                    })
-
-        return structure
+        return DocumentCueClassifier.classify(text)['structure']
 
     @staticmethod
     def detect_language(text: str) -> str:
         """
-        Détecte la langue du document
+        Détecte la langue du document (arrêt dès que la décision est sûre)
         """
-        # Mots-clés français
-        french_words = {'le', 'la', 'les', 'un', 'une', 'des', 'de', 'du', 'et', 'est', 'dans', 'pour', 'avec', 'que'}
-        # Mots-clés anglais
-        english_words = {'the', 'a', 'an', 'of', 'and', 'is', 'in', 'for', 'with', 'that', 'this'}
-
-        words = set(text.lower().split()[:200])  # Analyser les 200 premiers mots
-
-        french_count = len(words.intersection(french_words))
-        english_count = len(words.intersection(english_words))
-
-        if french_count > english_count:
-            return 'Français'
-        elif english_count > french_count:
-            return 'Anglais'
-        else:
-            return 'Non détectée'
+        return DocumentCueClassifier.classify(text, with_structure=False)['language']
 
     @staticmethod
     def detect_document_type(text: str, document_title: str = '') -> str:
         """
-        Détecte le type de document
-        """
-        text_lower = text.lower()
-        title_lower = document_title.lower()
-
-        # Patterns pour différents types de documents
-        if any(word in text_lower for word in ['contrat', 'contract', 'agreement', 'accord']):
-            return 'Contrat'
-        elif any(word in text_lower for word in ['rapport', 'report', 'étude', 'study']):
-            return 'Rapport'
-        elif any(word in text_lower for word in ['facture', 'invoice', 'devis', 'quote']):
-            return 'Document financier'
-        elif any(word in text_lower for word in ['guideline', 'directive', 'règlement', 'regulation']):
-            return 'Directive/Règlement'
-        elif any(word in text_lower for word in ['manuel', 'manual', 'guide', 'documentation']):
-            return 'Manuel/Guide'
-        elif any(word in text_lower for word in ['article', 'publication', 'journal', 'research']):
-            return 'Article/Publication'
-        elif any(word in text_lower for word in ['lettre', 'letter', 'correspondance']):
-            return 'Lettre/Correspondance'
-        else:
-            return 'Document général'
+        Détecte le type de document (arrêt dès que la décision est sûre)
+        """
+        return DocumentCueClassifier.classify(text, title=document_title, with_structure=False)['document_type']
 
     @classmethod
     def analyze_document(cls, document: Document, content_text: str) -> Dict:
         """
         Analyse complète d'un document
+        Le texte n'est tokenisé qu'une fois pour le résumé et les mots-clés.
+        Les fréquences du corpus ne sont pas modifiées: elles sont mises à jour avec
+        l'enregistrement de l'analyse ('indexed_terms', voir save_results)
         """
+        text_analysis = TextAnalysisEngine.analyze(content_text, update_statistics=False)
+
+        # Type, langue et structure en un seul parcours du texte
+        cues = DocumentCueClassifier.classify(content_text, title=document.title)
+
+        content = DocumentContent.objects.filter(document=document).first()
+        page_starts = content.get_page_starts() if content else []
+
         return {
-            'summary': cls.generate_summary(content_text),
-            'keywords': cls.extract_keywords(content_text),
-            'entities': cls.extract_entities(content_text),
-            'structure': cls.detect_structure(content_text),
-            'detected_document_type': cls.detect_document_type(content_text, document.title),
-            'language': cls.detect_language(content_text),
+            'summary': text_analysis['summary'],
+            'keywords': text_analysis['keywords'],
+            'indexed_terms': text_analysis['indexed_terms'],
+            'entities': cls.extract_entities(content_text, page_starts),
+            'structure': cues['structure'],
+            'detected_document_type': cues['document_type'],
+            'language': cues['language'],
             'confidence_score': 75.0  # Score par défaut
         }
 
@@ -365,71 +465,168 @@ class DocumentAnalyzerService:
 class DocumentChunkerService:
     """
     Service pour découper les documents en segments pour la recherche
+    Les segments ne chevauchent jamais deux pages: chacun porte son numéro de page
+    et sa position (start_char, end_char) dans le texte brut du document.
+    Leur texte n'est pas stocké: c'est une plage des pages (DocumentChunk.get_text)
     """
 
-    @staticmethod
-    def chunk_by_sentences(text: str, chunk_size: int = 500) -> List[str]:
+    # Estimation du nombre de tokens (≈ 4 caractères par token)
+    CHARS_PER_TOKEN = 4
+
+    PARAGRAPH_BREAK = re.compile(r'\n[ \t]*\n')
+    SENTENCE_END = re.compile(r'(?<=[.!?;])\s+')
+    WORD_BREAK = re.compile(r'\s+')
+
+    @classmethod
+    def _units(cls, text: str, max_chars: int):
         """
-        Découpe le texte en chunks basés sur les phrases
+        Découpe le texte en unités (start, end): paragraphes, puis phrases pour les
+        paragraphes trop longs, puis coupure sur un espace en dernier recours
         """
-        sentences = text.split('.')
-        chunks = []
-        current_chunk = ""
+        paragraph_start = 0
+        for separator in cls.PARAGRAPH_BREAK.finditer(text + '\n\n'):
+            paragraph_end = min(separator.start(), len(text))
+            if paragraph_end - paragraph_start > max_chars:
+                yield from cls._split_long(text, paragraph_start, paragraph_end, max_chars)
+            elif text[paragraph_start:paragraph_end].strip():
+                yield paragraph_start, paragraph_end
+            paragraph_start = separator.end()
 
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if len(current_chunk) + len(sentence) < chunk_size:
-                current_chunk += sentence + ". "
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence + ". "
+    @classmethod
+    def _split_long(cls, text: str, start: int, end: int, max_chars: int):
+        sentence_start = start
+        for separator in cls.SENTENCE_END.finditer(text, start, end):
+            yield from cls._hard_split(text, sentence_start, separator.start(), max_chars)
+            sentence_start = separator.end()
+        yield from cls._hard_split(text, sentence_start, end, max_chars)
 
-        if current_chunk:
-            chunks.append(current_chunk.strip())
+    @staticmethod
+    def _hard_split(text: str, start: int, end: int, max_chars: int):
+        while end - start > max_chars:
+            cut = text.rfind(' ', start + max_chars // 2, start + max_chars)
+            cut = cut if cut != -1 else start + max_chars
+            yield start, cut
+            start = cut
+        if text[start:end].strip():
+            yield start, end
+
+    @classmethod
+    def _overlap_start(cls, text: str, position: int, end: int) -> int:
+        """Début du recouvrement placé après le premier espace suivant position (pas au milieu d'un mot)"""
+        match = cls.WORD_BREAK.search(text, position, end)
+        return match.end() if match and match.end() < end else position
 
-        return chunks
+    @classmethod
+    def chunk_page(cls, page_text: str, max_tokens: int = None, overlap_tokens: int = None) -> List[Tuple[int, int]]:
+        """
+        Découpe le texte d'une page en segments (start, end) d'au plus max_tokens,
+        les segments consécutifs partageant environ overlap_tokens
+        """
+        max_tokens = max_tokens or getattr(settings, 'CHUNK_MAX_TOKENS', 250)
+        overlap_tokens = getattr(settings, 'CHUNK_OVERLAP_TOKENS', 40) if overlap_tokens is None else overlap_tokens
+        max_chars = max_tokens * cls.CHARS_PER_TOKEN
+        overlap_chars = min(overlap_tokens * cls.CHARS_PER_TOKEN, max_chars // 2)
+
+        # Unités assez courtes pour tenir dans un segment avec le recouvrement qui les précède
+        units = list(cls._units(page_text, max_chars - overlap_chars))
+        spans = []
+        i = 0
+        start = units[0][0] if units else 0
+        while i < len(units):
+            end = units[i][1]
+            j = i
+            while j + 1 < len(units) and units[j + 1][1] - start <= max_chars:
+                j += 1
+                end = units[j][1]
+            spans.append((start, end))
+
+            if j + 1 >= len(units):
+                break
+
+            # Le segment suivant reprend les dernières unités (recouvrement)
+            k = j + 1
+            while k - 1 > i and units[k - 1][0] >= end - overlap_chars:
+                k -= 1
+            if k <= j:
+                i, start = k, units[k][0]
+                continue
+
+            # Dernière unité plus longue que le recouvrement: il commence à l'intérieur de celle-ci
+            overlap_start = cls._overlap_start(page_text, max(end - overlap_chars, start), end)
+            if overlap_chars and overlap_start < end and units[j + 1][1] - overlap_start <= max_chars:
+                i, start = j, overlap_start
+            else:
+                i, start = j + 1, units[j + 1][0]
+
+        return spans
 
     @staticmethod
-    def chunk_by_paragraphs(text: str, max_chunk_size: int = 1000) -> List[str]:
+    def iter_pages(text: str, pdf_structure: Dict = None, page_spans: List[Tuple] = None):
         """
-        Découpe le texte en chunks basés sur les paragraphes
+        Pages du document: (numéro de page, texte de la page, position dans le texte brut)
+        page_spans: découpage produit par DocumentExtractorService.extract_text
+        Sans découpage exploitable, le texte entier forme une seule page (numéro None)
         """
-        paragraphs = text.split('\n\n')
-        chunks = []
-        current_chunk = ""
+        if page_spans:
+            for page_number, start, end in page_spans:
+                yield page_number, text[start:end], start
+            return
 
-        for para in paragraphs:
-            para = para.strip()
-            if len(current_chunk) + len(para) < max_chunk_size:
-                current_chunk += para + "\n\n"
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = para + "\n\n"
+        page_starts = DocumentExtractorService.compute_page_starts(pdf_structure, text)
+        if not page_starts:
+            yield None, text, 0
+            return
 
-        if current_chunk:
-            chunks.append(current_chunk.strip())
+        for page, start in zip(pdf_structure['pages'], page_starts):
+            page_text = page.get('text') or ''
+            if page_text:
+                yield page.get('page_number'), page_text, start
 
-        return chunks
+    @classmethod
+    def iter_chunks(cls, document: Document, pages: Iterable[Tuple[Optional[int], str, int]]) -> Iterator[DocumentChunk]:
+        """
+        Chunks produits au fil des pages (numéro de page, texte de la page, position dans le texte brut):
+        une seule page est découpée à la fois
+        """
+        chunk_index = 0
+        for page_number, page_text, page_start in pages:
+            for start, end in cls.chunk_page(page_text):
+                content = page_text[start:end]
+                stripped = content.strip()
+                start += len(content) - len(content.lstrip())
+                end = start + len(stripped)
+
+                chunk = DocumentChunk(
+                    document=document,
+                    chunk_index=chunk_index,
+                    page_number=page_number,
+                    start_char=page_start + start,
+                    end_char=page_start + end
+                )
+                chunk._text = stripped
+                yield chunk
+                chunk_index += 1
 
     @classmethod
-    def create_chunks(cls, document: Document, text: str) -> List[DocumentChunk]:
+    def create_chunks(cls, document: Document, text: str, pdf_structure: Dict = None,
+                      page_spans: List[Tuple] = None) -> List[DocumentChunk]:
         """
-        Crée les chunks pour un document
+        Crée les chunks pour un document, page par page
         """
-        chunks = cls.chunk_by_paragraphs(text)
-        chunk_objects = []
+        return list(cls.iter_chunks(document, cls.iter_pages(text, pdf_structure, page_spans)))
 
-        for i, chunk_content in enumerate(chunks):
-            chunk = DocumentChunk(
-                document=document,
-                chunk_index=i,
-                content=chunk_content
-            )
-            chunk_objects.append(chunk)
-
-        return chunk_objects
+    @classmethod
+    def save_chunks(cls, document: Document, text: str, pdf_structure: Dict = None,
+                    page_spans: List[Tuple] = None, batch_size: int = 500) -> int:
+        """Enregistre les chunks par lots, sans les garder tous en mémoire. Retourne leur nombre."""
+        chunks = cls.iter_chunks(document, cls.iter_pages(text, pdf_structure, page_spans))
+        total = 0
+        while True:
+            batch = list(islice(chunks, batch_size))
+            if not batch:
+                return total
+            DocumentChunk.objects.bulk_create(batch)
+            total += len(batch)
 
 
 class DocumentProcessorService:
@@ -437,6 +634,227 @@ class DocumentProcessorService:
     Service principal pour orchestrer le traitement complet d'un document
     """
 
+    @staticmethod
+    def iter_document_pages(document: Document, extraction_result: Dict) -> Iterator[DocumentPage]:
+        """
+        Pages du texte extrait (DocumentPage), dont la concaténation est exactement le texte:
+        pages de la structure pdfplumber (avec tableaux et dimensions), sinon découpage page_spans
+        (pages PyPDF2, fenêtres DOCX et blocs TXT numérotés à la suite)
+        """
+        text = extraction_result['text']
+        pdf_structure = extraction_result.get('pdf_structure') or {}
+        if pdf_structure.get('success') and DocumentExtractorService.compute_page_starts(pdf_structure, text):
+            offset = 0
+            for page in pdf_structure['pages']:
+                page_text = page.get('text') or ''
+                yield DocumentPage(
+                    document=document,
+                    page_number=page['page_number'],
+                    text=page_text,
+                    start_char=offset,
+                    tables=page.get('tables') or [],
+                    width=page.get('width'),
+                    height=page.get('height')
+                )
+                offset += len(DocumentPage.span_text(page_text, True))
+            return
+
+        for index, (page_number, start, end) in enumerate(extraction_result.get('page_spans') or [], 1):
+            physical = page_number is not None
+            page_text = text[start:end]
+            if physical:
+                page_text = page_text[:-len(DocumentPage.SEPARATOR)]
+            yield DocumentPage(
+                document=document,
+                page_number=page_number if physical else index,
+                text=page_text,
+                start_char=start,
+                physical=physical
+            )
+
+    @classmethod
+    def save_pages(cls, document: Document, extraction_result: Dict) -> bool:
+        """
+        Remplace les pages du document par celles du texte extrait.
+        Retourne False si elles ne reconstituent pas le texte (il est alors stocké tel quel).
+        """
+        DocumentPage.objects.filter(document=document).delete()
+        pages = cls.iter_document_pages(document, extraction_result)
+        batch_size = getattr(settings, 'PDF_PAGE_BATCH_SIZE', 50)
+        length = 0
+        while True:
+            batch = list(islice(pages, batch_size))
+            if not batch:
+                break
+            DocumentPage.objects.bulk_create(batch)
+            length = batch[-1].start_char + len(DocumentPage.span_text(batch[-1].text, batch[-1].physical))
+
+        if length != len(extraction_result['text']):
+            DocumentPage.objects.filter(document=document).delete()
+            return False
+        return True
+
+    @staticmethod
+    def _save_analysis(document: Document, analysis_result: Dict, update_statistics: bool = True):
+        """
+        Crée ou met à jour l'analyse du document et applique la différence de ses termes
+        aux fréquences du corpus (à appeler dans une transaction: les deux restent cohérents)
+        """
+        analysis = DocumentAnalysis.objects.select_for_update().filter(document=document).first()
+        previous_terms = analysis.indexed_terms if analysis else []
+        if analysis is None:
+            analysis = DocumentAnalysis(document=document)
+
+        analysis.summary = analysis_result['summary']
+        analysis.keywords = analysis_result['keywords']
+        analysis.entities = analysis_result['entities']
+        analysis.structure = analysis_result['structure']
+        analysis.detected_document_type = analysis_result.get('detected_document_type', 'Document général')
+        analysis.language = analysis_result.get('language', 'Non détectée')
+        analysis.confidence_score = analysis_result.get('confidence_score', 75.0)
+        analysis.indexed_terms = analysis_result['indexed_terms']
+        analysis.save()
+
+        if update_statistics:
+            TermStatisticsService.update_document_terms(analysis_result['indexed_terms'], previous_terms)
+
+    @classmethod
+    def save_results(cls, document: Document, extraction_result: Dict, update_statistics: bool = True) -> Dict:
+        """
+        Enregistre le résultat d'une extraction (DocumentExtractorService.extract_text):
+        pages, contenu, analyse NLP et chunks. Retourne le résultat de l'analyse.
+        Le texte n'est stocké qu'une fois, dans les pages: contenu et chunks y renvoient.
+        """
+        text = extraction_result['text']
+
+        # 2. Créer ou mettre à jour les pages et le contenu
+        content = DocumentContent.objects.filter(document=document).first() or DocumentContent(document=document)
+        content.word_count = extraction_result['word_count']
+        content.page_count = extraction_result['page_count']
+        content.set_payload(processed_text=text)
+        if cls.save_pages(document, extraction_result):
+            content.set_page_text(text)
+        else:
+            content.set_payload(raw_text=text)
+
+        # Ajouter la structure PDF si disponible (ses pages sont celles de DocumentPage)
+        pdf_structure = extraction_result.get('pdf_structure')
+        if pdf_structure:
+            if content.text_in_pages and pdf_structure.get('success'):
+                pdf_structure = {key: value for key, value in pdf_structure.items() if key != 'pages'}
+                pdf_structure['pages_in_db'] = True
+            content.set_payload(pdf_structure=pdf_structure)
+            print(f"[INFO] Structure PDF stockée: {pdf_structure.get('total_tables', 0)} tableau(x)")
+
+        content.save()
+
+        # 3. Analyser le document
+        analysis_result = DocumentAnalyzerService.analyze_document(document, extraction_result['text'])
+
+        # Créer ou mettre à jour l'analyse, et les fréquences du corpus dans la même transaction
+        # (update_statistics False: l'appelant les met à jour, voir ingest_directory)
+        with transaction.atomic():
+            cls._save_analysis(document, analysis_result, update_statistics)
+
+        # 4. Créer les chunks
+        document.chunks.all().delete()  # Supprimer les anciens chunks
+        DocumentChunkerService.save_chunks(
+            document,
+            text,
+            pdf_structure=extraction_result.get('pdf_structure'),
+            page_spans=extraction_result.get('page_spans')
+        )
+
+        return analysis_result
+
+    @classmethod
+    def save_streamed_results(cls, document: Document, pages: Iterable[Dict], summary: Dict,
+                              update_statistics: bool = True) -> Dict:
+        """
+        Variante en flux de save_results (DocumentExtractorService.extract_pages): chaque page est
+        enregistrée (DocumentPage), découpée en chunks et indexée dès qu'elle est extraite.
+        Le texte complet n'est jamais assemblé: la mémoire ne dépend pas de la taille du fichier.
+        Résumé, mots-clés, entités et type portent sur les DOCUMENT_ANALYSIS_MAX_CHARS premiers
+        caractères; les termes indexés (fréquences du corpus) sur tout le texte.
+        Retourne le résultat de l'analyse.
+        """
+        DocumentPage.objects.filter(document=document).delete()
+        document.chunks.all().delete()
+
+        batch_size = getattr(settings, 'PDF_PAGE_BATCH_SIZE', 50)
+        sample_limit = getattr(settings, 'DOCUMENT_ANALYSIS_MAX_CHARS', 2000000)
+        sample, sample_size = [], 0
+        terms: Dict[str, None] = {}  # Ordre de première apparition, comme TokenizedText.content_terms
+        totals = {'length': 0, 'words': 0}
+        page_batch: List[DocumentPage] = []
+
+        def written_pages():
+            nonlocal sample_size
+            offset = 0
+            for index, page in enumerate(pages, 1):
+                physical = page.get('page_number') is not None
+                page_text = page.get('text') or ''
+                span = DocumentPage.span_text(page_text, physical)
+                page_batch.append(DocumentPage(
+                    document=document,
+                    page_number=page['page_number'] if physical else index,
+                    text=page_text,
+                    start_char=offset,
+                    physical=physical,
+                    tables=page.get('tables') or [],
+                    width=page.get('width'),
+                    height=page.get('height')
+                ))
+                if len(page_batch) >= batch_size:
+                    DocumentPage.objects.bulk_create(page_batch)
+                    page_batch.clear()
+
+                totals['words'] += len(span.split())
+                terms.update(dict.fromkeys(TextAnalysisEngine.tokenize(span).content_terms()))
+                if sample_size < sample_limit:
+                    sample.append(span[:sample_limit - sample_size])
+                    sample_size += len(sample[-1])
+
+                if span:
+                    yield page.get('page_number'), span, offset
+                offset += len(span)
+
+            totals['length'] = offset
+            if page_batch:
+                DocumentPage.objects.bulk_create(page_batch)
+                page_batch.clear()
+
+        # 2. Pages et chunks, au fil de l'extraction
+        chunks = DocumentChunkerService.iter_chunks(document, written_pages())
+        while True:
+            batch = list(islice(chunks, 500))
+            if not batch:
+                break
+            DocumentChunk.objects.bulk_create(batch)
+
+        content = DocumentContent.objects.filter(document=document).first() or DocumentContent(document=document)
+        content.word_count = totals['words']
+        content.page_count = summary.get('page_count', 0)
+        content.set_streamed_page_text(totals['length'])
+        pdf_structure = summary.get('pdf_structure')
+        if pdf_structure:
+            content.set_payload(pdf_structure=dict(pdf_structure, pages_in_db=True))
+            print(f"[INFO] Structure PDF stockée: {pdf_structure.get('total_tables', 0)} tableau(x)")
+        content.save()
+
+        # 3. Analyse du début du texte, termes indexés de tout le document
+        sample_text = ''.join(sample)
+        sample.clear()
+        analysis_result = DocumentAnalyzerService.analyze_document(document, sample_text)
+        analysis_result['indexed_terms'] = list(terms)
+        if totals['length'] > sample_limit:
+            print(f"[INFO] Analyse limitée aux {sample_limit} premiers caractères ({totals['length']} au total)")
+
+        with transaction.atomic():
+            cls._save_analysis(document, analysis_result, update_statistics)
+
+        return analysis_result
+
     @classmethod
     def process_document(cls, document: Document) -> bool:
         """
@@ -455,79 +873,10 @@ class DocumentProcessorService:
             file_path = document.file.path
             file_extension = document.get_file_extension()
 
-            extraction_result = DocumentExtractorService.extract_text(
-                file_path,
-                file_extension
-            )
-
-            # 2. Créer ou mettre à jour le contenu
-            defaults = {
-                'raw_text': extraction_result['text'],
-                'processed_text': extraction_result['text'],
-                'word_count': extraction_result['word_count'],
-                'page_count': extraction_result['page_count']
-            }
-
-            # Ajouter la structure PDF si disponible
-            if 'pdf_structure' in extraction_result and extraction_result['pdf_structure']:
-                defaults['pdf_structure'] = extraction_result['pdf_structure']
-                print(f"[INFO] Structure PDF stockée: {extraction_result['pdf_structure'].get('total_tables', 0)} tableau(x)")
-
-            content, created = DocumentContent.objects.get_or_create(
-                document=document,
-                defaults=defaults
-            )
-
-            if not created:
-                content.raw_text = extraction_result['text']
-                content.processed_text = extraction_result['text']
-                content.word_count = extraction_result['word_count']
-                content.page_count = extraction_result['page_count']
-
-                # Mettre à jour la structure PDF si disponible
-                if 'pdf_structure' in extraction_result and extraction_result['pdf_structure']:
-                    content.pdf_structure = extraction_result['pdf_structure']
-                    print(f"[INFO] Structure PDF mise à jour: {extraction_result['pdf_structure'].get('total_tables', 0)} tableau(x)")
-
-                content.save()
-
-            # 3. Analyser le document
-            analysis_result = DocumentAnalyzerService.analyze_document(
-                document,
-                extraction_result['text']
-            )
-
-            # Créer ou mettre à jour l'analyse
-            analysis, created = DocumentAnalysis.objects.get_or_create(
-                document=document,
-                defaults={
-                    'summary': analysis_result['summary'],
-                    'keywords': analysis_result['keywords'],
-                    'entities': analysis_result['entities'],
-                    'structure': analysis_result['structure'],
-                    'detected_document_type': analysis_result.get('detected_document_type', 'Document général'),
-                    'language': analysis_result.get('language', 'Non détectée'),
-                    'confidence_score': analysis_result.get('confidence_score', 75.0)
-                }
-            )
-
-            if not created:
-                analysis.summary = analysis_result['summary']
-                analysis.keywords = analysis_result['keywords']
-                analysis.entities = analysis_result['entities']
-                analysis.structure = analysis_result['structure']
-                analysis.detected_document_type = analysis_result.get('detected_document_type', 'Document général')
-                analysis.language = analysis_result.get('language', 'Non détectée')
-                analysis.confidence_score = analysis_result.get('confidence_score', 75.0)
-                analysis.save()
-
-            # 4. Créer les chunks
-            document.chunks.all().delete()  # Supprimer les anciens chunks
-            chunks = DocumentChunkerService.create_chunks(
-                document,
-                extraction_result['text']
-            )
-            DocumentChunk.objects.bulk_create(chunks)
+            # 2 à 4. Pages, chunks, contenu et analyse au fil de l'extraction (texte jamais assemblé)
+            summary = {}
+            pages = DocumentExtractorService.extract_pages(file_path, file_extension, summary)
+            cls.save_streamed_results(document, pages, summary)
 
             # 5. Mettre le statut en "completed"
             from django.utils import timezone
@@ -535,6 +884,17 @@ class DocumentProcessorService:
             document.analyzed_at = timezone.now()
             document.save()
 
+            # 6. Condensé pour l'agent (plan, résumés, tableaux, entités) en arrière-plan
+            from .digest_service import DocumentDigestService
+            DocumentDigestService.schedule_build(document)
+
+            # 7. Pages converties pour l'éditeur (Quill et Fabric.js) en arrière-plan
+            from chat.editor_page_service import EditorPageService
+            EditorPageService.schedule_precompute(document, refresh=True)
+
+            # 8. Rendus de la vignette et des premières pages (PDF) en arrière-plan
+            PageRenderService.schedule_precompute(document)
+
             return True
 
         except Exception as e:
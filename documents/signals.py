@@ -0,0 +1,17 @@
+# FICHIER: documents/signals.py
+# SIGNAUX DE L'APP DOCUMENTS
+# ============================================
+
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from .models import Document, DocumentAnalysis
+from .text_analysis import TermStatisticsService
+
+
+@receiver(pre_delete, sender=Document)
+def remove_document_terms(sender, instance, **kwargs):
+    """Retire les termes du document des fréquences du corpus"""
+    terms = DocumentAnalysis.objects.filter(document=instance).values_list('indexed_terms', flat=True).first()
+    if terms:
+        TermStatisticsService.update_document_terms([], terms)
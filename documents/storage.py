@@ -0,0 +1,150 @@
+# FICHIER: documents/storage.py
+# STOCKAGE DES FICHIERS PAR EMPREINTE DE CONTENU
+# ============================================
+# Chaque fichier est rangé sous son SHA-256 (cas/ab/cd/<sha256>.pdf): deux fichiers
+# identiques ne sont stockés qu'une fois et deux fichiers différents ne peuvent pas
+# s'écraser, quel que soit leur nom d'origine.
+
+from typing import Iterable, NamedTuple, Optional
+from django.conf import settings
+import hashlib
+import os
+import tempfile
+
+
+class StorageLimitExceeded(ValueError):
+    """Le contenu dépasse la taille autorisée"""
+
+
+class StoredFile(NamedTuple):
+    sha256: str
+    name: str       # Chemin relatif à MEDIA_ROOT (valeur du FileField)
+    size: int
+    created: bool   # False si un fichier identique était déjà stocké
+
+
+class ContentAddressedStorage:
+    """
+    Écriture en flux: le contenu est haché pendant sa copie dans un fichier temporaire
+    du même répertoire racine, puis renommé atomiquement sous son empreinte
+    """
+
+    ROOT = 'cas'
+    COPY_CHUNK_SIZE = 1024 * 1024
+    # Images extraites des PDF: rangées à part (cas/img/...), servies sans contrôle de propriétaire
+    IMAGE_NAMESPACE = 'img'
+
+    @classmethod
+    def _absolute(cls, name: str) -> str:
+        return os.path.join(settings.MEDIA_ROOT, name)
+
+    @classmethod
+    def name_for(cls, sha256: str, extension: str, namespace: str = '') -> str:
+        extension = (extension or '').lower()
+        root = f"{cls.ROOT}/{namespace}" if namespace else cls.ROOT
+        return f"{root}/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}"
+
+    @classmethod
+    def store_chunks(cls, chunks: Iterable[bytes], extension: str, max_bytes: Optional[int] = None,
+                     namespace: str = '') -> StoredFile:
+        """
+        Stocke le contenu fourni par morceaux
+
+        Raises:
+            StorageLimitExceeded si le contenu dépasse max_bytes (rien n'est conservé)
+        """
+        tmp_dir = cls._absolute(os.path.join(cls.ROOT, 'tmp'))
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        tmp = tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False)
+        try:
+            with tmp:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise StorageLimitExceeded(f"taille maximale dépassée ({max_bytes} octets)")
+                    digest.update(chunk)
+                    tmp.write(chunk)
+
+            sha256 = digest.hexdigest()
+            name = cls.name_for(sha256, extension, namespace)
+            path = cls._absolute(name)
+
+            if os.path.exists(path):
+                os.remove(tmp.name)
+                return StoredFile(sha256, name, size, False)
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp.name, path)
+            return StoredFile(sha256, name, size, True)
+        except BaseException:
+            if os.path.exists(tmp.name):
+                os.remove(tmp.name)
+            raise
+
+    @classmethod
+    def store_bytes(cls, data: bytes, extension: str, namespace: str = '') -> StoredFile:
+        """Stocke un contenu déjà en mémoire (images extraites des PDF)"""
+        sha256 = hashlib.sha256(data).hexdigest()
+        name = cls.name_for(sha256, extension, namespace)
+        if os.path.exists(cls._absolute(name)):
+            return StoredFile(sha256, name, len(data), False)
+        return cls.store_chunks([data], extension, namespace=namespace)
+
+    @classmethod
+    def store_derived(cls, key: str, data: bytes, extension: str) -> StoredFile:
+        """
+        Stocke un contenu dérivé (rendu de page) sous l'empreinte de ce qui le produit:
+        key est le SHA-256 des entrées (fichier source, paramètres du rendu), connu avant le calcul
+        """
+        name = cls.name_for(key, extension)
+        path = cls._absolute(name)
+        if os.path.exists(path):
+            return StoredFile(key, name, len(data), False)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False)
+        try:
+            with tmp:
+                tmp.write(data)
+            os.replace(tmp.name, path)
+        except BaseException:
+            if os.path.exists(tmp.name):
+                os.remove(tmp.name)
+            raise
+        return StoredFile(key, name, len(data), True)
+
+    @classmethod
+    def path_for(cls, sha256: str, extension: str, namespace: str = '') -> str:
+        """Chemin absolu du fichier stocké sous cette empreinte"""
+        return cls._absolute(cls.name_for(sha256, extension, namespace))
+
+    @classmethod
+    def store_file(cls, fileobj, extension: str, max_bytes: Optional[int] = None) -> StoredFile:
+        """Stocke un fichier ouvert (lu par blocs de COPY_CHUNK_SIZE)"""
+        return cls.store_chunks(iter(lambda: fileobj.read(cls.COPY_CHUNK_SIZE), b''), extension, max_bytes)
+
+    @classmethod
+    def is_content_addressed(cls, name: str) -> bool:
+        return bool(name) and name.startswith(cls.ROOT + '/')
+
+    @classmethod
+    def release(cls, name: str, exclude_document_id: Optional[int] = None):
+        """
+        Supprime le fichier s'il n'est plus référencé par aucun autre document
+        (les fichiers stockés par empreinte peuvent être partagés)
+        """
+        from .models import Document
+
+        if not name:
+            return
+        others = Document.objects.filter(file=name)
+        if exclude_document_id is not None:
+            others = others.exclude(id=exclude_document_id)
+        if cls.is_content_addressed(name) and others.exists():
+            return
+
+        path = cls._absolute(name)
+        if os.path.exists(path):
+            os.remove(path)
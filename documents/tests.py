@@ -1,3 +1,94 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
 
-# Create your tests here.
+from .digest_service import DocumentDigestService
+from .entity_extractor import EntityExtractor
+from .models import Document, DocumentContent, DocumentDigest
+from .services import DocumentChunkerService
+
+
+class ChunkPageOverlapTests(SimpleTestCase):
+    """Recouvrement des segments consécutifs (chunk_page)"""
+
+    WORDS = ['alpha', 'beta', 'gamma', 'delta', 'epsilon']
+
+    def words(self, count):
+        return ' '.join(self.WORDS[i % len(self.WORDS)] for i in range(count))
+
+    def assertOverlapping(self, text, max_tokens=250, overlap_tokens=40):
+        spans = DocumentChunkerService.chunk_page(text, max_tokens, overlap_tokens)
+        self.assertGreater(len(spans), 1)
+        for i in range(len(spans) - 1):
+            self.assertGreater(spans[i][1], spans[i + 1][0])
+        for start, end in spans:
+            self.assertLessEqual(end - start, max_tokens * DocumentChunkerService.CHARS_PER_TOKEN)
+        self.assertEqual(spans[0][0], 0)
+        self.assertEqual(spans[-1][1], len(text))
+        return spans
+
+    def test_unbroken_text(self):
+        self.assertOverlapping(self.words(1200))
+
+    def test_long_paragraphs(self):
+        self.assertOverlapping('\n\n'.join(self.words(150) + '.' for _ in range(8)))
+
+    def test_short_paragraphs(self):
+        self.assertOverlapping('\n\n'.join(self.words(10) for _ in range(100)))
+
+    def test_overlap_starts_on_word_boundary(self):
+        text = self.words(1200)
+        for start, _ in self.assertOverlapping(text)[1:]:
+            self.assertEqual(text[start - 1], ' ')
+
+    def test_no_overlap(self):
+        spans = DocumentChunkerService.chunk_page(self.words(1200), 250, 0)
+        for i in range(len(spans) - 1):
+            self.assertLessEqual(spans[i][1], spans[i + 1][0])
+
+
+class SectionTextTests(TestCase):
+    """Texte d'une section: les positions du plan ne valent que pour le contenu du condensé"""
+
+    def setUp(self):
+        user = User.objects.create_user('reader')
+        self.document = Document.objects.create(user=user, title='Rapport', file_type='.txt')
+        text = 'Introduction\nPremier paragraphe.\nConclusion\nFin.'
+        self.content = DocumentContent(document=self.document)
+        self.content.set_payload(raw_text=text)
+        self.content.save()
+        self.digest = DocumentDigest.objects.create(
+            document=self.document,
+            content_hash=self.content.content_hash,
+            outline=[{'title': 'Conclusion', 'level': 1, 'start': text.index('Conclusion'), 'end': len(text), 'page': None, 'summary': ''}]
+        )
+
+    def test_current_digest(self):
+        section = DocumentDigestService.get_section_text(self.document, 0)
+        self.assertEqual(section['text'], 'Conclusion\nFin.')
+        self.assertFalse(section['rebuilding'])
+
+    def test_stale_digest(self):
+        self.content.set_payload(raw_text='Nouveau texte, sans les mêmes positions.')
+        self.content.save()
+        section = DocumentDigestService.get_section_text(self.document, 0)
+        self.assertIsNone(section['text'])
+        self.assertTrue(section['rebuilding'])
+
+
+class GazetteerCaseTests(TestCase):
+    """Sigles et noms à majuscules internes: casse exacte; noms ordinaires: majuscule initiale"""
+
+    def organizations(self, text):
+        return EntityExtractor.extract(text)['organizations']
+
+    def test_acronyms_do_not_match_capitalised_words(self):
+        self.assertEqual(self.organizations("Has the sponsor replied? Ich bin hier."), [])
+
+    def test_acronyms(self):
+        self.assertEqual(self.organizations("Avis de la HAS et des lignes directrices ICH."), ['HAS', 'ICH'])
+
+    def test_internal_capitals(self):
+        self.assertEqual(self.organizations("Vaccin BioNTech, et non Biontech."), ['BioNTech'])
+
+    def test_ordinary_names_ignore_case(self):
+        self.assertEqual(self.organizations("PFIZER, Boehringer ingelheim"), ['Pfizer', 'Boehringer Ingelheim'])
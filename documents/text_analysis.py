@@ -0,0 +1,401 @@
+# FICHIER: documents/text_analysis.py
+# MOTEUR D'ANALYSE TEXTUELLE (TF-IDF, TEXTRANK)
+# ============================================
+# Le texte est tokenisé une seule fois en un tableau d'entiers (un code par mot),
+# puis mots-clés et résumé sont calculés par opérations vectorisées numpy.
+
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+import re
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F
+
+from .models import DocumentAnalysis, DocumentContent, TermStatistic
+
+
+STOPWORDS = frozenset("""
+le la les un une des de du d l et ou où mais donc or ni car que qui quoi dont quel quelle quels quelles
+ce cet cette ces ça cela ceci celui celle ceux celles son sa ses leur leurs mon ma mes ton ta tes notre nos votre vos
+je tu il elle on nous vous ils elles me te se lui y en au aux à a ai as avons avez ont est es sommes êtes sont
+été être avoir fait faire peut peuvent doit doivent sera seront était étaient avait
+dans sur sous par pour avec sans entre vers chez depuis pendant selon avant après contre
+ne pas plus moins très tout tous toute toutes aussi ainsi comme si non oui même autres autre
+the a an of and or to in on at by for with from is are was were be been has have had this that these those
+it its as not but all any can may will shall should would which who what when where there their
+""".split())
+
+
+class TokenizedText:
+    """
+    Texte tokenisé en une passe:
+    - codes: un entier par mot (index dans vocab)
+    - token_sentence: index de phrase de chaque mot
+    - sentence_spans: positions (début, fin) de chaque phrase dans le texte
+    """
+    __slots__ = ('vocab', 'is_content', 'codes', 'token_sentence', 'sentence_spans')
+
+    def __init__(self, vocab, is_content, codes, token_sentence, sentence_spans):
+        self.vocab = vocab
+        self.is_content = is_content
+        self.codes = codes
+        self.token_sentence = token_sentence
+        self.sentence_spans = sentence_spans
+
+    @property
+    def sentence_count(self) -> int:
+        return len(self.sentence_spans)
+
+    def content_terms(self) -> List[str]:
+        """Termes pleins distincts présents dans le texte"""
+        present = np.unique(self.codes[self.is_content[self.codes]]) if len(self.codes) else []
+        return [self.vocab[i] for i in present]
+
+
+class TextAnalysisEngine:
+    """
+    Mots-clés TF-IDF (fréquences documentaires du corpus dans TermStatistic)
+    et résumé extractif TextRank sur une matrice de similarité creuse (COO)
+    """
+
+    TOKEN_PATTERN = re.compile(r"(\w+)|([.!?]+(?=\s|$)|\n[ \t]*\n)")
+    MAX_TERM_LENGTH = 100
+
+    # Un terme présent dans trop de phrases ne discrimine rien et rend le graphe quadratique
+    MAX_POSTINGS = 50
+    DAMPING = 0.85
+    MAX_ITERATIONS = 50
+    TOLERANCE = 1e-6
+
+    @classmethod
+    def tokenize(cls, text: str) -> TokenizedText:
+        """Tokenise le texte une seule fois (mots en minuscules codés par des entiers)"""
+        vocab_index: Dict[str, int] = {}
+        vocab: List[str] = []
+        content_flags = array('b')
+        codes = array('i')
+        token_sentence = array('i')
+        sentence_spans = []
+
+        sentence = 0
+        sentence_start = None
+        sentence_end = 0
+
+        for match in cls.TOKEN_PATTERN.finditer(text or ''):
+            word = match.group(1)
+            if word is None:
+                # Fin de phrase
+                if sentence_start is not None:
+                    sentence_spans.append((sentence_start, match.end()))
+                    sentence += 1
+                    sentence_start = None
+                continue
+
+            word = word.lower()
+            code = vocab_index.get(word)
+            if code is None:
+                code = len(vocab)
+                vocab_index[word] = code
+                vocab.append(word)
+                content_flags.append(
+                    len(word) > 2 and len(word) <= cls.MAX_TERM_LENGTH
+                    and word not in STOPWORDS and not word.isdigit()
+                )
+
+            if sentence_start is None:
+                sentence_start = match.start()
+            sentence_end = match.end()
+            codes.append(code)
+            token_sentence.append(sentence)
+
+        if sentence_start is not None:
+            sentence_spans.append((sentence_start, sentence_end))
+
+        return TokenizedText(
+            vocab=vocab,
+            is_content=np.frombuffer(content_flags, dtype=np.int8).astype(bool) if vocab else np.zeros(0, dtype=bool),
+            codes=np.frombuffer(codes, dtype=np.int32) if codes else np.zeros(0, dtype=np.int32),
+            token_sentence=np.frombuffer(token_sentence, dtype=np.int32) if token_sentence else np.zeros(0, dtype=np.int32),
+            sentence_spans=sentence_spans
+        )
+
+    # ------------------------------------------------------------------
+    # Mots-clés TF-IDF
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def keywords(cls, tokens: TokenizedText, top_n: int = 10) -> List[str]:
+        """Termes au meilleur score TF-IDF (IDF calculée sur tout le corpus)"""
+        if not len(tokens.codes):
+            return []
+
+        content_codes = tokens.codes[tokens.is_content[tokens.codes]]
+        if not len(content_codes):
+            return []
+
+        tf = np.bincount(content_codes, minlength=len(tokens.vocab))
+        candidates = np.flatnonzero(tf)
+
+        corpus_size, doc_freqs = TermStatisticsService.get_document_frequencies(
+            tokens.vocab[i] for i in candidates
+        )
+        df = np.fromiter(
+            (doc_freqs.get(tokens.vocab[i], 0) for i in candidates),
+            dtype=np.float64,
+            count=len(candidates)
+        )
+        idf = np.log((corpus_size + 1.0) / (df + 1.0)) + 1.0
+        scores = (tf[candidates] / len(content_codes)) * idf
+
+        top_n = min(top_n, len(candidates))
+        best = np.argpartition(-scores, top_n - 1)[:top_n]
+        best = best[np.lexsort((candidates[best], -scores[best]))]
+        return [tokens.vocab[candidates[i]] for i in best]
+
+    # ------------------------------------------------------------------
+    # Résumé TextRank
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _similarity_graph(cls, tokens: TokenizedText):
+        """
+        Arêtes (rows, cols, weights) du graphe de similarité entre phrases, au format COO.
+        Poids: nombre de termes communs / (log|Si| + log|Sj|), comme dans TextRank.
+        """
+        n_sentences = tokens.sentence_count
+        vocab_size = len(tokens.vocab)
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0))
+
+        mask = tokens.is_content[tokens.codes]
+        if not mask.any() or n_sentences < 2:
+            return empty
+
+        # Couples (phrase, terme) distincts
+        keys = np.unique(tokens.token_sentence[mask].astype(np.int64) * vocab_size + tokens.codes[mask])
+        sentences = keys // vocab_size
+        terms = keys % vocab_size
+        sentence_sizes = np.bincount(sentences, minlength=n_sentences)
+
+        # Listes de phrases par terme (triées par terme)
+        order = np.argsort(terms, kind='stable')
+        terms, sentences = terms[order], sentences[order]
+        bounds = np.flatnonzero(np.diff(terms)) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(terms)]))
+        sizes = ends - starts
+
+        pair_keys = []
+        triu_cache = {}
+        for start, size in zip(starts[(sizes > 1) & (sizes <= cls.MAX_POSTINGS)],
+                               sizes[(sizes > 1) & (sizes <= cls.MAX_POSTINGS)]):
+            if size not in triu_cache:
+                triu_cache[size] = np.triu_indices(size, 1)
+            iu, ju = triu_cache[size]
+            group = sentences[start:start + size]
+            pair_keys.append(group[iu] * n_sentences + group[ju])
+
+        if not pair_keys:
+            return empty
+
+        pairs, overlaps = np.unique(np.concatenate(pair_keys), return_counts=True)
+        rows, cols = pairs // n_sentences, pairs % n_sentences
+        weights = overlaps / (np.log1p(sentence_sizes[rows]) + np.log1p(sentence_sizes[cols]))
+
+        # Graphe non orienté: arêtes dans les deux sens
+        return (
+            np.concatenate((rows, cols)),
+            np.concatenate((cols, rows)),
+            np.concatenate((weights, weights))
+        )
+
+    @classmethod
+    def rank_sentences(cls, tokens: TokenizedText) -> np.ndarray:
+        """Score TextRank de chaque phrase (PageRank pondéré, itérations de puissance)"""
+        n = tokens.sentence_count
+        if n == 0:
+            return np.zeros(0)
+
+        rows, cols, weights = cls._similarity_graph(tokens)
+        scores = np.full(n, 1.0 / n)
+        if not len(rows):
+            return scores
+
+        out_weight = np.bincount(rows, weights=weights, minlength=n)
+        dangling = out_weight == 0
+        transition = weights / out_weight[rows]
+
+        for _ in range(cls.MAX_ITERATIONS):
+            spread = np.bincount(cols, weights=transition * scores[rows], minlength=n)
+            new_scores = (1 - cls.DAMPING) / n + cls.DAMPING * (spread + scores[dangling].sum() / n)
+            delta = np.abs(new_scores - scores).sum()
+            scores = new_scores
+            if delta < cls.TOLERANCE:
+                break
+
+        return scores
+
+    @classmethod
+    def summarize(cls, text: str, tokens: TokenizedText, max_length: int = 500) -> str:
+        """Résumé extractif: meilleures phrases TextRank, restituées dans l'ordre du texte"""
+        if not tokens.sentence_count:
+            return ' '.join((text or '').split())[:max_length]
+
+        scores = cls.rank_sentences(tokens)
+        # À score égal, privilégier les premières phrases
+        ranking = np.lexsort((np.arange(len(scores)), -scores))
+
+        selected, length = [], 0
+        for index in ranking:
+            start, end = tokens.sentence_spans[index]
+            sentence = ' '.join(text[start:end].split())
+            if length + len(sentence) + 1 > max_length:
+                if not selected:
+                    selected.append((index, sentence[:max_length]))
+                    break
+                continue
+            selected.append((index, sentence))
+            length += len(sentence) + 1
+
+        selected.sort()
+        return ' '.join(sentence for _, sentence in selected)
+
+    # ------------------------------------------------------------------
+    # Analyse complète
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def analyze(cls, text: str, previous_terms: Optional[Iterable[str]] = None,
+                top_n: int = 10, max_summary_length: int = 500, update_statistics: bool = True) -> Dict:
+        """
+        Analyse en une passe: tokenisation, mise à jour des fréquences documentaires,
+        mots-clés TF-IDF et résumé TextRank
+
+        Args:
+            previous_terms: termes indexés lors d'une analyse précédente du même document
+                            (retirés des statistiques s'ils ont disparu)
+            update_statistics: False pour différer la mise à jour des fréquences (l'appelant
+                               l'applique avec l'enregistrement de l'analyse: voir
+                               TermStatisticsService.update_document_terms)
+
+        Returns:
+            Dict avec 'summary', 'keywords' et 'indexed_terms'
+        """
+        tokens = cls.tokenize(text)
+        terms = tokens.content_terms()
+
+        if update_statistics:
+            TermStatisticsService.update_document_terms(terms, previous_terms or [])
+
+        return {
+            'summary': cls.summarize(text, tokens, max_summary_length),
+            'keywords': cls.keywords(tokens, top_n),
+            'indexed_terms': terms
+        }
+
+
+class TermStatisticsService:
+    """
+    Fréquences documentaires du corpus (nombre de documents contenant chaque terme),
+    mises à jour incrémentalement à chaque (ré)analyse ou suppression de document
+    """
+
+    # Ligne réservée contenant le nombre de documents indexés (aucun mot n'est vide)
+    CORPUS_KEY = ''
+    BATCH_SIZE = 500
+
+    @classmethod
+    def _batches(cls, terms: List[str]):
+        for i in range(0, len(terms), cls.BATCH_SIZE):
+            yield terms[i:i + cls.BATCH_SIZE]
+
+    @classmethod
+    def _increment(cls, terms: List[str], delta: int):
+        if delta > 0:
+            TermStatistic.objects.bulk_create(
+                [TermStatistic(term=term) for term in terms],
+                ignore_conflicts=True,
+                batch_size=cls.BATCH_SIZE
+            )
+        for batch in cls._batches(terms):
+            queryset = TermStatistic.objects.filter(term__in=batch)
+            if delta < 0:
+                queryset = queryset.filter(document_frequency__gt=0)
+            queryset.update(document_frequency=F('document_frequency') + delta)
+
+    @classmethod
+    def update_document_terms(cls, new_terms: Iterable[str], previous_terms: Iterable[str]):
+        """Applique la différence entre l'ancien et le nouveau vocabulaire d'un document"""
+        new_terms, previous_terms = set(new_terms), set(previous_terms)
+        added = sorted(new_terms - previous_terms)
+        removed = sorted(previous_terms - new_terms)
+
+        with transaction.atomic():
+            if new_terms and not previous_terms:
+                cls._increment([cls.CORPUS_KEY], 1)
+            elif previous_terms and not new_terms:
+                cls._increment([cls.CORPUS_KEY], -1)
+
+            if added:
+                cls._increment(added, 1)
+            if removed:
+                cls._increment(removed, -1)
+
+    @classmethod
+    def get_document_frequencies(cls, terms: Iterable[str]):
+        """
+        Returns:
+            (nombre de documents du corpus, {terme: nombre de documents le contenant})
+        """
+        terms = list(terms)
+        frequencies = {}
+        for batch in cls._batches(terms):
+            frequencies.update(
+                TermStatistic.objects.filter(term__in=batch).values_list('term', 'document_frequency')
+            )
+
+        corpus_size = TermStatistic.objects.filter(term=cls.CORPUS_KEY).values_list(
+            'document_frequency', flat=True
+        ).first() or 0
+        return corpus_size, frequencies
+
+    @classmethod
+    def rebuild(cls, backfill: bool = True) -> Dict[str, int]:
+        """
+        Recalcule toutes les fréquences à partir des termes indexés des analyses
+        (réconciliation après une interruption, corpus analysé avant l'indexation des termes)
+
+        Args:
+            backfill: indexer d'abord les termes des analyses qui n'en ont pas,
+                      à partir du texte de leur document
+
+        Returns:
+            Dict avec 'documents' (analyses indexées), 'backfilled' et 'terms'
+        """
+        backfilled = 0
+        if backfill:
+            for analysis in DocumentAnalysis.objects.filter(indexed_terms=[]).only('id', 'document_id').iterator():
+                content = DocumentContent.objects.filter(document_id=analysis.document_id).first()
+                text = content.get_raw_text() if content else ''
+                terms = TextAnalysisEngine.tokenize(text).content_terms() if text else []
+                if terms:
+                    DocumentAnalysis.objects.filter(id=analysis.id).update(indexed_terms=terms)
+                    backfilled += 1
+
+        counts = Counter()
+        documents = 0
+        for terms in DocumentAnalysis.objects.values_list('indexed_terms', flat=True).iterator():
+            if terms:
+                counts.update(set(terms))
+                documents += 1
+
+        with transaction.atomic():
+            TermStatistic.objects.all().delete()
+            statistics = [TermStatistic(term=term, document_frequency=count) for term, count in counts.items()]
+            statistics.append(TermStatistic(term=cls.CORPUS_KEY, document_frequency=documents))
+            TermStatistic.objects.bulk_create(statistics, batch_size=cls.BATCH_SIZE)
+
+        print(f"[TFIDF] Statistiques recalculées: {documents} document(s), {len(counts)} terme(s), "
+              f"{backfilled} analyse(s) indexée(s)")
+        return {'documents': documents, 'backfilled': backfilled, 'terms': len(counts)}
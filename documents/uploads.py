@@ -0,0 +1,337 @@
+# FICHIER: documents/uploads.py
+# UPLOAD FRACTIONNÉ ET REPRENABLE
+# ============================================
+# Le client annonce le fichier (taille, empreinte facultative), les quotas et les doublons
+# sont vérifiés avant le premier octet; les parties de taille fixe sont ensuite envoyées
+# (dans n'importe quel ordre, renvoyables), chacune hachée à la réception. La première
+# partie sert à détecter le type réel du fichier: un fichier refusé n'est pas transféré plus loin.
+# La validation assemble les parties directement dans le stockage par empreinte.
+
+from datetime import timedelta
+from typing import Dict, Iterator, List, Optional
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+import codecs
+import hashlib
+import os
+import shutil
+import tempfile
+
+from .models import Document, UploadSession
+from .storage import ContentAddressedStorage
+
+try:
+    import magic
+    MAGIC_AVAILABLE = True
+except ImportError:
+    MAGIC_AVAILABLE = False
+
+
+class UploadRejected(ValueError):
+    """Requête refusée; status: code HTTP à renvoyer au client"""
+
+    def __init__(self, message: str, status: int = 400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+class ChunkedUploadService:
+    """
+    Cycle d'un upload: start() -> write_part() pour chaque partie -> complete() (ou abort())
+    """
+
+    ROOT = 'uploads'
+    READ_CHUNK_SIZE = 64 * 1024
+    SNIFF_BYTES = 4096
+
+    # Types MIME acceptés par extension (préfixes)
+    ALLOWED_TYPES = {
+        '.pdf': ('application/pdf',),
+        '.docx': ('application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'application/zip'),
+        '.txt': ('text/',),
+    }
+
+    @staticmethod
+    def _setting(name: str, default):
+        return getattr(settings, name, default)
+
+    @classmethod
+    def _directory(cls, session: UploadSession) -> str:
+        return os.path.join(settings.MEDIA_ROOT, cls.ROOT, str(session.id))
+
+    @classmethod
+    def _part_path(cls, session: UploadSession, number: int) -> str:
+        return os.path.join(cls._directory(session), f"{number}.part")
+
+    @classmethod
+    def _discard(cls, session: UploadSession, status: str, error: str = ''):
+        """Termine la session sans document et libère les parties reçues"""
+        cls._close(session, status, error)
+        cls._remove_parts(session)
+
+    @staticmethod
+    def _close(session: UploadSession, status: str, error: str = ''):
+        session.status = status
+        session.error = error
+        session.save(update_fields=['status', 'error', 'updated_at'])
+
+    @classmethod
+    def _remove_parts(cls, session: UploadSession):
+        shutil.rmtree(cls._directory(session), ignore_errors=True)
+
+    # ------------------------------------------------------------------
+    # Contrôles
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def check_quota(user, size_bytes: int) -> Optional[str]:
+        """Message d'erreur si l'ajout d'un fichier de cette taille dépasse les quotas du profil"""
+        profile = user.profile
+        current_docs = Document.objects.filter(user=user).count()
+        if current_docs >= profile.max_documents:
+            return f'Limite de documents atteinte ({profile.max_documents} documents max).'
+
+        file_size_mb = size_bytes / (1024 * 1024)
+        if (profile.get_used_storage_mb() + file_size_mb) > profile.max_storage_mb:
+            return 'Espace de stockage insuffisant.'
+        return None
+
+    @staticmethod
+    def sniff_mime(head: bytes) -> str:
+        """Type MIME déduit des premiers octets (python-magic, signatures usuelles à défaut)"""
+        if MAGIC_AVAILABLE:
+            try:
+                return magic.from_buffer(head, mime=True)
+            except Exception as e:
+                print(f"[WARNING] python-magic: {e}")
+
+        if head.startswith(b'%PDF-'):
+            return 'application/pdf'
+        if head.startswith(b'PK\x03\x04'):
+            return 'application/zip'
+        if b'\x00' not in head:
+            try:
+                # Décodage incrémental: un caractère multi-octets peut être coupé en fin de bloc
+                codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+                return 'text/plain'
+            except UnicodeDecodeError:
+                pass
+        return 'application/octet-stream'
+
+    @classmethod
+    def is_allowed(cls, extension: str, mime_type: str) -> bool:
+        return any(mime_type.startswith(prefix) for prefix in cls.ALLOWED_TYPES.get(extension, ()))
+
+    # ------------------------------------------------------------------
+    # Cycle de l'upload
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def purge_stale(cls, user=None):
+        """Supprime les uploads inachevés plus anciens que UPLOAD_SESSION_TTL_HOURS"""
+        limit = timezone.now() - timedelta(hours=cls._setting('UPLOAD_SESSION_TTL_HOURS', 24))
+        stale = UploadSession.objects.filter(status='pending', updated_at__lt=limit)
+        if user is not None:
+            stale = stale.filter(user=user)
+        for session in stale:
+            cls._discard(session, 'aborted', "upload expiré")
+
+    @classmethod
+    def start(cls, user, title: str, filename: str, total_size: int,
+              description: str = '', declared_hash: str = '') -> UploadSession:
+        """
+        Ouvre une session d'upload après contrôle de l'extension, de la taille, des quotas
+        et (si l'empreinte est annoncée) des doublons
+
+        Raises:
+            UploadRejected (409 avec document_id pour un doublon)
+        """
+        cls.purge_stale(user)
+
+        filename = os.path.basename(filename or '')
+        extension = os.path.splitext(filename)[1].lower()
+        if not title or not filename:
+            raise UploadRejected('Veuillez fournir un titre et un fichier.')
+        if extension not in cls.ALLOWED_TYPES:
+            raise UploadRejected(f"Type de fichier non pris en charge ({extension or 'sans extension'}).", status=415)
+
+        max_bytes = cls._setting('UPLOAD_MAX_FILE_BYTES', 500 * 1024 * 1024)
+        if total_size <= 0:
+            raise UploadRejected('Fichier vide.')
+        if total_size > max_bytes:
+            raise UploadRejected(f"Fichier trop volumineux ({max_bytes // (1024 * 1024)} Mo max).", status=413)
+
+        declared_hash = (declared_hash or '').lower()
+        if declared_hash:
+            existing = Document.objects.filter(user=user, file_hash=declared_hash).first()
+            if existing:
+                raise UploadRejected(f"Ce fichier a déjà été importé ({existing.title}).", status=409,
+                                     document_id=existing.id)
+
+        error = cls.check_quota(user, total_size)
+        if error:
+            raise UploadRejected(error, status=403)
+
+        session = UploadSession.objects.create(
+            user=user,
+            title=title[:255],
+            description=description,
+            filename=filename[:255],
+            total_size=total_size,
+            part_size=cls._setting('UPLOAD_PART_SIZE', 8 * 1024 * 1024),
+            declared_hash=declared_hash[:64]
+        )
+        os.makedirs(cls._directory(session), exist_ok=True)
+        print(f"[UPLOAD] Session {session.id}: {filename}, {total_size} octets en {session.part_count} partie(s)")
+        return session
+
+    @classmethod
+    def write_part(cls, session: UploadSession, number: int, stream) -> Dict:
+        """
+        Reçoit une partie depuis le flux de la requête (lue par blocs, jamais entièrement en mémoire).
+        Une partie déjà reçue peut être renvoyée: elle remplace la précédente.
+
+        Returns:
+            {'number', 'offset', 'size', 'etag'} (etag: SHA-256 de la partie)
+        """
+        if session.status != 'pending':
+            raise UploadRejected(f"Upload {session.get_status_display().lower()}.", status=409)
+        if not 1 <= number <= session.part_count:
+            raise UploadRejected(f"Numéro de partie invalide (1 à {session.part_count}).")
+
+        expected = session.expected_part_size(number)
+        digest = hashlib.sha256()
+        head = b''
+        size = 0
+
+        directory = cls._directory(session)
+        os.makedirs(directory, exist_ok=True)
+        tmp = tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False)
+        try:
+            with tmp:
+                while True:
+                    chunk = stream.read(cls.READ_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > expected:
+                        raise UploadRejected(f"Partie {number} trop longue ({expected} octets attendus).")
+                    if number == 1 and len(head) < cls.SNIFF_BYTES:
+                        head += chunk[:cls.SNIFF_BYTES - len(head)]
+                    digest.update(chunk)
+                    tmp.write(chunk)
+
+            if size != expected:
+                raise UploadRejected(f"Partie {number} incomplète ({size}/{expected} octets).")
+
+            # Type réel du fichier, dès la première partie
+            if number == 1:
+                extension = os.path.splitext(session.filename)[1].lower()
+                mime_type = cls.sniff_mime(head)
+                if not cls.is_allowed(extension, mime_type):
+                    cls._discard(session, 'rejected', f"contenu {mime_type} incompatible avec {extension}")
+                    raise UploadRejected(f"Le contenu du fichier ({mime_type}) ne correspond pas à un fichier {extension}.",
+                                         status=415)
+
+            os.replace(tmp.name, cls._part_path(session, number))
+        except BaseException:
+            if os.path.exists(tmp.name):
+                os.remove(tmp.name)
+            raise
+
+        part = {'offset': (number - 1) * session.part_size, 'size': size, 'etag': digest.hexdigest()}
+
+        # Les parties peuvent arriver en parallèle: mise à jour sous verrou
+        with transaction.atomic():
+            locked = UploadSession.objects.select_for_update().get(id=session.id)
+            locked.parts[str(number)] = part
+            locked.received_bytes = sum(p['size'] for p in locked.parts.values())
+            update_fields = ['parts', 'received_bytes', 'updated_at']
+            if number == 1:
+                locked.mime_type = mime_type
+                update_fields.append('mime_type')
+            locked.save(update_fields=update_fields)
+
+        return dict(part, number=number)
+
+    @classmethod
+    def _iter_parts(cls, session: UploadSession) -> Iterator[bytes]:
+        for number in range(1, session.part_count + 1):
+            try:
+                part = open(cls._part_path(session, number), 'rb')
+            except FileNotFoundError:
+                raise UploadRejected(f"Partie {number} introuvable, veuillez la renvoyer.", status=409,
+                                     missing_parts=[number])
+            with part:
+                for chunk in iter(lambda: part.read(ContentAddressedStorage.COPY_CHUNK_SIZE), b''):
+                    yield chunk
+
+    @classmethod
+    def complete(cls, session: UploadSession, etags: Optional[List[str]] = None) -> Dict:
+        """
+        Assemble les parties dans le stockage par empreinte et crée le document
+
+        etags: empreintes des parties calculées par le client (facultatif, vérifiées)
+
+        Returns:
+            {'document': Document, 'duplicate': bool}
+        """
+        # Un refus est enregistré dans la transaction; les fichiers ne sont supprimés
+        # qu'après sa validation (et jamais si elle est annulée)
+        rejected = None
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().get(id=session.id)
+            if session.status == 'completed' and session.document_id:
+                return {'document': session.document, 'duplicate': False}
+            if session.status != 'pending':
+                raise UploadRejected(f"Upload {session.get_status_display().lower()}.", status=409)
+
+            missing = [n for n in range(1, session.part_count + 1) if str(n) not in session.parts]
+            if missing:
+                raise UploadRejected(f"{len(missing)} partie(s) manquante(s).", status=409, missing_parts=missing)
+            if etags is not None:
+                received = [session.parts[str(n)]['etag'] for n in range(1, session.part_count + 1)]
+                if list(etags) != received:
+                    raise UploadRejected("Empreintes des parties différentes de celles reçues.", status=409)
+
+            extension = os.path.splitext(session.filename)[1].lower()
+            stored = ContentAddressedStorage.store_chunks(cls._iter_parts(session), extension,
+                                                          max_bytes=session.total_size)
+
+            if session.declared_hash and stored.sha256 != session.declared_hash:
+                cls._close(session, 'rejected', "empreinte du fichier différente de l'empreinte annoncée")
+                rejected = UploadRejected("Le fichier reçu ne correspond pas à l'empreinte annoncée.", status=422)
+            else:
+                error = cls.check_quota(session.user, stored.size)
+                existing = Document.objects.filter(user=session.user, file_hash=stored.sha256).first()
+                if error and not existing:
+                    cls._close(session, 'rejected', error)
+                    rejected = UploadRejected(error, status=403)
+                else:
+                    duplicate = existing is not None
+                    document = existing or Document.objects.create(
+                        user=session.user,
+                        title=session.title,
+                        file=stored.name,
+                        file_hash=stored.sha256,
+                        description=session.description
+                    )
+                    session.status = 'completed'
+                    session.document = document
+                    session.save(update_fields=['status', 'document', 'updated_at'])
+
+        cls._remove_parts(session)
+        if rejected:
+            if stored.created:
+                ContentAddressedStorage.release(stored.name)
+            raise rejected
+
+        print(f"[UPLOAD] Session {session.id} terminée: document {document.id}{' (doublon)' if duplicate else ''}")
+        return {'document': document, 'duplicate': duplicate}
+
+    @classmethod
+    def abort(cls, session: UploadSession):
+        if session.status == 'pending':
+            cls._discard(session, 'aborted')
@@ -15,6 +15,13 @@ urlpatterns = [
     path('<int:pk>/analysis/', views.document_analysis_view, name='analysis'),
     path('<int:pk>/analyze/', views.analyze_document, name='analyze'),
     path('<int:pk>/download/', views.document_download, name='download'),
+    path('<int:pk>/pages/<int:page_number>/render/', views.page_render, name='page_render'),
     path('<int:pk>/delete/', views.document_delete, name='delete'),
     path('search/', views.document_search, name='search'),
+    path('batches/<int:pk>/status/', views.ingestion_batch_status, name='batch_status'),
+    path('uploads/', views.upload_session_start, name='upload_start'),
+    path('uploads/<int:pk>/', views.upload_session_status, name='upload_status'),
+    path('uploads/<int:pk>/parts/<int:number>/', views.upload_session_part, name='upload_part'),
+    path('uploads/<int:pk>/complete/', views.upload_session_complete, name='upload_complete'),
+    path('uploads/<int:pk>/abort/', views.upload_session_abort, name='upload_abort'),
 ]
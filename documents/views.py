@@ -5,10 +5,16 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import FileResponse, JsonResponse
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponseNotModified, JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods, require_POST
 from django.db import models
-from .models import Document, DocumentContent, DocumentAnalysis
+from .models import Document, DocumentContent, DocumentAnalysis, IngestionBatch, UploadSession
+from .render_service import PageRenderService, RenderUnavailable
 from .services import DocumentProcessorService
+from .storage import ContentAddressedStorage
+from .uploads import ChunkedUploadService, UploadRejected
 from core.models import ActivityLog
 import os
 
@@ -23,6 +29,11 @@ def document_list(request):
     if status:
         documents = documents.filter(status=status)
 
+    # Vignette de la première page (PDF), rendue à la première demande puis servie depuis le cache
+    documents = list(documents)
+    for document in documents:
+        document.thumbnail_url = PageRenderService.thumbnail_url(document)
+
     context = {
         'documents': documents,
         'status_filter': status,
@@ -50,12 +61,27 @@ def document_detail(request, pk):
     context = {
         'document': document,
         'content': content,
+        'text_preview': content.get_text_preview() if content else '',
         'analysis': analysis,
     }
 
     return render(request, 'documents/detail.html', context)
 
 
+def _record_upload(user, document):
+    """Statistiques du profil et journal d'activité après un upload"""
+    profile = user.profile
+    profile.total_documents_uploaded += 1
+    profile.save()
+
+    ActivityLog.objects.create(
+        user=user,
+        action_type='upload',
+        description=f'Upload du document: {document.title}',
+        metadata={'document_id': document.id}
+    )
+
+
 @login_required
 def document_upload(request):
     """Upload d'un nouveau document"""
@@ -68,20 +94,10 @@ def document_upload(request):
             messages.error(request, 'Veuillez fournir un titre et un fichier.')
             return redirect('documents:upload')
 
-        # Vérifier les quotas
-        profile = request.user.profile
-        current_docs = Document.objects.filter(user=request.user).count()
-
-        if current_docs >= profile.max_documents:
-            messages.error(request, f'Limite de documents atteinte ({profile.max_documents} documents max).')
-            return redirect('documents:list')
-
-        # Vérifier l'espace de stockage
-        file_size_mb = file.size / (1024 * 1024)
-        current_storage = profile.get_used_storage_mb()
-
-        if (current_storage + file_size_mb) > profile.max_storage_mb:
-            messages.error(request, 'Espace de stockage insuffisant.')
+        # Vérifier les quotas (nombre de documents, espace de stockage)
+        error = ChunkedUploadService.check_quota(request.user, file.size)
+        if error:
+            messages.error(request, error)
             return redirect('documents:list')
 
         # Créer le document
@@ -91,18 +107,7 @@ def document_upload(request):
             file=file,
             description=description
         )
-
-        # Mettre à jour les statistiques
-        profile.total_documents_uploaded += 1
-        profile.save()
-
-        # Log de l'activité
-        ActivityLog.objects.create(
-            user=request.user,
-            action_type='upload',
-            description=f'Upload du document: {title}',
-            metadata={'document_id': document.id}
-        )
+        _record_upload(request.user, document)
 
         messages.success(request, 'Document uploadé avec succès !')
 
@@ -151,6 +156,7 @@ def document_content(request, pk):
     context = {
         'document': document,
         'content': content,
+        'text': content.get_text(),
     }
 
     return render(request, 'documents/content.html', context)
@@ -190,6 +196,44 @@ def document_download(request, pk):
         return redirect('documents:detail', pk=pk)
 
 
+@login_required
+@require_http_methods(['GET', 'HEAD'])
+def page_render(request, pk, page_number):
+    """
+    Rendu JPEG d'une page PDF (vignettes, fond de l'éditeur)
+
+    Paramètres GET:
+        dpi: résolution parmi PAGE_RENDER_DPIS (défaut: PAGE_RENDER_EDITOR_DPI)
+        tile: 'colonne,ligne' pour une tuile de PAGE_RENDER_TILE_SIZE pixels
+        v: empreinte du fichier (PageRenderService.url); si elle correspond, la réponse est cachée sans limite
+    """
+    document = get_object_or_404(Document, pk=pk, user=request.user)
+    try:
+        dpi = int(request.GET.get('dpi') or PageRenderService.editor_dpi())
+        tile = request.GET.get('tile')
+        if tile:
+            col, row = (int(value) for value in tile.split(','))
+            tile = (col, row)
+        rendered = PageRenderService.render(document, page_number, dpi, tile or None)
+        fingerprint = PageRenderService.fingerprint(document)
+    except (ValueError, RenderUnavailable) as e:
+        raise Http404(str(e))
+
+    if request.GET.get('v') == fingerprint[:16]:
+        cache_control = f"private, max-age={getattr(settings, 'PAGE_RENDER_CACHE_SECONDS', 31536000)}, immutable"
+    else:
+        cache_control = 'private, no-cache'
+    etag = f'"{rendered.key}"'
+
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(open(rendered.path, 'rb'), content_type=PageRenderService.CONTENT_TYPE)
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    return response
+
+
 @login_required
 def document_delete(request, pk):
     """Supprimer un document"""
@@ -198,10 +242,9 @@ def document_delete(request, pk):
     if request.method == 'POST':
         title = document.title
 
-        # Supprimer le fichier physique
+        # Supprimer le fichier physique (sauf s'il est partagé avec un autre document)
         if document.file:
-            if os.path.exists(document.file.path):
-                os.remove(document.file.path)
+            ContentAddressedStorage.release(document.file.name, exclude_document_id=document.id)
 
         # Supprimer le document
         document.delete()
@@ -240,4 +283,93 @@ def document_search(request):
         'results': results,
     }
 
-    return render(request, 'documents/search.html', context)
\ No newline at end of file
+    return render(request, 'documents/search.html', context)
+
+@login_required
+def ingestion_batch_status(request, pk):
+    """Avancement d'un lot d'import (JSON, interrogé périodiquement)"""
+    batch = get_object_or_404(IngestionBatch, pk=pk, user=request.user)
+    return JsonResponse(batch.progress())
+
+
+# ============================================
+# UPLOAD FRACTIONNÉ (API JSON)
+# ============================================
+
+def _upload_rejected(error: UploadRejected) -> JsonResponse:
+    return JsonResponse({'error': str(error), **error.extra}, status=error.status)
+
+
+@login_required
+@require_POST
+def upload_session_start(request):
+    """Ouvre un upload fractionné (quotas et doublons vérifiés avant l'envoi du contenu)"""
+    try:
+        total_size = int(request.POST.get('size', 0))
+    except ValueError:
+        total_size = 0
+
+    try:
+        session = ChunkedUploadService.start(
+            request.user,
+            title=request.POST.get('title', '').strip(),
+            filename=request.POST.get('filename', ''),
+            total_size=total_size,
+            description=request.POST.get('description', ''),
+            declared_hash=request.POST.get('sha256', '')
+        )
+    except UploadRejected as e:
+        return _upload_rejected(e)
+
+    return JsonResponse(session.progress(), status=201)
+
+
+@login_required
+def upload_session_status(request, pk):
+    """Parties déjà reçues (reprise d'un upload interrompu)"""
+    session = get_object_or_404(UploadSession, pk=pk, user=request.user)
+    return JsonResponse(session.progress())
+
+
+@login_required
+@require_http_methods(['PUT'])
+def upload_session_part(request, pk, number):
+    """Reçoit une partie (corps brut de la requête, lu en flux)"""
+    session = get_object_or_404(UploadSession, pk=pk, user=request.user)
+    try:
+        part = ChunkedUploadService.write_part(session, number, request)
+    except UploadRejected as e:
+        return _upload_rejected(e)
+    return JsonResponse(part)
+
+
+@login_required
+@require_POST
+def upload_session_complete(request, pk):
+    """Assemble les parties et crée le document"""
+    session = get_object_or_404(UploadSession, pk=pk, user=request.user)
+    etags = request.POST.get('etags')
+
+    try:
+        result = ChunkedUploadService.complete(session, etags.split(',') if etags else None)
+    except UploadRejected as e:
+        return _upload_rejected(e)
+
+    document = result['document']
+    if result['duplicate']:
+        messages.info(request, f'Ce fichier a déjà été importé: {document.title}.')
+        redirect_url = reverse('documents:detail', kwargs={'pk': document.pk})
+    else:
+        _record_upload(request.user, document)
+        messages.success(request, 'Document uploadé avec succès !')
+        redirect_url = reverse('documents:analyze', kwargs={'pk': document.pk})
+
+    return JsonResponse({'document_id': document.id, 'duplicate': result['duplicate'], 'redirect_url': redirect_url})
+
+
+@login_required
+@require_POST
+def upload_session_abort(request, pk):
+    session = get_object_or_404(UploadSession, pk=pk, user=request.user)
+    ChunkedUploadService.abort(session)
+    return JsonResponse(session.progress())